@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the database_search retriever.
+
+Builds a temporary Chroma DB of synthetic handbook chunks and compares the
+old per-call path (new embeddings client and Chroma instance, synchronous
+search) with the shared agents.retriever.chroma_retriever on:
+
+- cold: queries never seen before (embedding + index search)
+- warm: the same queries again (result cache)
+- warm_embedding: the same queries with another k (embedding cache, index search)
+
+Embeddings are offline hashing vectors; --embed-latency-ms adds a simulated
+provider round trip to each embedding call.
+
+Reports ops/s and p50/p95 latency per operation.
+
+Usage:
+    cd ast
+    uv run python scripts/bench_retriever.py --docs 2000 --queries 200
+    uv run python scripts/bench_retriever.py --embed-latency-ms 150 --output retriever.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from langchain_chroma import Chroma  # noqa: E402
+
+from agents.retriever import chroma_retriever  # noqa: E402
+from memory.embeddings import HashingEmbeddings  # noqa: E402
+
+WORDS = (
+    "vacation leave parental expense report travel policy benefits health dental "
+    "remote office laptop security password holiday overtime payroll bonus review "
+    "training mentor conduct harassment safety equipment badge visitor parking"
+).split()
+
+
+class _SlowEmbeddings(HashingEmbeddings):
+    """Hashing embeddings with a simulated provider round trip."""
+
+    def __init__(self, latency: float):
+        super().__init__()
+        self.latency = latency
+
+    def embed_query(self, text: str) -> list[float]:
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        await asyncio.sleep(self.latency)
+        return super().embed_query(text)
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+async def _measure(count: int, op: Callable[[int], Awaitable[Any]]) -> dict[str, float | None]:
+    samples = []
+    start = time.perf_counter()
+    for i in range(count):
+        t0 = time.perf_counter()
+        await op(i)
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    samples.sort()
+    return {
+        "ops_per_s": round(count / elapsed, 1) if elapsed else None,
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1000, 3),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    rng = random.Random(args.seed)
+    queries = [_text(rng, 4) for _ in range(args.queries)]
+    latency = args.embed_latency_ms / 1000
+    embeddings = _SlowEmbeddings(latency)
+    report: dict[str, Any] = {
+        "docs": args.docs,
+        "queries": args.queries,
+        "k": args.k,
+        "embed_latency_ms": args.embed_latency_ms,
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"▶ indexing {args.docs} chunks ...", file=sys.stderr)
+        Chroma(persist_directory=tmp, embedding_function=HashingEmbeddings()).add_texts(
+            [_text(rng, 60) for _ in range(args.docs)]
+        )
+
+        async def _legacy(i: int) -> None:
+            # What database_search used to do on every call
+            store = Chroma(persist_directory=tmp, embedding_function=_SlowEmbeddings(latency))
+            store.as_retriever(search_kwargs={"k": args.k}).invoke(queries[i])
+
+        with (
+            patch("agents.retriever.settings") as mock_settings,
+            patch("agents.retriever.get_chroma_embeddings", return_value=embeddings),
+        ):
+            mock_settings.CHROMA_DB_DIR = tmp
+            mock_settings.CHROMA_EMBEDDINGS = "bench"
+            mock_settings.RETRIEVER_K = args.k
+            mock_settings.RETRIEVER_SCORE_THRESHOLD = None
+            mock_settings.RETRIEVER_CACHE_SIZE = max(1024, 2 * args.queries)
+            mock_settings.RETRIEVER_CACHE_TTL = 3600.0
+
+            print("▶ legacy ...", file=sys.stderr)
+            report["results"]["legacy"] = await _measure(args.queries, _legacy)
+
+            chroma_retriever.clear()
+            t0 = time.perf_counter()
+            await chroma_retriever.asearch("warm up")  # Opens the store
+            report["open_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+
+            for name, k in (("cold", args.k), ("warm", args.k), ("warm_embedding", args.k + 1)):
+                print(f"▶ {name} ...", file=sys.stderr)
+                report["results"][name] = await _measure(
+                    args.queries, lambda i, k=k: chroma_retriever.asearch(queries[i], k=k)
+                )
+            report["cache"] = chroma_retriever.stats()
+            chroma_retriever.clear()
+    return report
+
+
+def print_report(report: dict[str, Any]) -> None:
+    header = f"{'lookup':<16}{'ops/s':>11}{'p50 ms':>10}{'p95 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, row in report["results"].items():
+        print(f"{name:<16}{row['ops_per_s']!s:>11}{row['p50_ms']!s:>10}{row['p95_ms']!s:>10}")
+    print(f"\nstore opened once in {report['open_ms']} ms")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=2000, help="Chunks in the index")
+    parser.add_argument("--queries", type=int, default=200, help="Distinct queries")
+    parser.add_argument("--k", type=int, default=5, help="Documents per search")
+    parser.add_argument(
+        "--embed-latency-ms", type=float, default=0.0, help="Simulated embedding round trip"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write machine-readable JSON results to this path")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the long-term store backends.
+
+Compares LangGraph's InMemoryStore with the durable WAL-mode SQLite store used
+when DATABASE_TYPE=sqlite (memory.sqlite.get_sqlite_store) on the operations
+the workflow service issues: single put, batched put, get, namespace listing
+(prefix search) and JSON-filtered search.
+
+Reports ops/s and p50/p95 latency per operation.
+
+Usage:
+    cd ast
+    uv run python scripts/bench_store.py --items 2000
+    uv run python scripts/bench_store.py --items 5000 --output store.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from langgraph.store.base import PutOp  # noqa: E402
+from langgraph.store.memory import InMemoryStore  # noqa: E402
+
+from memory.sqlite import get_sqlite_store  # noqa: E402
+
+NAMESPACE = ("workflows",)
+
+
+def _workflow(i: int) -> dict[str, Any]:
+    return {
+        "id": f"wf_{i}",
+        "name": f"Workflow {i}",
+        "isActive": i % 2 == 0,
+        "flowData": {"nodes": [{"id": f"n{j}", "type": "agent"} for j in range(5)], "edges": []},
+    }
+
+
+@asynccontextmanager
+async def _backend(name: str, path: str):
+    if name == "memory":
+        yield InMemoryStore()
+        return
+    with patch("memory.sqlite.settings") as mock_settings:
+        mock_settings.SQLITE_STORE_PATH = path
+        async with get_sqlite_store() as store:
+            yield store
+
+
+async def _measure(count: int, op: Callable[[int], Awaitable[Any]]) -> dict[str, float | None]:
+    samples = []
+    start = time.perf_counter()
+    for i in range(count):
+        t0 = time.perf_counter()
+        await op(i)
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    samples.sort()
+    return {
+        "ops_per_s": round(count / elapsed, 1) if elapsed else None,
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1000, 3),
+    }
+
+
+async def bench_backend(name: str, items: int, batch_size: int, path: str) -> dict[str, Any]:
+    async with _backend(name, path) as store:
+        results = {
+            "put": await _measure(items, lambda i: store.aput(NAMESPACE, f"wf_{i}", _workflow(i))),
+        }
+        batches = max(1, items // batch_size)
+        results["batch_put"] = await _measure(
+            batches,
+            lambda b: store.abatch(
+                [PutOp(("batch",), f"k_{b}_{i}", _workflow(i)) for i in range(batch_size)]
+            ),
+        )
+        results["get"] = await _measure(items, lambda i: store.aget(NAMESPACE, f"wf_{i}"))
+        results["list_50"] = await _measure(200, lambda i: store.asearch(NAMESPACE, limit=50))
+        results["filter_50"] = await _measure(
+            200, lambda i: store.asearch(NAMESPACE, filter={"isActive": True}, limit=50)
+        )
+    return results
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    report: dict[str, Any] = {"items": args.items, "batch_size": args.batch_size, "backends": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("memory", "sqlite"):
+            print(f"▶ {name} ...", file=sys.stderr)
+            report["backends"][name] = await bench_backend(
+                name, args.items, args.batch_size, os.path.join(tmp, "store.db")
+            )
+    return report
+
+
+def print_report(report: dict[str, Any]) -> None:
+    header = f"{'operation':<12}{'backend':<9}{'ops/s':>11}{'p50 ms':>10}{'p95 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for operation in report["backends"]["memory"]:
+        for backend, results in report["backends"].items():
+            row = results[operation]
+            print(
+                f"{operation:<12}{backend:<9}{row['ops_per_s']!s:>11}"
+                f"{row['p50_ms']!s:>10}{row['p95_ms']!s:>10}"
+            )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--items", type=int, default=2000, help="Workflows to write/read")
+    parser.add_argument("--batch-size", type=int, default=100, help="Puts per abatch call")
+    parser.add_argument("--output", help="Write machine-readable JSON results to this path")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
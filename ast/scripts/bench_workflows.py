@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Offline load-generation benchmark for the workflow execution path.
+
+Boots the workflow router on a local uvicorn server backed by an in-memory or
+SQLite checkpointer and an in-memory store, replaces the LLM with the
+latency-configurable fake provider (core.llm.FakeToolModel), and drives N
+concurrent workers (each with its own conversation thread) against /workflows/{id}/invoke and /workflows/{id}/stream.
+
+Reports requests/s, p50/p95/p99 latency, time-to-first-token (stream) and
+peak memory per worker. No real LLM calls are made.
+
+Usage:
+    cd ast
+    uv run python scripts/bench_workflows.py --concurrency 20 --requests 10
+    uv run python scripts/bench_workflows.py --shapes simple,router --output bench.json
+    uv run python scripts/bench_workflows.py --output new.json --compare bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+from typing import Any
+from unittest.mock import patch
+from uuid import uuid4
+
+# Never call real providers from the benchmark
+os.environ.setdefault("USE_FAKE_MODEL", "true")
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from langgraph.checkpoint.memory import InMemorySaver  # noqa: E402
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver  # noqa: E402
+from langgraph.store.memory import InMemoryStore  # noqa: E402
+
+from agents import get_agent  # noqa: E402
+from core.llm import FakeToolModel  # noqa: E402
+from core.settings import settings  # noqa: E402
+from nodes.graph_cache import workflow_graph_cache  # noqa: E402
+from service.workflow_router import WORKFLOW_AGENT_ID  # noqa: E402
+from service.workflow_router import router as workflow_router  # noqa: E402
+from workflows import create_workflow  # noqa: E402
+
+RESPONSE_TEXT = (
+    "This is a benchmark response from the fake model. It is long enough to "
+    "produce a realistic number of streamed tokens for the workflow path."
+)
+
+
+# =============================================================================
+# Workflow shapes
+# =============================================================================
+
+
+def _agent(node_id: str, system: str = "You are a helpful assistant.") -> dict[str, Any]:
+    return {
+        "id": node_id,
+        "type": "agent",
+        "name": node_id,
+        "config": {
+            "prompt": {"system": system, "variables": []},
+            "llm": {"model": "fake"},
+            "memory": {"tokenLimit": 16000},
+        },
+    }
+
+
+def _trigger() -> dict[str, Any]:
+    return {"id": "trigger", "type": "manual_trigger", "name": "Trigger", "config": {}}
+
+
+WORKFLOW_SHAPES: dict[str, dict[str, Any]] = {
+    # trigger -> agent
+    "simple": {
+        "nodes": [_trigger(), _agent("agent")],
+        "edges": [{"source": "trigger", "target": "agent"}],
+    },
+    # trigger -> router -> agent -> end
+    "router": {
+        "nodes": [
+            _trigger(),
+            {
+                "id": "router",
+                "type": "router",
+                "name": "Router",
+                "config": {
+                    "expression": "source",
+                    "outputs": [{"key": "manual", "target": "agent"}],
+                    "defaultOutput": "agent",
+                },
+            },
+            _agent("agent"),
+            {"id": "end", "type": "end", "name": "End", "config": {}},
+        ],
+        "edges": [
+            {"source": "trigger", "target": "router"},
+            {"source": "router", "target": "agent"},
+            {"source": "agent", "target": "end"},
+        ],
+    },
+    # trigger -> agent -> agent (two sequential LLM calls)
+    "chain": {
+        "nodes": [_trigger(), _agent("draft"), _agent("review", "Review the previous answer.")],
+        "edges": [
+            {"source": "trigger", "target": "draft"},
+            {"source": "draft", "target": "review"},
+        ],
+    },
+}
+
+
+# =============================================================================
+# Server
+# =============================================================================
+
+
+@asynccontextmanager
+async def _checkpointer(store_type: str):
+    if store_type == "sqlite":
+        with tempfile.TemporaryDirectory() as tmp:
+            async with AsyncSqliteSaver.from_conn_string(os.path.join(tmp, "bench.db")) as saver:
+                await saver.setup()
+                yield saver
+    else:
+        yield InMemorySaver()
+
+
+@asynccontextmanager
+async def serve(app: FastAPI) -> AsyncIterator[str]:
+    """Run uvicorn on a free local port and yield its base URL."""
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", lifespan="off")
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        await task
+
+
+# =============================================================================
+# Load generation
+# =============================================================================
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return round(ordered[index] * 1000, 2)
+
+
+def _peak_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+async def _invoke_once(client: httpx.AsyncClient, url: str, thread_id: str) -> tuple[float, None]:
+    start = time.perf_counter()
+    response = await client.post(url, json={"message": "Hello!", "threadId": thread_id})
+    response.raise_for_status()
+    return time.perf_counter() - start, None
+
+
+async def _stream_once(
+    client: httpx.AsyncClient, url: str, thread_id: str
+) -> tuple[float, float | None]:
+    start = time.perf_counter()
+    first_token: float | None = None
+    async with client.stream(
+        "POST", url, json={"message": "Hello!", "threadId": thread_id}
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data: {"):
+                continue
+            event = json.loads(line[len("data: ") :])
+            if event["type"] == "token" and first_token is None:
+                first_token = time.perf_counter() - start
+            elif event["type"] == "error":
+                raise RuntimeError(event["content"])
+    return time.perf_counter() - start, first_token
+
+
+async def run_scenario(
+    base_url: str,
+    workflow_id: str,
+    endpoint: str,
+    concurrency: int,
+    requests_per_worker: int,
+    headers: dict[str, str],
+) -> dict[str, Any]:
+    """Drive `concurrency` workers, each sending `requests_per_worker` requests."""
+    url = f"{base_url}/workflows/{workflow_id}/{endpoint}"
+    call = _invoke_once if endpoint == "invoke" else _stream_once
+    latencies: list[float] = []
+    ttfts: list[float] = []
+    errors = 0
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal errors
+        thread_id = str(uuid4())
+        for _ in range(requests_per_worker):
+            try:
+                latency, ttft = await call(client, url, thread_id)
+                latencies.append(latency)
+                if ttft is not None:
+                    ttfts.append(ttft)
+            except Exception:
+                errors += 1
+
+    rss_before = _peak_rss_kb()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=120.0, limits=limits, headers=headers) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    rss_after = _peak_rss_kb()
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+        },
+        "ttft_ms": {
+            "p50": _percentile(ttfts, 50),
+            "p95": _percentile(ttfts, 95),
+            "p99": _percentile(ttfts, 99),
+        }
+        if endpoint == "stream"
+        else None,
+        "peak_rss_mb": round(rss_after / 1024, 1),
+        "rss_growth_per_worker_kb": round((rss_after - rss_before) / concurrency, 1),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict[str, Any]:
+    shapes = [s.strip() for s in args.shapes.split(",") if s.strip()]
+    unknown = set(shapes) - set(WORKFLOW_SHAPES)
+    if unknown:
+        raise SystemExit(f"Unknown shapes: {', '.join(sorted(unknown))}")
+    endpoints = ["invoke", "stream"] if args.endpoint == "both" else [args.endpoint]
+
+    fake_model = FakeToolModel(
+        responses=[RESPONSE_TEXT],
+        first_token_delay=args.first_token_delay,
+        tokens_per_second=args.tokens_per_second,
+        jitter=args.jitter,
+        seed=0,
+    )
+
+    async def _fake_model_from_name(model_name: str) -> FakeToolModel:
+        return fake_model
+
+    headers = {}
+    if settings.AUTH_SECRET:
+        headers["Authorization"] = f"Bearer {settings.AUTH_SECRET.get_secret_value()}"
+
+    store = InMemoryStore()
+    app = FastAPI()
+    app.include_router(workflow_router)
+
+    results: list[dict[str, Any]] = []
+    async with _checkpointer(args.store) as saver:
+        agent = get_agent(WORKFLOW_AGENT_ID)
+        agent.checkpointer = saver
+        agent.store = store
+        workflow_graph_cache.clear()
+        workflow_graph_cache.configure(checkpointer=saver, store=store)
+
+        with patch("nodes.actions.agent_node.get_model_from_name", _fake_model_from_name):
+            async with serve(app) as base_url:
+                for shape in shapes:
+                    workflow = await create_workflow(
+                        store=store, name=f"bench-{shape}", flow_data=WORKFLOW_SHAPES[shape]
+                    )
+                    for endpoint in endpoints:
+                        print(f"▶ {shape}/{endpoint} ...", file=sys.stderr)
+                        result = await run_scenario(
+                            base_url,
+                            workflow["id"],
+                            endpoint,
+                            args.concurrency,
+                            args.requests,
+                            headers,
+                        )
+                        results.append({"shape": shape, "endpoint": endpoint, **result})
+
+    return {
+        "timestamp": datetime.now(UTC).isoformat(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "config": {
+            "concurrency": args.concurrency,
+            "requests_per_worker": args.requests,
+            "store": args.store,
+            "first_token_delay_s": args.first_token_delay,
+            "tokens_per_second": args.tokens_per_second,
+            "jitter": args.jitter,
+        },
+        "results": results,
+    }
+
+
+# =============================================================================
+# Reporting
+# =============================================================================
+
+
+def print_report(report: dict[str, Any], baseline: dict[str, Any] | None = None) -> None:
+    base_rows = {(r["shape"], r["endpoint"]): r for r in (baseline or {}).get("results", [])}
+    header = f"{'scenario':<18}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'ttft50':>9}{'err':>6}"
+    print(header)
+    print("-" * len(header))
+    for row in report["results"]:
+        ttft = (row["ttft_ms"] or {}).get("p50")
+        line = (
+            f"{row['shape'] + '/' + row['endpoint']:<18}"
+            f"{row['requests_per_s']:>9}"
+            f"{row['latency_ms']['p50']!s:>9}"
+            f"{row['latency_ms']['p95']!s:>9}"
+            f"{row['latency_ms']['p99']!s:>9}"
+            f"{ttft!s:>9}"
+            f"{row['errors']:>6}"
+        )
+        base = base_rows.get((row["shape"], row["endpoint"]))
+        if base and base["requests_per_s"]:
+            delta = (row["requests_per_s"] - base["requests_per_s"]) / base["requests_per_s"]
+            line += f"   Δ req/s {delta:+.1%}"
+        print(line)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent workers")
+    parser.add_argument("--requests", type=int, default=5, help="Requests per worker")
+    parser.add_argument(
+        "--shapes",
+        default=",".join(WORKFLOW_SHAPES),
+        help=f"Comma-separated workflow shapes ({', '.join(WORKFLOW_SHAPES)})",
+    )
+    parser.add_argument("--endpoint", choices=["invoke", "stream", "both"], default="both")
+    parser.add_argument("--store", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--first-token-delay", type=float, default=0.2, help="Seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--jitter", type=float, default=0.0, help="Relative delay jitter")
+    parser.add_argument("--output", help="Write machine-readable JSON results to this path")
+    parser.add_argument("--compare", help="Previous JSON results to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Keep service timing logs")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    if not args.verbose:
+        # Timing logs (⏱️) are emitted at WARNING and would flood the output
+        logging.disable(logging.WARNING)
+    report = asyncio.run(run_benchmark(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,83 +1,423 @@
+#!/usr/bin/env python3
+"""
+Incremental ingestion of a folder of documents into the Chroma DB.
+
+Only what changed since the last run is processed:
+
+- Files are hashed and skipped when their content (and the chunking
+  parameters) match the manifest kept in the DB directory
+- Changed files are loaded and split in a process pool
+- Chunk ids are content-addressed, so unchanged chunks of a changed file
+  are kept as they are, chunks already in the DB are not re-embedded, and
+  chunks that disappeared are deleted
+- New chunks are embedded in batches (one request per --batch-size chunks),
+  --concurrency batches at a time, and upserted
+- A file is recorded in the manifest once all its chunks are stored, so an
+  interrupted run resumes where it stopped
+
+The DB is only wiped with --rebuild.
+
+Usage:
+    cd ast
+    uv run python scripts/create_chroma_db.py ./data
+    uv run python scripts/create_chroma_db.py ./data --batch-size 512 --concurrency 8
+    uv run python scripts/create_chroma_db.py ./data --rebuild
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
 import os
 import shutil
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import forkserver
+from typing import Any
 
-from dotenv import load_dotenv
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
-from langchain_community.document_loaders import Docx2txtLoader, PyPDFLoader
-from langchain_openai import OpenAIEmbeddings
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
-# Load environment variables from the .env file
-load_dotenv()
+import chromadb  # noqa: E402
+from langchain_chroma import Chroma  # noqa: E402
+from langchain_community.document_loaders import Docx2txtLoader, PyPDFLoader  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+from langchain_text_splitters import RecursiveCharacterTextSplitter  # noqa: E402
 
+# Add more loaders if required, i.e. JSONLoader, TxtLoader, etc.
+LOADERS = {".pdf": PyPDFLoader, ".docx": Docx2txtLoader}
 
-def create_chroma_db(
+MANIFEST_NAME = "ingest_manifest.json"
+COLLECTION_NAME = "langchain"  # langchain_chroma's default, read by agents.retriever
+
+
+@dataclass
+class Chunk:
+    id: str
+    source: str
+    text: str
+    metadata: dict[str, Any]
+
+
+@dataclass
+class IngestStats:
+    files: int = 0
+    skipped: int = 0
+    changed: int = 0
+    removed: int = 0
+    chunks: int = 0
+    embedded: int = 0
+    deleted: int = 0
+    batches: int = 0
+    split_seconds: float = 0.0
+    embed_seconds: float = 0.0
+    elapsed: float = 0.0
+    failed: list[str] = field(default_factory=list)
+
+    def report(self) -> str:
+        rate = self.embedded / self.elapsed if self.elapsed else 0.0
+        return (
+            f"{self.files} files: {self.skipped} unchanged, {self.changed} ingested, "
+            f"{self.removed} removed, {len(self.failed)} failed\n"
+            f"{self.chunks} chunks in changed files: {self.embedded} embedded in "
+            f"{self.batches} batches, {self.chunks - self.embedded} kept, {self.deleted} deleted\n"
+            f"{self.elapsed:.1f}s total ({self.split_seconds:.1f}s load/split, "
+            f"{self.embed_seconds:.1f}s embedding), {rate:.1f} chunks/s"
+        )
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# =============================================================================
+# Worker processes
+# =============================================================================
+
+
+def _load_and_split(path: str, chunk_size: int, overlap: int) -> list[tuple[str, dict[str, Any]]]:
+    """Load a document and split it into (text, metadata) chunks."""
+    loader = LOADERS[os.path.splitext(path)[1].lower()](path)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
+    chunks = splitter.split_documents(loader.load())
+    return [(chunk.page_content, chunk.metadata) for chunk in chunks]
+
+
+# =============================================================================
+# Pipeline
+# =============================================================================
+
+
+def _chunk_ids(source: str, chunks: list[tuple[str, dict[str, Any]]]) -> list[str]:
+    """Content-addressed chunk ids (repeated identical chunks get distinct ids)."""
+    seen: Counter[str] = Counter()
+    ids = []
+    for text, metadata in chunks:
+        content = json.dumps([source, text, metadata], sort_keys=True, default=str)
+        ids.append(hashlib.sha256(f"{content}\0{seen[content]}".encode()).hexdigest())
+        seen[content] += 1
+    return ids
+
+
+class Manifest:
+    """Per-file content hash and chunk ids of what's in the DB, saved atomically."""
+
+    def __init__(self, path: str, params: dict[str, Any]) -> None:
+        self.path = path
+        self.params = params
+        data: dict[str, Any] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+        # Other chunking parameters: every file is re-split (its chunk ids still diff)
+        self.same_params = data.get("params") == params
+        self.files: dict[str, dict[str, Any]] = data.get("files", {})
+
+    def unchanged(self, source: str, file_hash: str) -> bool:
+        entry = self.files.get(source)
+        return self.same_params and entry is not None and entry["hash"] == file_hash
+
+    def save(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"params": self.params, "files": self.files}, f)
+        os.replace(tmp, self.path)
+
+
+class Ingestion:
+    """Batches new chunks across files, embeds them concurrently and upserts them."""
+
+    def __init__(
+        self,
+        collection: Any,
+        embeddings: Embeddings,
+        manifest: Manifest,
+        stats: IngestStats,
+        batch_size: int,
+        max_concurrency: int,
+    ) -> None:
+        self.collection = collection
+        self.embeddings = embeddings
+        self.manifest = manifest
+        self.stats = stats
+        self.batch_size = batch_size
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.write_lock = asyncio.Lock()
+        self.pending: list[Chunk] = []
+        self.tasks: list[asyncio.Task] = []
+        self.remaining: dict[str, int] = {}
+        self.records: dict[str, dict[str, Any]] = {}
+        self.started = time.perf_counter()
+
+    def _finish_file(self, source: str) -> None:
+        self.manifest.files[source] = self.records.pop(source)
+        self.manifest.save()
+        print(f"✔ {source}")
+
+    async def add_file(
+        self, source: str, file_hash: str, chunks: list[tuple[str, dict[str, Any]]]
+    ) -> None:
+        """Queue a split file: delete its stale chunks, embed the ones not in the DB."""
+        ids = _chunk_ids(source, chunks)
+        old_ids = set(self.manifest.files.get(source, {}).get("ids", []))
+        stale = list(old_ids - set(ids))
+        existing: set[str] = set()
+        async with self.write_lock:
+            if stale:
+                await asyncio.to_thread(self.collection.delete, ids=stale)
+            if ids:
+                stored = await asyncio.to_thread(self.collection.get, ids=ids, include=[])
+                existing = set(stored["ids"])
+        new = [
+            Chunk(chunk_id, source, text, metadata)
+            for chunk_id, (text, metadata) in zip(ids, chunks)
+            if chunk_id not in existing
+        ]
+        self.stats.chunks += len(ids)
+        self.stats.deleted += len(stale)
+
+        self.records[source] = {"hash": file_hash, "ids": ids}
+        if not new:
+            self._finish_file(source)
+            return
+        self.remaining[source] = len(new)
+        self.pending.extend(new)
+        while len(self.pending) >= self.batch_size:
+            self._schedule(self.pending[: self.batch_size])
+            self.pending = self.pending[self.batch_size :]
+
+    def _schedule(self, batch: list[Chunk]) -> None:
+        self.tasks.append(asyncio.create_task(self._embed_and_upsert(batch)))
+
+    async def _embed_and_upsert(self, batch: list[Chunk]) -> None:
+        async with self.semaphore:
+            start = time.perf_counter()
+            vectors = await self.embeddings.aembed_documents([chunk.text for chunk in batch])
+            self.stats.embed_seconds += time.perf_counter() - start
+        async with self.write_lock:
+            await asyncio.to_thread(
+                self.collection.upsert,
+                ids=[chunk.id for chunk in batch],
+                embeddings=vectors,
+                documents=[chunk.text for chunk in batch],
+                metadatas=[chunk.metadata or None for chunk in batch],
+            )
+        self.stats.batches += 1
+        self.stats.embedded += len(batch)
+        rate = self.stats.embedded / (time.perf_counter() - self.started)
+        print(f"  batch {self.stats.batches}: {len(batch)} chunks ({rate:.1f} chunks/s)")
+
+        done = Counter(chunk.source for chunk in batch)
+        for source, count in done.items():
+            self.remaining[source] -= count
+            if self.remaining[source] == 0:
+                del self.remaining[source]
+                self._finish_file(source)
+
+    async def flush(self) -> None:
+        """Embed what's left and wait for every batch."""
+        if self.pending:
+            self._schedule(self.pending)
+            self.pending = []
+        try:
+            await asyncio.gather(*self.tasks)
+        finally:
+            for task in self.tasks:
+                task.cancel()
+
+
+async def ingest(
     folder_path: str,
-    db_name: str = "./chroma_db",
-    delete_chroma_db: bool = True,
+    db_name: str,
+    embeddings: Embeddings,
     chunk_size: int = 2000,
     overlap: int = 500,
-):
-    embeddings = OpenAIEmbeddings(api_key=os.environ["OPENAI_API_KEY"])
-
-    # Initialize Chroma vector store
-    if delete_chroma_db and os.path.exists(db_name):
+    batch_size: int = 256,
+    max_concurrency: int = 4,
+    workers: int | None = None,
+    rebuild: bool = False,
+) -> IngestStats:
+    """Bring the Chroma DB in db_name up to date with the documents in folder_path."""
+    started = time.perf_counter()
+    stats = IngestStats()
+    if rebuild and os.path.exists(db_name):
         shutil.rmtree(db_name)
         print(f"Deleted existing database at {db_name}")
+    os.makedirs(db_name, exist_ok=True)
 
-    chroma = Chroma(
-        embedding_function=embeddings,
-        persist_directory=f"./{db_name}",
+    manifest = Manifest(
+        os.path.join(db_name, MANIFEST_NAME), {"chunk_size": chunk_size, "overlap": overlap}
     )
+    client = chromadb.PersistentClient(path=db_name)
+    collection = client.get_or_create_collection(COLLECTION_NAME, embedding_function=None)
 
-    # Initialize text splitter
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
+    sources = sorted(
+        filename
+        for filename in os.listdir(folder_path)
+        if os.path.splitext(filename)[1].lower() in LOADERS
+    )
+    stats.files = len(sources)
 
-    # Iterate over files in the folder
-    for filename in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, filename)
+    # Files gone from the folder: drop their chunks
+    for source in [source for source in manifest.files if source not in sources]:
+        ids = manifest.files.pop(source)["ids"]
+        if ids:
+            collection.delete(ids=ids)
+        stats.removed += 1
+        stats.deleted += len(ids)
+        print(f"✖ {source} (removed)")
+    manifest.save()
 
-        # Load document based on file extension
-        # Add more loaders if required, i.e. JSONLoader, TxtLoader, etc.
-        if filename.endswith(".pdf"):
-            loader = PyPDFLoader(file_path)
-        elif filename.endswith(".docx"):
-            loader = Docx2txtLoader(file_path)
+    # Hashing is I/O bound (hashlib releases the GIL): threads are enough
+    paths = {source: os.path.join(folder_path, source) for source in sources}
+    hashes = await asyncio.gather(
+        *(asyncio.to_thread(_file_hash, paths[source]) for source in sources)
+    )
+    changed = {}
+    for source, file_hash in zip(sources, hashes):
+        if manifest.unchanged(source, file_hash):
+            stats.skipped += 1
         else:
-            continue  # Skip unsupported file types
+            changed[source] = file_hash
+    stats.changed = len(changed)
+    print(f"{len(sources)} files, {len(changed)} to ingest")
+    if not changed:
+        stats.elapsed = time.perf_counter() - started
+        return stats
 
-        # Load and split document into chunks
-        document = loader.load()
-        chunks = text_splitter.split_documents(document)
+    # Workers are forked from a server that already imported this script (and
+    # its loaders), so they start instantly and never inherit the loop's threads
+    loop = asyncio.get_running_loop()
+    forkserver.set_forkserver_preload(["__main__"])
+    context = multiprocessing.get_context("forkserver")
+    workers = workers or min(len(changed), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
 
-        # Add chunks to Chroma vector store
-        for chunk in chunks:
-            chunk_id = chroma.add_documents([chunk])
-            if chunk_id:
-                print(f"Chunk added with ID: {chunk_id}")
-            else:
-                print("Failed to add chunk")
+        async def _split(source: str) -> tuple[str, list[tuple[str, dict[str, Any]]] | None]:
+            try:
+                chunks = await loop.run_in_executor(
+                    pool, _load_and_split, paths[source], chunk_size, overlap
+                )
+            except Exception as e:
+                print(f"Failed to load {source}: {e}", file=sys.stderr)
+                return source, None
+            return source, chunks
 
-        print(f"Document {filename} added to database.")
+        pipeline = Ingestion(collection, embeddings, manifest, stats, batch_size, max_concurrency)
+        split_started = time.perf_counter()
+        for next_split in asyncio.as_completed([_split(source) for source in changed]):
+            source, chunks = await next_split
+            if chunks is None:
+                stats.failed.append(source)
+                continue
+            await pipeline.add_file(source, changed[source], chunks)
+        stats.split_seconds = time.perf_counter() - split_started
+        await pipeline.flush()
 
-    print(f"Vector database created and saved in {db_name}.")
-    return chroma
+    stats.changed -= len(stats.failed)
+    stats.elapsed = time.perf_counter() - started
+    return stats
 
 
-if __name__ == "__main__":
-    # Path to the folder containing the documents
-    folder_path = "./data"
+def create_chroma_db(
+    folder_path: str,
+    db_name: str | None = None,
+    delete_chroma_db: bool = False,
+    chunk_size: int = 2000,
+    overlap: int = 500,
+    batch_size: int = 256,
+    max_concurrency: int = 4,
+    workers: int | None = None,
+) -> Chroma:
+    # Imported here, not at the top: worker processes import this script
+    from agents.retriever import get_chroma_embeddings
+    from core.settings import settings
 
-    # Create the Chroma database
-    chroma = create_chroma_db(folder_path=folder_path)
+    db_name = db_name or settings.CHROMA_DB_DIR
+    embeddings = get_chroma_embeddings()
+    stats = asyncio.run(
+        ingest(
+            folder_path,
+            db_name,
+            embeddings,
+            chunk_size=chunk_size,
+            overlap=overlap,
+            batch_size=batch_size,
+            max_concurrency=max_concurrency,
+            workers=workers,
+            rebuild=delete_chroma_db,
+        )
+    )
+    print(stats.report())
+    print(f"Vector database saved in {db_name}.")
+    return Chroma(persist_directory=db_name, embedding_function=embeddings)
 
-    # Create retriever from the Chroma database
-    retriever = chroma.as_retriever(search_kwargs={"k": 3})
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("folder", nargs="?", default="./data", help="Folder with the documents")
+    parser.add_argument("--db", help="Chroma DB directory (default: CHROMA_DB_DIR)")
+    parser.add_argument("--rebuild", action="store_true", help="Delete the DB first")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--overlap", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=256, help="Chunks per embedding request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Embedding requests at once")
+    parser.add_argument("--workers", type=int, help="Load/split processes (default: CPUs)")
+    parser.add_argument(
+        "--query",
+        default="What's my company's mission and values",
+        help="Similarity search to run afterwards ('' to skip)",
+    )
+    args = parser.parse_args(argv)
+
+    chroma = create_chroma_db(
+        folder_path=args.folder,
+        db_name=args.db,
+        delete_chroma_db=args.rebuild,
+        chunk_size=args.chunk_size,
+        overlap=args.overlap,
+        batch_size=args.batch_size,
+        max_concurrency=args.concurrency,
+        workers=args.workers,
+    )
+    if not args.query:
+        return
 
     # Perform a similarity search
-    query = "What's my company's mission and values"
-    similar_docs = retriever.invoke(query)
+    similar_docs = chroma.as_retriever(search_kwargs={"k": 3}).invoke(args.query)
 
     # Display results
     for i, doc in enumerate(similar_docs, start=1):
         print(f"\n🔹 Result {i}:\n{doc.page_content}\nTags: {doc.metadata.get('source', [])}")
+
+
+if __name__ == "__main__":
+    main()
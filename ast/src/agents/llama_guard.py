@@ -1,12 +1,30 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict, deque
 from enum import Enum
+from typing import Any
 
-from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    AnyMessage,
+    HumanMessage,
+    message_chunk_to_message,
+)
 from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable, RunnableConfig
 from pydantic import BaseModel, Field
 
 from core import get_model, settings
 from schema.models import GroqModelName
 
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 1000  # Latest latencies per verdict kept for percentiles
+
 
 class SafetyAssessment(Enum):
     SAFE = "safe"
@@ -57,6 +75,8 @@ Provide your safety assessment for ONLY THE LAST {{role}} in the above conversat
 - First line must read 'safe' or 'unsafe'.
 - If unsafe, a second line must include a comma-separated list of violated categories."""
 
+_prompt = PromptTemplate.from_template(llama_guard_instructions)
+
 
 def parse_llama_guard_output(output: str) -> LlamaGuardOutput:
     if output == "safe":
@@ -75,40 +95,305 @@ def parse_llama_guard_output(output: str) -> LlamaGuardOutput:
         return LlamaGuardOutput(safety_assessment=SafetyAssessment.ERROR)
 
 
+def _prompt_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode()).hexdigest()
+
+
+def _latency_summary(latencies: deque[float], count: int) -> dict[str, Any]:
+    if not latencies:
+        return {"count": count}
+    ordered = sorted(latencies)
+    return {
+        "count": count,
+        "avgMs": round(1000 * sum(ordered) / len(ordered), 1),
+        "p50Ms": round(1000 * ordered[len(ordered) // 2], 1),
+        "p95Ms": round(1000 * ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        "maxMs": round(1000 * ordered[-1], 1),
+    }
+
+
 class LlamaGuard:
-    def __init__(self) -> None:
-        if settings.GROQ_API_KEY is None:
-            print("GROQ_API_KEY not set, skipping LlamaGuard")
-            self.model = None
-            return
-        self.model = get_model(GroqModelName.LLAMA_GUARD_4_12B).with_config(tags=["skip_stream"])
-        self.prompt = PromptTemplate.from_template(llama_guard_instructions)
+    """Singleton LlamaGuard safety classifier with a verdict cache.
+
+    Each assessment is keyed by a hash of its compiled prompt (the role and
+    the latest LLAMA_GUARD_CONTEXT_MESSAGES messages), so content already
+    classified - a retried turn, a common opening message - costs no call.
+    Identical assessments in flight at the same time share one call.
+
+    Usage:
+        from agents.llama_guard import llama_guard
+
+        safety = await llama_guard.ainvoke("User", state["messages"])
+        verdicts = await llama_guard.abatch([("User", messages), ("Agent", other)])
+        llama_guard.stats()  # exposed on /health
+    """
+
+    _instance: "LlamaGuard | None" = None
+
+    def __new__(cls) -> "LlamaGuard":
+        """Singleton pattern - always return the same instance."""
+        if cls._instance is None:
+            instance = super().__new__(cls)
+            instance._model = None
+            instance._model_loaded = False
+            instance._verdicts: OrderedDict[str, LlamaGuardOutput] = OrderedDict()
+            instance._inflight: dict[str, tuple[asyncio.Task, int]] = {}
+            instance.reset_stats()
+            cls._instance = instance
+        return cls._instance
+
+    @property
+    def model(self) -> BaseChatModel | None:
+        """The guard model, created on first use (None without GROQ_API_KEY)."""
+        if not self._model_loaded:
+            if settings.GROQ_API_KEY is None:
+                logger.warning("GROQ_API_KEY not set, skipping LlamaGuard")
+            else:
+                self._model = get_model(GroqModelName.LLAMA_GUARD_4_12B).with_config(
+                    tags=["skip_stream"]
+                )
+            self._model_loaded = True
+        return self._model
 
     def _compile_prompt(self, role: str, messages: list[AnyMessage]) -> str:
         role_mapping = {"ai": "Agent", "human": "User"}
-        messages_str = [
-            f"{role_mapping[m.type]}: {m.content}" for m in messages if m.type in ["ai", "human"]
-        ]
-        conversation_history = "\n\n".join(messages_str)
-        return self.prompt.format(role=role, conversation_history=conversation_history)
+        conversation = [m for m in messages if m.type in role_mapping]
+        if settings.LLAMA_GUARD_CONTEXT_MESSAGES > 0:
+            conversation = conversation[-settings.LLAMA_GUARD_CONTEXT_MESSAGES :]
+        conversation_history = "\n\n".join(
+            f"{role_mapping[m.type]}: {m.text}" for m in conversation
+        )
+        return _prompt.format(role=role, conversation_history=conversation_history)
+
+    # -------------------------------------------------------------------------
+    # Verdict cache
+    # -------------------------------------------------------------------------
+
+    def _cached(self, key: str) -> LlamaGuardOutput | None:
+        verdict = self._verdicts.get(key)
+        if verdict is not None:
+            self._verdicts.move_to_end(key)
+        return verdict
+
+    def _store(self, key: str, verdict: LlamaGuardOutput) -> None:
+        if verdict.safety_assessment == SafetyAssessment.ERROR:
+            return  # Unparseable output may be transient: ask again next time
+        self._verdicts[key] = verdict
+        self._verdicts.move_to_end(key)
+        while len(self._verdicts) > settings.LLAMA_GUARD_CACHE_SIZE:
+            self._verdicts.popitem(last=False)
+
+    def _record(self, verdict: LlamaGuardOutput, latency: float) -> None:
+        assessment = verdict.safety_assessment.value
+        self._counts[assessment] += 1
+        self._latencies[assessment].append(latency)
+
+    # -------------------------------------------------------------------------
+    # Assessments
+    # -------------------------------------------------------------------------
 
     def invoke(self, role: str, messages: list[AnyMessage]) -> LlamaGuardOutput:
         if self.model is None:
             return LlamaGuardOutput(safety_assessment=SafetyAssessment.SAFE)
         compiled_prompt = self._compile_prompt(role, messages)
+        key = _prompt_key(compiled_prompt)
+        if (verdict := self._cached(key)) is not None:
+            self._stats["hits"] += 1
+            return verdict
+        self._stats["misses"] += 1
+        start = time.perf_counter()
         result = self.model.invoke([HumanMessage(content=compiled_prompt)])
-        return parse_llama_guard_output(str(result.content))
+        verdict = parse_llama_guard_output(str(result.content))
+        self._record(verdict, time.perf_counter() - start)
+        self._store(key, verdict)
+        return verdict
 
     async def ainvoke(self, role: str, messages: list[AnyMessage]) -> LlamaGuardOutput:
+        return (await self.abatch([(role, messages)]))[0]
+
+    async def abatch(self, requests: list[tuple[str, list[AnyMessage]]]) -> list[LlamaGuardOutput]:
+        """Assess several (role, messages) at once; each distinct prompt is one call at most.
+
+        Cached verdicts are returned directly, prompts already being
+        assessed are awaited, and the rest run concurrently. A caller being
+        cancelled doesn't cancel the shared assessment: its verdict is
+        still cached for the next one.
+        """
         if self.model is None:
-            return LlamaGuardOutput(safety_assessment=SafetyAssessment.SAFE)
-        compiled_prompt = self._compile_prompt(role, messages)
-        result = await self.model.ainvoke([HumanMessage(content=compiled_prompt)])
-        return parse_llama_guard_output(str(result.content))
+            return [LlamaGuardOutput(safety_assessment=SafetyAssessment.SAFE) for _ in requests]
+
+        keys = []
+        verdicts: dict[str, LlamaGuardOutput] = {}
+        pending: dict[str, tuple[asyncio.Task, int]] = {}
+        misses: dict[str, str] = {}
+        for role, messages in requests:
+            compiled_prompt = self._compile_prompt(role, messages)
+            key = _prompt_key(compiled_prompt)
+            keys.append(key)
+            if key in verdicts or key in pending or key in misses:
+                continue
+            if (verdict := self._cached(key)) is not None:
+                self._stats["hits"] += 1
+                verdicts[key] = verdict
+            elif key in self._inflight:
+                self._stats["coalesced"] += 1
+                pending[key] = self._inflight[key]
+            else:
+                self._stats["misses"] += 1
+                misses[key] = compiled_prompt
+
+        if misses:
+            task = asyncio.ensure_future(self._assess(misses))
+            # Retrieved even when every caller was cancelled meanwhile
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            for index, key in enumerate(misses):
+                self._inflight[key] = pending[key] = (task, index)
+
+        for key, (task, index) in pending.items():
+            verdicts[key] = (await asyncio.shield(task))[index]
+        return [verdicts[key] for key in keys]
+
+    async def _assess(self, prompts: dict[str, str]) -> list[LlamaGuardOutput]:
+        """Run the model on prompts (by cache key) concurrently, caching the verdicts."""
+        model = self.model
+
+        async def _one(key: str, compiled_prompt: str) -> LlamaGuardOutput:
+            start = time.perf_counter()
+            result = await model.ainvoke([HumanMessage(content=compiled_prompt)])
+            verdict = parse_llama_guard_output(str(result.content))
+            self._record(verdict, time.perf_counter() - start)
+            self._store(key, verdict)
+            return verdict
+
+        try:
+            return await asyncio.gather(*(_one(key, prompt) for key, prompt in prompts.items()))
+        finally:
+            for key in prompts:
+                self._inflight.pop(key, None)
+
+    # -------------------------------------------------------------------------
+    # Stats
+    # -------------------------------------------------------------------------
+
+    def stats(self) -> dict[str, Any]:
+        """Cache hit rate and latency per verdict."""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "enabled": settings.GROQ_API_KEY is not None,
+            **self._stats,
+            "hitRate": round(self._stats["hits"] / lookups, 4) if lookups else None,
+            "cached": len(self._verdicts),
+            "verdicts": {
+                assessment: _latency_summary(self._latencies[assessment], count)
+                for assessment, count in self._counts.items()
+            },
+        }
+
+    def reset_stats(self) -> None:
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0}
+        self._counts = {assessment.value: 0 for assessment in SafetyAssessment}
+        self._latencies: dict[str, deque[float]] = {
+            assessment.value: deque(maxlen=LATENCY_WINDOW) for assessment in SafetyAssessment
+        }
+
+    def clear(self) -> None:
+        """Forget cached verdicts, counters and the model (tests, settings changes)."""
+        self._verdicts.clear()
+        self._inflight.clear()
+        self._model = None
+        self._model_loaded = False
+        self.reset_stats()
+
+
+# Module-level singleton instance - import this in other modules
+llama_guard = LlamaGuard()
+
+
+def _is_unsafe(check: asyncio.Future) -> bool:
+    return (
+        not check.cancelled()
+        and check.exception() is None
+        and check.result().safety_assessment == SafetyAssessment.UNSAFE
+    )
+
+
+async def astream_guarded(
+    model: Runnable,
+    model_input: Any,
+    config: RunnableConfig,
+    messages: list[AnyMessage],
+    guard_input: bool = False,
+) -> tuple[AIMessage | None, LlamaGuardOutput]:
+    """Stream a model response while LlamaGuard checks it as it is generated.
+
+    Every LLAMA_GUARD_STREAM_CHECK_CHARS of streamed text the partial
+    response is assessed in the background, and an unsafe verdict stops the
+    generation. With guard_input, the "User" assessment of messages runs
+    concurrently with the model call instead of before it. The complete
+    response always gets a final "Agent" assessment (a cache hit when the
+    last partial check already covered it).
+
+    Args:
+        model: Runnable producing the response
+        model_input: Input for the model
+        config: Node config (keeps the tokens streaming to the client)
+        messages: Conversation the response answers
+        guard_input: Also assess messages as the user's input
+
+    Returns:
+        (response, safety): response is None when the input or the output
+        was flagged, and safety is the verdict that flagged it
+    """
+    flagged: list[LlamaGuardOutput] = []
+    checks: list[asyncio.Future] = []
+
+    def _check(role: str, conversation: list[AnyMessage]) -> asyncio.Future:
+        check = asyncio.ensure_future(llama_guard.ainvoke(role, conversation))
+        check.add_done_callback(_on_verdict)
+        checks.append(check)
+        return check
+
+    def _on_verdict(check: asyncio.Future) -> None:
+        if _is_unsafe(check) and not flagged:
+            flagged.append(check.result())
+            generation.cancel()
+
+    async def _generate() -> AIMessageChunk | None:
+        step = settings.LLAMA_GUARD_STREAM_CHECK_CHARS if llama_guard.model is not None else 0
+        response, checked = None, 0
+        async for chunk in model.astream(model_input, config):
+            response = chunk if response is None else response + chunk
+            text = response.text
+            if step > 0 and len(text) - checked >= step:
+                checked = len(text)
+                _check("Agent", messages + [AIMessage(content=text)])
+        return response
+
+    generation = asyncio.ensure_future(_generate())
+    input_check = _check("User", messages) if guard_input else None
+    try:
+        try:
+            chunk = await generation
+        except asyncio.CancelledError:
+            if not flagged or asyncio.current_task().cancelling():
+                raise
+            return None, flagged[0]
+
+        if input_check is not None:
+            safety = await input_check
+            if safety.safety_assessment == SafetyAssessment.UNSAFE:
+                return None, safety
+        response = message_chunk_to_message(chunk) if chunk is not None else AIMessage(content="")
+        if flagged:
+            return None, flagged[0]
+        return response, await llama_guard.ainvoke("Agent", messages + [response])
+    finally:
+        generation.cancel()
+        for check in checks:
+            check.cancel()
 
 
 if __name__ == "__main__":
-    llama_guard = LlamaGuard()
     output = llama_guard.invoke(
         "Agent",
         [
@@ -10,7 +10,7 @@ from langgraph.graph import END, MessagesState, StateGraph
 from langgraph.managed import RemainingSteps
 from langgraph.prebuilt import ToolNode
 
-from agents.llama_guard import LlamaGuard, LlamaGuardOutput, SafetyAssessment
+from agents.llama_guard import LlamaGuardOutput, SafetyAssessment, astream_guarded, llama_guard
 from agents.tools import calculator
 from core import get_model, settings
 
@@ -70,12 +70,14 @@ def format_safety_message(safety: LlamaGuardOutput) -> AIMessage:
 async def acall_model(state: AgentState, config: RunnableConfig) -> AgentState:
     m = get_model(config["configurable"].get("model", settings.DEFAULT_MODEL))
     model_runnable = wrap_model(m)
-    response = await model_runnable.ainvoke(state, config)
+    # In speculative mode the input guard runs alongside the first model call of a turn
+    speculative = settings.LLAMA_GUARD_SPECULATIVE and state["messages"][-1].type == "human"
 
-    # Run llama guard check here to avoid returning the message if it's unsafe
-    llama_guard = LlamaGuard()
-    safety_output = await llama_guard.ainvoke("Agent", state["messages"] + [response])
-    if safety_output.safety_assessment == SafetyAssessment.UNSAFE:
+    # Llama guard checks the response as it streams, to avoid returning it if it's unsafe
+    response, safety_output = await astream_guarded(
+        model_runnable, state, config, state["messages"], guard_input=speculative
+    )
+    if response is None or safety_output.safety_assessment == SafetyAssessment.UNSAFE:
         return {"messages": [format_safety_message(safety_output)], "safety": safety_output}
 
     if state["remaining_steps"] < 2 and response.tool_calls:
@@ -92,7 +94,6 @@ async def acall_model(state: AgentState, config: RunnableConfig) -> AgentState:
 
 
 async def llama_guard_input(state: AgentState, config: RunnableConfig) -> AgentState:
-    llama_guard = LlamaGuard()
     safety_output = await llama_guard.ainvoke("User", state["messages"])
     return {"safety": safety_output, "messages": []}
 
@@ -108,7 +109,14 @@ agent.add_node("model", acall_model)
 agent.add_node("tools", ToolNode(tools))
 agent.add_node("guard_input", llama_guard_input)
 agent.add_node("block_unsafe_content", block_unsafe_content)
-agent.set_entry_point("guard_input")
+
+
+# Guard the input before the model, unless it's checked speculatively alongside it
+def route_input(state: AgentState) -> Literal["guard_input", "model"]:
+    return "model" if settings.LLAMA_GUARD_SPECULATIVE else "guard_input"
+
+
+agent.set_conditional_entry_point(route_input, ["guard_input", "model"])
 
 
 # Check for unsafe input and block further processing if found
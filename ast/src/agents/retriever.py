@@ -0,0 +1,191 @@
+"""Process-wide retriever over the persisted Chroma DB (database_search tool).
+
+★ Insight ─────────────────────────────────────
+- Singleton pattern via __new__ (same as the other process-wide caches):
+  the embeddings client and the Chroma collection are opened once, not per
+  tool call, and reopened only when CHROMA_DB_DIR/CHROMA_EMBEDDINGS change
+- Async all the way: the query is embedded with the embeddings' native
+  async API, and the local index search runs in a thread
+- Two LRU caches keyed by the normalized query (case and whitespace
+  folded): query embeddings, and top-k results per (query, k, threshold)
+  for RETRIEVER_CACHE_TTL seconds, so a re-ingested DB shows up
+- RETRIEVER_SCORE_THRESHOLD drops results below a relevance score (0-1)
+─────────────────────────────────────────────────
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from core.settings import settings
+from memory.embeddings import HashingEmbeddings
+
+
+def get_chroma_embeddings(spec: str | None = None) -> Embeddings:
+    """
+    Create the embedding function of the Chroma DB (shared with ingestion).
+
+    Args:
+        spec: "openai", "openai:<model>" or "fake" (defaults to CHROMA_EMBEDDINGS)
+
+    Raises:
+        RuntimeError: If OpenAIEmbeddings can't be initialized
+        ValueError: If the provider is not supported
+    """
+    provider, _, model = (spec or settings.CHROMA_EMBEDDINGS).partition(":")
+    if provider == "fake":
+        return HashingEmbeddings()
+    if provider == "openai":
+        from langchain_openai import OpenAIEmbeddings
+
+        try:
+            return OpenAIEmbeddings(model=model) if model else OpenAIEmbeddings()
+        except Exception as e:
+            raise RuntimeError(
+                "Failed to initialize OpenAIEmbeddings. Ensure the OpenAI API key is set."
+            ) from e
+    raise ValueError(f"Unsupported embeddings provider: {provider!r}")
+
+
+def normalize_query(query: str) -> str:
+    """Cache key form of a query: case-folded, whitespace collapsed."""
+    return " ".join(query.casefold().split())
+
+
+class ChromaRetriever:
+    """Singleton similarity search over the Chroma DB with query caches.
+
+    Usage:
+        from agents.retriever import chroma_retriever
+
+        documents = await chroma_retriever.asearch("parental leave policy")
+        chroma_retriever.stats()
+    """
+
+    _instance: "ChromaRetriever | None" = None
+
+    def __new__(cls) -> "ChromaRetriever":
+        """Singleton pattern - always return the same instance."""
+        if cls._instance is None:
+            instance = super().__new__(cls)
+            instance._store: Chroma | None = None
+            instance._store_config: tuple | None = None
+            instance._load_lock = threading.Lock()
+            instance._embeddings: OrderedDict[str, list[float]] = OrderedDict()
+            instance._results: OrderedDict[tuple, tuple[float, list[Document]]] = OrderedDict()
+            instance._stats = {"embeddingHits": 0, "embeddingMisses": 0, "hits": 0, "misses": 0}
+            cls._instance = instance
+        return cls._instance
+
+    @staticmethod
+    def _config() -> tuple[str, str]:
+        return (settings.CHROMA_DB_DIR, settings.CHROMA_EMBEDDINGS)
+
+    def _load(self) -> Chroma:
+        """Open the Chroma store (blocking: runs in a thread)."""
+        config = self._config()
+        with self._load_lock:
+            if self._store is None or self._store_config != config:
+                self._store = Chroma(
+                    persist_directory=settings.CHROMA_DB_DIR,
+                    embedding_function=get_chroma_embeddings(),
+                )
+                self._store_config = config
+                self._embeddings.clear()
+                self._results.clear()
+            return self._store
+
+    async def _get_store(self) -> Chroma:
+        if self._store is not None and self._store_config == self._config():
+            return self._store
+        return await asyncio.to_thread(self._load)
+
+    async def _embed(self, store: Chroma, query: str) -> list[float]:
+        """Embedding of a normalized query."""
+        embedding = self._embeddings.get(query)
+        if embedding is not None:
+            self._stats["embeddingHits"] += 1
+            self._embeddings.move_to_end(query)
+            return embedding
+        self._stats["embeddingMisses"] += 1
+        embedding = await store.embeddings.aembed_query(query)
+        self._embeddings[query] = embedding
+        while len(self._embeddings) > settings.RETRIEVER_CACHE_SIZE:
+            self._embeddings.popitem(last=False)
+        return embedding
+
+    @staticmethod
+    def _search(
+        store: Chroma, embedding: list[float], k: int, threshold: float | None
+    ) -> list[Document]:
+        results = store.similarity_search_by_vector_with_relevance_scores(embedding, k=k)
+        if threshold is None:
+            return [document for document, _ in results]
+        # Chroma returns distances; map them to 0-1 relevance for the collection's metric
+        relevance = store._select_relevance_score_fn()
+        return [document for document, distance in results if relevance(distance) >= threshold]
+
+    async def asearch(
+        self, query: str, k: int | None = None, score_threshold: float | None = None
+    ) -> list[Document]:
+        """
+        Top-k documents for a query.
+
+        Args:
+            query: Search text
+            k: Number of documents (defaults to RETRIEVER_K)
+            score_threshold: Minimum relevance score, 0-1 (defaults to
+                RETRIEVER_SCORE_THRESHOLD, None keeps all k)
+
+        Returns:
+            Documents, most relevant first
+        """
+        k = k or settings.RETRIEVER_K
+        if score_threshold is None:
+            score_threshold = settings.RETRIEVER_SCORE_THRESHOLD
+        store = await self._get_store()
+        normalized = normalize_query(query)
+        key = (normalized, k, score_threshold)
+        cached = self._results.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self._stats["hits"] += 1
+            self._results.move_to_end(key)
+            return list(cached[1])
+        self._stats["misses"] += 1
+
+        embedding = await self._embed(store, normalized)
+        documents = await asyncio.to_thread(self._search, store, embedding, k, score_threshold)
+        self._results[key] = (time.monotonic() + settings.RETRIEVER_CACHE_TTL, documents)
+        self._results.move_to_end(key)
+        while len(self._results) > settings.RETRIEVER_CACHE_SIZE:
+            self._results.popitem(last=False)
+        return list(documents)
+
+    def stats(self) -> dict[str, Any]:
+        """Cache hit rates and sizes."""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hitRate": round(self._stats["hits"] / lookups, 4) if lookups else None,
+            "cachedEmbeddings": len(self._embeddings),
+            "cachedResults": len(self._results),
+        }
+
+    def clear(self) -> None:
+        """Close the store and forget the caches (tests, after re-ingestion)."""
+        with self._load_lock:
+            self._store = None
+            self._store_config = None
+        self._embeddings.clear()
+        self._results.clear()
+        self._stats = {"embeddingHits": 0, "embeddingMisses": 0, "hits": 0, "misses": 0}
+
+
+# Module-level singleton instance - import this in other modules
+chroma_retriever = ChromaRetriever()
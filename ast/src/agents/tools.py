@@ -2,9 +2,9 @@ import math
 import re
 
 import numexpr
-from langchain_chroma import Chroma
 from langchain_core.tools import BaseTool, tool
-from langchain_openai import OpenAIEmbeddings
+
+from agents.retriever import chroma_retriever
 
 
 def calculator_func(expression: str) -> str:
@@ -47,28 +47,10 @@ def format_contexts(docs):
     return "\n\n".join(doc.page_content for doc in docs)
 
 
-def load_chroma_db():
-    # Create the embedding function for our project description database
-    try:
-        embeddings = OpenAIEmbeddings()
-    except Exception as e:
-        raise RuntimeError(
-            "Failed to initialize OpenAIEmbeddings. Ensure the OpenAI API key is set."
-        ) from e
-
-    # Load the stored vector database
-    chroma_db = Chroma(persist_directory="./chroma_db", embedding_function=embeddings)
-    retriever = chroma_db.as_retriever(search_kwargs={"k": 5})
-    return retriever
-
-
-def database_search_func(query: str) -> str:
+async def database_search_func(query: str) -> str:
     """Searches chroma_db for information in the company's handbook."""
-    # Get the chroma retriever
-    retriever = load_chroma_db()
-
-    # Search the database for relevant documents
-    documents = retriever.invoke(query)
+    # Search the database for relevant documents (shared retriever, cached per query)
+    documents = await chroma_retriever.asearch(query)
 
     # Format the documents into a string
     context_str = format_contexts(documents)
@@ -1,7 +1,9 @@
 from core.file_processor import (
+    DocumentNotFoundError,
     FileProcessingError,
     FileProcessor,
     FileTooLargeError,
+    InvalidPageRangeError,
     ProcessedFile,
     ProcessingAction,
     ProcessingResult,
@@ -19,5 +21,7 @@ __all__ = [
     "ProcessingResult",
     "FileProcessingError",
     "FileTooLargeError",
+    "InvalidPageRangeError",
+    "DocumentNotFoundError",
     "UnsupportedFileTypeError",
 ]
@@ -0,0 +1,267 @@
+"""Blob store for processed files, referenced as short blob:// refs.
+
+Inline base64 costs a third more bytes on the wire, encode/decode CPU on
+both ends, and a copy of every page in each checkpoint that holds the
+message. With output="ref" the processed files are written here instead
+and the client gets back refs like ``blob://<sha256>.jpg``; agent nodes
+swap the refs for data URLs only when calling the model.
+
+★ Insight ─────────────────────────────────────
+- Keys are content-addressed (sha256 of the bytes plus an extension that
+  carries the MIME type), so a page stored twice is one object and a ref
+  is all a message needs
+- Backends: local filesystem (default, FILE_BLOB_DIR) or any S3-compatible
+  bucket (FILE_BLOB_BACKEND=s3, boto3 imported on first use)
+- Blobs are never evicted here: checkpoints keep refs for the life of the
+  thread, so expiry belongs to bucket lifecycle rules / thread retention
+- A ref that can no longer be resolved becomes a text placeholder, so one
+  lost blob doesn't break every later turn of the thread
+- Disk and S3 I/O runs in a thread, never on the event loop
+─────────────────────────────────────────────────
+"""
+
+import asyncio
+import base64
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import uuid
+from pathlib import Path
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+BLOB_SCHEME = "blob://"
+_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]+$")
+
+# mimetypes' first guesses for these are unusual (.jpe, ...)
+_EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp", "image/gif": "gif"}
+
+MISSING_BLOB_TEXT = "[attachment unavailable]"
+
+
+class BlobNotFoundError(Exception):
+    """Blob ref is malformed or its blob doesn't exist."""
+
+    pass
+
+
+def blob_key(data: bytes, mime_type: str) -> str:
+    """Content-addressed key for bytes of a MIME type."""
+    extension = _EXTENSIONS.get(mime_type) or (mimetypes.guess_extension(mime_type) or ".bin")
+    return f"{hashlib.sha256(data).hexdigest()}.{extension.lstrip('.')}"
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(BLOB_SCHEME)
+
+
+def parse_blob_ref(ref: str) -> str:
+    """Key of a blob ref (or a bare key), validated so it can't escape the store."""
+    key = ref.removeprefix(BLOB_SCHEME)
+    if not _KEY_PATTERN.match(key):
+        raise BlobNotFoundError(f"Invalid blob ref: {ref}")
+    return key
+
+
+def blob_mime_type(key: str) -> str:
+    """MIME type recorded in a key's extension."""
+    return mimetypes.guess_type(f"blob.{key.rsplit('.', 1)[-1]}")[0] or "application/octet-stream"
+
+
+# =============================================================================
+# Backends
+# =============================================================================
+
+
+class BlobStore:
+    """Base blob store: content-addressed put, get by ref.
+
+    Subclasses implement the blocking _write/_read, which run in a thread.
+    """
+
+    def _write(self, key: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    def _read(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def _put(self, data: bytes, mime_type: str) -> str:
+        key = blob_key(data, mime_type)
+        self._write(key, data)
+        return BLOB_SCHEME + key
+
+    async def put(self, data: bytes, mime_type: str) -> str:
+        """Store bytes, returning their blob:// ref."""
+        return await asyncio.to_thread(self._put, data, mime_type)
+
+    async def get(self, ref: str) -> bytes:
+        """Bytes of a blob ref.
+
+        Raises:
+            BlobNotFoundError: If the ref is invalid or the blob is gone
+        """
+        return await asyncio.to_thread(self._read, parse_blob_ref(ref))
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs as files under a directory, fanned out by key prefix."""
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        if path.exists():
+            return  # Same key, same bytes
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)  # Readers never see a partial blob
+
+    def _read(self, key: str) -> bytes:
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            raise BlobNotFoundError(f"Blob not found: {key}") from None
+
+
+class S3BlobStore(BlobStore):
+    """Blobs as objects in an S3-compatible bucket (AWS, MinIO, R2, ...).
+
+    Credentials come from the standard AWS chain (env, profile, role).
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str | None = None) -> None:
+        try:
+            import boto3
+        except ImportError as e:
+            raise ImportError("FILE_BLOB_BACKEND=s3 requires boto3 (pip install boto3)") from e
+        self.bucket = bucket
+        self.prefix = prefix
+        self._client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def _write(self, key: str, data: bytes) -> None:
+        self._client.put_object(
+            Bucket=self.bucket,
+            Key=self.prefix + key,
+            Body=data,
+            ContentType=blob_mime_type(key),
+        )
+
+    def _read(self, key: str) -> bytes:
+        try:
+            response = self._client.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        except self._client.exceptions.NoSuchKey:
+            raise BlobNotFoundError(f"Blob not found: {key}") from None
+        return response["Body"].read()
+
+
+# Configured store, rebuilt when the blob settings change
+_blob_store: BlobStore | None = None
+_blob_store_config: tuple | None = None
+
+
+def get_blob_store() -> BlobStore:
+    """Return the blob store for the configured backend."""
+    global _blob_store, _blob_store_config
+    config = (
+        settings.FILE_BLOB_BACKEND,
+        settings.FILE_BLOB_DIR,
+        settings.FILE_BLOB_S3_BUCKET,
+        settings.FILE_BLOB_S3_PREFIX,
+        settings.FILE_BLOB_S3_ENDPOINT_URL,
+    )
+    if _blob_store is None or _blob_store_config != config:
+        if settings.FILE_BLOB_BACKEND == "s3":
+            if not settings.FILE_BLOB_S3_BUCKET:
+                raise ValueError("FILE_BLOB_BACKEND=s3 requires FILE_BLOB_S3_BUCKET")
+            _blob_store = S3BlobStore(
+                settings.FILE_BLOB_S3_BUCKET,
+                prefix=settings.FILE_BLOB_S3_PREFIX,
+                endpoint_url=settings.FILE_BLOB_S3_ENDPOINT_URL,
+            )
+        else:
+            _blob_store = LocalBlobStore(settings.FILE_BLOB_DIR)
+        _blob_store_config = config
+    return _blob_store
+
+
+# =============================================================================
+# Lazy resolution in messages
+# =============================================================================
+
+
+def _item_ref(item: Any) -> str | None:
+    """The blob ref a multimodal content item points at, if any."""
+    if not isinstance(item, dict):
+        return None
+    if item.get("type") == "image_url":
+        image_url = item.get("image_url")
+        url = image_url.get("url") if isinstance(image_url, dict) else image_url
+        return url if is_blob_ref(url) else None
+    if item.get("type") == "media" and is_blob_ref(item.get("data")):
+        return item["data"]
+    return None
+
+
+def _resolved_item(item: dict[str, Any], ref: str, data: bytes | None) -> dict[str, Any]:
+    if data is None:
+        return {"type": "text", "text": MISSING_BLOB_TEXT}
+    b64 = base64.b64encode(data).decode("utf-8")
+    if item["type"] == "media":
+        return {**item, "data": b64}
+    url = f"data:{blob_mime_type(parse_blob_ref(ref))};base64,{b64}"
+    image_url = item["image_url"]
+    return {**item, "image_url": {**image_url, "url": url} if isinstance(image_url, dict) else url}
+
+
+async def resolve_blob_refs(messages: list[BaseMessage]) -> list[BaseMessage]:
+    """Swap blob:// refs in multimodal content for inline data, right before a model call.
+
+    Messages without refs are returned as-is; the rest are copied, so the
+    state (and checkpoints) keep the short refs. Each distinct ref is
+    fetched once, concurrently.
+    """
+    refs = {
+        ref
+        for message in messages
+        if isinstance(message.content, list)
+        for ref in map(_item_ref, message.content)
+        if ref is not None
+    }
+    if not refs:
+        return messages
+
+    store = get_blob_store()
+
+    async def _fetch(ref: str) -> bytes | None:
+        try:
+            return await store.get(ref)
+        except BlobNotFoundError as e:
+            logger.warning(f"Unresolvable attachment in conversation: {e}")
+            return None
+
+    ordered = list(refs)
+    blobs = dict(zip(ordered, await asyncio.gather(*(_fetch(ref) for ref in ordered))))
+
+    resolved = []
+    for message in messages:
+        if not isinstance(message.content, list) or not any(map(_item_ref, message.content)):
+            resolved.append(message)
+            continue
+        content = []
+        for item in message.content:
+            ref = _item_ref(item)
+            content.append(item if ref is None else _resolved_item(item, ref, blobs[ref]))
+        resolved.append(message.model_copy(update={"content": content}))
+    return resolved
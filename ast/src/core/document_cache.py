@@ -0,0 +1,121 @@
+"""Short-lived cache of PDFs previewed with thumbnails.
+
+A thumbnail-first request returns low-res previews plus a handle; the full
+resolution pages the model actually needs are rendered later from the same
+document, without downloading it again.
+
+★ Insight ─────────────────────────────────────
+- Singleton pattern via __new__ (same as the other process-wide caches)
+- Entries are temp files (the worker processes open PDFs by path, and keep
+  the last few opened per process, so repeated page requests reuse them)
+- Sliding expiry: FILE_DOCUMENT_TTL seconds after the last use; at most
+  FILE_DOCUMENT_MAX documents, least recently used evicted first
+- Documents in use by a request are never evicted under it
+- Handles are local to this service process (sticky sessions when scaled out)
+─────────────────────────────────────────────────
+"""
+
+import contextlib
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedDocument:
+    """A document kept for lazy page rendering."""
+
+    path: str
+    page_count: int
+    expires_at: float
+    in_use: int = 0
+
+
+class DocumentCache:
+    """Singleton cache of documents addressed by handle.
+
+    Usage:
+        from core.document_cache import document_cache
+
+        handle = document_cache.add(path, page_count)  # takes ownership of path
+        with document_cache.use(handle) as document:
+            ...  # document is None if the handle is unknown or expired
+    """
+
+    _instance: "DocumentCache | None" = None
+
+    def __new__(cls) -> "DocumentCache":
+        """Singleton pattern - always return the same instance."""
+        if cls._instance is None:
+            instance = super().__new__(cls)
+            instance._documents: OrderedDict[str, CachedDocument] = OrderedDict()
+            cls._instance = instance
+        return cls._instance
+
+    def _remove(self, handle: str) -> None:
+        document = self._documents.pop(handle)
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(document.path)
+
+    def _evict(self) -> None:
+        """Drop expired documents, then idle ones over the size bound."""
+        now = time.monotonic()
+        for handle, document in list(self._documents.items()):
+            if document.expires_at <= now and not document.in_use:
+                self._remove(handle)
+        idle = [handle for handle, document in self._documents.items() if not document.in_use]
+        for handle in idle[: max(0, len(self._documents) - settings.FILE_DOCUMENT_MAX)]:
+            self._remove(handle)
+
+    def add(self, path: str, page_count: int) -> str:
+        """Keep a document file (deleted on eviction) and return its handle."""
+        handle = uuid.uuid4().hex
+        self._documents[handle] = CachedDocument(
+            path=path,
+            page_count=page_count,
+            expires_at=time.monotonic() + settings.FILE_DOCUMENT_TTL,
+        )
+        self._evict()
+        return handle
+
+    @contextlib.contextmanager
+    def use(self, handle: str) -> Iterator[CachedDocument | None]:
+        """Hold a document for the duration of a request (None if unknown or expired)."""
+        self._evict()
+        document = self._documents.get(handle)
+        if document is None:
+            yield None
+            return
+        document.in_use += 1
+        document.expires_at = time.monotonic() + settings.FILE_DOCUMENT_TTL
+        self._documents.move_to_end(handle)
+        try:
+            yield document
+        finally:
+            document.in_use -= 1
+            document.expires_at = time.monotonic() + settings.FILE_DOCUMENT_TTL
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "documents": len(self._documents),
+            "maxDocuments": settings.FILE_DOCUMENT_MAX,
+            "ttlSeconds": settings.FILE_DOCUMENT_TTL,
+        }
+
+    def clear(self) -> None:
+        """Delete every document (service shutdown)."""
+        for handle in list(self._documents):
+            self._remove(handle)
+
+
+# Module-level singleton instance - import this in other modules
+document_cache = DocumentCache()
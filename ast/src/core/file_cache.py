@@ -0,0 +1,311 @@
+"""Content-addressed cache of processed files, on local disk.
+
+Customers re-send the same PDFs and images constantly. Processed results
+are stored under a hash of the file bytes (plus the processing parameters),
+so a repeated file skips Pillow/PyMuPDF entirely.
+
+★ Insight ─────────────────────────────────────
+- Singleton pattern via __new__ (same as the other process-wide caches)
+- Entries are JSON Lines files in FILE_CACHE_DIR (a meta record, then one
+  record per file), written and read one file at a time so streamed results
+  never sit in memory whole; an in-memory LRU index (key -> size) is rebuilt
+  from the directory on first use, oldest access first
+- Total size is bounded by FILE_CACHE_MAX_MB, evicting least recently used
+- URLs are remembered with their ETag/Last-Modified and content key, so a
+  repeat can be answered by a conditional GET (304) without the body
+- Disk I/O runs in a thread, never on the event loop
+─────────────────────────────────────────────────
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any
+
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UrlEntry:
+    """Validators a URL was last served with, and the content it had."""
+
+    key: str
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def content_key(source: bytes | str, params: str) -> str:
+    """Cache key for file bytes (or a file, by path) processed with the given parameters."""
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            digest = hashlib.file_digest(f, "sha256")
+    else:
+        digest = hashlib.sha256(source)
+    digest.update(params.encode())
+    return digest.hexdigest()
+
+
+class ProcessedFileCache:
+    """Singleton disk LRU of processed file results.
+
+    Usage:
+        from core.file_cache import processed_file_cache
+
+        payload = await processed_file_cache.get(key)
+        await processed_file_cache.put(key, payload)
+        processed_file_cache.stats()  # exposed on /files/cache/stats
+    """
+
+    _instance: "ProcessedFileCache | None" = None
+
+    def __new__(cls) -> "ProcessedFileCache":
+        """Singleton pattern - always return the same instance."""
+        if cls._instance is None:
+            instance = super().__new__(cls)
+            instance._index: OrderedDict[str, int] = OrderedDict()
+            instance._urls: OrderedDict[str, UrlEntry] = OrderedDict()
+            instance._loaded_dir: Path | None = None
+            instance._size = 0
+            instance._stats = {"hits": 0, "misses": 0, "urlHits": 0, "evictions": 0}
+            cls._instance = instance
+        return cls._instance
+
+    @property
+    def enabled(self) -> bool:
+        return settings.FILE_CACHE_ENABLED
+
+    @property
+    def directory(self) -> Path:
+        return Path(settings.FILE_CACHE_DIR)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.jsonl"
+
+    def _ensure_loaded(self) -> None:
+        """Rebuild the index from disk (once per directory)."""
+        directory = self.directory
+        if self._loaded_dir == directory:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for path in directory.glob("*.jsonl"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        self._index.clear()
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+        self._size = sum(self._index.values())
+        self._loaded_dir = directory
+
+    # -------------------------------------------------------------------------
+    # Content entries
+    # -------------------------------------------------------------------------
+
+    def _open(self, key: str) -> IO[bytes] | None:
+        self._ensure_loaded()
+        if key not in self._index:
+            return None
+        path = self._path(key)
+        try:
+            fp = path.open("rb")
+            os.utime(path)  # Recency survives restarts
+        except OSError:
+            self._size -= self._index.pop(key, 0)
+            return None
+        self._index.move_to_end(key)
+        return fp
+
+    def _commit(self, key: str, tmp: Path) -> None:
+        """Move a complete entry into place and evict down to the size bound."""
+        self._ensure_loaded()
+        size = tmp.stat().st_size
+        max_bytes = settings.FILE_CACHE_MAX_MB * 1024 * 1024
+        if size > max_bytes:
+            tmp.unlink(missing_ok=True)
+            return
+        os.replace(tmp, self._path(key))  # Readers never see a partial entry
+        self._size += size - self._index.pop(key, 0)
+        self._index[key] = size
+        while self._size > max_bytes:
+            old_key, old_size = self._index.popitem(last=False)
+            self._path(old_key).unlink(missing_ok=True)
+            self._size -= old_size
+            self._stats["evictions"] += 1
+
+    async def iter_entry(self, key: str) -> AsyncIterator[dict[str, Any]] | None:
+        """Stream a cached entry: the meta record, then one record per file.
+
+        Returns:
+            Async iterator over the entry's records, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        fp = await asyncio.to_thread(self._open, key)
+        self._stats["hits" if fp is not None else "misses"] += 1
+        if fp is None:
+            return None
+
+        async def _records() -> AsyncIterator[dict[str, Any]]:
+            try:
+                while line := await asyncio.to_thread(fp.readline):
+                    yield json.loads(line)
+            finally:
+                fp.close()
+
+        return _records()
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        """Return the cached payload ({**meta, "files": [...]}) for a key, or None."""
+        records = await self.iter_entry(key)
+        if records is None:
+            return None
+        try:
+            meta = await anext(records)
+            return {**meta, "files": [record async for record in records]}
+        except (OSError, ValueError, StopAsyncIteration):
+            return None
+
+    def writer(self, key: str, meta: dict[str, Any]) -> "CacheEntryWriter | None":
+        """Writer appending an entry file by file (None if the cache is disabled)."""
+        if not self.enabled:
+            return None
+        return CacheEntryWriter(self, key, meta)
+
+    async def put(self, key: str, payload: dict[str, Any]) -> None:
+        """Store a payload, evicting least recently used entries over the size bound."""
+        writer = self.writer(key, {k: v for k, v in payload.items() if k != "files"})
+        if writer is None:
+            return
+        for record in payload.get("files", []):
+            await writer.append(record)
+        await writer.commit()
+
+    # -------------------------------------------------------------------------
+    # URL shortcut
+    # -------------------------------------------------------------------------
+
+    def lookup_url(self, url: str) -> UrlEntry | None:
+        """Validators and content key for a URL seen before (None if not cached)."""
+        if not self.enabled:
+            return None
+        entry = self._urls.get(url)
+        if entry is None or entry.key not in self._index:
+            return None
+        return entry
+
+    def remember_url(self, url: str, key: str, etag: str | None, last_modified: str | None) -> None:
+        """Remember a URL's validators (only URLs with validators are remembered)."""
+        if not self.enabled or not (etag or last_modified):
+            return
+        self._urls[url] = UrlEntry(key=key, etag=etag, last_modified=last_modified)
+        self._urls.move_to_end(url)
+        while len(self._urls) > settings.FILE_CACHE_MAX_URLS:
+            self._urls.popitem(last=False)
+
+    def record_url_hit(self) -> None:
+        """Count a hit served after a 304 (already counted as a hit by get)."""
+        self._stats["urlHits"] += 1
+
+    # -------------------------------------------------------------------------
+    # Stats
+    # -------------------------------------------------------------------------
+
+    def stats(self) -> dict[str, Any]:
+        """Hit rate and size counters."""
+        # urlHits is the share of hits answered by a 304, without downloading
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "enabled": self.enabled,
+            **self._stats,
+            "hitRate": round(self._stats["hits"] / lookups, 4) if lookups else None,
+            "entries": len(self._index),
+            "sizeBytes": self._size,
+            "maxBytes": settings.FILE_CACHE_MAX_MB * 1024 * 1024,
+            "urls": len(self._urls),
+        }
+
+    def clear(self) -> None:
+        """Forget the in-memory index and counters (entries stay on disk)."""
+        self._index.clear()
+        self._urls.clear()
+        self._loaded_dir = None
+        self._size = 0
+        self._stats = {"hits": 0, "misses": 0, "urlHits": 0, "evictions": 0}
+
+
+class CacheEntryWriter:
+    """Appends a cache entry record by record; visible to readers only after commit.
+
+    Write failures are logged and turn the writer into a no-op: the cache
+    must never fail the request it is caching.
+    """
+
+    def __init__(self, cache: ProcessedFileCache, key: str, meta: dict[str, Any]) -> None:
+        self._cache = cache
+        self._key = key
+        self._meta = meta
+        self._tmp = cache._path(key).with_suffix(f".{uuid.uuid4().hex}.tmp")
+        self._fp: IO[bytes] | None = None
+        self._failed = False
+
+    def _ensure_open(self) -> IO[bytes]:
+        if self._fp is None:
+            self._cache.directory.mkdir(parents=True, exist_ok=True)
+            self._fp = self._tmp.open("wb")
+            self._fp.write(json.dumps(self._meta).encode() + b"\n")
+        return self._fp
+
+    def _write(self, record: dict[str, Any]) -> None:
+        self._ensure_open().write(json.dumps(record).encode() + b"\n")
+
+    def _commit(self) -> None:
+        self._ensure_open().close()
+        self._cache._commit(self._key, self._tmp)
+
+    def _abort(self) -> None:
+        if self._fp is not None:
+            self._fp.close()
+        self._tmp.unlink(missing_ok=True)
+
+    async def _run(self, fn, *args: Any) -> None:
+        if self._failed:
+            return
+        try:
+            await asyncio.to_thread(fn, *args)
+        except OSError as e:
+            logger.error(f"Failed to write file cache entry {self._key}: {e}")
+            self._failed = True
+            await asyncio.to_thread(self._abort)
+
+    async def append(self, record: dict[str, Any]) -> None:
+        await self._run(self._write, record)
+
+    async def commit(self) -> None:
+        """Publish the entry."""
+        await self._run(self._commit)
+
+    async def abort(self) -> None:
+        """Drop a partial entry (processing failed or the client went away)."""
+        self._failed = True
+        await asyncio.to_thread(self._abort)
+
+
+# Module-level singleton instance - import this in other modules
+processed_file_cache = ProcessedFileCache()
@@ -1,23 +1,71 @@
-"""File processor for multimodal content - handles PDF, resize, and tiling."""
-
+"""File processor for multimodal content - handles PDF, resize, and tiling.
+
+★ Insight ─────────────────────────────────────
+- Downloads stream through one pooled, shared httpx client
+- Oversized files are rejected from Content-Length before the body is read,
+  or as soon as the running byte count passes MAX_FILE_SIZE_MB
+- Bodies are spooled: kept in memory up to SPOOL_THRESHOLD_MB, then in a
+  named temp file that workers open by path, so large files are never read
+  back into the service process or pickled
+- Images are opened once; the same Image feeds the size check and the
+  compress/tile step, so the pixels are decoded exactly once
+- PDF pages with a usable text layer are sent as text (text/plain files),
+  only scanned, sparse or graphic pages are rendered - a mixed result; pages
+  render at a DPI fitted to their size, and images are scaled down to the
+  long edge vision models work at (IMAGE_TARGET_LONG_EDGE)
+- PyMuPDF/Pillow work runs in a process pool (FILE_PROCESS_WORKERS), never
+  on the event loop; PDF pages render in parallel, one task per page, and
+  are yielded in page order (process_stream) as soon as they're ready
+- At most FILE_PROCESS_MAX_CONCURRENCY files are processed at once, so
+  uploads can't starve the chat streams of CPU
+- Results are cached by content hash (core.file_cache); a URL seen before
+  is revalidated with a conditional GET, so a 304 skips the download too
+- PDFs can be limited to a page range, or previewed as thumbnails plus a
+  handle (core.document_cache) whose pages render at full resolution later;
+  workers keep their last few opened PDFs, so those pages skip the re-open
+  (locked per document; dropped once their file is deleted)
+─────────────────────────────────────────────────
+"""
+
+import asyncio
 import base64
+import contextlib
 import io
-import math
-from dataclasses import dataclass
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from enum import Enum
+from multiprocessing import forkserver
+from typing import IO, Any
 
 import fitz  # PyMuPDF
 import httpx
 from PIL import Image
 
+from core.document_cache import document_cache
+from core.file_cache import content_key, processed_file_cache
+from core.settings import settings
+from core.tiling import plan_tiles
+
 
 class ProcessingAction(Enum):
     """Actions for file processing."""
 
     DIRECT = "direct"  # Send without processing
+    RESIZE = "resize"  # Scale down to the target long edge
     COMPRESS = "compress"  # Compress to JPEG 85%
     TILE = "tile"  # Split into tiles
     RENDER_PAGES = "render"  # PDF → images
+    EXTRACT_TEXT = "text"  # PDF → text (every page has a text layer)
+    MIXED = "mixed"  # PDF → text pages and rendered pages
+    THUMBNAILS = "thumbnails"  # PDF → low-res previews plus a handle
 
 
 class FileProcessingError(Exception):
@@ -38,15 +86,67 @@ class UnsupportedFileTypeError(FileProcessingError):
     pass
 
 
+class InvalidPageRangeError(FileProcessingError):
+    """Page range doesn't match the document."""
+
+    pass
+
+
+class DocumentNotFoundError(FileProcessingError):
+    """Document handle is unknown or expired."""
+
+    pass
+
+
+# "1-3,7,10-" (1-based, open-ended ranges run to the last page)
+PAGE_RANGE_PATTERN = r"^\s*\d+\s*(-\s*\d*\s*)?(,\s*\d+\s*(-\s*\d*\s*)?)*$"
+
+
+def parse_page_range(spec: str | None, page_count: int) -> list[int]:
+    """0-based page indexes selected by a page range (all pages for None).
+
+    Raises:
+        InvalidPageRangeError: If the range is malformed or outside the document
+    """
+    if spec is None:
+        return list(range(page_count))
+    if not re.match(PAGE_RANGE_PATTERN, spec):
+        raise InvalidPageRangeError(f"Invalid page range: {spec!r}")
+    selected: set[int] = set()
+    for part in spec.split(","):
+        first, _, last = (item.strip() for item in part.partition("-"))
+        start = int(first)
+        stop = int(last) if last else (page_count if "-" in part else start)
+        if start < 1 or stop < start or stop > page_count:
+            raise InvalidPageRangeError(
+                f"Page range {part.strip()!r} is outside the document ({page_count} pages)"
+            )
+        selected.update(range(start - 1, stop))
+    return sorted(selected)
+
+
+TEXT_MIME_TYPE = "text/plain"
+
+
 @dataclass
 class ProcessedFile:
-    """A processed file ready for LLM."""
+    """A processed file ready for LLM (an image, or the text of a PDF page)."""
 
-    data: str  # base64 encoded
+    data: str  # base64 encoded; the text itself when mime_type is text/plain
     mime_type: str
     width: int
     height: int
 
+    @property
+    def is_text(self) -> bool:
+        return self.mime_type == TEXT_MIME_TYPE
+
+    def to_bytes(self) -> bytes:
+        """Raw content: the decoded image, or the UTF-8 text."""
+        if self.is_text:
+            return self.data.encode("utf-8")
+        return base64.b64decode(self.data)
+
 
 @dataclass
 class ProcessingResult:
@@ -55,6 +155,66 @@ class ProcessingResult:
     files: list[ProcessedFile]
     action: ProcessingAction
     original_pages: int | None = None  # For PDFs
+    pages: list[int] | None = None  # 1-based page of each file, when not all pages in order
+    handle: str | None = None  # Thumbnails: document handle for full-resolution pages
+
+
+@dataclass
+class Download:
+    """A downloaded file (no source if the server answered 304 Not Modified).
+
+    The source is the body itself up to SPOOL_THRESHOLD_MB, else the path of
+    the temp file it was spooled to (deleted on close, unless taken).
+    """
+
+    source: bytes | str | None
+    size: int = 0
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def take_path(self) -> str | None:
+        """Hand the spooled temp file over to the caller (who deletes it)."""
+        if not isinstance(self.source, str):
+            return None
+        path, self.source = self.source, None
+        return path
+
+    def close(self) -> None:
+        """Delete the spooled temp file, if any."""
+        if isinstance(self.source, str):
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.source)
+        self.source = None
+
+    def __enter__(self) -> "Download":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def _result_to_dict(result: ProcessingResult) -> dict[str, Any]:
+    """Cache meta record of a result (files are separate records)."""
+    return {
+        "action": result.action.value,
+        "original_pages": result.original_pages,
+        "pages": result.pages,
+    }
+
+
+async def _replay(
+    records: AsyncIterator[dict[str, Any]],
+) -> AsyncIterator[ProcessingResult | ProcessedFile]:
+    """Turn cache records back into a header ProcessingResult and files."""
+    meta = await anext(records)
+    yield ProcessingResult(
+        files=[],
+        action=ProcessingAction(meta["action"]),
+        original_pages=meta["original_pages"],
+        pages=meta.get("pages"),
+    )
+    async for record in records:
+        yield ProcessedFile(**record)
 
 
 # Supported mime types
@@ -62,18 +222,123 @@ SUPPORTED_IMAGE_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp"}
 SUPPORTED_PDF_TYPES = {"application/pdf"}
 SUPPORTED_TYPES = SUPPORTED_IMAGE_TYPES | SUPPORTED_PDF_TYPES
 
+# Workers fork from a server process that imported this module once, so
+# they start instantly (spawn would re-import the app per worker) and never
+# inherit the event loop's threads (fork)
+WORKER_START_METHOD = "forkserver"
+
+# Shared HTTP client for downloads (connection pooling across requests)
+_http_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared download client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=60.0,
+            follow_redirects=True,  # Hosted files often redirect to a CDN
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared download client (service shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+class FileWorkerPool:
+    """Singleton process pool for CPU-bound file processing.
+
+    Usage:
+        from core.file_processor import file_worker_pool
+
+        async with file_worker_pool.limit():
+            result = await file_worker_pool.run(processor._process_image, data, mime)
+
+        file_worker_pool.start()  # service startup, warms the workers
+        file_worker_pool.shutdown()  # service shutdown
+    """
+
+    _instance: "FileWorkerPool | None" = None
+
+    def __new__(cls) -> "FileWorkerPool":
+        """Singleton pattern - always return the same instance."""
+        if cls._instance is None:
+            instance = super().__new__(cls)
+            instance._executor: ProcessPoolExecutor | None = None
+            instance._semaphore: asyncio.Semaphore | None = None
+            instance._semaphore_loop: asyncio.AbstractEventLoop | None = None
+            cls._instance = instance
+        return cls._instance
+
+    @property
+    def workers(self) -> int:
+        """Number of parallel workers (1 when running in a thread)."""
+        return max(1, settings.FILE_PROCESS_WORKERS)
+
+    def _get_executor(self) -> ProcessPoolExecutor | None:
+        if settings.FILE_PROCESS_WORKERS <= 0:
+            return None  # Default thread pool
+        if self._executor is None:
+            forkserver.set_forkserver_preload([__name__])
+            self._executor = ProcessPoolExecutor(
+                max_workers=settings.FILE_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context(WORKER_START_METHOD),
+            )
+        return self._executor
+
+    def start(self) -> None:
+        """Start the worker processes in the background (service startup)."""
+        executor = self._get_executor()
+        if executor is not None:
+            for _ in range(settings.FILE_PROCESS_WORKERS):
+                executor.submit(int)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn(*args) in the pool (arguments and result must be picklable)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), fn, *args)
+
+    def limit(self) -> asyncio.Semaphore:
+        """Semaphore capping files processed concurrently (per event loop)."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(settings.FILE_PROCESS_MAX_CONCURRENCY)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def shutdown(self) -> None:
+        """Stop the worker processes (recreated on next use)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Module-level singleton instance
+file_worker_pool = FileWorkerPool()
+
 
 class FileProcessor:
     """Processes files for LLM consumption.
 
     Handles:
-    - PDF → images (PyMuPDF, 150 DPI)
+    - PDF → text per page where the text layer carries the page, images
+      (PyMuPDF, 72-200 DPI fitted to a 1568px long edge) for the rest
+    - Images over 1568px → resized to a 1568px long edge
     - Large images → compression (JPEG 85%)
-    - Huge images → tiling (1568px tiles, 10% overlap)
+    - Huge images → content-aware tiling (up to 1568px tiles, 10% overlap,
+      blank background skipped)
     """
 
     # Size limits
     MAX_FILE_SIZE_MB = 50
+    SPOOL_THRESHOLD_MB = 8  # Downloads above this are spooled to a temp file
+    DOWNLOAD_CHUNK_SIZE = 64 * 1024
     COMPRESS_THRESHOLD_MB = 10
     FORCE_COMPRESS_MB = 20
 
@@ -82,14 +347,47 @@ class FileProcessor:
     TILE_SIZE = 1568
     TILE_OVERLAP = 0.1  # 10%
     MAX_TILES = 9
+    TILE_LOSSLESS_MAX_COLORS = 256  # Tiles with more colours are photographic
+    TILE_LOSSY_FORMAT = "WEBP"  # Or "JPEG" for consumers without WebP
+    TILE_WEBP_METHOD = 2  # 0 (fastest) - 6 (smallest); past 2 saves little for the CPU
+
+    # Vision models downscale anything larger (long edge, in pixels)
+    IMAGE_TARGET_LONG_EDGE = 1568
 
     # PDF settings
-    PDF_DPI = 150
+    PDF_MIN_DPI = 72  # Large pages (posters, drawings) never go below this
+    PDF_MAX_DPI = 200  # Small pages (receipts, slides) get more pixels, up to this
     PDF_MAX_PAGES = 50
+    # Text fast path: a page is sent as text when its text layer has at least
+    # PDF_TEXT_MIN_CHARS characters, images cover at most PDF_TEXT_MAX_IMAGE_COVERAGE
+    # of it (scans carry an image under their OCR text) and it has at most
+    # PDF_TEXT_MAX_DRAWINGS vector paths (charts, diagrams)
+    PDF_TEXT_LAYER = True
+    PDF_TEXT_MIN_CHARS = 200
+    PDF_TEXT_MAX_IMAGE_COVERAGE = 0.3
+    PDF_TEXT_MAX_DRAWINGS = 100
+
+    # Thumbnail-first previews
+    THUMBNAIL_LONG_EDGE = 256
+    THUMBNAIL_QUALITY = 70  # JPEG
+    THUMBNAIL_MAX_PAGES = 500  # Previews are cheap: far more than PDF_MAX_PAGES
 
     # Compression settings
     JPEG_QUALITY = 85
 
+    def _check_type(self, mime_type: str) -> None:
+        """Raise UnsupportedFileTypeError if the mime type isn't supported."""
+        if mime_type not in SUPPORTED_TYPES:
+            raise UnsupportedFileTypeError(f"Unsupported file type: {mime_type}")
+
+    def _check_size(self, size_bytes: int) -> None:
+        """Raise FileTooLargeError if size_bytes exceeds MAX_FILE_SIZE_MB."""
+        size_mb = size_bytes / (1024 * 1024)
+        if size_mb > self.MAX_FILE_SIZE_MB:
+            raise FileTooLargeError(
+                f"File size {size_mb:.1f}MB exceeds maximum {self.MAX_FILE_SIZE_MB}MB"
+            )
+
     def _get_action(
         self,
         size_bytes: int,
@@ -112,18 +410,11 @@ class FileProcessor:
             UnsupportedFileTypeError: If mime type not supported
             FileTooLargeError: If file > 50MB
         """
-        # Check file type
-        if mime_type not in SUPPORTED_TYPES:
-            raise UnsupportedFileTypeError(f"Unsupported file type: {mime_type}")
-
-        # Check file size
+        self._check_type(mime_type)
+        self._check_size(size_bytes)
         size_mb = size_bytes / (1024 * 1024)
-        if size_mb > self.MAX_FILE_SIZE_MB:
-            raise FileTooLargeError(
-                f"File size {size_mb:.1f}MB exceeds maximum {self.MAX_FILE_SIZE_MB}MB"
-            )
 
-        # PDF always renders to images
+        # PDF renders to images (refined per page by _pdf_action)
         if mime_type in SUPPORTED_PDF_TYPES:
             return ProcessingAction.RENDER_PAGES
 
@@ -135,45 +426,83 @@ class FileProcessor:
         if size_mb >= self.COMPRESS_THRESHOLD_MB:
             return ProcessingAction.COMPRESS
 
+        # Larger than the model will look at: scale down before sending
+        if max(width, height) > self.IMAGE_TARGET_LONG_EDGE:
+            return ProcessingAction.RESIZE
+
         # Small file, send directly
         return ProcessingAction.DIRECT
 
-    def _process_pdf(self, data: bytes) -> list[ProcessedFile]:
-        """Convert PDF to list of images.
+    def _pdf_action(self, plan: dict[int, str | None]) -> ProcessingAction:
+        """Action for a PDF from its page plan (text or None per page)."""
+        text_pages = sum(text is not None for text in plan.values())
+        if text_pages == 0:
+            return ProcessingAction.RENDER_PAGES
+        if text_pages == len(plan):
+            return ProcessingAction.EXTRACT_TEXT
+        return ProcessingAction.MIXED
+
+    def _plan_pdf_pages(
+        self, source: bytes | str, pages: str | None = None
+    ) -> tuple[int, dict[int, str | None]]:
+        """Decide per page between text and rendering.
 
         Args:
-            data: PDF file bytes
+            source: PDF file bytes, or the path of a PDF file
+            pages: Page range to process (all pages if None)
 
         Returns:
-            List of ProcessedFile, one per page
+            The page count, and the plan: the text of each selected page
+            sent as text, None for pages to render (by 0-based page index)
 
         Raises:
-            FileTooLargeError: If PDF has > 50 pages
+            FileTooLargeError: If more than 50 pages are selected
+            InvalidPageRangeError: If the page range doesn't fit the document
         """
-        doc = fitz.open(stream=data, filetype="pdf")
-
-        try:
+        with _pdf_document(source) as doc:
             page_count = len(doc)
-            if page_count > self.PDF_MAX_PAGES:
+            selected = parse_page_range(pages, page_count)
+            if len(selected) > self.PDF_MAX_PAGES:
                 raise FileTooLargeError(
-                    f"PDF has {page_count} pages, maximum is {self.PDF_MAX_PAGES}"
+                    f"PDF has {len(selected)} pages, maximum is {self.PDF_MAX_PAGES}"
+                    + (" (request a page range)" if pages is None else "")
                 )
-
+            return page_count, {page: self._page_text(doc[page]) for page in selected}
+
+    def _page_text(self, page: fitz.Page) -> str | None:
+        """The page's text if its text layer carries the page, else None (render it)."""
+        if not self.PDF_TEXT_LAYER:
+            return None
+        text = page.get_text("text", sort=True).strip()
+        if len(text) < self.PDF_TEXT_MIN_CHARS:
+            return None  # Scanned without OCR, or mostly visual
+
+        page_area = abs(page.rect)
+        image_area = sum(abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info())
+        if page_area and image_area / page_area > self.PDF_TEXT_MAX_IMAGE_COVERAGE:
+            return None  # Scan with an OCR layer, or photos the text refers to
+        if len(page.get_drawings()) > self.PDF_TEXT_MAX_DRAWINGS:
+            return None  # Charts and diagrams
+        return text
+
+    def _page_scale(self, page: fitz.Page) -> float:
+        """Render scale fitting the page's long edge to IMAGE_TARGET_LONG_EDGE pixels."""
+        # PyMuPDF uses 72 DPI base, so scale factor = target_dpi / 72
+        long_edge_inches = max(page.rect.width, page.rect.height) / 72
+        dpi = self.IMAGE_TARGET_LONG_EDGE / long_edge_inches if long_edge_inches else 0
+        return min(self.PDF_MAX_DPI, max(self.PDF_MIN_DPI, dpi)) / 72
+
+    def _render_pdf_pages(self, source: bytes | str, start: int, stop: int) -> list[ProcessedFile]:
+        """Render pages [start, stop) of a PDF (bytes or path) to PNG images."""
+        with _pdf_document(source) as doc:
             result = []
-            # DPI scaling: PyMuPDF uses 72 DPI base, so scale factor = target_dpi / 72
-            scale = self.PDF_DPI / 72
-
-            for page_num in range(page_count):
+            for page_num in range(start, stop):
                 page = doc[page_num]
-                # Render with scaling matrix
-                mat = fitz.Matrix(scale, scale)
-                pix = page.get_pixmap(matrix=mat)
+                scale = self._page_scale(page)
+                pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale))
 
-                # Convert to PNG bytes
-                img_bytes = pix.tobytes("png")
-
-                # Encode to base64
-                b64_data = base64.b64encode(img_bytes).decode("utf-8")
+                # Convert to PNG bytes, then base64
+                b64_data = base64.b64encode(pix.tobytes("png")).decode("utf-8")
 
                 result.append(
                     ProcessedFile(
@@ -185,20 +514,148 @@ class FileProcessor:
                 )
 
             return result
+
+    def _render_pdf_thumbnails(
+        self, source: bytes | str, pages: str | None = None
+    ) -> tuple[int, list[int], list[ProcessedFile]]:
+        """Render low-res JPEG previews of a PDF's pages.
+
+        Returns:
+            The page count, the 0-based indexes of the selected pages, and
+            one thumbnail per selected page
+
+        Raises:
+            FileTooLargeError: If more than THUMBNAIL_MAX_PAGES pages are selected
+            InvalidPageRangeError: If the page range doesn't fit the document
+        """
+        with _pdf_document(source) as doc:
+            page_count = len(doc)
+            selected = parse_page_range(pages, page_count)
+            if len(selected) > self.THUMBNAIL_MAX_PAGES:
+                raise FileTooLargeError(
+                    f"PDF has {len(selected)} pages, maximum is {self.THUMBNAIL_MAX_PAGES}"
+                )
+            thumbnails = []
+            for page_num in selected:
+                page = doc[page_num]
+                scale = self.THUMBNAIL_LONG_EDGE / max(page.rect.width, page.rect.height)
+                pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale))
+                jpeg = pix.tobytes("jpg", jpg_quality=self.THUMBNAIL_QUALITY)
+                thumbnails.append(
+                    ProcessedFile(
+                        data=base64.b64encode(jpeg).decode("utf-8"),
+                        mime_type="image/jpeg",
+                        width=pix.width,
+                        height=pix.height,
+                    )
+                )
+            return page_count, selected, thumbnails
+
+    def _process_pdf(self, data: bytes) -> list[ProcessedFile]:
+        """Convert PDF to a list of text pages and images, in page order.
+
+        Args:
+            data: PDF file bytes
+
+        Returns:
+            List of ProcessedFile, one per page
+
+        Raises:
+            FileTooLargeError: If PDF has > 50 pages
+        """
+        result = []
+        for page_num, text in self._plan_pdf_pages(data)[1].items():
+            if text is not None:
+                result.append(_text_page(text))
+            else:
+                result.extend(self._render_pdf_pages(data, page_num, page_num + 1))
+        return result
+
+    async def _iter_pdf_pages(
+        self, path: str, plan: dict[int, str | None]
+    ) -> AsyncIterator[ProcessedFile]:
+        """Yield a PDF's pages in page order, rendering in the worker pool.
+
+        Text pages come straight from the plan. Pages to render are one task
+        each, at most one per worker in flight: pages render in parallel while
+        only a worker's worth of them is held in memory. Workers open the PDF
+        from `path`, so its bytes are never pickled.
+        """
+        to_render = deque(page for page, text in plan.items() if text is None)
+        pending: deque[asyncio.Task] = deque()
+        try:
+            for text in plan.values():
+                # Keep the workers busy ahead of the page being yielded
+                while to_render and len(pending) < file_worker_pool.workers:
+                    page = to_render.popleft()
+                    pending.append(
+                        asyncio.ensure_future(
+                            file_worker_pool.run(self._render_pdf_pages, path, page, page + 1)
+                        )
+                    )
+                if text is not None:
+                    yield _text_page(text)
+                    continue
+                for file in await pending.popleft():
+                    yield file
         finally:
-            doc.close()
+            # Consumer stopped early (client disconnected): drop queued pages
+            for task in pending:
+                task.cancel()
+
+    def _fit_long_edge(self, img: Image.Image) -> Image.Image:
+        """Scale an image down to IMAGE_TARGET_LONG_EDGE (smaller images are returned as-is)."""
+        width, height = img.size
+        scale = self.IMAGE_TARGET_LONG_EDGE / max(width, height)
+        if scale >= 1:
+            return img
+        if img.mode == "P":
+            img = img.convert("RGBA")  # Palette images can't be resampled smoothly
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return img.resize(size, Image.Resampling.LANCZOS)
+
+    def _resize_image(self, data: bytes | str | Image.Image, mime_type: str) -> ProcessedFile:
+        """Scale an image down to the target long edge, keeping its format.
+
+        JPEG and WebP stay lossy at JPEG_QUALITY; everything else (PNG, GIF)
+        becomes PNG, so screenshots and diagrams stay sharp.
+
+        Args:
+            data: Original image bytes or path, or the already opened image
+            mime_type: Original MIME type
+
+        Returns:
+            ProcessedFile with the resized image
+        """
+        img = self._fit_long_edge(_open_image(data))
+        image_format = {"image/jpeg": "JPEG", "image/webp": "WEBP"}.get(mime_type, "PNG")
+
+        buffer = io.BytesIO()
+        if image_format == "PNG":
+            img.save(buffer, format="PNG")
+        else:
+            if img.mode not in ("RGB", "L") and image_format == "JPEG":
+                img = img.convert("RGB")
+            img.save(buffer, format=image_format, quality=self.JPEG_QUALITY)
+
+        return ProcessedFile(
+            data=base64.b64encode(buffer.getvalue()).decode("utf-8"),
+            mime_type=f"image/{image_format.lower()}",
+            width=img.width,
+            height=img.height,
+        )
 
-    def _compress_image(self, data: bytes, mime_type: str) -> ProcessedFile:
-        """Compress image to JPEG 85%.
+    def _compress_image(self, data: bytes | str | Image.Image, mime_type: str) -> ProcessedFile:
+        """Compress image to JPEG 85%, no larger than the target long edge.
 
         Args:
-            data: Original image bytes
+            data: Original image bytes or path, or the already opened image
             mime_type: Original MIME type
 
         Returns:
             ProcessedFile with compressed JPEG
         """
-        img = Image.open(io.BytesIO(data))
+        img = self._fit_long_edge(_open_image(data))
 
         # Convert to RGB if necessary (for PNG with alpha)
         if img.mode in ("RGBA", "P"):
@@ -220,77 +677,129 @@ class FileProcessor:
             height=height,
         )
 
-    def _tile_image(self, data: bytes) -> list[ProcessedFile]:
-        """Split large image into tiles.
+    def _tile_image(self, data: bytes | str | Image.Image) -> list[ProcessedFile]:
+        """Split large image into tiles around its content (see core.tiling).
+
+        Blank background is skipped, tiles are cropped to their content and
+        all content is covered by at most MAX_TILES tiles.
 
         Args:
-            data: Original image bytes
+            data: Original image bytes or path, or the already opened image
 
         Returns:
-            List of ProcessedFile tiles
+            List of ProcessedFile tiles, in reading order
         """
-        img = Image.open(io.BytesIO(data))
-        width, height = img.size
-
-        # Calculate tile step (with overlap)
-        step = int(self.TILE_SIZE * (1 - self.TILE_OVERLAP))
-
-        # Calculate grid dimensions
-        cols = math.ceil(width / step)
-        rows = math.ceil(height / step)
-
-        # Limit total tiles
-        total_tiles = cols * rows
-        if total_tiles > self.MAX_TILES:
-            # Reduce grid size proportionally
-            scale = math.sqrt(self.MAX_TILES / total_tiles)
-            cols = max(1, int(cols * scale))
-            rows = max(1, int(rows * scale))
-            # Recalculate step to cover entire image
-            step = max(width // cols, height // rows)
-
+        img = _open_image(data)
         result = []
+        for tile in plan_tiles(img, self.TILE_SIZE, self.TILE_OVERLAP, self.MAX_TILES):
+            crop = img.crop(tile.box)
+            if tile.scale > 1:
+                if crop.mode == "P":
+                    crop = crop.convert("RGBA")
+                crop = crop.resize(tile.size, Image.Resampling.LANCZOS)
+            result.append(self._encode_tile(crop))
+        return result
 
-        for row in range(rows):
-            for col in range(cols):
-                # Calculate tile bounds
-                x1 = col * step
-                y1 = row * step
-                x2 = min(x1 + self.TILE_SIZE, width)
-                y2 = min(y1 + self.TILE_SIZE, height)
+    def _encode_tile(self, tile: Image.Image) -> ProcessedFile:
+        """Encode a tile: PNG for flat graphics (text, UI), lossy for photographic content."""
+        buffer = io.BytesIO()
+        if tile.getcolors(self.TILE_LOSSLESS_MAX_COLORS) is not None:
+            tile.save(buffer, format="PNG")
+            mime_type = "image/png"
+        else:
+            options = {"quality": self.JPEG_QUALITY}
+            if self.TILE_LOSSY_FORMAT == "WEBP":
+                options["method"] = self.TILE_WEBP_METHOD
+            elif tile.mode not in ("RGB", "L"):
+                tile = tile.convert("RGB")  # JPEG has no alpha
+            tile.save(buffer, format=self.TILE_LOSSY_FORMAT, **options)
+            mime_type = f"image/{self.TILE_LOSSY_FORMAT.lower()}"
 
-                # Crop tile
-                tile = img.crop((x1, y1, x2, y2))
+        return ProcessedFile(
+            data=base64.b64encode(buffer.getvalue()).decode("utf-8"),
+            mime_type=mime_type,
+            width=tile.width,
+            height=tile.height,
+        )
 
-                # Save as PNG
-                buffer = io.BytesIO()
-                tile.save(buffer, format="PNG")
-                tile_bytes = buffer.getvalue()
+    async def _download(self, url: str, headers: dict[str, str] | None = None) -> Download:
+        """Stream a file into memory or a named temp file, enforcing MAX_FILE_SIZE_MB.
 
-                b64_data = base64.b64encode(tile_bytes).decode("utf-8")
+        Args:
+            url: URL to fetch file from
+            headers: Extra request headers (conditional GET validators)
 
-                result.append(
-                    ProcessedFile(
-                        data=b64_data,
-                        mime_type="image/png",
-                        width=x2 - x1,
-                        height=y2 - y1,
-                    )
-                )
+        Returns:
+            Download of the body (caller closes it), or no source if the
+            server answered 304
 
-                if len(result) >= self.MAX_TILES:
-                    break
-            if len(result) >= self.MAX_TILES:
-                break
+        Raises:
+            FileTooLargeError: If Content-Length or the bytes received exceed the limit
+            FileProcessingError: If fetching fails
+        """
+        max_bytes = self.MAX_FILE_SIZE_MB * 1024 * 1024
+        spool_bytes = self.SPOOL_THRESHOLD_MB * 1024 * 1024
+        buffer = bytearray()
+        spool: IO[bytes] | None = None
+        try:
+            async with get_http_client().stream("GET", url, headers=headers) as response:
+                if response.status_code == httpx.codes.NOT_MODIFIED:
+                    return Download(source=None)
+                response.raise_for_status()
+                etag = response.headers.get("etag")
+                last_modified = response.headers.get("last-modified")
+                # Reject before reading the body when the server declares the size
+                content_length = response.headers.get("content-length", "")
+                if content_length.isdigit():
+                    self._check_size(int(content_length))
+                received = 0
+                async for chunk in response.aiter_bytes(self.DOWNLOAD_CHUNK_SIZE):
+                    received += len(chunk)
+                    if received > max_bytes:
+                        self._check_size(received)
+                    if spool is None and received > spool_bytes:
+                        # Roll over to a file the workers can open by path
+                        spool = tempfile.NamedTemporaryFile(delete=False)
+                        spool.write(buffer)
+                        buffer = bytearray()
+                    if spool is not None:
+                        spool.write(chunk)
+                    else:
+                        buffer += chunk
+        except BaseException as e:
+            if spool is not None:
+                spool.close()
+                os.unlink(spool.name)
+            if isinstance(e, FileProcessingError) or not isinstance(e, Exception):
+                raise
+            raise FileProcessingError(f"Failed to fetch file: {e}") from e
 
-        return result
+        if spool is None:
+            return Download(bytes(buffer), received, etag, last_modified)
+        spool.close()
+        return Download(spool.name, received, etag, last_modified)
+
+    def _cache_params(self, mime_type: str) -> str:
+        """Everything besides the bytes that shapes the result (part of the cache key)."""
+        return (
+            f"{mime_type}|{self.PDF_MIN_DPI}|{self.PDF_MAX_DPI}|{self.IMAGE_TARGET_LONG_EDGE}|"
+            f"{self.JPEG_QUALITY}|{self.MAX_DIMENSION}|{self.COMPRESS_THRESHOLD_MB}|"
+            f"{self.TILE_SIZE}|{self.TILE_OVERLAP}|{self.MAX_TILES}|{self.TILE_LOSSY_FORMAT}|"
+            f"{self.TILE_LOSSLESS_MAX_COLORS}|{self.PDF_TEXT_LAYER}|"
+            f"{self.PDF_TEXT_MIN_CHARS}|{self.PDF_TEXT_MAX_IMAGE_COVERAGE}|"
+            f"{self.PDF_TEXT_MAX_DRAWINGS}"
+        )
 
-    async def process(self, url: str, mime_type: str) -> ProcessingResult:
+    async def process(
+        self, url: str, mime_type: str, pages: str | None = None, thumbnails: bool = False
+    ) -> ProcessingResult:
         """Process a file from URL.
 
         Args:
             url: URL to fetch file from
             mime_type: MIME type of file
+            pages: PDF page range, e.g. "1-3,7" (all pages if None)
+            thumbnails: PDFs: return low-res previews plus a document handle
 
         Returns:
             ProcessingResult with processed files
@@ -298,48 +807,200 @@ class FileProcessor:
         Raises:
             FileProcessingError: If fetching or processing fails
         """
-        try:
-            # Fetch file (follow redirects for hosted files)
-            async with httpx.AsyncClient(timeout=60.0, follow_redirects=True) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                data = response.content
-        except Exception as e:
-            raise FileProcessingError(f"Failed to fetch file: {e}") from e
+        return await _collect(self.process_stream(url, mime_type, pages, thumbnails))
 
-        size_bytes = len(data)
+    async def process_stream(
+        self, url: str, mime_type: str, pages: str | None = None, thumbnails: bool = False
+    ) -> AsyncIterator[ProcessingResult | ProcessedFile]:
+        """Process a file from URL, yielding each file as soon as it's ready.
 
-        # For images, get dimensions
+        Yields a ProcessingResult header first (action and original_pages,
+        no files), then every ProcessedFile in order. Fetch and validation
+        errors are raised before the header. Page range and thumbnails only
+        apply to PDFs (see process).
+
+        Raises:
+            FileProcessingError: If fetching or processing fails
+        """
+        # Unsupported types are rejected without downloading anything
+        self._check_type(mime_type)
+        if thumbnails and mime_type in SUPPORTED_PDF_TYPES:
+            # The handle needs the document itself: no cached shortcut
+            with await self._download(url) as download:
+                async for item in self._process_download(
+                    download, mime_type, pages, thumbnails=True
+                ):
+                    yield item
+            return
+        params = self._cache_params(mime_type)
+        if pages is not None and mime_type in SUPPORTED_PDF_TYPES:
+            params += f"|pages={pages}"
+
+        # A URL seen before is revalidated: 304 means the cached result still holds
+        known = processed_file_cache.lookup_url(url) if pages is None else None
+        download = await self._download(url, known.conditional_headers() if known else None)
+        if download.source is None:
+            records = await processed_file_cache.iter_entry(known.key) if known else None
+            if records is not None:
+                processed_file_cache.record_url_hit()
+                async for item in _replay(records):
+                    yield item
+                return
+            download = await self._download(url)  # Entry evicted meanwhile
+
+        with download:
+            key = await asyncio.to_thread(content_key, download.source, params)
+            if pages is None:
+                processed_file_cache.remember_url(url, key, download.etag, download.last_modified)
+            records = await processed_file_cache.iter_entry(key)
+            if records is not None:
+                async for item in _replay(records):
+                    yield item
+                return
+
+            # Cache the result while streaming it, one file at a time
+            writer = None
+            try:
+                async for item in self._process_download(download, mime_type, pages):
+                    if isinstance(item, ProcessingResult):
+                        writer = processed_file_cache.writer(key, _result_to_dict(item))
+                    elif writer is not None:
+                        await writer.append(vars(item))
+                    yield item
+            except BaseException:
+                if writer is not None:
+                    await writer.abort()
+                raise
+            if writer is not None:
+                await writer.commit()
+
+    async def process_document(self, handle: str, pages: str | None = None) -> ProcessingResult:
+        """Process pages of a document previewed with thumbnails (see process_document_stream)."""
+        return await _collect(self.process_document_stream(handle, pages))
+
+    async def process_document_stream(
+        self, handle: str, pages: str | None = None
+    ) -> AsyncIterator[ProcessingResult | ProcessedFile]:
+        """Process pages of a document previewed with thumbnails, at full resolution.
+
+        Same per-page text/render decision and output as process_stream,
+        from the document kept under the handle (no download).
+
+        Raises:
+            DocumentNotFoundError: If the handle is unknown or expired
+            FileProcessingError: If processing fails
+        """
+        with document_cache.use(handle) as document:
+            if document is None:
+                raise DocumentNotFoundError(f"Unknown or expired document handle: {handle}")
+            async with file_worker_pool.limit():
+                page_count, plan = await file_worker_pool.run(
+                    self._plan_pdf_pages, document.path, pages
+                )
+                yield ProcessingResult(
+                    files=[],
+                    action=self._pdf_action(plan),
+                    original_pages=page_count,
+                    pages=[page + 1 for page in plan] if pages is not None else None,
+                    handle=handle,
+                )
+                async for file in self._iter_pdf_pages(document.path, plan):
+                    yield file
+
+    async def _process_download(
+        self,
+        download: Download,
+        mime_type: str,
+        pages: str | None = None,
+        thumbnails: bool = False,
+    ) -> AsyncIterator[ProcessingResult | ProcessedFile]:
+        """Process a download in the worker pool, a few files at a time.
+
+        Spooled bodies are opened by the workers from their temp file; only
+        bodies below SPOOL_THRESHOLD_MB are passed (pickled) as bytes.
+        """
+        async with file_worker_pool.limit():
+            if mime_type in SUPPORTED_PDF_TYPES:
+                self._get_action(download.size, 0, 0, mime_type)
+                # Page tasks open the PDF by path: take the spool, or write a small body out
+                path = download.take_path() or await asyncio.to_thread(
+                    _write_temp_pdf, download.source
+                )
+                try:
+                    if thumbnails:
+                        page_count, selected, files = await file_worker_pool.run(
+                            self._render_pdf_thumbnails, path, pages
+                        )
+                        # The document cache owns the file from here on
+                        handle, path = document_cache.add(path, page_count), None
+                        yield ProcessingResult(
+                            files=[],
+                            action=ProcessingAction.THUMBNAILS,
+                            original_pages=page_count,
+                            pages=[page + 1 for page in selected],
+                            handle=handle,
+                        )
+                        for file in files:
+                            yield file
+                        return
+
+                    page_count, plan = await file_worker_pool.run(self._plan_pdf_pages, path, pages)
+                    yield ProcessingResult(
+                        files=[],
+                        action=self._pdf_action(plan),
+                        original_pages=page_count,
+                        pages=[page + 1 for page in plan] if pages is not None else None,
+                    )
+                    async for file in self._iter_pdf_pages(path, plan):
+                        yield file
+                finally:
+                    if path is not None:
+                        _forget_pdf_document(path)
+                        os.unlink(path)
+                return
+
+            # Images are at most MAX_TILES files: processed in one worker call
+            result = await file_worker_pool.run(self._process_image, download.source, mime_type)
+            files, result.files = result.files, []
+            yield result
+            for file in files:
+                yield file
+
+    def _process_image(self, source: bytes | str, mime_type: str) -> ProcessingResult:
+        """Size-check and process an image (bytes or path), opening it exactly once.
+
+        Runs in the worker pool: the dimensions come from the header and the
+        same Image is handed to compress/tile, so pixels are decoded once.
+        """
+        # Read dimensions from the header (pixels stay undecoded)
+        img = None
         width = 0
         height = 0
-        if mime_type in SUPPORTED_IMAGE_TYPES:
-            try:
-                img = Image.open(io.BytesIO(data))
-                width, height = img.size
-            except Exception:
-                pass
+        try:
+            img = _open_image(source)
+            width, height = img.size
+        except Exception:
+            img = None
 
         # Determine action
-        action = self._get_action(size_bytes, width, height, mime_type)
+        size = os.path.getsize(source) if isinstance(source, str) else len(source)
+        action = self._get_action(size, width, height, mime_type)
 
         # Process based on action
-        if action == ProcessingAction.RENDER_PAGES:
-            files = self._process_pdf(data)
-            return ProcessingResult(
-                files=files,
-                action=action,
-                original_pages=len(files),
-            )
-
-        elif action == ProcessingAction.TILE:
-            files = self._tile_image(data)
+        if action == ProcessingAction.TILE:
+            files = self._tile_image(img if img is not None else source)
             return ProcessingResult(files=files, action=action)
 
         elif action == ProcessingAction.COMPRESS:
-            file = self._compress_image(data, mime_type)
+            file = self._compress_image(img if img is not None else source, mime_type)
+            return ProcessingResult(files=[file], action=action)
+
+        elif action == ProcessingAction.RESIZE:
+            file = self._resize_image(img if img is not None else source, mime_type)
             return ProcessingResult(files=[file], action=action)
 
         else:  # DIRECT
+            data = source if isinstance(source, bytes) else _read_file(source)
             b64_data = base64.b64encode(data).decode("utf-8")
             file = ProcessedFile(
                 data=b64_data,
@@ -348,3 +1009,119 @@ class FileProcessor:
                 height=height,
             )
             return ProcessingResult(files=[file], action=action)
+
+
+def _text_page(text: str) -> ProcessedFile:
+    """A PDF page sent as its text."""
+    return ProcessedFile(data=text, mime_type=TEXT_MIME_TYPE, width=0, height=0)
+
+
+async def _collect(stream: AsyncIterator[ProcessingResult | ProcessedFile]) -> ProcessingResult:
+    """Gather a processing stream into one ProcessingResult."""
+    result = await anext(stream)
+    async for file in stream:
+        result.files.append(file)
+    return result
+
+
+# PDFs opened by path in this process (a worker renders many pages of one
+# document, and handles bring the same document back), least recent first
+OPEN_DOCUMENTS_MAX = 4
+
+
+@dataclass
+class _OpenDocument:
+    """A PDF kept open by path, used by one thread at a time."""
+
+    identity: tuple[int, int] | None  # (inode, mtime) of the file it was opened from
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    doc: fitz.Document | None = None
+    closed: bool = False
+
+    def close(self) -> None:
+        # Waits for a thread still using the document
+        with self.lock:
+            self.closed = True
+            if self.doc is not None:
+                self.doc.close()
+                self.doc = None
+
+
+_open_documents: OrderedDict[str, _OpenDocument] = OrderedDict()
+_open_documents_lock = threading.Lock()  # Guards the dict only, never held while rendering
+
+
+def _file_identity(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def _forget_pdf_document(path: str) -> None:
+    """Close this process's open copy of a PDF file (before the file is deleted)."""
+    with _open_documents_lock:
+        entry = _open_documents.pop(path, None)
+    if entry is not None:
+        entry.close()
+
+
+@contextmanager
+def _pdf_document(source: bytes | str) -> Iterator[fitz.Document]:
+    """Open a PDF from bytes, or reuse this process's open copy of a PDF file."""
+    if not isinstance(source, str):
+        doc = fitz.open(stream=source, filetype="pdf")
+        try:
+            yield doc
+        finally:
+            doc.close()
+        return
+
+    with _open_documents_lock:
+        # Files deleted (or replaced) since they were opened are dropped, so
+        # workers don't keep removed temp files alive through open handles
+        stale = [
+            path
+            for path, entry in _open_documents.items()
+            if _file_identity(path) != entry.identity
+        ]
+        evicted = [_open_documents.pop(path) for path in stale]
+        entry = _open_documents.pop(source, None)
+        if entry is None:
+            entry = _OpenDocument(_file_identity(source))
+        _open_documents[source] = entry
+        while len(_open_documents) > OPEN_DOCUMENTS_MAX:
+            evicted.append(_open_documents.popitem(last=False)[1])
+    for old in evicted:
+        old.close()
+
+    # One user per document at a time: PyMuPDF documents aren't thread-safe
+    with entry.lock:
+        if entry.closed:
+            # Evicted by another thread meanwhile: use a private copy
+            with fitz.open(source, filetype="pdf") as doc:
+                yield doc
+            return
+        if entry.doc is None:
+            entry.doc = fitz.open(source, filetype="pdf")
+        yield entry.doc
+
+
+def _write_temp_pdf(data: bytes) -> str:
+    """Write PDF bytes to a temp file for the workers; the caller deletes it."""
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(data)
+    return f.name
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _open_image(data: bytes | str | Image.Image) -> Image.Image:
+    """Return data as an Image, opening raw bytes or a file path."""
+    if isinstance(data, Image.Image):
+        return data
+    return Image.open(data if isinstance(data, str) else io.BytesIO(data))
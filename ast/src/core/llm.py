@@ -11,19 +11,27 @@ New async-safe API:
 """
 
 import asyncio
+import json
 import logging
+import random
+import re
+import time
+from collections.abc import AsyncIterator, Iterator
 from functools import cache
-from typing import TypeAlias
+from typing import Any, TypeAlias
 
 from langchain_anthropic import ChatAnthropic
 from langchain_aws import ChatBedrock
 from langchain_community.chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_google_vertexai import ChatVertexAI
 from langchain_groq import ChatGroq
 from langchain_ollama import ChatOllama
 from langchain_openai import AzureChatOpenAI, ChatOpenAI
 from langchain_xai import ChatXAI
+from pydantic import PrivateAttr
 
 from core.profiling import log_timing, start_timer
 from core.settings import settings
@@ -65,13 +73,177 @@ _MODEL_TABLE = (
 )
 
 
+class FakeModelError(Exception):
+    """Injected failure from the fake model."""
+
+    status_code = 500
+
+
+class FakeRateLimitError(FakeModelError):
+    """Injected 429 from the fake model."""
+
+    status_code = 429
+
+
+_FAKE_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+
 class FakeToolModel(FakeListChatModel):
-    def __init__(self, responses: list[str]):
-        super().__init__(responses=responses)
+    """Deterministic fake provider for offline and performance testing.
+
+    Streams real AIMessageChunks token by token (word-sized tokens) with a
+    configurable first-token delay and token rate, so streaming, timeout and
+    backpressure paths behave like a live provider.
+
+    Responses are a script cycled in order. Each entry is either a string or a
+    dict with "content" and optional "tool_calls" ([{"name", "args", "id"}]).
+
+    Config (all optional, see FAKE_MODEL_CONFIG):
+        first_token_delay: Seconds before the first token
+        tokens_per_second: Token rate after the first token (None = instant)
+        jitter: Relative random variation applied to every delay (0.1 = ±10%)
+        error_rate: Probability of raising FakeModelError per call
+        rate_limit_rate: Probability of raising FakeRateLimitError (429) per call
+        seed: Seed for jitter/error injection, for reproducible runs
+    """
 
-    def bind_tools(self, tools):
+    responses: list[str | dict[str, Any]]  # type: ignore[assignment]
+    first_token_delay: float = 0.0
+    tokens_per_second: float | None = None
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    seed: int | None = None
+
+    _rng: random.Random = PrivateAttr(default_factory=random.Random)
+
+    def __init__(self, responses: list[str | dict[str, Any]], **kwargs: Any):
+        super().__init__(responses=responses, **kwargs)
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-tool-model"
+
+    def bind_tools(self, tools, **kwargs):
         return self
 
+    def _next_response(self) -> tuple[str, list[dict[str, Any]]]:
+        """Return the next scripted (content, tool_calls), cycling the script."""
+        response = self.responses[self.i]
+        self.i = self.i + 1 if self.i < len(self.responses) - 1 else 0
+        if isinstance(response, str):
+            return response, []
+        tool_calls = [
+            {"name": tc["name"], "args": tc.get("args", {}), "id": tc.get("id") or f"call_{n}"}
+            for n, tc in enumerate(response.get("tool_calls", []))
+        ]
+        return response.get("content", ""), tool_calls
+
+    def _maybe_fail(self) -> None:
+        roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            raise FakeRateLimitError("Fake model rate limit exceeded (429)")
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise FakeModelError("Fake model injected error")
+
+    def _delay(self, seconds: float) -> float:
+        if seconds <= 0:
+            return 0.0
+        if self.jitter:
+            seconds *= 1 + self._rng.uniform(-self.jitter, self.jitter)
+        return max(seconds, 0.0)
+
+    def _token_delay(self) -> float:
+        return self._delay(1 / self.tokens_per_second) if self.tokens_per_second else 0.0
+
+    @staticmethod
+    def _usage(messages: list[BaseMessage], tokens: list[str]) -> dict[str, int]:
+        input_tokens = sum(len(str(m.content)) for m in messages) // 4
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": len(tokens),
+            "total_tokens": input_tokens + len(tokens),
+        }
+
+    def _chunks(
+        self, messages: list[BaseMessage]
+    ) -> tuple[list[str], list[dict[str, Any]], dict[str, int]]:
+        self._maybe_fail()
+        content, tool_calls = self._next_response()
+        tokens = _FAKE_TOKEN_RE.findall(content)
+        return tokens, tool_calls, self._usage(messages, tokens)
+
+    @staticmethod
+    def _last_chunk(
+        tool_calls: list[dict[str, Any]], usage: dict[str, int]
+    ) -> ChatGenerationChunk:
+        return ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": n}
+                    for n, tc in enumerate(tool_calls)
+                ],
+                usage_metadata=usage,
+                chunk_position="last",
+            )
+        )
+
+    def _result(self, tokens, tool_calls, usage) -> ChatResult:
+        message = AIMessage(content="".join(tokens), tool_calls=tool_calls, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        tokens, tool_calls, usage = self._chunks(messages)
+        time.sleep(self._delay(self.first_token_delay) + len(tokens) * self._token_delay())
+        return self._result(tokens, tool_calls, usage)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        tokens, tool_calls, usage = self._chunks(messages)
+        await asyncio.sleep(
+            self._delay(self.first_token_delay) + len(tokens) * self._token_delay()
+        )
+        return self._result(tokens, tool_calls, usage)
+
+    def _stream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> Iterator[ChatGenerationChunk]:
+        tokens, tool_calls, usage = self._chunks(messages)
+        time.sleep(self._delay(self.first_token_delay))
+        for n, token in enumerate(tokens):
+            if n:
+                time.sleep(self._token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield self._last_chunk(tool_calls, usage)
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        tokens, tool_calls, usage = self._chunks(messages)
+        await asyncio.sleep(self._delay(self.first_token_delay))
+        for n, token in enumerate(tokens):
+            if n:
+                await asyncio.sleep(self._token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield self._last_chunk(tool_calls, usage)
+
+
+FAKE_MODEL_RESPONSE = "This is a test response from the fake model."
+
+
+def _create_fake_model() -> FakeToolModel:
+    """Create the fake provider model from settings.FAKE_MODEL_CONFIG."""
+    config = dict(settings.FAKE_MODEL_CONFIG)
+    responses = config.pop("responses", None) or [FAKE_MODEL_RESPONSE]
+    return FakeToolModel(responses=responses, **config)
+
 
 ModelT: TypeAlias = (
     AzureChatOpenAI
@@ -139,6 +311,10 @@ def _detect_provider(model_id: str) -> str:
     """
     model_lower = model_id.lower()
 
+    # Fake provider (offline testing / benchmarks)
+    if model_lower == "fake":
+        return "fake"
+
     # OpenAI patterns
     if model_lower.startswith(("gpt-", "o1-", "o3-")):
         return "openai"
@@ -303,9 +479,7 @@ def get_model(model_name: AllModelEnum | str, /, provider: str | None = None) ->
                 model = ChatVertexAI(model=model_id, temperature=0.5, streaming=True)
 
             case "fake":
-                model = FakeToolModel(
-                    responses=["This is a test response from the fake model."]
-                )
+                model = _create_fake_model()
 
             case _:
                 raise ValueError(f"Unsupported provider: {provider}")
@@ -394,7 +568,7 @@ def get_model(model_name: AllModelEnum | str, /, provider: str | None = None) ->
                 api_key=settings.OPENROUTER_API_KEY,
             )
         elif model_name in FakeModelName:
-            model = FakeToolModel(responses=["This is a test response from the fake model."])
+            model = _create_fake_model()
 
     if model is None:
         raise ValueError(f"Unsupported model: {model_name}")
@@ -510,9 +684,7 @@ def _create_model_sync(model_name: str, provider: str) -> ModelT:
             model = ChatVertexAI(model=model_name, temperature=0.5, streaming=True)
 
         case "fake":
-            model = FakeToolModel(
-                responses=["This is a test response from the fake model."]
-            )
+            model = _create_fake_model()
 
         case _:
             raise ValueError(f"Unsupported provider: {provider}")
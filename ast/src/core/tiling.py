@@ -0,0 +1,222 @@
+"""Content-aware tiling for images too large to send whole.
+
+Screenshots and scanned forms are mostly background: cutting them into a
+fixed grid sends tiles of pure whitespace. Tiles here follow the content.
+
+★ Insight ─────────────────────────────────────
+- One pass over the pixels (grayscale, NumPy, a band of rows at a time)
+  builds an ink map: mean and standard deviation of every CELL x CELL block
+- A cell is blank when it's flat and the colour of the image's background
+  (the dominant flat colour: white page, dark-mode UI); flat blocks of any
+  other colour still count as content
+- Content is split into regions at blank gaps (recursive XY-cut); regions
+  that fit one tile together are merged, larger ones are gridded with
+  overlap, windows without content are dropped and the rest are cropped to
+  their content
+- When that needs more than max_tiles, windows grow (and are scaled down to
+  tile_size) until it fits, so every content cell is always covered
+─────────────────────────────────────────────────
+"""
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image
+
+CELL = 32  # Ink map resolution, in pixels
+FLAT_STD = 6.0  # Cells below this standard deviation are flat
+BACKGROUND_TOLERANCE = 12.0  # Flat cells within this of the background mean are blank
+BACKGROUND_MIN_SHARE = 0.4  # The dominant flat colour is background only if this common
+MIN_GAP_CELLS = 2  # Blank rows/columns needed to split a region
+WINDOW_GROWTH = 1.25  # Window scale step when the tiles don't fit max_tiles
+
+
+@dataclass
+class Tile:
+    """A region of the image, sent scaled down by `scale` (1.0 = as is)."""
+
+    box: tuple[int, int, int, int]  # x1, y1, x2, y2 in image pixels
+    scale: float = 1.0
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """Output size in pixels."""
+        x1, y1, x2, y2 = self.box
+        return (
+            max(1, round((x2 - x1) / self.scale)),
+            max(1, round((y2 - y1) / self.scale)),
+        )
+
+
+def content_mask(img: Image.Image, cell: int = CELL) -> np.ndarray:
+    """Ink map: True for each cell x cell block holding content."""
+    gray = np.asarray(img.convert("L"))
+    height, width = gray.shape
+    rows, cols = math.ceil(height / cell), math.ceil(width / cell)
+    means = np.empty((rows, cols), dtype=np.float32)
+    stds = np.empty((rows, cols), dtype=np.float32)
+
+    # A band of cell rows at a time: float copies stay a band in size
+    for row in range(rows):
+        band = gray[row * cell : (row + 1) * cell]
+        if cols * cell != width:
+            band = np.pad(band, ((0, 0), (0, cols * cell - width)), mode="edge")
+        blocks = band.reshape(band.shape[0], cols, cell).astype(np.float32)
+        means[row] = blocks.mean(axis=(0, 2))
+        stds[row] = blocks.std(axis=(0, 2))
+
+    flat = stds < FLAT_STD
+    if not flat.any():
+        return np.ones((rows, cols), dtype=bool)
+
+    # Background: the most common flat brightness, if it's common enough
+    bins = (means[flat] // 8).astype(np.int64)
+    counts = np.bincount(bins)
+    background_bin = int(counts.argmax())
+    if counts[background_bin] / flat.size < BACKGROUND_MIN_SHARE:
+        return np.ones((rows, cols), dtype=bool)
+    background = float(means[flat][bins == background_bin].mean())
+    return ~(flat & (np.abs(means - background) <= BACKGROUND_TOLERANCE))
+
+
+def _find_gap(profile: np.ndarray, min_gap: int) -> tuple[int, int] | None:
+    """First run of at least min_gap False values strictly inside profile."""
+    start = None
+    for i, filled in enumerate(profile):
+        if not filled and start is None:
+            start = i
+        elif filled and start is not None:
+            if i - start >= min_gap:
+                return start, i
+            start = None
+    return None
+
+
+def content_regions(mask: np.ndarray, min_gap: int = MIN_GAP_CELLS) -> list[tuple[int, ...]]:
+    """Split content into regions at blank gaps (recursive XY-cut).
+
+    Returns:
+        (row1, col1, row2, col2) cell boxes, end-exclusive, one per region
+    """
+    regions: list[tuple[int, ...]] = []
+    stack = [(0, 0, mask.shape[0], mask.shape[1])]
+    while stack:
+        r1, c1, r2, c2 = stack.pop()
+        sub = mask[r1:r2, c1:c2]
+        rows = np.flatnonzero(sub.any(axis=1))
+        if rows.size == 0:
+            continue
+        cols = np.flatnonzero(sub.any(axis=0))
+        # Trim blank margins
+        r1, r2 = r1 + int(rows[0]), r1 + int(rows[-1]) + 1
+        c1, c2 = c1 + int(cols[0]), c1 + int(cols[-1]) + 1
+        sub = mask[r1:r2, c1:c2]
+
+        row_gap = _find_gap(sub.any(axis=1), min_gap)
+        if row_gap is not None:
+            stack += [(r1, c1, r1 + row_gap[0], c2), (r1 + row_gap[1], c1, r2, c2)]
+            continue
+        col_gap = _find_gap(sub.any(axis=0), min_gap)
+        if col_gap is not None:
+            stack += [(r1, c1, r2, c1 + col_gap[0]), (r1, c1 + col_gap[1], r2, c2)]
+            continue
+        regions.append((r1, c1, r2, c2))
+    return sorted(regions)
+
+
+def _merge(boxes: list[tuple[int, ...]], window: int) -> list[tuple[int, ...]]:
+    """Greedily merge boxes whose union still fits in one window."""
+    groups: list[tuple[int, ...]] = []
+    for x1, y1, x2, y2 in boxes:
+        for i, (gx1, gy1, gx2, gy2) in enumerate(groups):
+            union = (min(x1, gx1), min(y1, gy1), max(x2, gx2), max(y2, gy2))
+            if union[2] - union[0] <= window and union[3] - union[1] <= window:
+                groups[i] = union
+                break
+        else:
+            groups.append((x1, y1, x2, y2))
+    return groups
+
+
+def _positions(start: int, stop: int, window: int, overlap: float) -> list[int]:
+    """Window starts covering [start, stop), the last one flush with stop."""
+    length = stop - start
+    if length <= window:
+        return [start]
+    count = math.ceil((length - window) / (window * (1 - overlap))) + 1
+    return [start + round(i * (length - window) / (count - 1)) for i in range(count)]
+
+
+def _layout(
+    mask: np.ndarray,
+    boxes: list[tuple[int, ...]],
+    size: tuple[int, int],
+    window: int,
+    overlap: float,
+    cell: int,
+) -> list[tuple[int, int, int, int]]:
+    """Tile boxes covering every content cell, with windows of `window` pixels."""
+    width, height = size
+    tiles = []
+    for x1, y1, x2, y2 in _merge(boxes, window):
+        for wy in _positions(y1, y2, window, overlap):
+            for wx in _positions(x1, x2, window, overlap):
+                # Crop the window to the content cells it holds
+                r1, c1 = wy // cell, wx // cell
+                r2 = math.ceil(min(wy + window, height) / cell)
+                c2 = math.ceil(min(wx + window, width) / cell)
+                sub = mask[r1:r2, c1:c2]
+                rows = np.flatnonzero(sub.any(axis=1))
+                if rows.size == 0:
+                    continue  # Nothing but background
+                cols = np.flatnonzero(sub.any(axis=0))
+                tiles.append(
+                    (
+                        max(wx, (c1 + int(cols[0])) * cell),
+                        max(wy, (r1 + int(rows[0])) * cell),
+                        min(wx + window, width, (c1 + int(cols[-1]) + 1) * cell),
+                        min(wy + window, height, (r1 + int(rows[-1]) + 1) * cell),
+                    )
+                )
+    return tiles
+
+
+def plan_tiles(
+    img: Image.Image,
+    tile_size: int,
+    overlap: float,
+    max_tiles: int,
+    cell: int = CELL,
+) -> list[Tile]:
+    """Tiles covering all of an image's content, at most max_tiles of them.
+
+    Args:
+        img: The image to tile
+        tile_size: Largest tile edge sent, in pixels
+        overlap: Overlap between neighbouring tiles of a region (0-1)
+        max_tiles: Upper bound on the number of tiles
+        cell: Ink map resolution, in pixels
+
+    Returns:
+        Tiles in reading order (top to bottom, left to right)
+    """
+    width, height = img.size
+    mask = content_mask(img, cell)
+    boxes = [
+        (c1 * cell, r1 * cell, min(c2 * cell, width), min(r2 * cell, height))
+        for r1, c1, r2, c2 in content_regions(mask)
+    ]
+    if not boxes:
+        # Nothing but background: one overview of the whole image
+        return [Tile((0, 0, width, height), max(1.0, max(width, height) / tile_size))]
+
+    scale = 1.0
+    while True:
+        window = round(tile_size * scale)
+        tiles = _layout(mask, boxes, (width, height), window, overlap, cell)
+        if len(tiles) <= max_tiles or window >= max(width, height):
+            break
+        scale *= WINDOW_GROWTH
+    tiles.sort(key=lambda box: (box[1], box[0]))
+    return [Tile(box, scale) for box in tiles[:max_tiles]]
@@ -0,0 +1,65 @@
+"""Embedding functions for semantic memory.
+
+`get_embeddings()` resolves MEMORY_EMBEDDINGS ("provider:model") into a
+LangChain Embeddings instance. "fake" gives an offline, deterministic
+hashing embedding for tests and local development.
+"""
+
+import hashlib
+import re
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from core.settings import settings
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class HashingEmbeddings(Embeddings):
+    """Offline bag-of-words embeddings via feature hashing.
+
+    Texts sharing words get a high cosine similarity, which is enough to
+    exercise recall end to end without a model or network.
+    """
+
+    def __init__(self, dims: int = 256):
+        self.dims = dims
+
+    def _embed(self, text: str) -> list[float]:
+        vector = np.zeros(self.dims, dtype=np.float32)
+        for token in _TOKEN_RE.findall(text.casefold()):
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            vector[int.from_bytes(digest, "little") % self.dims] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+def get_embeddings(spec: str | None = None) -> Embeddings:
+    """
+    Create the embedding function for semantic memory.
+
+    Args:
+        spec: "provider:model" (defaults to MEMORY_EMBEDDINGS), e.g.
+            "openai:text-embedding-3-small" or "fake"
+
+    Raises:
+        ValueError: If the provider is not supported
+    """
+    provider, _, model = (spec or settings.MEMORY_EMBEDDINGS).partition(":")
+    if provider == "fake":
+        return HashingEmbeddings(settings.MEMORY_EMBEDDING_DIMS)
+    if provider == "openai":
+        from langchain_openai import OpenAIEmbeddings
+
+        return OpenAIEmbeddings(
+            model=model or "text-embedding-3-small",
+            dimensions=settings.MEMORY_EMBEDDING_DIMS,
+        )
+    raise ValueError(f"Unsupported embeddings provider: {provider!r}")
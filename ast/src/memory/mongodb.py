@@ -1,9 +1,30 @@
+import asyncio
 import logging
+import re
 import urllib.parse
-from contextlib import AbstractAsyncContextManager
+from collections.abc import AsyncIterator, Iterable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from datetime import UTC, datetime
+from itertools import groupby
+from typing import Any
 
 from langgraph.checkpoint.mongodb.aio import AsyncMongoDBSaver
+from langgraph.store.base import (
+    GetOp,
+    Item,
+    ListNamespacesOp,
+    MatchCondition,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+)
+from langgraph.store.base.batch import AsyncBatchedBaseStore
+from pymongo import AsyncMongoClient, DeleteOne, UpdateOne
+from pymongo.asynchronous.collection import AsyncCollection
 
+from core.profiling import log_timing, start_timer
 from core.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -60,3 +81,189 @@ def get_mongo_saver() -> AbstractAsyncContextManager[AsyncMongoDBSaver]:
     return AsyncMongoDBSaver.from_conn_string(
         get_mongo_connection_string(), db_name=settings.MONGO_DB
     )
+
+
+# =============================================================================
+# Long-term store
+# =============================================================================
+
+# Documents: {prefix: "a.b", key, value, created_at, updated_at}
+# (prefix, key) is unique and serves point reads; (prefix, updated_at) serves
+# namespace listing, which returns the most recently updated items first.
+_ITEM_PROJECTION = {"_id": 0, "prefix": 1, "key": 1, "value": 1, "created_at": 1, "updated_at": 1}
+
+
+def _namespace_to_text(namespace: tuple[str, ...]) -> str:
+    return ".".join(namespace)
+
+
+def _prefix_query(namespace_prefix: tuple[str, ...]) -> dict[str, Any]:
+    """Match a namespace and its children (tuple-prefix semantics, index friendly)."""
+    if not namespace_prefix:
+        return {}
+    text = _namespace_to_text(namespace_prefix)
+    return {"$or": [{"prefix": text}, {"prefix": {"$regex": f"^{re.escape(text)}\\."}}]}
+
+
+def _filter_query(filter: dict[str, Any] | None, path: str = "value") -> dict[str, Any]:
+    """Translate a BaseStore filter to a Mongo query on the value document.
+
+    Nested dicts match partially (like InMemoryStore/Postgres JSONB containment);
+    dicts of $-operators ($eq, $ne, $gt, $gte, $lt, $lte) pass through.
+    """
+    query: dict[str, Any] = {}
+    for key, value in (filter or {}).items():
+        field = f"{path}.{key}"
+        if isinstance(value, dict) and value and all(k.startswith("$") for k in value):
+            query[field] = value
+        elif isinstance(value, dict):
+            query.update(_filter_query(value, field))
+        else:
+            query[field] = value
+    return query
+
+
+def _does_match(condition: MatchCondition, namespace: tuple[str, ...]) -> bool:
+    path = tuple(condition.path)
+    if len(namespace) < len(path):
+        return False
+    if condition.match_type == "prefix":
+        candidate = namespace[: len(path)]
+    else:
+        candidate = namespace[len(namespace) - len(path) :]
+    return all(p == "*" or p == n for p, n in zip(path, candidate, strict=True))
+
+
+def _to_item(doc: dict[str, Any], cls: type[Item] = Item) -> Item:
+    return cls(
+        namespace=tuple(doc["prefix"].split(".")),
+        key=doc["key"],
+        value=doc["value"],
+        created_at=doc["created_at"],
+        updated_at=doc["updated_at"],
+    )
+
+
+class AsyncMongoDBStore(AsyncBatchedBaseStore):
+    """Async MongoDB implementation of LangGraph's BaseStore.
+
+    Concurrent aget/aput/asearch calls are coalesced by AsyncBatchedBaseStore
+    into abatch, which applies the ops in order: each run of consecutive
+    reads issues one `$in` find per namespace, each run of puts/deletes a
+    single unordered bulk_write. Vector search is not supported; `query` is
+    ignored like InMemoryStore without an index.
+    """
+
+    supports_ttl = False
+
+    def __init__(self, collection: AsyncCollection) -> None:
+        super().__init__()
+        self.collection = collection
+
+    async def setup(self) -> None:
+        """Create the compound indexes (idempotent)."""
+        await self.collection.create_index(
+            [("prefix", 1), ("key", 1)], unique=True, name="prefix_key"
+        )
+        await self.collection.create_index(
+            [("prefix", 1), ("updated_at", -1)], name="prefix_updated_at"
+        )
+
+    async def abatch(self, ops: Iterable[Op]) -> list[Result]:
+        ops = list(ops)
+        for op in ops:
+            if not isinstance(op, GetOp | PutOp | SearchOp | ListNamespacesOp):
+                raise ValueError(f"Unknown operation type: {type(op)}")
+        results: list[Result] = [None] * len(ops)
+
+        # Runs of consecutive reads (or puts) execute together, and runs in
+        # batch order: every read sees exactly the puts issued before it
+        for is_put, run in groupby(enumerate(ops), key=lambda entry: isinstance(entry[1], PutOp)):
+            if is_put:
+                # Last write wins within a run
+                await self._bulk_put({(op.namespace, op.key): op for _, op in run}.values())
+            else:
+                await self._read(list(run), results)
+        return results
+
+    async def _read(self, run: list[tuple[int, Op]], results: list[Result]) -> None:
+        gets: dict[str, list[tuple[int, GetOp]]] = {}
+        reads = []
+        for idx, op in run:
+            if isinstance(op, GetOp):
+                gets.setdefault(_namespace_to_text(op.namespace), []).append((idx, op))
+            elif isinstance(op, SearchOp):
+                reads.append(self._search(idx, op, results))
+            else:
+                reads.append(self._list_namespaces(idx, op, results))
+        reads.extend(self._get_many(prefix, items, results) for prefix, items in gets.items())
+        await asyncio.gather(*reads)
+
+    async def _get_many(
+        self, prefix: str, items: list[tuple[int, GetOp]], results: list[Result]
+    ) -> None:
+        keys = list({op.key for _, op in items})
+        query = {"prefix": prefix, "key": keys[0] if len(keys) == 1 else {"$in": keys}}
+        docs = {doc["key"]: doc async for doc in self.collection.find(query, _ITEM_PROJECTION)}
+        for idx, op in items:
+            if op.key in docs:
+                results[idx] = _to_item(docs[op.key])
+
+    async def _search(self, idx: int, op: SearchOp, results: list[Result]) -> None:
+        query = {**_prefix_query(op.namespace_prefix), **_filter_query(op.filter)}
+        cursor = (
+            self.collection.find(query, _ITEM_PROJECTION)
+            .sort("updated_at", -1)
+            .skip(op.offset)
+            .limit(op.limit)
+        )
+        results[idx] = [_to_item(doc, SearchItem) async for doc in cursor]
+
+    async def _list_namespaces(self, idx: int, op: ListNamespacesOp, results: list[Result]) -> None:
+        # Push the first literal prefix down to the index, filter the rest in Python
+        query: dict[str, Any] = {}
+        for condition in op.match_conditions or ():
+            if condition.match_type == "prefix" and "*" not in condition.path:
+                query = _prefix_query(tuple(condition.path))
+                break
+        namespaces = {
+            tuple(prefix.split(".")) for prefix in await self.collection.distinct("prefix", query)
+        }
+        namespaces = {
+            ns for ns in namespaces if all(_does_match(c, ns) for c in op.match_conditions or ())
+        }
+        if op.max_depth is not None:
+            namespaces = {ns[: op.max_depth] for ns in namespaces}
+        results[idx] = sorted(namespaces)[op.offset : op.offset + op.limit]
+
+    async def _bulk_put(self, puts: Iterable[PutOp]) -> None:
+        now = datetime.now(UTC)
+        requests = []
+        for op in puts:
+            selector = {"prefix": _namespace_to_text(op.namespace), "key": op.key}
+            if op.value is None:
+                requests.append(DeleteOne(selector))
+            else:
+                update = {
+                    "$set": {"value": op.value, "updated_at": now},
+                    "$setOnInsert": {"created_at": now},
+                }
+                requests.append(UpdateOne(selector, update, upsert=True))
+        await self.collection.bulk_write(requests, ordered=False)
+
+
+@asynccontextmanager
+async def get_mongo_store() -> AsyncIterator[AsyncMongoDBStore]:
+    """Initialize and return a MongoDB long-term store."""
+    validate_mongo_config()
+    if settings.MONGO_DB is None:  # for type checking
+        raise ValueError("MONGO_DB is not set")
+
+    start = start_timer()
+    client = AsyncMongoClient(get_mongo_connection_string(), tz_aware=True)
+    try:
+        store = AsyncMongoDBStore(client[settings.MONGO_DB][settings.MONGO_STORE_COLLECTION])
+        log_timing("mongo_store_connected", start)
+        yield store
+    finally:
+        await client.close()
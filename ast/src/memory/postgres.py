@@ -1,13 +1,15 @@
 import logging
+from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from langgraph.store.postgres import AsyncPostgresStore
-from psycopg.rows import dict_row
-from psycopg_pool import AsyncConnectionPool
 
 from core.profiling import log_timing, start_timer
 from core.settings import settings
+from memory.postgres_pool import REPLICA_POOL, postgres_pool_manager
+from memory.postgres_replica import ReplicaRoutedPostgresSaver, ReplicaRoutedPostgresStore
+from memory.semantic import memory_index_config
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +39,11 @@ def validate_postgres_config() -> None:
             f"POSTGRES_MIN_CONNECTIONS_PER_POOL ({settings.POSTGRES_MIN_CONNECTIONS_PER_POOL}) must be less than or equal to POSTGRES_MAX_CONNECTIONS_PER_POOL ({settings.POSTGRES_MAX_CONNECTIONS_PER_POOL})"
         )
 
+    if settings.POSTGRES_POOL_MODE not in ("shared", "split"):
+        raise ValueError(
+            f"POSTGRES_POOL_MODE must be 'shared' or 'split', got {settings.POSTGRES_POOL_MODE!r}"
+        )
+
 
 def get_postgres_connection_string() -> str:
     """Build and return the PostgreSQL connection string from settings."""
@@ -53,88 +60,55 @@ def get_postgres_connection_string() -> str:
     )
 
 
+@asynccontextmanager
+async def _replica_pool() -> AsyncIterator[object | None]:
+    """The read replica pool, or None when POSTGRES_REPLICA_DSN is not set."""
+    if settings.POSTGRES_REPLICA_DSN is None:
+        yield None
+        return
+    async with postgres_pool_manager.pool(REPLICA_POOL) as pool:
+        yield pool
+
+
 @asynccontextmanager
 async def get_postgres_saver():
-    """Initialize and return a PostgreSQL saver instance based on a connection pool for more resilent connections."""
+    """Initialize and return a PostgreSQL saver backed by the managed connection pool."""
     validate_postgres_config()
-    application_name = settings.POSTGRES_APPLICATION_NAME + "-" + "saver"
-
-    logger.warning(f"⏱️ [saver_pool_config] min={settings.POSTGRES_MIN_CONNECTIONS_PER_POOL}, max={settings.POSTGRES_MAX_CONNECTIONS_PER_POOL}")
-    start = start_timer()
-    async with AsyncConnectionPool(
-        get_postgres_connection_string(),
-        min_size=settings.POSTGRES_MIN_CONNECTIONS_PER_POOL,
-        max_size=settings.POSTGRES_MAX_CONNECTIONS_PER_POOL,
-        # Langgraph requires autocommmit=true and row_factory to be set to dict_row.
-        # Application_name is passed so you can identify the connection in your Postgres database connection manager.
-        kwargs={"autocommit": True, "row_factory": dict_row, "application_name": application_name},
-        # makes sure that the connection is still valid before using it
-        check=AsyncConnectionPool.check_connection,
-    ) as pool:
-        log_timing("saver_pool_entered", start)
-
-        # POOL WARMUP - Force real connections to Neon
-        logger.warning(f"⏱️ [saver_warmup_start] Warming up {settings.POSTGRES_MIN_CONNECTIONS_PER_POOL} connections...")
+
+    async with postgres_pool_manager.pool("saver") as pool, _replica_pool() as replica:
+        logger.warning("⏱️ [saver_before_setup] AsyncPostgresSaver instance creating...")
         start = start_timer()
-        try:
-            await pool.wait(timeout=60.0)  # 60s timeout for Neon cold start
-            log_timing("saver_warmup_complete", start)
-        except Exception as e:
-            logger.error(f"❌ [saver_warmup_failed] {e}")
-            raise
-
-        try:
-            logger.warning("⏱️ [saver_before_setup] AsyncPostgresSaver instance creating...")
-            start = start_timer()
+        if replica is None:
             checkpointer = AsyncPostgresSaver(pool)
-            await checkpointer.setup()
-            log_timing("saver_setup_complete", start)
-            yield checkpointer
-        finally:
-            await pool.close()
+        else:
+            # History reads may use the replica, writes stay on the primary
+            checkpointer = ReplicaRoutedPostgresSaver(pool, replica_conn=replica)
+        await checkpointer.setup()
+        log_timing("saver_setup_complete", start)
+        yield checkpointer
 
 
 @asynccontextmanager
 async def get_postgres_store():
     """
-    Get a PostgreSQL store instance based on a connection pool for more resilent connections.
+    Get a PostgreSQL store instance backed by the managed connection pool.
 
     Returns an AsyncPostgresStore instance that can be used with async context manager pattern.
-
+    In shared pool mode (default) the store and the saver use the same pool.
+    With POSTGRES_REPLICA_DSN set, reads are routed to the read replica.
     """
     validate_postgres_config()
-    application_name = settings.POSTGRES_APPLICATION_NAME + "-" + "store"
-
-    logger.warning(f"⏱️ [store_pool_config] min={settings.POSTGRES_MIN_CONNECTIONS_PER_POOL}, max={settings.POSTGRES_MAX_CONNECTIONS_PER_POOL}")
-    start = start_timer()
-    async with AsyncConnectionPool(
-        get_postgres_connection_string(),
-        min_size=settings.POSTGRES_MIN_CONNECTIONS_PER_POOL,
-        max_size=settings.POSTGRES_MAX_CONNECTIONS_PER_POOL,
-        # Langgraph requires autocommmit=true and row_factory to be set to dict_row
-        # Application_name is passed so you can identify the connection in your Postgres database connection manager.
-        kwargs={"autocommit": True, "row_factory": dict_row, "application_name": application_name},
-        # makes sure that the connection is still valid before using it
-        check=AsyncConnectionPool.check_connection,
-    ) as pool:
-        log_timing("store_pool_entered", start)
-
-        # POOL WARMUP - Force real connections to Neon
-        logger.warning(f"⏱️ [store_warmup_start] Warming up {settings.POSTGRES_MIN_CONNECTIONS_PER_POOL} connections...")
+
+    async with postgres_pool_manager.pool("store") as pool, _replica_pool() as replica:
+        logger.warning("⏱️ [store_before_setup] AsyncPostgresStore instance creating...")
         start = start_timer()
-        try:
-            await pool.wait(timeout=60.0)  # 60s timeout for Neon cold start
-            log_timing("store_warmup_complete", start)
-        except Exception as e:
-            logger.error(f"❌ [store_warmup_failed] {e}")
-            raise
-
-        try:
-            logger.warning("⏱️ [store_before_setup] AsyncPostgresStore instance creating...")
-            start = start_timer()
-            store = AsyncPostgresStore(pool)
-            await store.setup()
-            log_timing("store_setup_complete", start)
-            yield store
-        finally:
-            await pool.close()
+        # pgvector index for semantic memory (None when MEMORY_ENABLED is off)
+        if replica is None:
+            store = AsyncPostgresStore(pool, index=memory_index_config())
+        else:
+            store = ReplicaRoutedPostgresStore(
+                pool, replica_conn=replica, index=memory_index_config()
+            )
+        await store.setup()
+        log_timing("store_setup_complete", start)
+        yield store
@@ -0,0 +1,264 @@
+"""Postgres Pool Manager - Shared/split connection pools with telemetry.
+
+The saver and the store used to open one AsyncConnectionPool each, doubling
+the connection footprint on Neon. The manager hands out pools by role:
+
+- shared mode: saver and store use a single pool (one footprint, one warmup)
+- split mode: each role gets its own pool with an explicit max-size budget
+- the "replica" role always gets its own pool on POSTGRES_REPLICA_DSN
+
+★ Insight ─────────────────────────────────────
+- Singleton pattern via __new__ so saver and store see the same pools
+- Pools are reference counted per role and closed when the last user exits
+- Checkout latency is measured around getconn(); wait/in-use/idle come from
+  psycopg_pool's own counters
+- Optional keep-warm task pings the database during business hours so Neon
+  compute never scales to zero and the 60s cold-start wait disappears
+─────────────────────────────────────────────────
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from core.profiling import log_timing, start_timer
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SHARED_POOL = "shared"
+REPLICA_POOL = "replica"
+CHECKOUT_SAMPLE_SIZE = 1024
+
+
+class InstrumentedAsyncConnectionPool(AsyncConnectionPool):
+    """AsyncConnectionPool that records checkout latency."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._checkout_ms: deque[float] = deque(maxlen=CHECKOUT_SAMPLE_SIZE)
+        self._checkout_count = 0
+        self._checkout_max_ms = 0.0
+
+    async def getconn(self, timeout: float | None = None):
+        start = time.perf_counter()
+        conn = await super().getconn(timeout=timeout)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._checkout_ms.append(elapsed_ms)
+        self._checkout_count += 1
+        self._checkout_max_ms = max(self._checkout_max_ms, elapsed_ms)
+        return conn
+
+    def checkout_stats(self) -> dict[str, Any]:
+        """Checkout latency summary over the most recent samples."""
+        samples = sorted(self._checkout_ms)
+        if not samples:
+            return {"count": 0, "meanMs": None, "p50Ms": None, "p95Ms": None, "maxMs": None}
+
+        def _pct(q: float) -> float:
+            return round(samples[min(len(samples) - 1, int(q * len(samples)))], 3)
+
+        return {
+            "count": self._checkout_count,
+            "meanMs": round(sum(samples) / len(samples), 3),
+            "p50Ms": _pct(0.50),
+            "p95Ms": _pct(0.95),
+            "maxMs": round(self._checkout_max_ms, 3),
+        }
+
+    def telemetry(self) -> dict[str, Any]:
+        """Pool saturation counters plus checkout latency."""
+        stats = self.get_stats()
+        size = stats.get("pool_size", 0)
+        idle = stats.get("pool_available", 0)
+        return {
+            "minSize": self.min_size,
+            "maxSize": self.max_size,
+            "size": size,
+            "inUse": size - idle,
+            "idle": idle,
+            "waiting": stats.get("requests_waiting", 0),
+            "requests": stats.get("requests_num", 0),
+            "waitMsTotal": stats.get("requests_wait_ms", 0),
+            "timeouts": stats.get("requests_errors", 0),
+            "checkout": self.checkout_stats(),
+        }
+
+
+def within_keep_warm_window(now: datetime | None = None) -> bool:
+    """Return True if `now` falls inside the configured business hours."""
+    tz = ZoneInfo(settings.POSTGRES_KEEP_WARM_TIMEZONE)
+    now = now.astimezone(tz) if now else datetime.now(tz)
+    if settings.POSTGRES_KEEP_WARM_WEEKDAYS_ONLY and now.weekday() >= 5:
+        return False
+    return settings.POSTGRES_KEEP_WARM_START_HOUR <= now.hour < settings.POSTGRES_KEEP_WARM_END_HOUR
+
+
+class PostgresPoolManager:
+    """Singleton owner of the Postgres connection pools.
+
+    Usage:
+        from memory.postgres_pool import postgres_pool_manager
+
+        async with postgres_pool_manager.pool("saver") as pool:
+            checkpointer = AsyncPostgresSaver(pool)
+
+        postgres_pool_manager.stats()  # exposed on /health
+    """
+
+    _instance: "PostgresPoolManager | None" = None
+
+    def __new__(cls) -> "PostgresPoolManager":
+        """Singleton pattern - always return the same instance."""
+        if cls._instance is None:
+            instance = super().__new__(cls)
+            instance._pools: dict[str, InstrumentedAsyncConnectionPool] = {}
+            instance._refs: dict[str, int] = {}
+            instance._lock = asyncio.Lock()
+            instance._keep_warm_task: asyncio.Task | None = None
+            instance._keep_warm_pings = 0
+            instance._keep_warm_failures = 0
+            cls._instance = instance
+        return cls._instance
+
+    def _pool_name(self, role: str) -> str:
+        if role == REPLICA_POOL:
+            return REPLICA_POOL
+        return SHARED_POOL if settings.POSTGRES_POOL_MODE == "shared" else role
+
+    def _budget(self, name: str) -> tuple[int, int]:
+        """Return (min_size, max_size) for a pool."""
+        max_size = settings.POSTGRES_MAX_CONNECTIONS_PER_POOL
+        if name == "saver" and settings.POSTGRES_SAVER_POOL_MAX:
+            max_size = settings.POSTGRES_SAVER_POOL_MAX
+        elif name == "store" and settings.POSTGRES_STORE_POOL_MAX:
+            max_size = settings.POSTGRES_STORE_POOL_MAX
+        elif name == REPLICA_POOL and settings.POSTGRES_REPLICA_POOL_MAX:
+            max_size = settings.POSTGRES_REPLICA_POOL_MAX
+        return min(settings.POSTGRES_MIN_CONNECTIONS_PER_POOL, max_size), max_size
+
+    async def _open(self, name: str) -> InstrumentedAsyncConnectionPool:
+        # Lazy import to avoid a cycle with memory.postgres
+        from memory.postgres import get_postgres_connection_string
+
+        if name == REPLICA_POOL:
+            if settings.POSTGRES_REPLICA_DSN is None:
+                raise ValueError("POSTGRES_REPLICA_DSN is not set")
+            conninfo = settings.POSTGRES_REPLICA_DSN.get_secret_value()
+        else:
+            conninfo = get_postgres_connection_string()
+        min_size, max_size = self._budget(name)
+        logger.warning(f"⏱️ [{name}_pool_config] min={min_size}, max={max_size}")
+        start = start_timer()
+        pool = InstrumentedAsyncConnectionPool(
+            conninfo,
+            min_size=min_size,
+            max_size=max_size,
+            # Langgraph requires autocommmit=true and row_factory to be set to dict_row.
+            # Application_name is passed so you can identify the connection in your Postgres database connection manager.
+            kwargs={
+                "autocommit": True,
+                "row_factory": dict_row,
+                "application_name": f"{settings.POSTGRES_APPLICATION_NAME}-{name}",
+            },
+            # makes sure that the connection is still valid before using it
+            check=AsyncConnectionPool.check_connection,
+            open=False,
+        )
+        await pool.open()
+        log_timing(f"{name}_pool_entered", start)
+
+        # POOL WARMUP - Force real connections to Neon
+        logger.warning(f"⏱️ [{name}_warmup_start] Warming up {min_size} connections...")
+        start = start_timer()
+        try:
+            await pool.wait(timeout=settings.POSTGRES_POOL_WAIT_TIMEOUT)
+            log_timing(f"{name}_warmup_complete", start)
+        except Exception as e:
+            logger.error(f"❌ [{name}_warmup_failed] {e}")
+            await pool.close()
+            raise
+        return pool
+
+    async def acquire(self, role: str) -> InstrumentedAsyncConnectionPool:
+        """Return the pool serving `role`, opening it on first use."""
+        name = self._pool_name(role)
+        async with self._lock:
+            if name not in self._pools:
+                self._pools[name] = await self._open(name)
+                self._refs[name] = 0
+            self._refs[name] += 1
+            if settings.POSTGRES_KEEP_WARM and self._keep_warm_task is None:
+                self._keep_warm_task = asyncio.create_task(self._keep_warm_loop())
+            return self._pools[name]
+
+    async def release(self, role: str) -> None:
+        """Drop one reference to `role`'s pool, closing it when unused."""
+        name = self._pool_name(role)
+        async with self._lock:
+            if name not in self._refs:
+                return
+            self._refs[name] -= 1
+            if self._refs[name] > 0:
+                return
+            pool = self._pools.pop(name)
+            del self._refs[name]
+            if not self._pools and self._keep_warm_task is not None:
+                self._keep_warm_task.cancel()
+                self._keep_warm_task = None
+        await pool.close()
+
+    @asynccontextmanager
+    async def pool(self, role: str) -> AsyncIterator[InstrumentedAsyncConnectionPool]:
+        """Context manager wrapping acquire/release."""
+        pool = await self.acquire(role)
+        try:
+            yield pool
+        finally:
+            await self.release(role)
+
+    async def ping(self) -> bool:
+        """Run SELECT 1 on every open pool. Returns False if any ping failed."""
+        ok = True
+        for name, pool in list(self._pools.items()):
+            try:
+                async with pool.connection() as conn:
+                    await conn.execute("SELECT 1")
+                self._keep_warm_pings += 1
+            except Exception as e:
+                ok = False
+                self._keep_warm_failures += 1
+                logger.error(f"❌ [{name}_keep_warm_failed] {e}")
+        return ok
+
+    async def _keep_warm_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.POSTGRES_KEEP_WARM_INTERVAL)
+            if within_keep_warm_window():
+                await self.ping()
+
+    def stats(self) -> dict[str, Any]:
+        """Telemetry for every open pool."""
+        return {
+            "mode": settings.POSTGRES_POOL_MODE,
+            "pools": {name: pool.telemetry() for name, pool in self._pools.items()},
+            "refs": dict(self._refs),
+            "keepWarm": {
+                "enabled": self._keep_warm_task is not None,
+                "pings": self._keep_warm_pings,
+                "failures": self._keep_warm_failures,
+            },
+        }
+
+
+# Module-level singleton instance
+postgres_pool_manager = PostgresPoolManager()
@@ -0,0 +1,366 @@
+"""Postgres Read Replica Routing - store and checkpoint reads off the primary.
+
+With POSTGRES_REPLICA_DSN set, the store and the saver are wrapped so that
+reads can be served by a read replica while every write goes to the primary:
+
+- store reads (get_workflow, summaries, thread history, memories) go to the
+  replica by default
+- checkpoint reads go to the replica only inside read_preference("replica")
+  (history endpoints): a run reads its checkpoint to write the next one, so
+  graph execution always reads from the primary
+
+★ Insight ─────────────────────────────────────
+- Singleton pattern via __new__ so store and saver share the replica state
+- Replica lag is probed at most every POSTGRES_REPLICA_LAG_CHECK_INTERVAL;
+  above POSTGRES_REPLICA_MAX_LAG, or for POSTGRES_REPLICA_RETRY_AFTER after
+  an error, reads go to the primary
+- Read-your-writes: keys, namespaces and threads written by this process are
+  remembered for max lag + check interval, and reads touching them go to the
+  primary (this covers any read later in the same request)
+- Routing happens in abatch, so it also applies to the operations the store's
+  background loop batches together; a batch with any write goes to the primary
+─────────────────────────────────────────────────
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Hashable, Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Literal
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import CheckpointTuple
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.store.base import GetOp, Item, ListNamespacesOp, Op, PutOp, Result, SearchOp
+from langgraph.store.postgres import AsyncPostgresStore
+
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+ReadPreference = Literal["auto", "primary", "replica"]
+
+_read_preference: ContextVar[ReadPreference] = ContextVar("read_preference", default="auto")
+
+# Replay lag in seconds; 0 when the replica has replayed everything it received
+# (an idle primary would otherwise look like a lagging replica)
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END AS lag
+"""
+
+
+@contextmanager
+def read_preference(preference: ReadPreference) -> Iterator[None]:
+    """Prefer the primary or the replica for reads in this context.
+
+    "primary" forces store reads to the primary (read-modify-write);
+    "replica" lets checkpoint reads use the replica (history endpoints).
+    """
+    token = _read_preference.set(preference)
+    try:
+        yield
+    finally:
+        _read_preference.reset(token)
+
+
+# =============================================================================
+# Replica Router
+# =============================================================================
+
+
+class ReplicaRouter:
+    """Singleton deciding whether a read may be served by the replica.
+
+    Usage:
+        from memory.postgres_replica import replica_router
+
+        replica_router.note_write(("checkpoint", thread_id))
+        if not replica_router.recently_written(key) and await replica_router.usable(pool):
+            ...  # read from the replica
+
+        replica_router.stats()  # exposed on /health
+    """
+
+    _instance: "ReplicaRouter | None" = None
+
+    def __new__(cls) -> "ReplicaRouter":
+        """Singleton pattern - always return the same instance."""
+        if cls._instance is None:
+            instance = super().__new__(cls)
+            instance._writes: OrderedDict[Hashable, float] = OrderedDict()
+            instance._namespaces: OrderedDict[tuple[str, ...], float] = OrderedDict()
+            instance._probe_lock = asyncio.Lock()
+            instance.reset()
+            cls._instance = instance
+        return cls._instance
+
+    def reset(self) -> None:
+        """Forget writes, lag and counters."""
+        self._writes.clear()
+        self._namespaces.clear()
+        self._lag: float | None = None
+        self._checked_at: float | None = None
+        self._failed_at: float | None = None
+        self._counts = {"replica": 0, "primary": 0, "fallbacks": 0}
+
+    # -------------------------------------------------------------------------
+    # Read-your-writes
+    # -------------------------------------------------------------------------
+
+    def _window(self) -> float:
+        return settings.POSTGRES_REPLICA_MAX_LAG + settings.POSTGRES_REPLICA_LAG_CHECK_INTERVAL
+
+    def _prune(self, entries: OrderedDict, now: float) -> None:
+        # Oldest first: stop at the first entry still inside the window
+        window = self._window()
+        while entries and now - next(iter(entries.values())) > window:
+            entries.popitem(last=False)
+
+    def note_write(self, key: Hashable, namespace: tuple[str, ...] | None = None) -> None:
+        """Remember a write so reads of it go to the primary for a while."""
+        now = time.monotonic()
+        self._writes[key] = now
+        self._writes.move_to_end(key)
+        self._prune(self._writes, now)
+        if namespace is not None:
+            self._namespaces[namespace] = now
+            self._namespaces.move_to_end(namespace)
+            self._prune(self._namespaces, now)
+
+    def recently_written(self, key: Hashable) -> bool:
+        written_at = self._writes.get(key)
+        return written_at is not None and time.monotonic() - written_at <= self._window()
+
+    def namespace_recently_written(self, prefix: tuple[str, ...] | None = None) -> bool:
+        """Whether a namespace under `prefix` (any namespace if None) was just written."""
+        self._prune(self._namespaces, time.monotonic())
+        if prefix is None:
+            return bool(self._namespaces)
+        return any(namespace[: len(prefix)] == prefix for namespace in self._namespaces)
+
+    # -------------------------------------------------------------------------
+    # Replica health
+    # -------------------------------------------------------------------------
+
+    async def _probe(self, pool: Any) -> float:
+        async with pool.connection() as conn:
+            cursor = await conn.execute(REPLICA_LAG_SQL)
+            row = await cursor.fetchone()
+        return float(row["lag"])
+
+    async def usable(self, pool: Any) -> bool:
+        """Whether the replica is healthy and within POSTGRES_REPLICA_MAX_LAG."""
+        if (
+            self._failed_at is not None
+            and time.monotonic() - self._failed_at < settings.POSTGRES_REPLICA_RETRY_AFTER
+        ):
+            return False
+        if self._stale_probe():
+            async with self._probe_lock:
+                # Another read may have probed while we waited for the lock
+                if self._stale_probe():
+                    try:
+                        self._lag = await self._probe(pool)
+                    except Exception as e:
+                        self.mark_failed(e)
+                        return False
+                    self._checked_at = time.monotonic()
+                    self._failed_at = None
+        return self._lag <= settings.POSTGRES_REPLICA_MAX_LAG
+
+    def _stale_probe(self) -> bool:
+        return (
+            self._checked_at is None
+            or time.monotonic() - self._checked_at >= settings.POSTGRES_REPLICA_LAG_CHECK_INTERVAL
+        )
+
+    def mark_failed(self, error: Exception) -> None:
+        """Send reads to the primary for POSTGRES_REPLICA_RETRY_AFTER seconds."""
+        logger.error(f"❌ [replica_read_failed] {error}")
+        self._failed_at = time.monotonic()
+        self._checked_at = None
+        self._counts["fallbacks"] += 1
+
+    def record(self, target: Literal["replica", "primary"]) -> None:
+        self._counts[target] += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Routing counters and the last measured lag."""
+        return {
+            "reads": dict(self._counts),
+            "lagSeconds": self._lag,
+            "failing": self._failed_at is not None
+            and time.monotonic() - self._failed_at < settings.POSTGRES_REPLICA_RETRY_AFTER,
+            "trackedWrites": len(self._writes),
+        }
+
+
+# Module-level singleton instance
+replica_router = ReplicaRouter()
+
+
+# =============================================================================
+# Store
+# =============================================================================
+
+
+def _store_key(namespace: tuple[str, ...], key: str) -> tuple[str, tuple[str, ...], str]:
+    return ("store", namespace, key)
+
+
+class ReplicaRoutedPostgresStore(AsyncPostgresStore):
+    """AsyncPostgresStore that serves read-only batches from a replica."""
+
+    def __init__(self, conn: Any, *, replica_conn: Any, **kwargs: Any) -> None:
+        super().__init__(conn, **kwargs)
+        self.replica_conn = replica_conn
+        # Same index config, so semantic searches embed the query the same way
+        self.replica = AsyncPostgresStore(replica_conn, index=kwargs.get("index"))
+
+    def note_write(self, namespace: tuple[str, ...], key: str) -> None:
+        """Record a write made outside abatch (e.g. raw SQL on the primary)."""
+        replica_router.note_write(_store_key(namespace, key), namespace)
+
+    def _replica_eligible(self, ops: list[Op]) -> bool:
+        for op in ops:
+            if isinstance(op, GetOp):
+                if replica_router.recently_written(_store_key(op.namespace, op.key)):
+                    return False
+            elif isinstance(op, SearchOp):
+                if replica_router.namespace_recently_written(op.namespace_prefix):
+                    return False
+            elif isinstance(op, ListNamespacesOp):
+                if replica_router.namespace_recently_written():
+                    return False
+            else:
+                return False
+        return True
+
+    async def abatch(self, ops: Iterable[Op]) -> list[Result]:
+        ops = list(ops)
+        for op in ops:
+            if isinstance(op, PutOp):
+                self.note_write(op.namespace, op.key)
+
+        if (
+            _read_preference.get() != "primary"
+            and self._replica_eligible(ops)
+            and await replica_router.usable(self.replica_conn)
+        ):
+            try:
+                results = await self.replica.abatch(ops)
+                replica_router.record("replica")
+                return results
+            except Exception as e:
+                replica_router.mark_failed(e)
+
+        replica_router.record("primary")
+        return await super().abatch(ops)
+
+    async def aget(
+        self,
+        namespace: tuple[str, ...],
+        key: str,
+        *,
+        refresh_ttl: bool | None = None,
+    ) -> Item | None:
+        # The background batching loop does not see this context's preference
+        if _read_preference.get() == "primary":
+            if refresh_ttl is None:
+                refresh_ttl = (self.ttl_config or {}).get("refresh_on_read", True)
+            return (await self.abatch([GetOp(namespace, key, refresh_ttl=refresh_ttl)]))[0]
+        return await super().aget(namespace, key, refresh_ttl=refresh_ttl)
+
+
+# =============================================================================
+# Saver
+# =============================================================================
+
+
+def _thread_key(config: RunnableConfig | None) -> tuple[str, str] | None:
+    thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+    return ("checkpoint", str(thread_id)) if thread_id is not None else None
+
+
+class ReplicaRoutedPostgresSaver(AsyncPostgresSaver):
+    """AsyncPostgresSaver that serves history reads from a replica.
+
+    Reads only use the replica inside read_preference("replica"), for a
+    thread not written recently by this process.
+    """
+
+    def __init__(self, conn: Any, *, replica_conn: Any, **kwargs: Any) -> None:
+        super().__init__(conn, **kwargs)
+        self.replica_conn = replica_conn
+        self.replica = AsyncPostgresSaver(replica_conn, serde=self.serde)
+
+    async def _use_replica(self, config: RunnableConfig | None) -> bool:
+        key = _thread_key(config)
+        return (
+            _read_preference.get() == "replica"
+            and key is not None
+            and not replica_router.recently_written(key)
+            and await replica_router.usable(self.replica_conn)
+        )
+
+    def _note_write(self, config: RunnableConfig) -> None:
+        key = _thread_key(config)
+        if key is not None:
+            replica_router.note_write(key)
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        if await self._use_replica(config):
+            try:
+                result = await self.replica.aget_tuple(config)
+                replica_router.record("replica")
+                return result
+            except Exception as e:
+                replica_router.mark_failed(e)
+        replica_router.record("primary")
+        return await super().aget_tuple(config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        if await self._use_replica(config):
+            yielded = False
+            try:
+                async for item in self.replica.alist(
+                    config, filter=filter, before=before, limit=limit
+                ):
+                    yielded = True
+                    yield item
+                replica_router.record("replica")
+                return
+            except Exception as e:
+                # Only restart on the primary if the caller has seen nothing yet
+                if yielded:
+                    raise
+                replica_router.mark_failed(e)
+        replica_router.record("primary")
+        async for item in super().alist(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        self._note_write(config)
+        return await super().aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = "") -> None:
+        self._note_write(config)
+        await super().aput_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        replica_router.note_write(("checkpoint", str(thread_id)))
+        await super().adelete_thread(thread_id)
@@ -0,0 +1,331 @@
+"""Semantic long-term memory - facts about a contact, recalled by similarity.
+
+Agent nodes with `memory.semantic` enabled get the top-k facts most relevant
+to the latest message added to their system prompt, instead of replaying
+full histories. After responding, facts worth keeping are extracted from the
+exchange by the model in a background task (write-behind) and stored.
+
+★ Insight ─────────────────────────────────────
+- Singleton pattern via __new__ (same as WorkflowGraphCache)
+- Stores with a vector index (AsyncPostgresStore + pgvector, configured by
+  memory_index_config) embed on put and search natively
+- Other stores keep the embedding next to the fact and are searched with an
+  in-process numpy brute-force index, loaded once per namespace (TTL)
+- Facts are keyed by a hash of their normalized text, so re-extracting a
+  known fact overwrites it instead of duplicating it
+─────────────────────────────────────────────────
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langgraph.store.base import BaseStore
+
+from core.settings import settings
+from memory.embeddings import get_embeddings
+
+logger = logging.getLogger(__name__)
+
+# Namespace for facts: ("memories", workflow_id, subject) / fact hash
+MEMORIES_NAMESPACE = "memories"
+
+EXTRACTION_PROMPT = (
+    "Extract durable facts about the user from the conversation below: "
+    "preferences, personal details, decisions and commitments. Ignore "
+    "small talk and anything only relevant to this exchange. Answer with a "
+    'JSON array of short, self-contained sentences, e.g. ["Prefers email '
+    'over phone calls"]. Answer [] if there is nothing worth remembering.'
+)
+
+
+def memory_namespace(workflow_id: str, subject: str) -> tuple[str, ...]:
+    """Namespace holding the facts about `subject` (user or thread) in a workflow."""
+    return (MEMORIES_NAMESPACE, workflow_id, subject)
+
+
+def memory_index_config() -> dict[str, Any] | None:
+    """Vector index config for stores that support one (None if memory is disabled)."""
+    if not settings.MEMORY_ENABLED:
+        return None
+    return {
+        "dims": settings.MEMORY_EMBEDDING_DIMS,
+        "embed": get_embeddings(),
+        "fields": ["text"],
+    }
+
+
+def _fact_key(text: str) -> str:
+    return hashlib.sha256(" ".join(text.casefold().split()).encode()).hexdigest()[:16]
+
+
+def parse_facts(content: Any) -> list[str]:
+    """Parse the extraction model's answer (JSON array, or one fact per line)."""
+    if not isinstance(content, str):
+        content = "".join(c if isinstance(c, str) else c.get("text", "") for c in content)
+    text = content.strip().removeprefix("```json").removeprefix("```").removesuffix("```")
+    try:
+        facts = json.loads(text)
+    except ValueError:
+        facts = [line.strip().lstrip("-*• ").strip() for line in text.splitlines()]
+    if not isinstance(facts, list):
+        return []
+    return [fact.strip() for fact in facts if isinstance(fact, str) and fact.strip()]
+
+
+# =============================================================================
+# Local vector index
+# =============================================================================
+
+
+class LocalVectorIndex:
+    """Brute-force cosine similarity over a namespace's facts, in numpy.
+
+    Embeddings are stored alongside the facts; the index loads a namespace
+    from the store on first use and reloads it once MEMORY_INDEX_TTL expires
+    (picking up facts written by other processes).
+    """
+
+    def __init__(self) -> None:
+        # namespace -> (loaded_at, keys, texts, unit-norm matrix)
+        self._entries: dict[tuple[str, ...], tuple[float, list[str], list[str], np.ndarray]] = {}
+
+    async def _load(self, store: BaseStore, namespace: tuple[str, ...], page_size: int = 500):
+        keys: list[str] = []
+        texts: list[str] = []
+        vectors: list[list[float]] = []
+        offset = 0
+        while True:
+            items = await store.asearch(namespace, limit=page_size, offset=offset)
+            for item in items:
+                if item.namespace == namespace and "embedding" in item.value:
+                    keys.append(item.key)
+                    texts.append(item.value["text"])
+                    vectors.append(item.value["embedding"])
+            if len(items) < page_size:
+                break
+            offset += page_size
+        matrix = np.asarray(vectors, dtype=np.float32) if vectors else np.zeros((0, 0), np.float32)
+        self._entries[namespace] = (time.monotonic(), keys, texts, _normalize(matrix))
+
+    def add(self, namespace: tuple[str, ...], key: str, text: str, vector: list[float]) -> None:
+        """Add (or replace) a fact in a loaded namespace."""
+        entry = self._entries.get(namespace)
+        if entry is None:
+            return  # Loaded with the fact on first search
+        loaded_at, keys, texts, matrix = entry
+        row = _normalize(np.asarray([vector], dtype=np.float32))
+        if key in keys:
+            i = keys.index(key)
+            texts[i] = text
+            matrix[i] = row[0]
+        else:
+            keys.append(key)
+            texts.append(text)
+            matrix = np.vstack([matrix, row]) if matrix.size else row
+        self._entries[namespace] = (loaded_at, keys, texts, matrix)
+
+    async def search(
+        self, store: BaseStore, namespace: tuple[str, ...], vector: list[float], k: int
+    ) -> list[tuple[str, float]]:
+        """Top-k (text, cosine score) for a query vector."""
+        entry = self._entries.get(namespace)
+        if entry is None or time.monotonic() - entry[0] > settings.MEMORY_INDEX_TTL:
+            await self._load(store, namespace)
+            entry = self._entries[namespace]
+        _, _, texts, matrix = entry
+        if not texts:
+            return []
+        scores = matrix @ _normalize(np.asarray([vector], dtype=np.float32))[0]
+        top = np.argsort(-scores)[:k] if k < len(texts) else np.argsort(-scores)
+        return [(texts[i], float(scores[i])) for i in top]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    if not matrix.size:
+        return matrix
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+# =============================================================================
+# Semantic memory
+# =============================================================================
+
+
+class SemanticMemory:
+    """Singleton facade for remembering and recalling facts.
+
+    Usage:
+        from memory.semantic import semantic_memory
+
+        # Configure once at startup (when MEMORY_ENABLED)
+        semantic_memory.configure(store=store)
+
+        facts = await semantic_memory.recall(namespace, "user message", k=5)
+        semantic_memory.schedule_extraction(namespace, messages, model)
+    """
+
+    _instance: "SemanticMemory | None" = None
+
+    def __new__(cls) -> "SemanticMemory":
+        """Singleton pattern - always return the same instance."""
+        if cls._instance is None:
+            instance = super().__new__(cls)
+            instance._store: BaseStore | None = None
+            instance._embeddings: Embeddings | None = None
+            instance._index = LocalVectorIndex()
+            instance._pending: set[asyncio.Task] = set()
+            cls._instance = instance
+        return cls._instance
+
+    def configure(
+        self,
+        store: BaseStore | None = None,
+        embeddings: Embeddings | None = None,
+    ) -> None:
+        """Configure the store and embedding function.
+
+        Args:
+            store: LangGraph store holding the facts
+            embeddings: Embedding function for stores without a vector index
+                (defaults to get_embeddings())
+        """
+        self._store = store
+        self._embeddings = embeddings
+        self._index.clear()
+
+    @property
+    def enabled(self) -> bool:
+        return self._store is not None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        if self._embeddings is None:
+            self._embeddings = get_embeddings()
+        return self._embeddings
+
+    def _native_index(self) -> bool:
+        """Whether the store embeds and searches facts itself (e.g. pgvector)."""
+        return bool(getattr(self._store, "index_config", None))
+
+    async def remember(self, namespace: tuple[str, ...], facts: list[str]) -> int:
+        """
+        Store facts under a namespace.
+
+        Returns:
+            Number of facts written
+        """
+        if self._store is None or not facts:
+            return 0
+        keys = [_fact_key(fact) for fact in facts]
+        if self._native_index():
+            writes = [
+                self._store.aput(namespace, key, {"text": fact}, index=["text"])
+                for key, fact in zip(keys, facts)
+            ]
+        else:
+            vectors = await self.embeddings.aembed_documents(facts)
+            writes = []
+            for key, fact, vector in zip(keys, facts, vectors):
+                writes.append(
+                    self._store.aput(
+                        namespace, key, {"text": fact, "embedding": vector}, index=False
+                    )
+                )
+                self._index.add(namespace, key, fact, vector)
+        await asyncio.gather(*writes)
+        return len(facts)
+
+    async def _native_recall(self, namespace: tuple[str, ...], query: str, k: int) -> list[str]:
+        """Vector search by the store, restricted to exactly `namespace`.
+
+        Some stores match namespaces as string prefixes (AsyncPostgresStore:
+        `prefix LIKE 'memories.wf.user1%'` also matches user10), so results from
+        other namespaces are dropped and further pages fetched until k remain.
+        """
+        texts: list[str] = []
+        page_size = 2 * k
+        offset = 0
+        while len(texts) < k:
+            items = await self._store.asearch(
+                namespace, query=query, limit=page_size, offset=offset
+            )
+            texts.extend(item.value["text"] for item in items if item.namespace == namespace)
+            if len(items) < page_size:
+                break
+            offset += page_size
+        return texts[:k]
+
+    async def recall(
+        self, namespace: tuple[str, ...], query: str, k: int | None = None
+    ) -> list[str]:
+        """
+        Recall the facts most relevant to `query`.
+
+        Failures are logged and yield no facts, so a memory outage never
+        fails the agent.
+
+        Returns:
+            Up to k facts, most relevant first
+        """
+        if self._store is None or not query:
+            return []
+        k = k or settings.MEMORY_TOP_K
+        try:
+            if self._native_index():
+                return await self._native_recall(namespace, query, k)
+            vector = await self.embeddings.aembed_query(query)
+            return [text for text, _ in await self._index.search(self._store, namespace, vector, k)]
+        except Exception as e:
+            logger.error(f"Failed to recall memories for {namespace}: {e}")
+            return []
+
+    async def extract(
+        self, namespace: tuple[str, ...], messages: list[BaseMessage], model: BaseChatModel
+    ) -> list[str]:
+        """Extract facts from messages with the model and remember them."""
+        transcript = "\n".join(f"{message.type}: {message.text}" for message in messages)
+        response = await model.ainvoke(
+            [SystemMessage(content=EXTRACTION_PROMPT), HumanMessage(content=transcript)]
+        )
+        facts = parse_facts(response.content)
+        await self.remember(namespace, facts)
+        return facts
+
+    def schedule_extraction(
+        self, namespace: tuple[str, ...], messages: list[BaseMessage], model: BaseChatModel
+    ) -> None:
+        """Extract and store facts in a background task so responses never wait on it."""
+        if self._store is None:
+            return
+
+        async def _run() -> None:
+            try:
+                await self.extract(namespace, messages, model)
+            except Exception as e:
+                logger.error(f"Failed to extract memories for {namespace}: {e}")
+
+        task = asyncio.create_task(_run())
+        # Keep a reference until done, otherwise the task may be garbage collected
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def drain(self) -> None:
+        """Wait for pending extractions (shutdown and tests)."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+
+# Module-level singleton instance - import this in other modules
+semantic_memory = SemanticMemory()
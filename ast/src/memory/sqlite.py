@@ -1,40 +1,75 @@
+import re
+from collections.abc import Sequence
 from contextlib import AbstractAsyncContextManager, asynccontextmanager
 
 from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
-from langgraph.store.memory import InMemoryStore
+from langgraph.store.base import SearchOp
+from langgraph.store.sqlite.aio import AsyncSqliteStore
 
 from core.settings import settings
 
+# WAL lets readers run alongside the single writer; NORMAL sync is durable
+# across application crashes in WAL mode and avoids an fsync per commit.
+# case_sensitive_like lets `prefix LIKE 'ns%'` (namespace prefix search) use
+# the primary-key/prefix index instead of scanning the table.
+SQLITE_STORE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA case_sensitive_like=ON",
+)
+
+
+_PREFIX_LIKE = re.compile(r"((?:\w+\.)?prefix) LIKE \?")
 
-def get_sqlite_saver() -> AbstractAsyncContextManager[AsyncSqliteSaver]:
-    """Initialize and return a SQLite saver instance."""
-    return AsyncSqliteSaver.from_conn_string(settings.SQLITE_DB_PATH)
 
+class TuplePrefixSqliteStore(AsyncSqliteStore):
+    """AsyncSqliteStore with BaseStore's tuple-prefix namespace search.
 
-class AsyncInMemoryStore:
-    """Wrapper for InMemoryStore that provides an async context manager interface."""
+    The upstream store searches with `prefix LIKE 'workflow%'`, so ("workflow",)
+    also matched ("workflows",) and ("workflow_traces", ...), and `_` in a
+    namespace was a wildcard. A search now matches the namespace itself and
+    its children: `prefix = 'ns' OR prefix >= 'ns.' AND prefix < 'ns/'`,
+    still a range on the (prefix, key) index.
+    """
+
+    def _prepare_batch_search_queries(self, search_ops: Sequence[tuple[int, SearchOp]]):
+        queries, embedding_requests = super()._prepare_batch_search_queries(search_ops)
+        for i, ((_, op), (query, params)) in enumerate(zip(search_ops, queries)):
+            if not op.namespace_prefix:
+                continue
+            namespace = ".".join(op.namespace_prefix)
+            # Replaced in place: vector placeholders are filled by position later
+            at = params.index(f"{namespace}%")
+            params[at : at + 1] = [namespace, f"{namespace}.", f"{namespace}/"]
+            query = _PREFIX_LIKE.sub(r"(\1 = ? OR (\1 >= ? AND \1 < ?))", query, count=1)
+            queries[i] = (query, params)
+        return queries, embedding_requests
 
-    def __init__(self):
-        self.store = InMemoryStore()
 
-    async def __aenter__(self):
-        return self.store
+def get_sqlite_saver() -> AbstractAsyncContextManager[AsyncSqliteSaver]:
+    """Initialize and return a SQLite saver instance."""
+    return AsyncSqliteSaver.from_conn_string(settings.SQLITE_DB_PATH)
 
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        # No cleanup needed for InMemoryStore
-        pass
 
-    async def setup(self):
-        # No-op method for compatibility with PostgresStore
-        pass
+async def configure_sqlite_store(store: AsyncSqliteStore) -> None:
+    """Apply WAL pragmas and run migrations (store table, (prefix, key) indexes)."""
+    for pragma in SQLITE_STORE_PRAGMAS:
+        await store.conn.execute(pragma)
+    await store.setup()
 
 
 @asynccontextmanager
 async def get_sqlite_store():
-    """Initialize and return a store instance for long-term memory.
+    """Initialize and return a durable SQLite store for long-term memory.
 
-    Note: SQLite-specific store isn't available in LangGraph,
-    so we use InMemoryStore wrapped in an async context manager for compatibility.
+    Uses LangGraph's AsyncSqliteStore (batched abatch, namespace prefix search,
+    JSON filters) in WAL mode, with tuple-prefix namespace search. Data lives in SQLITE_STORE_PATH, separate from the
+    checkpoint database so store writes don't contend with checkpoint writes.
+    Set SQLITE_STORE_PATH=":memory:" for a non-durable store.
     """
-    store_manager = AsyncInMemoryStore()
-    yield await store_manager.__aenter__()
+    async with TuplePrefixSqliteStore.from_conn_string(settings.SQLITE_STORE_PATH) as store:
+        await configure_sqlite_store(store)
+        yield store
@@ -10,8 +10,11 @@ from typing import Any
 from langchain_core.messages import BaseMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
 
+from core.blob_store import resolve_blob_refs
+from memory.semantic import memory_namespace, semantic_memory
 from nodes.base import BaseNode
 from nodes.registry import node_registry
+from nodes.tracing import record_node_input
 
 # Reuse existing utilities (DRY)
 # Import directly to avoid circular import through agents/__init__.py
@@ -54,10 +57,18 @@ class AgentNode(BaseNode):
     Processes system prompt with template variables, trims messages
     to fit token limit, and invokes the configured model.
 
+    With memory.semantic enabled, the facts most relevant to the latest
+    message are recalled into the system prompt, and new facts are
+    extracted from the exchange in the background after responding.
+    Facts are scoped to the run's user_id (falling back to the thread).
+
+    Attachments sent as blob:// refs (files processed with output="ref")
+    stay refs in the state; their bytes are only loaded for the LLM call.
+
     Config:
         prompt: PromptConfig with system prompt and variables
         llm: LLMConfig with model and temperature
-        memory: MemoryConfig with tokenLimit
+        memory: MemoryConfig with tokenLimit, semantic and recallTopK
     """
 
     node_type = "agent"
@@ -72,9 +83,11 @@ class AgentNode(BaseNode):
 
         1. Extract config
         2. Process template variables in system prompt
-        3. Trim messages to fit token limit
-        4. Invoke LLM
-        5. Return response
+        3. Recall relevant facts (semantic memory)
+        4. Trim messages to fit token limit
+        5. Resolve blob:// attachment refs and invoke LLM
+        6. Schedule fact extraction (semantic memory)
+        7. Return response
 
         Args:
             state: Current workflow state with messages
@@ -105,6 +118,23 @@ class AgentNode(BaseNode):
         # Get messages from state
         messages: list[BaseMessage] = state.get("messages", [])
 
+        # Recall facts about the user relevant to the latest message
+        namespace = None
+        if memory_config.get("semantic") and semantic_memory.enabled:
+            configurable = config.get("configurable", {})
+            namespace = memory_namespace(
+                configurable.get("workflow_id", "unknown"),
+                configurable.get("user_id") or thread_id or "anonymous",
+            )
+            query = messages[-1].text if messages else ""
+            facts = await semantic_memory.recall(
+                namespace, query, k=memory_config.get("recallTopK")
+            )
+            if facts:
+                processed_prompt += "\n\nKnown facts about the user:\n" + "\n".join(
+                    f"- {fact}" for fact in facts
+                )
+
         # Trim messages to fit token limit
         trimmed_messages = trim_messages(messages, max_tokens=token_limit)
 
@@ -113,10 +143,15 @@ class AgentNode(BaseNode):
             SystemMessage(content=processed_prompt),
             *trimmed_messages,
         ]
+        record_node_input(messages_for_llm)
 
-        # Get model and invoke
+        # Get model and invoke (attachments loaded now, traces keep the refs)
         model = await get_model_from_name(model_name)
-        response = await model.ainvoke(messages_for_llm)
+        response = await model.ainvoke(await resolve_blob_refs(messages_for_llm))
+
+        # Write-behind: remember new facts without delaying the response
+        if namespace is not None and messages:
+            semantic_memory.schedule_extraction(namespace, [messages[-1], response], model)
 
         # Return state update
         return {
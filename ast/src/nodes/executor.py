@@ -13,9 +13,11 @@ from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, END
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.store.base import BaseStore
+from langgraph.types import Durability
 
 from nodes.base import BaseNode
 from nodes.registry import node_registry
+from nodes.tracing import trace_node
 
 # Import all nodes to register them
 import nodes.triggers  # noqa: F401
@@ -91,6 +93,51 @@ def get_node_executor(
     return node_class(node_id, config)
 
 
+# =============================================================================
+# Checkpoint Durability
+# =============================================================================
+
+# Per-workflow checkpoint durability (flowData.durability):
+# - sync: persist each superstep before the next one runs
+# - async: persist in the background while the next superstep runs (default)
+# - exit: persist only the final state of each run
+# - none: compile without a checkpointer (stateless workflows)
+DURABILITY_MODES = ("sync", "async", "exit", "none")
+DEFAULT_DURABILITY = "async"
+
+
+def get_workflow_durability(flow_data: dict[str, Any]) -> str:
+    """
+    Resolve the checkpoint durability mode of a workflow.
+
+    Args:
+        flow_data: Workflow flowData dict
+
+    Returns:
+        One of DURABILITY_MODES
+
+    Raises:
+        ValueError: If the configured mode is unknown
+    """
+    durability = flow_data.get("durability") or DEFAULT_DURABILITY
+    if durability not in DURABILITY_MODES:
+        raise ValueError(
+            f"Invalid durability '{durability}'. Expected one of: {', '.join(DURABILITY_MODES)}"
+        )
+    return durability
+
+
+def get_run_durability(workflow: dict[str, Any]) -> Durability | None:
+    """
+    Durability to pass to invoke/stream of a workflow's compiled graph.
+
+    Returns None for stateless ("none") workflows, whose graph has no
+    checkpointer and would warn on an explicit durability.
+    """
+    durability = get_workflow_durability(workflow.get("flowData", {}))
+    return None if durability == "none" else durability
+
+
 # =============================================================================
 # Workflow Graph Builder
 # =============================================================================
@@ -111,6 +158,12 @@ async def build_workflow_graph(
     4. Sets the entry point (trigger node)
     5. Compiles and returns the graph
 
+    Every node's execute is wrapped with `trace_node`, so per-node timings
+    and token usage are recorded in the node trace recorder.
+
+    A workflow with flowData.durability "none" is compiled without a
+    checkpointer; other modes are applied per run via `get_run_durability`.
+
     Args:
         workflow: Workflow dict with flowData containing nodes and edges
         checkpointer: Optional checkpointer for conversation persistence
@@ -120,12 +173,14 @@ async def build_workflow_graph(
         Compiled StateGraph ready for execution
 
     Raises:
-        ValueError: If workflow has no trigger node
+        ValueError: If workflow has no trigger node or an invalid durability
         KeyError: If unknown node type is encountered
     """
+    workflow_id = workflow.get("id", "unknown")
     flow_data = workflow.get("flowData", {})
     nodes = flow_data.get("nodes", [])
     edges = flow_data.get("edges", [])
+    durability = get_workflow_durability(flow_data)
 
     # Create StateGraph
     builder = StateGraph(WorkflowStateSchema)
@@ -142,8 +197,8 @@ async def build_workflow_graph(
         # Create executor
         executor = get_node_executor(node_type, node_id, node_config)
 
-        # Add to graph
-        builder.add_node(node_id, executor.execute)
+        # Add to graph (instrumented for per-node tracing)
+        builder.add_node(node_id, trace_node(executor, workflow_id))
 
         # Track triggers
         if node_type.endswith("_trigger"):
@@ -191,5 +246,9 @@ async def build_workflow_graph(
     # In future, we can support multiple entry points
     builder.set_entry_point(trigger_nodes[0])
 
+    # Stateless workflows skip the checkpointer entirely
+    if durability == "none":
+        checkpointer = None
+
     # Compile with optional checkpointer and store
     return builder.compile(checkpointer=checkpointer, store=store)
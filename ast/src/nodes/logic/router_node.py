@@ -19,6 +19,7 @@ from langgraph.types import Command
 
 from nodes.base import BaseNode
 from nodes.registry import node_registry
+from nodes.tracing import record_node_input
 
 logger = logging.getLogger(__name__)
 
@@ -101,6 +102,7 @@ class RouterNode(BaseNode):
 
         # Evaluate expression against state
         value = self._evaluate_expression(expression, state)
+        record_node_input(value)
 
         # Find matching output
         target = default_output
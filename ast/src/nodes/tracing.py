@@ -0,0 +1,428 @@
+"""Node Trace Recorder - Per-node execution timings for workflow runs.
+
+Every node added by `build_workflow_graph` is wrapped with `trace_node`, which
+records start/end, duration, payload sizes and LLM token usage into a bounded
+ring buffer. Traces are grouped by run_id so a full run timeline can be served
+by the `/workflows/{id}/runs/{run_id}/trace` endpoint, and every observation
+feeds a per-node latency histogram.
+
+★ Insight ─────────────────────────────────────
+- Singleton pattern via __new__ (same as WorkflowGraphCache)
+- deque(maxlen=N) ring buffer: old traces fall off, memory stays bounded
+- Nodes report what they consume via record_node_input (ContextVar)
+- Persistence is opt-in, once per run, in a background task off the request path
+─────────────────────────────────────────────────
+"""
+
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+
+from core.settings import settings
+from nodes.base import BaseNode
+
+logger = logging.getLogger(__name__)
+
+# Namespace for persisted run traces: ("workflow_traces", workflow_id) / run_id
+TRACES_NAMESPACE = "workflow_traces"
+
+# Histogram bucket upper bounds in milliseconds (last bucket is +inf)
+LATENCY_BUCKETS_MS: tuple[float, ...] = (
+    5,
+    10,
+    25,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+    10000,
+    30000,
+)
+
+# State keys that mirror data already present in "messages" (not counted twice)
+_MIRROR_KEYS = frozenset({"agent_response"})
+
+# Input size reported by the running node (see record_node_input)
+_node_input_size: ContextVar[int | None] = ContextVar("node_input_size", default=None)
+
+
+@dataclass
+class NodeTrace:
+    """Timing and usage record for a single node execution."""
+
+    run_id: str
+    workflow_id: str
+    node_id: str
+    node_type: str
+    started_at: float  # Unix epoch seconds
+    ended_at: float
+    duration_ms: float
+    input_size: int  # Approximate payload size in characters
+    output_size: int
+    thread_id: str | None = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+    status: str = "ok"  # "ok" or "error"
+    error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class LatencyHistogram:
+    """Fixed-bucket latency histogram for one workflow node."""
+
+    buckets: tuple[float, ...] = LATENCY_BUCKETS_MS
+    counts: list[int] = field(default_factory=list)
+    count: int = 0
+    sum_ms: float = 0.0
+    min_ms: float | None = None
+    max_ms: float | None = None
+
+    def __post_init__(self) -> None:
+        if not self.counts:
+            self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, duration_ms: float) -> None:
+        """Record one observation."""
+        self.counts[bisect_left(self.buckets, duration_ms)] += 1
+        self.count += 1
+        self.sum_ms += duration_ms
+        self.min_ms = duration_ms if self.min_ms is None else min(self.min_ms, duration_ms)
+        self.max_ms = duration_ms if self.max_ms is None else max(self.max_ms, duration_ms)
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate a quantile as the upper bound of the bucket containing it."""
+        if self.count == 0:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target and bucket_count:
+                if i < len(self.buckets):
+                    return float(self.buckets[i])
+                return self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict[str, Any]:
+        labels = [f"le_{int(b)}" for b in self.buckets] + ["le_inf"]
+        return {
+            "count": self.count,
+            "sumMs": round(self.sum_ms, 3),
+            "meanMs": round(self.sum_ms / self.count, 3) if self.count else None,
+            "minMs": self.min_ms,
+            "maxMs": self.max_ms,
+            "p50Ms": self.quantile(0.5),
+            "p95Ms": self.quantile(0.95),
+            "p99Ms": self.quantile(0.99),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+def _payload_size(payload: Any) -> int:
+    """Approximate payload size in characters without serializing it.
+
+    Messages count their content length; other values fall back to len(str()).
+    Cheap enough to run on every node execution.
+    """
+    if payload is None:
+        return 0
+    if isinstance(payload, BaseMessage):
+        content = payload.content
+        return len(content) if isinstance(content, str) else len(str(content))
+    if isinstance(payload, str):
+        return len(payload)
+    if isinstance(payload, dict):
+        return sum(_payload_size(v) for k, v in payload.items() if k not in _MIRROR_KEYS)
+    if isinstance(payload, (list, tuple)):
+        return sum(_payload_size(v) for v in payload)
+    # Command objects carry their state update in .update
+    update = getattr(payload, "update", None)
+    if update is not None:
+        return _payload_size(update)
+    return len(str(payload))
+
+
+def record_node_input(payload: Any) -> None:
+    """Report the part of the state the current node actually consumes.
+
+    Called from inside BaseNode.execute (e.g. AgentNode reports the trimmed
+    messages sent to the LLM). Outside a traced node this is a no-op.
+    """
+    _node_input_size.set(_payload_size(payload))
+
+
+def _default_input(state: dict[str, Any]) -> Any:
+    """Fallback input for nodes that don't report one: the latest message."""
+    messages = state.get("messages") or []
+    return messages[-1:]
+
+
+def _token_usage(output: Any) -> tuple[int, int, int]:
+    """Sum usage_metadata of AI messages produced by a node."""
+    update = output if isinstance(output, dict) else getattr(output, "update", None)
+    if not isinstance(update, dict):
+        return 0, 0, 0
+
+    input_tokens = output_tokens = total_tokens = 0
+    for message in update.get("messages", []) or []:
+        usage = getattr(message, "usage_metadata", None)
+        if not usage:
+            continue
+        input_tokens += usage.get("input_tokens", 0)
+        output_tokens += usage.get("output_tokens", 0)
+        total_tokens += usage.get("total_tokens", 0)
+    return input_tokens, output_tokens, total_tokens
+
+
+class NodeTraceRecorder:
+    """Singleton recorder for per-node execution traces.
+
+    Usage:
+        from nodes.tracing import node_trace_recorder
+
+        # Configure once at startup (optional persistence)
+        node_trace_recorder.configure(store=store, persist=True, capacity=5000)
+
+        # Query a run timeline
+        traces = await node_trace_recorder.aget_run("wf_123", run_id)
+
+        # Per-node latency histograms
+        node_trace_recorder.histograms("wf_123")
+    """
+
+    _instance: "NodeTraceRecorder | None" = None
+
+    def __new__(cls) -> "NodeTraceRecorder":
+        """Singleton pattern - always return the same instance."""
+        if cls._instance is None:
+            instance = super().__new__(cls)
+            instance._pending: set[asyncio.Task] = set()
+            instance.reset()
+            cls._instance = instance
+        return cls._instance
+
+    def reset(self) -> None:
+        """Drop all traces and restore configuration from settings.
+
+        Useful for testing.
+        """
+        self._buffer: deque[NodeTrace] = deque(maxlen=settings.WORKFLOW_TRACE_BUFFER_SIZE)
+        self._histograms: dict[tuple[str, str], LatencyHistogram] = {}
+        self._store: Any | None = None
+        self._persist = settings.WORKFLOW_TRACE_PERSIST
+
+    def configure(
+        self,
+        store: Any | None = None,
+        persist: bool | None = None,
+        capacity: int | None = None,
+    ) -> None:
+        """Configure persistence and ring buffer size.
+
+        Args:
+            store: LangGraph store used to persist run traces
+            persist: Whether completed runs are written to the store
+            capacity: Maximum number of node traces kept in memory
+        """
+        if store is not None:
+            self._store = store
+        if persist is not None:
+            self._persist = persist
+        if capacity is not None and capacity != self._buffer.maxlen:
+            self._buffer = deque(self._buffer, maxlen=capacity)
+
+    def record(self, trace: NodeTrace) -> None:
+        """Append a trace to the ring buffer and update its node histogram."""
+        self._buffer.append(trace)
+        key = (trace.workflow_id, trace.node_id)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = LatencyHistogram()
+        histogram.observe(trace.duration_ms)
+
+    def get_run(self, run_id: str) -> list[NodeTrace]:
+        """Return buffered traces for a run, ordered by start time."""
+        traces = [t for t in self._buffer if t.run_id == run_id]
+        return sorted(traces, key=lambda t: t.started_at)
+
+    async def aget_run(self, workflow_id: str, run_id: str) -> list[dict[str, Any]]:
+        """Return a run timeline from the buffer, falling back to the store.
+
+        Returns:
+            List of trace dicts ordered by start time (empty if unknown run)
+        """
+        traces = [t.to_dict() for t in self.get_run(run_id) if t.workflow_id == workflow_id]
+        if traces or self._store is None:
+            return traces
+
+        item = await self._store.aget(namespace=(TRACES_NAMESPACE, workflow_id), key=run_id)
+        return item.value.get("nodes", []) if item else []
+
+    async def persist_run(self, workflow_id: str, run_id: str) -> bool:
+        """Persist a completed run's traces to the store.
+
+        No-op unless persistence is enabled. Failures are logged and swallowed
+        so tracing can never break a workflow response.
+
+        Returns:
+            True if the run was written to the store
+        """
+        if not self._persist or self._store is None:
+            return False
+
+        traces = [t.to_dict() for t in self.get_run(run_id) if t.workflow_id == workflow_id]
+        if not traces:
+            return False
+
+        try:
+            await self._store.aput(
+                namespace=(TRACES_NAMESPACE, workflow_id),
+                key=run_id,
+                value={"runId": run_id, "workflowId": workflow_id, "nodes": traces},
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to persist trace for run {run_id}: {e}")
+            return False
+
+    def schedule_persist(self, workflow_id: str, run_id: str) -> None:
+        """Persist a run in a background task so responses never wait on it."""
+        if not self._persist or self._store is None:
+            return
+        task = asyncio.create_task(self.persist_run(workflow_id, run_id))
+        # Keep a reference until done, otherwise the task may be garbage collected
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def invalidate(self, workflow_id: str) -> int:
+        """Drop latency histograms for a workflow.
+
+        Called when a workflow is updated or deleted so removed or changed
+        nodes stop showing up in the aggregated histograms.
+
+        Returns:
+            Number of histograms removed.
+        """
+        keys_to_remove = [k for k in self._histograms if k[0] == workflow_id]
+        for key in keys_to_remove:
+            del self._histograms[key]
+        return len(keys_to_remove)
+
+    def histograms(self, workflow_id: str) -> dict[str, dict[str, Any]]:
+        """Return latency histograms for every traced node of a workflow."""
+        return {
+            node_id: histogram.to_dict()
+            for (wf_id, node_id), histogram in self._histograms.items()
+            if wf_id == workflow_id
+        }
+
+    def clear(self) -> int:
+        """Remove all buffered traces and histograms.
+
+        Returns:
+            Number of traces removed.
+        """
+        count = len(self._buffer)
+        self._buffer.clear()
+        self._histograms.clear()
+        return count
+
+    def stats(self) -> dict[str, Any]:
+        """Return buffer statistics."""
+        return {
+            "entries": len(self._buffer),
+            "capacity": self._buffer.maxlen,
+            "histograms": len(self._histograms),
+            "persist": self._persist,
+        }
+
+
+# Module-level singleton instance - import this in other modules
+node_trace_recorder = NodeTraceRecorder()
+
+
+def trace_node(
+    executor: BaseNode,
+    workflow_id: str,
+    recorder: NodeTraceRecorder | None = None,
+) -> Callable[[dict[str, Any], RunnableConfig], Awaitable[Any]]:
+    """Wrap a node's execute method with trace instrumentation.
+
+    The wrapper keeps the (state, config) signature so LangGraph still injects
+    the RunnableConfig. Input size is what the node reports through
+    record_node_input, or the latest message when it reports nothing. The run is identified by `configurable.run_id`, falling
+    back to the thread_id when the caller didn't set one.
+
+    Args:
+        executor: Node instance to wrap
+        workflow_id: ID of the workflow the node belongs to
+        recorder: Recorder to write to (default: module singleton)
+
+    Returns:
+        Async callable to pass to StateGraph.add_node
+    """
+    target = recorder or node_trace_recorder
+
+    async def traced_execute(state: dict[str, Any], config: RunnableConfig) -> Any:
+        configurable = config.get("configurable", {}) if config else {}
+        thread_id = configurable.get("thread_id")
+        run_id = str(configurable.get("run_id") or thread_id or "unknown")
+
+        input_token = _node_input_size.set(None)
+        started_at = time.time()
+        start = time.perf_counter()
+        output: Any = None
+        status = "ok"
+        error: str | None = None
+        try:
+            output = await executor.execute(state, config)
+            return output
+        except Exception as e:
+            status = "error"
+            error = str(e)
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            input_tokens, output_tokens, total_tokens = _token_usage(output)
+            input_size = _node_input_size.get()
+            if input_size is None:
+                input_size = _payload_size(_default_input(state))
+            _node_input_size.reset(input_token)
+            target.record(
+                NodeTrace(
+                    run_id=run_id,
+                    workflow_id=workflow_id,
+                    node_id=executor.node_id,
+                    node_type=executor.node_type,
+                    started_at=started_at,
+                    ended_at=started_at + duration_ms / 1000,
+                    duration_ms=round(duration_ms, 3),
+                    input_size=input_size,
+                    output_size=_payload_size(output),
+                    thread_id=thread_id,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                    total_tokens=total_tokens,
+                    status=status,
+                    error=error,
+                )
+            )
+
+    traced_execute.__name__ = f"traced_{executor.node_id}"
+    return traced_execute
@@ -1,10 +1,12 @@
 """Pydantic schemas for workflow system."""
 
 from datetime import datetime
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field, field_validator
 
+from schema.schema import ChatMessage
+
 
 # Lazy import to avoid circular dependency
 _registry = None
@@ -62,6 +64,13 @@ class MemoryConfig(BaseModel):
     messageLimit: int | None = Field(
         default=None, description="Maximum messages to keep in context"
     )
+    semantic: bool = Field(
+        default=False,
+        description="Recall relevant facts about the user and extract new ones (MEMORY_ENABLED)",
+    )
+    recallTopK: int | None = Field(
+        default=None, ge=1, le=50, description="Facts to recall (default MEMORY_TOP_K)"
+    )
 
 
 class AgentNodeConfig(BaseModel):
@@ -112,6 +121,17 @@ class WorkflowEdge(BaseModel):
     )
 
 
+class RetentionPolicy(BaseModel):
+    """Thread retention policy of a workflow (unset fields use server defaults)."""
+
+    idleTtlHours: float | None = Field(
+        default=None, gt=0, description="Delete threads idle for longer than this"
+    )
+    maxThreads: int | None = Field(
+        default=None, ge=1, description="Keep only the most recently active threads"
+    )
+
+
 class FlowData(BaseModel):
     """Complete workflow flow data with nodes and edges."""
 
@@ -119,6 +139,17 @@ class FlowData(BaseModel):
     edges: list[WorkflowEdge] = Field(
         default=[], description="List of edges connecting nodes"
     )
+    durability: Literal["sync", "async", "exit", "none"] = Field(
+        default="async",
+        description=(
+            "Checkpoint durability: sync (persist every step before the next), "
+            "async (persist in the background), exit (persist only the final state) "
+            "or none (no checkpointer, stateless)"
+        ),
+    )
+    retention: RetentionPolicy | None = Field(
+        default=None, description="Thread retention policy, enforced by the background sweeper"
+    )
 
 
 class WorkflowCreate(BaseModel):
@@ -151,10 +182,48 @@ class WorkflowResponse(BaseModel):
     description: str | None = Field(default=None, description="Workflow description")
     flowData: FlowData = Field(..., description="Workflow flow data")
     isActive: bool = Field(..., description="Whether workflow is active")
+    version: int = Field(default=0, description="Version, bumped on every update (ETag)")
+    createdAt: datetime = Field(..., description="Creation timestamp")
+    updatedAt: datetime | None = Field(default=None, description="Last update timestamp")
+
+
+class WorkflowSummary(BaseModel):
+    """Schema for workflow list views (no flowData)."""
+
+    id: str = Field(..., description="Workflow ID (wf_xxx format)")
+    name: str = Field(..., description="Workflow name")
+    description: str | None = Field(default=None, description="Workflow description")
+    isActive: bool = Field(..., description="Whether workflow is active")
+    version: int = Field(default=0, description="Version, bumped on every update (ETag)")
+    nodeCount: int = Field(default=0, description="Number of nodes in flowData")
     createdAt: datetime = Field(..., description="Creation timestamp")
     updatedAt: datetime | None = Field(default=None, description="Last update timestamp")
 
 
+class WorkflowSummaryPage(BaseModel):
+    """Schema for a page of workflow summaries."""
+
+    items: list[WorkflowSummary] = Field(..., description="Workflow summaries, newest first")
+    nextCursor: str | None = Field(
+        default=None, description="Cursor for the next page, null on the last page"
+    )
+
+
+class ThreadMessage(ChatMessage):
+    """A message of a workflow thread's message projection."""
+
+    seq: int = Field(..., description="Position of the message in the thread (0-based)")
+
+
+class ThreadMessagesPage(BaseModel):
+    """Schema for a page of workflow thread messages."""
+
+    messages: list[ThreadMessage] = Field(..., description="Messages, oldest first")
+    nextCursor: str | None = Field(
+        default=None, description="Cursor for older messages, null at the start of the thread"
+    )
+
+
 class WorkflowInvokeInput(BaseModel):
     """Schema for invoking a workflow."""
 
@@ -163,6 +232,10 @@ class WorkflowInvokeInput(BaseModel):
         description="User message - string for text-only, or list of content items for multimodal",
     )
     threadId: str = Field(..., description="Thread ID (UUID) for conversation")
+    userId: str | None = Field(
+        default=None,
+        description="User/contact ID; scopes semantic memory across threads (defaults to the thread)",
+    )
 
     @field_validator("message")
     @classmethod
@@ -174,6 +247,9 @@ class WorkflowInvokeInput(BaseModel):
         - "text": Text content
         - "image_url": Image with URL
         - "media": Audio/video with base64 data and mime_type
+
+        Image URLs and media data may be blob:// refs from /files/process
+        (output="ref"); agent nodes resolve them at LLM call time.
         """
         if isinstance(v, str):
             if not v.strip():
@@ -5,7 +5,7 @@ Seeds essential data on startup (like WuzAPI's initializeSchema).
 """
 
 import logging
-from datetime import datetime, timezone
+from datetime import UTC, datetime
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -18,6 +18,8 @@ logger = logging.getLogger(__name__)
 # =============================================================================
 
 IVY_WORKFLOW_ID = "wf_ivy"
+MIGRATIONS_NAMESPACE = ("migrations",)
+WORKFLOW_SUMMARIES_MIGRATION = "workflow_summaries_v2"  # v2: nameKey
 DEFAULT_MODEL = "gemini-3-flash-preview"
 
 IVY_SYSTEM_PROMPT = """Você é a Ivy, assistente virtual inteligente do LivChat.ai - a plataforma de WhatsApp API para desenvolvedores.
@@ -68,7 +70,7 @@ def _get_ivy_workflow_data() -> dict:
 
     Flow: manual_trigger → agent → END
     """
-    now = datetime.now(timezone.utc).isoformat()
+    now = datetime.now(UTC).isoformat()
     return {
         "id": IVY_WORKFLOW_ID,
         "name": "Ivy",
@@ -142,11 +144,32 @@ async def run_seeds(store: "BaseStore") -> None:
         if existing:
             logger.info(f"   ⚠️  Workflow '{IVY_WORKFLOW_ID}' already exists, skipping")
         else:
-            workflow_data = _get_ivy_workflow_data()
-            await store.aput(namespace, IVY_WORKFLOW_ID, workflow_data)
+            from workflows.storage import _put_workflow
+
+            # Through the storage layer so the summary projection is written too
+            await _put_workflow(store, _get_ivy_workflow_data())
             logger.info(f"   ✅ Created workflow '{IVY_WORKFLOW_ID}' (Ivy assistant)")
     except Exception as e:
         logger.error(f"   ❌ Failed to seed Ivy workflow: {e}")
         # Don't fail startup, just log the error
 
+    # Migration: summary projection for workflows written before it existed
+    try:
+        from workflows.storage import (
+            backfill_workflow_summaries,
+            setup_workflow_summary_indexes,
+        )
+
+        await setup_workflow_summary_indexes(store)
+        if not await store.aget(MIGRATIONS_NAMESPACE, WORKFLOW_SUMMARIES_MIGRATION):
+            written = await backfill_workflow_summaries(store)
+            await store.aput(
+                MIGRATIONS_NAMESPACE,
+                WORKFLOW_SUMMARIES_MIGRATION,
+                {"appliedAt": datetime.now(UTC).isoformat(), "written": written},
+            )
+            logger.info(f"   ✅ Backfilled {written} workflow summaries")
+    except Exception as e:
+        logger.error(f"   ❌ Failed to backfill workflow summaries: {e}")
+
     logger.info("✅ Seeds complete!")
@@ -1,14 +1,31 @@
 """File processing router for multimodal content."""
 
+import asyncio
+import json
+import logging
+import uuid
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Literal
+
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
 
 from core import (
+    DocumentNotFoundError,
     FileProcessingError,
     FileProcessor,
     FileTooLargeError,
+    InvalidPageRangeError,
+    ProcessedFile,
+    ProcessingResult,
     UnsupportedFileTypeError,
 )
+from core.blob_store import BlobNotFoundError, blob_mime_type, get_blob_store, parse_blob_ref
+from core.file_cache import processed_file_cache
+from core.file_processor import PAGE_RANGE_PATTERN
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/files", tags=["files"])
 
@@ -18,12 +35,26 @@ class ProcessRequest(BaseModel):
 
     url: str
     mime_type: str
+    # inline: base64 in JSON; ref: blob:// refs to the blob store;
+    # raw: multipart/mixed of the raw bytes (direct consumers)
+    output: Literal["inline", "ref", "raw"] = "inline"
+    # PDFs only: 1-based page range ("1-3,7", "10-"), and thumbnail-first mode
+    pages: str | None = Field(default=None, pattern=PAGE_RANGE_PATTERN)
+    thumbnails: bool = False
+
+
+class DocumentPagesRequest(BaseModel):
+    """Request for full-resolution pages of a document previewed with thumbnails."""
+
+    pages: str | None = Field(default=None, pattern=PAGE_RANGE_PATTERN)
+    output: Literal["inline", "ref", "raw"] = "inline"
 
 
 class ProcessedFileResponse(BaseModel):
-    """A processed file."""
+    """A processed file (data when inline, ref when output="ref")."""
 
-    data: str  # base64
+    data: str | None = None  # base64 (the text itself for text/plain pages)
+    ref: str | None = None  # blob://...
     mime_type: str
     width: int
     height: int
@@ -35,50 +66,235 @@ class ProcessResponse(BaseModel):
     files: list[ProcessedFileResponse]
     action: str
     original_pages: int | None = None
+    pages: list[int] | None = None  # Page of each file, when a range was requested
+    handle: str | None = None  # Thumbnails: pass to /files/documents/{handle}/pages
 
 
 @router.post("/process", response_model=ProcessResponse)
-async def process_file(request: ProcessRequest) -> ProcessResponse:
+async def process_file(request: ProcessRequest) -> ProcessResponse | Response:
     """Process a file (PDF, large image) for LLM consumption.
 
-    - PDF: Renders each page as an image (150 DPI)
-    - Large image (> 20MB): Compresses to JPEG 85%
+    - PDF: Text pages as text/plain files, other pages rendered as images
+      (action "text", "render" or "mixed")
+    - Image (> 1568px): Resized to a 1568px long edge
+    - Large image (> 10MB): Compresses to JPEG 85%
     - Huge image (> 4096px): Splits into tiles
 
+    With output="ref" files are written to the blob store and returned as
+    blob:// refs (workflow messages accept them in place of data; text pages
+    stay inline); with output="raw" the response is multipart/mixed, see
+    _multipart_response.
+
+    PDFs can be limited to a page range. With thumbnails=true they come back
+    as low-res previews plus a handle; render the pages needed at full
+    resolution with POST /files/documents/{handle}/pages.
+
     Args:
-        request: URL and mime type of file to process
+        request: URL and mime type of file to process, output mode, pages
 
     Returns:
-        List of processed files (base64 encoded)
+        List of processed files (base64 encoded or refs)
 
     Raises:
-        400: Invalid request (unsupported type, too large)
+        400: Invalid request (unsupported type, too large, page range)
         500: Processing error
     """
     processor = FileProcessor()
+    args = (request.url, request.mime_type, request.pages, request.thumbnails)
+
+    if request.output == "raw":
+        return _multipart_response(*await _open_stream(processor.process_stream(*args)))
 
     try:
-        result = await processor.process(request.url, request.mime_type)
-
-        return ProcessResponse(
-            files=[
-                ProcessedFileResponse(
-                    data=f.data,
-                    mime_type=f.mime_type,
-                    width=f.width,
-                    height=f.height,
-                )
-                for f in result.files
-            ],
-            action=result.action.value,
-            original_pages=result.original_pages,
+        result = await processor.process(*args)
+    except FileProcessingError as e:
+        raise HTTPException(status_code=_status_code(e), detail=str(e))
+    return await _process_response(result, request.output)
+
+
+@router.post("/documents/{handle}/pages", response_model=ProcessResponse)
+async def process_document_pages(
+    handle: str, request: DocumentPagesRequest
+) -> ProcessResponse | Response:
+    """Render pages of a document previewed with thumbnails, at full resolution.
+
+    Same result as /files/process for those pages (text or rendered per
+    page), without downloading the document again.
+
+    Raises:
+        400: Invalid page range, or too many pages
+        404: Unknown or expired handle
+        500: Processing error
+    """
+    processor = FileProcessor()
+
+    if request.output == "raw":
+        stream = processor.process_document_stream(handle, request.pages)
+        return _multipart_response(*await _open_stream(stream))
+
+    try:
+        result = await processor.process_document(handle, request.pages)
+    except FileProcessingError as e:
+        raise HTTPException(status_code=_status_code(e), detail=str(e))
+    return await _process_response(result, request.output)
+
+
+@router.post("/process/stream", response_class=StreamingResponse)
+async def process_file_stream(request: ProcessRequest) -> StreamingResponse:
+    """Process a file, streaming each page/tile as an NDJSON line when ready.
+
+    Lines:
+    - {"type": "meta", "action": ..., "original_pages": ...} first (plus
+      "pages" and "handle" when set)
+    - {"type": "file", "index": i, "data": ..., "mime_type": ..., "width": ..., "height": ...}
+      ("ref" instead of "data" with output="ref")
+    - {"type": "error", "detail": ...} if processing fails midway
+    - {"type": "done", "count": n} last
+
+    Pages can be forwarded to the LLM before the whole PDF is rendered, and
+    the server holds roughly one page per worker instead of the full response.
+    output="raw" streams multipart/mixed instead (see _multipart_response).
+
+    Raises:
+        400: Invalid request (unsupported type, too large, page range)
+        500: Fetch error
+    """
+    header, stream = await _open_stream(
+        FileProcessor().process_stream(
+            request.url, request.mime_type, request.pages, request.thumbnails
         )
+    )
+    if request.output == "raw":
+        return _multipart_response(header, stream)
+
+    async def ndjson_generator() -> AsyncGenerator[str, None]:
+        count = 0
+        try:
+            yield _ndjson({"type": "meta", **_meta(header)})
+            async for f in stream:
+                file = (await _file_response(f, request.output)).model_dump(exclude_none=True)
+                yield _ndjson({"type": "file", "index": count, **file})
+                count += 1
+            yield _ndjson({"type": "done", "count": count})
+        except Exception as e:
+            logger.error(f"Error streaming processed file: {e}")
+            yield _ndjson({"type": "error", "detail": str(e)})
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(ndjson_generator(), media_type="application/x-ndjson")
+
 
-    except UnsupportedFileTypeError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+def _status_code(error: FileProcessingError) -> int:
+    if isinstance(error, (UnsupportedFileTypeError, FileTooLargeError, InvalidPageRangeError)):
+        return 400
+    if isinstance(error, DocumentNotFoundError):
+        return 404
+    return 500
 
-    except FileTooLargeError as e:
-        raise HTTPException(status_code=400, detail=str(e))
 
+def _meta(result: ProcessingResult) -> dict:
+    """Result fields besides the files (pages/handle only when set)."""
+    meta = {"action": result.action.value, "original_pages": result.original_pages}
+    if result.pages is not None:
+        meta["pages"] = result.pages
+    if result.handle is not None:
+        meta["handle"] = result.handle
+    return meta
+
+
+async def _open_stream(
+    stream: AsyncIterator[ProcessingResult | ProcessedFile],
+) -> tuple[ProcessingResult, AsyncIterator[ProcessedFile]]:
+    """Pull a processing stream's header, so fetch/validation errors keep their status codes."""
+    try:
+        return await anext(stream), stream
     except FileProcessingError as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=_status_code(e), detail=str(e))
+
+
+async def _process_response(result: ProcessingResult, output: str) -> ProcessResponse:
+    return ProcessResponse(
+        files=await asyncio.gather(*(_file_response(f, output) for f in result.files)),
+        **_meta(result),
+    )
+
+
+async def _file_response(file: ProcessedFile, output: str) -> ProcessedFileResponse:
+    """Response for a processed file: inline base64, or written to the blob store."""
+    if output == "ref" and not file.is_text:
+        ref = await get_blob_store().put(file.to_bytes(), file.mime_type)
+        return ProcessedFileResponse(
+            ref=ref, mime_type=file.mime_type, width=file.width, height=file.height
+        )
+    return ProcessedFileResponse(
+        data=file.data, mime_type=file.mime_type, width=file.width, height=file.height
+    )
+
+
+def _multipart_response(
+    header: ProcessingResult, stream: AsyncIterator[ProcessedFile]
+) -> StreamingResponse:
+    """Stream files as multipart/mixed raw bytes, without base64 or JSON.
+
+    Parts:
+    - application/json {"action": ..., "original_pages": ...} first (as the NDJSON meta)
+    - one part per file, Content-Type its mime type, with X-Width/X-Height
+      (text/plain; charset=utf-8 for PDF pages sent as text)
+    - application/json {"error": ...} last if processing fails midway
+    """
+    boundary = uuid.uuid4().hex
+
+    def _part(content_type: str, body: bytes, headers: dict[str, str] | None = None) -> bytes:
+        lines = [f"--{boundary}", f"Content-Type: {content_type}", f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode() + body + b"\r\n"
+
+    async def multipart_generator() -> AsyncGenerator[bytes, None]:
+        try:
+            yield _part("application/json", json.dumps(_meta(header)).encode())
+            index = 0
+            async for f in stream:
+                headers = {
+                    "X-Index": str(index),
+                    "X-Width": str(f.width),
+                    "X-Height": str(f.height),
+                }
+                content_type = f"{f.mime_type}; charset=utf-8" if f.is_text else f.mime_type
+                yield _part(content_type, f.to_bytes(), headers)
+                index += 1
+        except Exception as e:
+            logger.error(f"Error streaming processed file: {e}")
+            yield _part("application/json", json.dumps({"error": str(e)}).encode())
+        finally:
+            await stream.aclose()
+        yield f"--{boundary}--\r\n".encode()
+
+    return StreamingResponse(
+        multipart_generator(), media_type=f"multipart/mixed; boundary={boundary}"
+    )
+
+
+def _ndjson(record: dict) -> str:
+    return json.dumps(record) + "\n"
+
+
+@router.get("/blobs/{key}")
+async def get_blob(key: str) -> Response:
+    """Raw bytes of a blob:// ref returned with output="ref" (the key is the part after blob://)."""
+    try:
+        data = await get_blob_store().get(parse_blob_ref(key))
+    except BlobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    # Content-addressed: a key's bytes never change
+    return Response(
+        content=data,
+        media_type=blob_mime_type(key),
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
+
+
+@router.get("/cache/stats")
+async def file_cache_stats() -> dict:
+    """Hit rate and size of the processed file cache."""
+    return processed_file_cache.stats()
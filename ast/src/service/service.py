@@ -22,8 +22,13 @@ from langgraph.types import Command, Interrupt
 from langsmith import Client as LangsmithClient
 
 from agents import DEFAULT_AGENT, AgentGraph, get_agent, get_all_agent_info, load_agent
+from agents.llama_guard import llama_guard
 from core import settings
+from core.document_cache import document_cache
+from core.file_processor import close_http_client, file_worker_pool
 from memory import initialize_database, initialize_store
+from memory.postgres_pool import postgres_pool_manager
+from memory.postgres_replica import read_preference, replica_router
 from seeds import run_seeds
 from schema import (
     ChatHistory,
@@ -132,8 +137,36 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
             logger.warning("⏱️ [lifespan_graph_cache_config] Configuring workflow graph cache...")
             workflow_graph_cache.configure(checkpointer=saver, store=store)
 
+            # Configure per-node trace recorder (persists to store if enabled)
+            from nodes.tracing import node_trace_recorder
+
+            node_trace_recorder.configure(store=store)
+
+            # Semantic long-term memory for agent nodes (opt-in)
+            if settings.MEMORY_ENABLED:
+                from memory.semantic import semantic_memory
+
+                semantic_memory.configure(store=store)
+
+            # Thread retention sweeper (loop runs only if WORKFLOW_GC_ENABLED)
+            from workflows.retention import thread_sweeper
+
+            thread_sweeper.configure(store=store, checkpointer=saver)
+            thread_sweeper.start()
+
+            # File processing worker processes, started ahead of the first upload
+            file_worker_pool.start()
+
             log_timing("lifespan_total", lifespan_start)
-            yield
+            try:
+                yield
+            finally:
+                await thread_sweeper.stop()
+                # Shared download client, worker processes and kept documents
+                # of the file processor
+                await close_http_client()
+                file_worker_pool.shutdown()
+                document_cache.clear()
     except Exception as e:
         logger.error(f"Error during database/store/agents initialization: {e}")
         raise
@@ -439,9 +472,11 @@ async def history(input: ChatHistoryInput) -> ChatHistory:
     # TODO: Hard-coding DEFAULT_AGENT here is wonky
     agent: AgentGraph = get_agent(DEFAULT_AGENT)
     try:
-        state_snapshot = await agent.aget_state(
-            config=RunnableConfig(configurable={"thread_id": input.thread_id})
-        )
+        # History is read-only: serve it from the read replica when configured
+        with read_preference("replica"):
+            state_snapshot = await agent.aget_state(
+                config=RunnableConfig(configurable={"thread_id": input.thread_id})
+            )
         messages: list[AnyMessage] = state_snapshot.values["messages"]
         chat_messages: list[ChatMessage] = [langchain_to_chat_message(m) for m in messages]
         return ChatHistory(messages=chat_messages)
@@ -456,6 +491,14 @@ async def health_check():
 
     health_status = {"status": "ok"}
 
+    pool_stats = postgres_pool_manager.stats()
+    if pool_stats["pools"]:
+        health_status["postgres_pools"] = pool_stats
+    if settings.POSTGRES_REPLICA_DSN is not None:
+        health_status["postgres_replica"] = replica_router.stats()
+    if settings.GROQ_API_KEY is not None:
+        health_status["llama_guard"] = llama_guard.stats()
+
     if settings.LANGFUSE_TRACING:
         try:
             langfuse = Langfuse()
@@ -7,10 +7,11 @@ Provides CRUD operations for workflows and invoke/stream endpoints for execution
 import json
 import logging
 from collections.abc import AsyncGenerator
+from datetime import datetime
 from typing import Annotated, Any
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from langchain_core.messages import HumanMessage
@@ -19,12 +20,17 @@ from langchain_core.runnables import RunnableConfig
 from agents import get_agent
 from core.profiling import log_timing, start_timer
 from core.settings import settings
-from service.utils import convert_message_content_to_string
+from memory.postgres_replica import read_preference
+from service.utils import convert_message_content_to_string, langchain_to_chat_message
+from nodes.executor import get_run_durability
 from nodes.graph_cache import workflow_graph_cache
+from nodes.tracing import node_trace_recorder
 from schema.workflow_schema import (
     WorkflowCreate,
     WorkflowUpdate,
     WorkflowResponse,
+    WorkflowSummaryPage,
+    ThreadMessagesPage,
     WorkflowInvokeInput,
     WorkflowStreamInput,
     validate_workflow_models,
@@ -33,9 +39,14 @@ from workflows import (
     create_workflow,
     get_workflow,
     list_workflows,
+    list_workflow_summaries,
     update_workflow,
     delete_workflow,
+    append_thread_messages,
+    list_thread_messages,
 )
+from workflows.retention import thread_sweeper
+from workflows.versioning import WorkflowVersionConflict, parse_etag_version, workflow_etag
 
 logger = logging.getLogger(__name__)
 
@@ -87,12 +98,68 @@ def _get_store():
     return store
 
 
+def _etag_matches(header: str, etag: str) -> bool:
+    """Check an If-None-Match header (possibly a list or *) against an ETag."""
+    candidates = [c.strip().removeprefix("W/") for c in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _if_match_version(if_match: str | None, workflow_id: str) -> int | None:
+    """Parse the expected version from an If-Match header (None if absent or *)."""
+    if not if_match or if_match.strip() == "*":
+        return None
+    version = parse_etag_version(if_match, workflow_id)
+    if version is None:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="If-Match is not a strong ETag of this workflow",
+        )
+    return version
+
+
 def _get_checkpointer():
     """Get the checkpointer from the workflow agent."""
     agent = get_agent(WORKFLOW_AGENT_ID)
     return agent.checkpointer
 
 
+def _serialize_chat_message(message: Any) -> dict[str, Any] | None:
+    try:
+        return langchain_to_chat_message(message).model_dump()
+    except ValueError:
+        return None  # System messages are not part of the chat history
+
+
+async def _project_thread_messages(
+    store: Any,
+    graph: Any,
+    workflow_id: str,
+    thread_id: str,
+    messages: list[Any],
+) -> None:
+    """Append a run's new messages to the thread's message projection.
+
+    With a checkpointer the state holds the whole thread, so only messages
+    past the projected count are new; stateless graphs only see this run.
+    Failures are logged, never surfaced: history is not on the run's path.
+    """
+    start = start_timer()
+    try:
+        # Versioned head put: the head must not come from a lagging replica
+        with read_preference("primary"):
+            await append_thread_messages(
+                store,
+                workflow_id,
+                thread_id,
+                messages,
+                stateful=graph.checkpointer is not None,
+                serialize=_serialize_chat_message,
+            )
+    except Exception as e:
+        logger.error(f"Error projecting thread messages: {e}")
+    log_timing("router_project_messages", start)
+
+
 # =============================================================================
 # CRUD Endpoints
 # =============================================================================
@@ -165,13 +232,66 @@ async def list_workflows_endpoint(limit: int = 100) -> list[WorkflowResponse]:
         )
 
 
+@router.get("/summaries", response_model=WorkflowSummaryPage)
+async def list_workflow_summaries_endpoint(
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+    cursor: str | None = None,
+    isActive: bool | None = None,
+    updatedAfter: datetime | None = None,
+    updatedBefore: datetime | None = None,
+    namePrefix: str | None = None,
+) -> WorkflowSummaryPage:
+    """
+    List workflow summaries (without flowData) with cursor pagination.
+
+    Args:
+        limit: Page size
+        cursor: nextCursor from the previous page
+        isActive: Filter by active status
+        updatedAfter: Only workflows updated at or after this time
+        updatedBefore: Only workflows updated before this time
+        namePrefix: Case-insensitive name prefix
+
+    Returns:
+        Page of summaries and the cursor for the next page
+    """
+    store = _get_store()
+
+    try:
+        items, next_cursor = await list_workflow_summaries(
+            store,
+            limit=limit,
+            cursor=cursor,
+            is_active=isActive,
+            updated_after=updatedAfter,
+            updated_before=updatedBefore,
+            name_prefix=namePrefix,
+        )
+        return WorkflowSummaryPage(items=items, nextCursor=next_cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error listing workflow summaries: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to list workflow summaries",
+        )
+
+
 @router.get("/{workflow_id}", response_model=WorkflowResponse)
-async def get_workflow_endpoint(workflow_id: str) -> WorkflowResponse:
+async def get_workflow_endpoint(
+    workflow_id: str,
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> WorkflowResponse | Response:
     """
     Get a workflow by ID.
 
+    Returns an ETag; a matching If-None-Match gets 304 without a body.
+
     Args:
         workflow_id: The workflow ID (wf_xxx format)
+        if_none_match: ETag(s) the client already has
 
     Returns:
         Workflow details
@@ -188,6 +308,10 @@ async def get_workflow_endpoint(workflow_id: str) -> WorkflowResponse:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Workflow {workflow_id} not found",
             )
+        etag = workflow_etag(workflow)
+        if if_none_match and _etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
         return WorkflowResponse(**workflow)
     except HTTPException:
         raise
@@ -203,13 +327,19 @@ async def get_workflow_endpoint(workflow_id: str) -> WorkflowResponse:
 async def update_workflow_endpoint(
     workflow_id: str,
     updates: WorkflowUpdate,
+    response: Response,
+    if_match: Annotated[str | None, Header()] = None,
 ) -> WorkflowResponse:
     """
     Update a workflow.
 
+    With If-Match, the update only applies if the workflow is still at that
+    ETag's version (compare-and-swap); otherwise 412.
+
     Args:
         workflow_id: The workflow ID
         updates: Fields to update
+        if_match: ETag the client last saw
 
     Returns:
         Updated workflow
@@ -217,7 +347,10 @@ async def update_workflow_endpoint(
     Raises:
         HTTPException: 400 if workflow contains invalid models
         HTTPException: 404 if workflow not found
+        HTTPException: 412 if If-Match doesn't match the current version
     """
+    expected_version = _if_match_version(if_match, workflow_id)
+
     # Validate models if flowData is being updated
     if updates.flowData:
         is_valid, errors = await validate_workflow_models(
@@ -240,7 +373,9 @@ async def update_workflow_endpoint(
         if "flowData" in updates_dict and updates_dict["flowData"]:
             updates_dict["flowData"] = updates_dict["flowData"]
 
-        updated = await update_workflow(store, workflow_id, updates_dict)
+        updated = await update_workflow(
+            store, workflow_id, updates_dict, expected_version=expected_version
+        )
         if not updated:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -249,8 +384,15 @@ async def update_workflow_endpoint(
 
         # Invalidate cached graph for this workflow
         workflow_graph_cache.invalidate(workflow_id)
+        node_trace_recorder.invalidate(workflow_id)
 
+        response.headers["ETag"] = workflow_etag(updated)
         return WorkflowResponse(**updated)
+    except WorkflowVersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"Workflow {workflow_id} was modified (current version {e.current_version})",
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -262,20 +404,26 @@ async def update_workflow_endpoint(
 
 
 @router.delete("/{workflow_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_workflow_endpoint(workflow_id: str) -> None:
+async def delete_workflow_endpoint(
+    workflow_id: str,
+    if_match: Annotated[str | None, Header()] = None,
+) -> None:
     """
     Delete a workflow.
 
     Args:
         workflow_id: The workflow ID
+        if_match: Optional ETag; delete only if still at that version
 
     Raises:
         HTTPException: 404 if workflow not found
+        HTTPException: 412 if If-Match doesn't match the current version
     """
+    expected_version = _if_match_version(if_match, workflow_id)
     store = _get_store()
 
     try:
-        deleted = await delete_workflow(store, workflow_id)
+        deleted = await delete_workflow(store, workflow_id, expected_version=expected_version)
         if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -284,7 +432,13 @@ async def delete_workflow_endpoint(workflow_id: str) -> None:
 
         # Invalidate cached graph for this workflow
         workflow_graph_cache.invalidate(workflow_id)
+        node_trace_recorder.invalidate(workflow_id)
 
+    except WorkflowVersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"Workflow {workflow_id} was modified (current version {e.current_version})",
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -336,10 +490,10 @@ async def invoke_workflow(
             detail=f"Workflow {workflow_id} not found",
         )
 
-    try:
-        run_id = uuid4()
-        thread_id = input_data.threadId or str(uuid4())
+    run_id = uuid4()
+    thread_id = input_data.threadId or str(uuid4())
 
+    try:
         # Get or build StateGraph from cache
         start = start_timer()
         graph = await workflow_graph_cache.get_or_build(workflow)
@@ -348,6 +502,9 @@ async def invoke_workflow(
         config = RunnableConfig(
             configurable={
                 "thread_id": thread_id,
+                "run_id": str(run_id),
+                "workflow_id": workflow_id,
+                "user_id": input_data.userId,
             },
             run_id=run_id,
         )
@@ -357,9 +514,12 @@ async def invoke_workflow(
         response = await graph.ainvoke(
             input={"messages": [HumanMessage(content=input_data.message)]},
             config=config,
+            durability=get_run_durability(workflow),
         )
         log_timing("router_graph_invoke", start)
 
+        await _project_thread_messages(store, graph, workflow_id, thread_id, response["messages"])
+
         # Get the response from state
         last_message = response["messages"][-1]
         log_timing("router_invoke_total", total_start)
@@ -395,6 +555,9 @@ async def invoke_workflow(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to invoke workflow",
         )
+    finally:
+        # Background write - failed runs are persisted too
+        node_trace_recorder.schedule_persist(workflow_id, str(run_id))
 
 
 async def workflow_stream_generator(
@@ -418,10 +581,11 @@ async def workflow_stream_generator(
     first_event_logged = False
 
     thread_id = input_data.threadId or str(uuid4())
+    run_id = uuid4()
+    workflow_id = workflow.get("id", "unknown")
+    final_messages: list[Any] | None = None
 
     try:
-        run_id = uuid4()
-
         # Get or build StateGraph from cache
         start = start_timer()
         graph = await workflow_graph_cache.get_or_build(workflow)
@@ -430,12 +594,14 @@ async def workflow_stream_generator(
         config = RunnableConfig(
             configurable={
                 "thread_id": thread_id,
+                "run_id": str(run_id),
+                "workflow_id": workflow_id,
+                "user_id": input_data.userId,
             },
             run_id=run_id,
         )
 
         # Log config details for debugging
-        workflow_id = workflow.get("id", "unknown")
         logger.warning(f"⏱️ [stream_config_created] thread={thread_id}, workflow={workflow_id}")
 
         # Log time before calling astream_events (checkpoint loading happens here)
@@ -447,6 +613,7 @@ async def workflow_stream_generator(
             input={"messages": [HumanMessage(content=input_data.message)]},
             config=config,
             version="v2",
+            durability=get_run_durability(workflow),
         ):
             # Log first event received (after checkpoint loading completes)
             if not first_event_logged:
@@ -471,6 +638,7 @@ async def workflow_stream_generator(
                 if event.get("name") == "LangGraph":
                     output = event.get("data", {}).get("output", {})
                     messages = output.get("messages", [])
+                    final_messages = messages
                     if messages:
                         last_msg = messages[-1]
                         if hasattr(last_msg, "content"):
@@ -478,13 +646,19 @@ async def workflow_stream_generator(
                             content_str = convert_message_content_to_string(last_msg.content)
                             yield f"data: {json.dumps({'type': 'complete', 'content': content_str})}\n\n"
 
+        if final_messages is not None:
+            await _project_thread_messages(
+                _get_store(), graph, workflow_id, thread_id, final_messages
+            )
+
     except Exception as e:
         logger.error(f"Error in workflow stream: {e}")
         yield f"data: {json.dumps({'type': 'error', 'content': str(e)})}\n\n"
 
     finally:
         log_timing("stream_total", stream_start)
-        yield f"data: {json.dumps({'type': 'done', 'threadId': thread_id})}\n\n"
+        node_trace_recorder.schedule_persist(workflow.get("id", "unknown"), str(run_id))
+        yield f"data: {json.dumps({'type': 'done', 'threadId': thread_id, 'runId': str(run_id)})}\n\n"
         yield "data: [DONE]\n\n"
 
 
@@ -522,3 +696,118 @@ async def stream_workflow(
         workflow_stream_generator(workflow, input_data),
         media_type="text/event-stream",
     )
+
+
+# =============================================================================
+# Thread History Endpoints
+# =============================================================================
+
+
+@router.get("/{workflow_id}/threads/{thread_id}/messages", response_model=ThreadMessagesPage)
+async def list_thread_messages_endpoint(
+    workflow_id: str,
+    thread_id: str,
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = Query(default=None),
+) -> ThreadMessagesPage:
+    """
+    Get a page of a workflow thread's messages, newest page first.
+
+    Served from the thread's append-only message projection, so a page
+    costs the same regardless of the thread's length.
+
+    Args:
+        workflow_id: The workflow ID
+        thread_id: The thread ID
+        limit: Page size
+        cursor: nextCursor from a previous page, to fetch older messages
+
+    Returns:
+        Messages oldest first, plus the cursor for older messages
+
+    Raises:
+        HTTPException: 400 if the cursor is invalid
+    """
+    store = _get_store()
+    try:
+        messages, next_cursor = await list_thread_messages(
+            store, workflow_id, thread_id, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return ThreadMessagesPage(messages=messages, nextCursor=next_cursor)
+
+
+@router.post("/threads/sweep")
+async def sweep_threads(
+    dry_run: bool = Query(default=True, alias="dryRun"),
+) -> dict[str, Any]:
+    """
+    Run a thread retention sweep now.
+
+    Deletes the checkpoints and projected messages of threads expired by
+    their workflow's retention policy (flowData.retention).
+
+    Args:
+        dry_run: Only report what would be reclaimed (default)
+
+    Returns:
+        Sweep report: threads, checkpoint rows/bytes and store rows reclaimed
+    """
+    report = await thread_sweeper.sweep(
+        dry_run=dry_run, store=_get_store(), checkpointer=_get_checkpointer()
+    )
+    return report.to_dict()
+
+
+# =============================================================================
+# Trace Endpoints
+# =============================================================================
+
+
+@router.get("/{workflow_id}/runs/{run_id}/trace")
+async def get_run_trace(workflow_id: str, run_id: str) -> dict[str, Any]:
+    """
+    Get the per-node execution timeline of a workflow run.
+
+    Args:
+        workflow_id: The workflow ID
+        run_id: The run ID returned by invoke/stream
+
+    Returns:
+        Node traces ordered by start time, plus total duration
+
+    Raises:
+        HTTPException: 404 if no trace is recorded for the run
+    """
+    nodes = await node_trace_recorder.aget_run(workflow_id, run_id)
+    if not nodes:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Trace for run {run_id} not found",
+        )
+
+    total_ms = (nodes[-1]["ended_at"] - nodes[0]["started_at"]) * 1000
+    return {
+        "workflowId": workflow_id,
+        "runId": run_id,
+        "totalMs": round(total_ms, 3),
+        "nodes": nodes,
+    }
+
+
+@router.get("/{workflow_id}/traces/histograms")
+async def get_node_latency_histograms(workflow_id: str) -> dict[str, Any]:
+    """
+    Get per-node latency histograms aggregated over recorded runs.
+
+    Args:
+        workflow_id: The workflow ID
+
+    Returns:
+        Histogram (bucket counts, mean, p50/p95/p99) per node ID
+    """
+    return {
+        "workflowId": workflow_id,
+        "nodes": node_trace_recorder.histograms(workflow_id),
+    }
@@ -2,13 +2,23 @@
 
 from workflows.storage import (
     WORKFLOWS_NAMESPACE,
+    WORKFLOW_SUMMARIES_NAMESPACE,
     generate_workflow_id,
     create_workflow,
     get_workflow,
     list_workflows,
+    list_workflow_summaries,
+    backfill_workflow_summaries,
     update_workflow,
     delete_workflow,
 )
+from workflows.threads import (
+    THREAD_HEADS_NAMESPACE,
+    THREAD_MESSAGES_NAMESPACE,
+    get_thread_head,
+    append_thread_messages,
+    list_thread_messages,
+)
 from workflows.template_processor import (
     WEEKDAYS_PT,
     MONTHS_PT,
@@ -19,12 +29,21 @@ from workflows.template_processor import (
 __all__ = [
     # Storage
     "WORKFLOWS_NAMESPACE",
+    "WORKFLOW_SUMMARIES_NAMESPACE",
     "generate_workflow_id",
     "create_workflow",
     "get_workflow",
     "list_workflows",
+    "list_workflow_summaries",
+    "backfill_workflow_summaries",
     "update_workflow",
     "delete_workflow",
+    # Thread message projection
+    "THREAD_HEADS_NAMESPACE",
+    "THREAD_MESSAGES_NAMESPACE",
+    "get_thread_head",
+    "append_thread_messages",
+    "list_thread_messages",
     # Template Processor
     "WEEKDAYS_PT",
     "MONTHS_PT",
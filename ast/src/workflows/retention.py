@@ -0,0 +1,451 @@
+"""Thread retention - background garbage collection of idle workflow threads.
+
+Abandoned threads (e.g. anonymous test conversations) keep their checkpoints
+and projected messages forever unless something removes them. Workflows
+declare a retention policy in flowData.retention (idle TTL and/or a maximum
+number of threads); a background sweeper enforces it.
+
+★ Insight ─────────────────────────────────────
+- A workflow's threads are enumerated from the checkpointer (runs record
+  workflow_id in checkpoint metadata) and from the thread heads
+  (workflows.threads) of graphs without one; last activity is the newer of
+  the latest checkpoint and the head's lastActiveUs
+- Each thread's activity is read again (from the primary) right before its
+  batch is deleted, so a thread resumed since selection is kept
+- Checkpoints are deleted in batches on the sweeper's own connection: one
+  statement per batch on Postgres (data-modifying CTEs returning
+  pg_column_size, on the managed "saver" pool) and SQLite; other savers
+  fall back to adelete_thread per thread
+- Rate limited: a pause between batches and a cap on threads per sweep keep
+  the sweeper from competing with live traffic
+- dry_run runs the same selection and size accounting without deleting
+─────────────────────────────────────────────────
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any
+
+import aiosqlite
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.store.base import BaseStore, Item
+
+from core.settings import settings
+from memory.postgres_pool import postgres_pool_manager
+from memory.postgres_replica import read_preference
+from workflows.storage import WORKFLOWS_NAMESPACE
+from workflows.threads import THREAD_HEADS_NAMESPACE, delete_thread_projection, thread_head_key
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SweepReport:
+    """What a sweep reclaimed (or would reclaim, in dry-run mode)."""
+
+    dry_run: bool
+    workflows: int = 0
+    threads: int = 0
+    checkpoint_rows: int = 0
+    checkpoint_bytes: int | None = 0  # None if the saver can't measure it
+    store_rows: int = 0
+    duration_ms: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        return {
+            "dryRun": data["dry_run"],
+            "workflows": data["workflows"],
+            "threads": data["threads"],
+            "checkpointRows": data["checkpoint_rows"],
+            "checkpointBytes": data["checkpoint_bytes"],
+            "storeRows": data["store_rows"],
+            "durationMs": round(data["duration_ms"], 3),
+        }
+
+
+def get_retention_policy(workflow: dict[str, Any]) -> tuple[float | None, int | None]:
+    """
+    Resolve a workflow's retention policy.
+
+    Unset fields fall back to WORKFLOW_THREAD_IDLE_TTL_HOURS and
+    WORKFLOW_MAX_THREADS.
+
+    Returns:
+        Tuple of (idle TTL in hours, max threads); None means unlimited
+    """
+    retention = workflow.get("flowData", {}).get("retention") or {}
+    idle_ttl_hours = retention.get("idleTtlHours") or settings.WORKFLOW_THREAD_IDLE_TTL_HOURS
+    max_threads = retention.get("maxThreads") or settings.WORKFLOW_MAX_THREADS
+    return idle_ttl_hours, max_threads
+
+
+async def _iter_search(
+    store: BaseStore,
+    namespace: tuple[str, ...],
+    filter: dict[str, Any] | None = None,
+    page_size: int = 500,
+) -> AsyncIterator[Item]:
+    offset = 0
+    while True:
+        items = await store.asearch(namespace, filter=filter, limit=page_size, offset=offset)
+        for item in items:
+            yield item
+        if len(items) < page_size:
+            return
+        offset += page_size
+
+
+def _checkpoint_us(checkpoint_ts: str) -> int:
+    return int(datetime.fromisoformat(checkpoint_ts).timestamp() * 1e6)
+
+
+def _head_active_us(item: Item) -> int:
+    # Heads written before lastActiveUs existed fall back to the row's timestamp
+    return item.value.get("lastActiveUs") or int(item.updated_at.timestamp() * 1e6)
+
+
+async def list_workflow_threads(
+    store: BaseStore, workflow_id: str, checkpointer: BaseCheckpointSaver | None = None
+) -> list[dict[str, Any]]:
+    """
+    List a workflow's threads with their last activity.
+
+    Threads come from the checkpointer (checkpoint metadata workflow_id) and
+    from the thread heads, so threads without a projected head are found too.
+
+    Returns:
+        Dicts with threadId, lastActiveUs and nextSeq (None without a head)
+    """
+    threads: dict[str, dict[str, Any]] = {}
+    if checkpointer is not None:
+        async for checkpoint in checkpointer.alist(None, filter={"workflow_id": workflow_id}):
+            thread_id = checkpoint.config["configurable"]["thread_id"]
+            active_us = _checkpoint_us(checkpoint.checkpoint["ts"])
+            thread = threads.setdefault(
+                thread_id, {"threadId": thread_id, "lastActiveUs": 0, "nextSeq": None}
+            )
+            thread["lastActiveUs"] = max(thread["lastActiveUs"], active_us)
+    async for item in _iter_search(
+        store, THREAD_HEADS_NAMESPACE, filter={"workflowId": workflow_id}
+    ):
+        thread_id = item.value["threadId"]
+        thread = threads.setdefault(thread_id, {"threadId": thread_id, "lastActiveUs": 0})
+        thread["lastActiveUs"] = max(thread["lastActiveUs"], _head_active_us(item))
+        thread["nextSeq"] = item.value.get("nextSeq", 0)
+    return list(threads.values())
+
+
+async def select_expired_threads(
+    store: BaseStore,
+    workflow: dict[str, Any],
+    now_us: int,
+    checkpointer: BaseCheckpointSaver | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Select the threads of a workflow that its retention policy expires.
+
+    Threads idle for longer than the TTL expire, and so do the least
+    recently active threads beyond the maximum count.
+
+    Returns:
+        Threads to delete (see list_workflow_threads)
+    """
+    idle_ttl_hours, max_threads = get_retention_policy(workflow)
+    if idle_ttl_hours is None and max_threads is None:
+        return []
+
+    threads = await list_workflow_threads(store, workflow["id"], checkpointer)
+    threads.sort(key=lambda thread: thread["lastActiveUs"], reverse=True)
+
+    expired = []
+    for rank, thread in enumerate(threads):
+        idle_us = now_us - thread["lastActiveUs"]
+        idle = idle_ttl_hours is not None and idle_us > idle_ttl_hours * 3.6e9
+        surplus = max_threads is not None and rank >= max_threads
+        if idle or surplus:
+            expired.append(thread)
+    return expired
+
+
+# =============================================================================
+# Checkpoint purge
+# =============================================================================
+
+_PG_CHECKPOINT_TABLES = ("checkpoints", "checkpoint_blobs", "checkpoint_writes")
+# SQLite saver tables -> approximate row payload size
+_SQLITE_CHECKPOINT_TABLES = {
+    "checkpoints": "length(checkpoint) + length(metadata)",
+    "writes": "length(value)",
+}
+
+
+def _pg_purge_sql(dry_run: bool) -> str:
+    if dry_run:
+        sizes = " UNION ALL ".join(
+            f"SELECT pg_column_size(t.*) AS size FROM {table} t WHERE thread_id = ANY(%(ids)s)"
+            for table in _PG_CHECKPOINT_TABLES
+        )
+        return f"SELECT count(*) AS rows, COALESCE(sum(size), 0) AS bytes FROM ({sizes}) s"
+    ctes = ", ".join(
+        f"d{i} AS (DELETE FROM {table} t WHERE thread_id = ANY(%(ids)s) "
+        "RETURNING pg_column_size(t.*) AS size)"
+        for i, table in enumerate(_PG_CHECKPOINT_TABLES)
+    )
+    sizes = " UNION ALL ".join(f"SELECT size FROM d{i}" for i in range(len(_PG_CHECKPOINT_TABLES)))
+    return f"WITH {ctes} SELECT count(*) AS rows, COALESCE(sum(size), 0) AS bytes FROM ({sizes}) s"
+
+
+async def _purge_postgres(saver, thread_ids, dry_run):
+    async with (
+        postgres_pool_manager.pool("saver") as pool,
+        pool.connection() as conn,
+        conn.cursor() as cur,
+    ):
+        await cur.execute(_pg_purge_sql(dry_run), {"ids": thread_ids})
+        row = await cur.fetchone()
+    return row["rows"], int(row["bytes"])
+
+
+async def _purge_sqlite(saver, thread_ids, dry_run):
+    marks = ", ".join("?" * len(thread_ids))
+    rows = size = 0
+    async with aiosqlite.connect(settings.SQLITE_DB_PATH) as conn:
+        for table, size_sql in _SQLITE_CHECKPOINT_TABLES.items():
+            async with conn.execute(
+                f"SELECT count(*), COALESCE(sum({size_sql}), 0) FROM {table} "
+                f"WHERE thread_id IN ({marks})",
+                thread_ids,
+            ) as cur:
+                count, nbytes = await cur.fetchone()
+            rows += count
+            size += nbytes
+            if not dry_run:
+                await conn.execute(f"DELETE FROM {table} WHERE thread_id IN ({marks})", thread_ids)
+        await conn.commit()
+    return rows, size
+
+
+async def _purge_generic(saver, thread_ids, dry_run):
+    rows = 0
+    for thread_id in thread_ids:
+        rows += len([c async for c in saver.alist({"configurable": {"thread_id": thread_id}})])
+        if not dry_run:
+            await saver.adelete_thread(thread_id)
+    return rows, None
+
+
+async def purge_checkpoints(
+    saver: BaseCheckpointSaver, thread_ids: list[str], dry_run: bool = False
+) -> tuple[int, int | None]:
+    """
+    Delete the checkpoints (and pending writes) of a batch of threads.
+
+    Postgres and SQLite run on a connection of their own (the managed "saver"
+    pool, SQLITE_DB_PATH), never the saver's internals.
+
+    Returns:
+        Tuple of (rows, bytes) deleted or, in dry-run mode, that would be;
+        bytes is None if the saver can't measure it
+    """
+    if isinstance(saver, AsyncPostgresSaver):
+        purge = _purge_postgres
+    elif isinstance(saver, AsyncSqliteSaver):
+        purge = _purge_sqlite
+    else:
+        purge = _purge_generic
+    return await purge(saver, thread_ids, dry_run)
+
+
+# =============================================================================
+# Sweeper
+# =============================================================================
+
+
+class ThreadSweeper:
+    """Singleton background sweeper enforcing workflow thread retention.
+
+    Usage:
+        from workflows.retention import thread_sweeper
+
+        # Configure once at startup, then start the loop (WORKFLOW_GC_ENABLED)
+        thread_sweeper.configure(store=store, checkpointer=saver)
+        thread_sweeper.start()
+
+        # One-off sweep (e.g. admin endpoint)
+        report = await thread_sweeper.sweep(dry_run=True)
+
+        # Or against another store/checkpointer, without reconfiguring
+        report = await thread_sweeper.sweep(dry_run=True, store=store, checkpointer=saver)
+    """
+
+    _instance: "ThreadSweeper | None" = None
+
+    def __new__(cls) -> "ThreadSweeper":
+        """Singleton pattern - always return the same instance."""
+        if cls._instance is None:
+            instance = super().__new__(cls)
+            instance._store: BaseStore | None = None
+            instance._checkpointer: BaseCheckpointSaver | None = None
+            instance._task: asyncio.Task | None = None
+            instance._last_report: SweepReport | None = None
+            cls._instance = instance
+        return cls._instance
+
+    def configure(
+        self,
+        store: BaseStore | None = None,
+        checkpointer: BaseCheckpointSaver | None = None,
+    ) -> None:
+        """Configure the store (thread registry) and checkpointer to sweep."""
+        self._store = store
+        self._checkpointer = checkpointer
+
+    async def _still_expired(
+        self, store: BaseStore, checkpointer: BaseCheckpointSaver | None, thread: dict[str, Any]
+    ) -> dict[str, Any] | None:
+        """Re-read a selected thread's activity; None if it was active since selection."""
+        thread_id = thread["threadId"]
+        # The head may have been written moments ago: don't trust a lagging replica
+        with read_preference("primary"):
+            head = await store.aget(
+                THREAD_HEADS_NAMESPACE, thread_head_key(thread["workflowId"], thread_id)
+            )
+        active_us = _head_active_us(head) if head is not None else 0
+        if checkpointer is not None:
+            latest = await checkpointer.aget_tuple(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+            )
+            if latest is not None:
+                active_us = max(active_us, _checkpoint_us(latest.checkpoint["ts"]))
+        if active_us > thread["lastActiveUs"]:
+            return None
+        return {**thread, "nextSeq": head.value.get("nextSeq", 0) if head is not None else None}
+
+    async def _purge_batch(
+        self,
+        store: BaseStore,
+        checkpointer: BaseCheckpointSaver | None,
+        threads: list[dict[str, Any]],
+        dry_run: bool,
+        report: SweepReport,
+    ) -> None:
+        current = await asyncio.gather(
+            *(self._still_expired(store, checkpointer, thread) for thread in threads)
+        )
+        threads = [thread for thread in current if thread is not None]
+        if not threads:
+            return
+        if checkpointer is not None:
+            thread_ids = [thread["threadId"] for thread in threads]
+            rows, nbytes = await purge_checkpoints(checkpointer, thread_ids, dry_run)
+            report.checkpoint_rows += rows
+            if report.checkpoint_bytes is not None:
+                report.checkpoint_bytes = (
+                    None if nbytes is None else report.checkpoint_bytes + nbytes
+                )
+        for thread in threads:
+            if thread["nextSeq"] is None:
+                continue  # No projection to delete
+            if dry_run:
+                # Projected messages + the head itself
+                report.store_rows += thread["nextSeq"] + 1
+            else:
+                report.store_rows += await delete_thread_projection(
+                    store, thread["workflowId"], thread["threadId"], thread["nextSeq"]
+                )
+        report.threads += len(threads)
+
+    async def sweep(
+        self,
+        dry_run: bool | None = None,
+        store: BaseStore | None = None,
+        checkpointer: BaseCheckpointSaver | None = None,
+    ) -> SweepReport:
+        """
+        Run one sweep over every workflow with a retention policy.
+
+        Args:
+            dry_run: Only report what would be reclaimed (default WORKFLOW_GC_DRY_RUN)
+            store: Store to sweep instead of the configured one (this sweep only)
+            checkpointer: Checkpointer to sweep instead of the configured one
+
+        Returns:
+            Report of reclaimed threads, rows and bytes
+        """
+        store = store or self._store
+        checkpointer = checkpointer or self._checkpointer
+        if store is None:
+            raise RuntimeError("Thread sweeper is not configured")
+        dry_run = settings.WORKFLOW_GC_DRY_RUN if dry_run is None else dry_run
+        start = time.perf_counter()
+        report = SweepReport(dry_run=dry_run)
+        now_us = time.time_ns() // 1000
+        budget = settings.WORKFLOW_GC_MAX_THREADS_PER_SWEEP
+        batch_size = settings.WORKFLOW_GC_BATCH_SIZE
+        first_batch = True
+
+        async for item in _iter_search(store, WORKFLOWS_NAMESPACE):
+            if budget <= 0:
+                break
+            expired = await select_expired_threads(store, item.value, now_us, checkpointer)
+            expired = [{**thread, "workflowId": item.key} for thread in expired[:budget]]
+            if not expired:
+                continue
+            report.workflows += 1
+            budget -= len(expired)
+            for i in range(0, len(expired), batch_size):
+                # Rate limit: give live traffic room between batches
+                if not first_batch:
+                    await asyncio.sleep(settings.WORKFLOW_GC_BATCH_PAUSE)
+                first_batch = False
+                await self._purge_batch(
+                    store, checkpointer, expired[i : i + batch_size], dry_run, report
+                )
+
+        report.duration_ms = (time.perf_counter() - start) * 1000
+        logger.warning(
+            f"🧹 [thread_gc{'_dry_run' if dry_run else ''}] threads={report.threads} "
+            f"checkpoint_rows={report.checkpoint_rows} checkpoint_bytes={report.checkpoint_bytes} "
+            f"store_rows={report.store_rows} in {report.duration_ms:.0f}ms"
+        )
+        self._last_report = report
+        return report
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.WORKFLOW_GC_INTERVAL)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Thread sweep failed: {e}")
+
+    def start(self) -> None:
+        """Start the periodic sweep loop (no-op unless WORKFLOW_GC_ENABLED)."""
+        if settings.WORKFLOW_GC_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the periodic sweep loop."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self._task is not None,
+            "lastReport": self._last_report.to_dict() if self._last_report else None,
+        }
+
+
+# Module-level singleton instance - import this in other modules
+thread_sweeper = ThreadSweeper()
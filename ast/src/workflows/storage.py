@@ -1,20 +1,103 @@
-"""Storage layer for workflows using LangGraph's PostgresStore."""
-
-from datetime import datetime, timezone
+"""Storage layer for workflows using LangGraph's PostgresStore.
+
+Each workflow is written twice: the full document under WORKFLOWS_NAMESPACE and
+a small summary (no flowData) under WORKFLOW_SUMMARIES_NAMESPACE. List views
+page over the summaries, so they never read prompts and canvases.
+
+★ Insight ─────────────────────────────────────
+- Both puts are issued concurrently; batched stores (Postgres, SQLite, Mongo)
+  coalesce them into a single round trip
+- Summaries carry updatedAtUs (epoch microseconds) and nameKey (casefolded
+  name); Postgres, SQLite and Mongo list pages with one query on partial
+  indexes over those fields (see setup_workflow_summary_indexes)
+- Cursors are opaque (updatedAtUs, id) keysets, stable under inserts
+─────────────────────────────────────────────────
+"""
+
+import asyncio
+import base64
+import binascii
+import heapq
+import json
+import re
+from dataclasses import dataclass
+from datetime import UTC, datetime
 from typing import Any
 import uuid
 
 from langgraph.store.base import BaseStore
+from langgraph.store.postgres import AsyncPostgresStore
+from langgraph.store.sqlite.aio import AsyncSqliteStore
+
+from memory.mongodb import AsyncMongoDBStore
+from workflows.versioning import versioned_delete, versioned_update
 
 # Namespace for workflows in the store
 WORKFLOWS_NAMESPACE = ("workflows",)
 
+# Namespace for the flowData-free projection used by list views
+WORKFLOW_SUMMARIES_NAMESPACE = ("workflow_summaries",)
+
+SUMMARY_FIELDS = ("id", "name", "description", "isActive", "version", "createdAt", "updatedAt")
+
 
 def generate_workflow_id() -> str:
     """Generate a unique workflow ID in the format wf_xxxxxxxxxxxx."""
     return f"wf_{uuid.uuid4().hex[:12]}"
 
 
+def _timestamp_us(value: str | datetime | None) -> int:
+    """Convert an ISO timestamp (or datetime) to epoch microseconds."""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return int(value.timestamp() * 1_000_000)
+
+
+def workflow_summary(workflow: dict[str, Any]) -> dict[str, Any]:
+    """Build the list-view projection of a workflow (everything but flowData)."""
+    summary = {field: workflow.get(field) for field in SUMMARY_FIELDS}
+    summary["nameKey"] = (workflow.get("name") or "").casefold()
+    summary["nodeCount"] = len((workflow.get("flowData") or {}).get("nodes", []))
+    summary["updatedAtUs"] = _timestamp_us(workflow.get("updatedAt") or workflow.get("createdAt"))
+    return summary
+
+
+def encode_cursor(summary: dict[str, Any]) -> str:
+    """Encode the keyset position after `summary` as an opaque cursor."""
+    raw = json.dumps([summary["updatedAtUs"], summary["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[int, str]:
+    """Decode a cursor from encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at_us, workflow_id = json.loads(raw)
+        return int(updated_at_us), str(workflow_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+async def _put_workflow(store: BaseStore, workflow: dict[str, Any]) -> None:
+    """Write the workflow and its summary (coalesced by batched stores)."""
+    await asyncio.gather(
+        store.aput(namespace=WORKFLOWS_NAMESPACE, key=workflow["id"], value=workflow),
+        store.aput(
+            namespace=WORKFLOW_SUMMARIES_NAMESPACE,
+            key=workflow["id"],
+            value=workflow_summary(workflow),
+        ),
+    )
+
+
 async def create_workflow(
     store: BaseStore,
     name: str,
@@ -34,7 +117,7 @@ async def create_workflow(
         Created workflow data
     """
     workflow_id = generate_workflow_id()
-    now = datetime.now(timezone.utc).isoformat()
+    now = datetime.now(UTC).isoformat()
 
     workflow = {
         "id": workflow_id,
@@ -42,15 +125,12 @@ async def create_workflow(
         "description": description,
         "flowData": flow_data,
         "isActive": True,
+        "version": 1,
         "createdAt": now,
         "updatedAt": now,
     }
 
-    await store.aput(
-        namespace=WORKFLOWS_NAMESPACE,
-        key=workflow_id,
-        value=workflow,
-    )
+    await _put_workflow(store, workflow)
 
     return workflow
 
@@ -97,62 +177,359 @@ async def list_workflows(
     return [item.value for item in results]
 
 
+# =============================================================================
+# Summary queries
+# =============================================================================
+
+_SUMMARIES_PREFIX = ".".join(WORKFLOW_SUMMARIES_NAMESPACE)
+
+
+@dataclass(frozen=True)
+class _SummaryQuery:
+    """Filters and keyset position of a summary page (limit includes the look-ahead)."""
+
+    after: tuple[int, str] | None
+    is_active: bool | None
+    updated_after: int | None
+    updated_before: int | None
+    name_key: str | None
+    limit: int
+
+
+# Partial indexes; the prefix is inlined (not bound) so the planner can match them
+_PG_SUMMARY_INDEXES = (
+    f"""
+    CREATE INDEX IF NOT EXISTS store_workflow_summaries_updated_idx
+    ON store (((value->>'updatedAtUs')::bigint) DESC, key DESC)
+    WHERE prefix = '{_SUMMARIES_PREFIX}'
+    """,
+    f"""
+    CREATE INDEX IF NOT EXISTS store_workflow_summaries_name_idx
+    ON store ((value->>'nameKey') text_pattern_ops)
+    WHERE prefix = '{_SUMMARIES_PREFIX}'
+    """,
+)
+
+
+async def _summaries_postgres(store: AsyncPostgresStore, query: _SummaryQuery) -> list[dict]:
+    updated = "(value->>'updatedAtUs')::bigint"
+    conditions = []
+    params: dict[str, Any] = {"limit": query.limit}
+    if query.is_active is not None:
+        conditions.append("(value->>'isActive')::boolean = %(is_active)s")
+        params["is_active"] = query.is_active
+    if query.updated_after is not None:
+        conditions.append(f"{updated} >= %(updated_after)s")
+        params["updated_after"] = query.updated_after
+    if query.updated_before is not None:
+        conditions.append(f"{updated} < %(updated_before)s")
+        params["updated_before"] = query.updated_before
+    if query.name_key:
+        escaped = re.sub(r"([\\%_])", r"\\\1", query.name_key)
+        conditions.append("value->>'nameKey' LIKE %(name_like)s")
+        params["name_like"] = f"{escaped}%"
+    if query.after is not None:
+        conditions.append(f"({updated}, key) < (%(after_us)s, %(after_id)s)")
+        params["after_us"], params["after_id"] = query.after
+
+    where = "".join(f" AND {condition}" for condition in conditions)
+    async with store._cursor() as cur:
+        await cur.execute(
+            f"SELECT value FROM store WHERE prefix = '{_SUMMARIES_PREFIX}'{where} "
+            f"ORDER BY {updated} DESC, key DESC LIMIT %(limit)s",
+            params,
+        )
+        return [row["value"] for row in await cur.fetchall()]
+
+
+# CAST: the store writes values as BLOBs, which newer SQLite reads as JSONB
+_SQLITE_UPDATED = "json_extract(CAST(value AS TEXT), '$.updatedAtUs')"
+_SQLITE_NAME_KEY = "json_extract(CAST(value AS TEXT), '$.nameKey')"
+
+# Leading prefix column rather than partial indexes: without ANALYZE stats the
+# planner only prefers them to store_prefix_idx when they cover the equality
+_SQLITE_SUMMARY_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS store_workflow_summaries_updated_idx "
+    f"ON store (prefix, {_SQLITE_UPDATED} DESC, key DESC)",
+    "CREATE INDEX IF NOT EXISTS store_workflow_summaries_name_idx "
+    f"ON store (prefix, {_SQLITE_NAME_KEY})",
+)
+
+
+async def _summaries_sqlite(store: AsyncSqliteStore, query: _SummaryQuery) -> list[dict]:
+    conditions = []
+    params: list[Any] = [_SUMMARIES_PREFIX]
+    if query.is_active is not None:
+        conditions.append("json_extract(CAST(value AS TEXT), '$.isActive') = ?")
+        params.append(int(query.is_active))
+    if query.updated_after is not None:
+        conditions.append(f"{_SQLITE_UPDATED} >= ?")
+        params.append(query.updated_after)
+    if query.updated_before is not None:
+        conditions.append(f"{_SQLITE_UPDATED} < ?")
+        params.append(query.updated_before)
+    if query.name_key:
+        # A range, not LIKE: SQLite only optimizes LIKE on plain columns
+        conditions.append(f"{_SQLITE_NAME_KEY} >= ? AND {_SQLITE_NAME_KEY} < ?")
+        params.extend([query.name_key, query.name_key + "\U0010ffff"])
+    if query.after is not None:
+        # Expanded keyset: the planner seeks on `<=`, not on row-value `<`
+        after_us, after_id = query.after
+        conditions.append(f"{_SQLITE_UPDATED} <= ? AND ({_SQLITE_UPDATED} < ? OR key < ?)")
+        params.extend([after_us, after_us, after_id])
+
+    where = "".join(f" AND {condition}" for condition in conditions)
+    async with store._cursor(transaction=False) as cur:
+        await cur.execute(
+            f"SELECT CAST(value AS TEXT) FROM store WHERE prefix = ?{where} "
+            f"ORDER BY {_SQLITE_UPDATED} DESC, key DESC LIMIT ?",
+            [*params, query.limit],
+        )
+        return [json.loads(row[0]) for row in await cur.fetchall()]
+
+
+async def _summaries_mongo(store: AsyncMongoDBStore, query: _SummaryQuery) -> list[dict]:
+    selector: dict[str, Any] = {"prefix": _SUMMARIES_PREFIX}
+    if query.is_active is not None:
+        selector["value.isActive"] = query.is_active
+    updated: dict[str, int] = {}
+    if query.updated_after is not None:
+        updated["$gte"] = query.updated_after
+    if query.updated_before is not None:
+        updated["$lt"] = query.updated_before
+    if updated:
+        selector["value.updatedAtUs"] = updated
+    if query.name_key:
+        # Anchored, case-sensitive regexes use the index as a range scan
+        selector["value.nameKey"] = {"$regex": f"^{re.escape(query.name_key)}"}
+    if query.after is not None:
+        after_us, after_id = query.after
+        selector["$or"] = [
+            {"value.updatedAtUs": {"$lt": after_us}},
+            {"value.updatedAtUs": after_us, "key": {"$lt": after_id}},
+        ]
+
+    cursor = (
+        store.collection.find(selector, {"_id": 0, "value": 1})
+        .sort([("value.updatedAtUs", -1), ("key", -1)])
+        .limit(query.limit)
+    )
+    return [doc["value"] async for doc in cursor]
+
+
+async def _summaries_scan(store: BaseStore, query: _SummaryQuery) -> list[dict]:
+    """Stores without ordered queries: scan every match, keep the newest."""
+    store_filter: dict[str, Any] = {}
+    if query.is_active is not None:
+        store_filter["isActive"] = query.is_active
+    updated: dict[str, int] = {}
+    if query.updated_after is not None:
+        updated["$gte"] = query.updated_after
+    if query.updated_before is not None:
+        updated["$lt"] = query.updated_before
+    if query.after is not None:
+        updated["$lte"] = min(query.after[0], updated.get("$lt", query.after[0]))
+    if updated:
+        store_filter["updatedAtUs"] = updated
+
+    matches: list[dict[str, Any]] = []
+    batch_size = 500
+    offset = 0
+    while True:
+        items = await store.asearch(
+            WORKFLOW_SUMMARIES_NAMESPACE,
+            filter=store_filter or None,
+            limit=batch_size,
+            offset=offset,
+        )
+        for item in items:
+            summary = item.value
+            if query.after is not None and (summary["updatedAtUs"], summary["id"]) >= query.after:
+                continue
+            name = (summary.get("name") or "").casefold()
+            if query.name_key and not name.startswith(query.name_key):
+                continue
+            matches.append(summary)
+        if len(items) < batch_size:
+            break
+        offset += batch_size
+
+    return heapq.nlargest(query.limit, matches, key=lambda s: (s["updatedAtUs"], s["id"]))
+
+
+async def setup_workflow_summary_indexes(store: BaseStore) -> None:
+    """Create the indexes behind list_workflow_summaries (idempotent, after store.setup())."""
+    if isinstance(store, AsyncPostgresStore):
+        async with store._cursor() as cur:
+            for statement in _PG_SUMMARY_INDEXES:
+                await cur.execute(statement)
+    elif isinstance(store, AsyncSqliteStore):
+        async with store._cursor() as cur:
+            for statement in _SQLITE_SUMMARY_INDEXES:
+                await cur.execute(statement)
+    elif isinstance(store, AsyncMongoDBStore):
+        await store.collection.create_index(
+            [("prefix", 1), ("value.updatedAtUs", -1), ("key", -1)],
+            name="workflow_summaries_updated",
+        )
+        await store.collection.create_index(
+            [("prefix", 1), ("value.nameKey", 1)], name="workflow_summaries_name"
+        )
+
+
+async def list_workflow_summaries(
+    store: BaseStore,
+    limit: int = 50,
+    cursor: str | None = None,
+    is_active: bool | None = None,
+    updated_after: datetime | None = None,
+    updated_before: datetime | None = None,
+    name_prefix: str | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    """
+    List workflow summaries (no flowData), newest first, with keyset pagination.
+
+    Postgres, SQLite and Mongo run one indexed query that filters, orders by
+    (updatedAtUs, id) and seeks past the cursor. Other stores scan every match
+    and sort in memory before cutting the page.
+
+    Args:
+        store: LangGraph store instance
+        limit: Page size
+        cursor: Opaque cursor from a previous page
+        is_active: Only active/inactive workflows
+        updated_after: Only workflows updated at or after this time
+        updated_before: Only workflows updated before this time
+        name_prefix: Only workflows whose name starts with this prefix (case-insensitive)
+
+    Returns:
+        Tuple of (summaries, next cursor or None on the last page)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    query = _SummaryQuery(
+        after=decode_cursor(cursor) if cursor else None,
+        is_active=is_active,
+        updated_after=_timestamp_us(updated_after) if updated_after is not None else None,
+        updated_before=_timestamp_us(updated_before) if updated_before is not None else None,
+        name_key=name_prefix.casefold() if name_prefix else None,
+        # One extra match tells whether there is a next page
+        limit=limit + 1,
+    )
+    if isinstance(store, AsyncPostgresStore):
+        page = await _summaries_postgres(store, query)
+    elif isinstance(store, AsyncSqliteStore):
+        page = await _summaries_sqlite(store, query)
+    elif isinstance(store, AsyncMongoDBStore):
+        page = await _summaries_mongo(store, query)
+    else:
+        page = await _summaries_scan(store, query)
+
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor
+
+
+async def backfill_workflow_summaries(store: BaseStore, batch_size: int = 100) -> int:
+    """
+    Write missing or stale summaries (e.g. for workflows created before the
+    summary projection existed, or summaries without nameKey).
+
+    Args:
+        store: LangGraph store instance
+        batch_size: Workflows read per search call
+
+    Returns:
+        Number of summaries written
+    """
+    written = 0
+    offset = 0
+    while True:
+        items = await store.asearch(WORKFLOWS_NAMESPACE, limit=batch_size, offset=offset)
+        if not items:
+            return written
+        existing = await asyncio.gather(
+            *(store.aget(WORKFLOW_SUMMARIES_NAMESPACE, item.key) for item in items)
+        )
+        summaries = [workflow_summary(item.value) for item in items]
+        stale = [
+            summary
+            for summary, current in zip(summaries, existing)
+            if current is None or current.value != summary
+        ]
+        await asyncio.gather(
+            *(store.aput(WORKFLOW_SUMMARIES_NAMESPACE, summary["id"], summary) for summary in stale)
+        )
+        written += len(stale)
+        offset += batch_size
+
+
 async def update_workflow(
     store: BaseStore,
     workflow_id: str,
     updates: dict[str, Any],
+    expected_version: int | None = None,
 ) -> dict[str, Any] | None:
     """
-    Update an existing workflow.
+    Update an existing workflow in one round trip (compare-and-swap on version).
 
     Args:
         store: LangGraph store instance
         workflow_id: Workflow ID to update
         updates: Dictionary of fields to update (None values are ignored)
+        expected_version: Only update if the workflow is at this version
 
     Returns:
         Updated workflow data or None if not found
-    """
-    existing = await get_workflow(store, workflow_id)
-    if not existing:
-        return None
-
-    # Merge updates, ignoring None values
-    updated = {
-        **existing,
-        **{k: v for k, v in updates.items() if v is not None},
-        "updatedAt": datetime.now(timezone.utc).isoformat(),
-    }
 
-    await store.aput(
-        namespace=WORKFLOWS_NAMESPACE,
-        key=workflow_id,
-        value=updated,
+    Raises:
+        WorkflowVersionConflict: If expected_version is stale
+    """
+    now = datetime.now(UTC).isoformat()
+    patch = {k: v for k, v in updates.items() if v is not None}
+    patch["updatedAt"] = now
+
+    summary_patch = {k: v for k, v in patch.items() if k in SUMMARY_FIELDS}
+    summary_patch["updatedAtUs"] = _timestamp_us(now)
+    if "name" in patch:
+        summary_patch["nameKey"] = patch["name"].casefold()
+    if "flowData" in patch:
+        summary_patch["nodeCount"] = len(patch["flowData"].get("nodes", []))
+
+    return await versioned_update(
+        store,
+        WORKFLOWS_NAMESPACE,
+        WORKFLOW_SUMMARIES_NAMESPACE,
+        workflow_id,
+        patch,
+        summary_patch,
+        expected_version,
     )
 
-    return updated
-
 
 async def delete_workflow(
     store: BaseStore,
     workflow_id: str,
+    expected_version: int | None = None,
 ) -> bool:
     """
-    Delete a workflow.
+    Delete a workflow and its summary in one round trip.
 
     Args:
         store: LangGraph store instance
         workflow_id: Workflow ID to delete
+        expected_version: Only delete if the workflow is at this version
 
     Returns:
         True if deleted, False if not found
-    """
-    existing = await get_workflow(store, workflow_id)
-    if not existing:
-        return False
 
-    await store.adelete(
-        namespace=WORKFLOWS_NAMESPACE,
-        key=workflow_id,
+    Raises:
+        WorkflowVersionConflict: If expected_version is stale
+    """
+    return await versioned_delete(
+        store,
+        WORKFLOWS_NAMESPACE,
+        WORKFLOW_SUMMARIES_NAMESPACE,
+        workflow_id,
+        expected_version,
     )
-    return True
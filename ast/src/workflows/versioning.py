@@ -0,0 +1,497 @@
+"""Versioned (compare-and-swap) workflow writes.
+
+Every workflow carries an integer `version`, bumped on each update. Updates
+and deletes can be made conditional on the version the client last saw
+(HTTP If-Match), so concurrent editors get 412 instead of silently
+overwriting each other.
+
+★ Insight ─────────────────────────────────────
+- The CAS runs as a single statement on the store's own connection
+  (Postgres data-modifying CTE, SQLite UPDATE ... RETURNING, Mongo
+  find_one_and_update) instead of get + put, so a mutation is one round trip
+- The patch is merged server-side; the full document is never read first
+- The summary row (see workflows.storage) gets the same patch and version:
+  atomically with the document on Postgres and SQLite; on Mongo it is a
+  second, best-effort write after the CAS (no multi-document transaction),
+  so a failure between the two leaves the summary stale until those fields
+  are written again or backfill_workflow_summaries runs
+- Other BaseStore implementations fall back to read-compare-write under a
+  per-key asyncio lock: atomic for single-process stores (InMemoryStore),
+  best-effort when several processes share the store
+- versioned_put writes a whole document (create-if-absent or replace at a
+  version), for small records such as thread heads that several writers race on
+- A miss is classified (404 vs conflict) with one extra read, only on failure
+- Raw SQL bypasses the store's batching, so replica-routed stores are told
+  about the write (read-your-writes, see memory.postgres_replica)
+─────────────────────────────────────────────────
+"""
+
+import asyncio
+import json
+import weakref
+from datetime import UTC, datetime
+from typing import Any
+
+from langgraph.store.base import BaseStore
+from langgraph.store.postgres import AsyncPostgresStore
+from langgraph.store.sqlite.aio import AsyncSqliteStore
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from memory.mongodb import AsyncMongoDBStore
+from memory.postgres_replica import ReplicaRoutedPostgresStore
+
+
+class WorkflowVersionConflict(Exception):
+    """Raised when a conditional write's expected version is stale."""
+
+    def __init__(self, workflow_id: str, current_version: int):
+        self.workflow_id = workflow_id
+        self.current_version = current_version
+        super().__init__(f"Workflow {workflow_id} is at version {current_version}")
+
+
+def workflow_etag(workflow: dict[str, Any]) -> str:
+    """Strong ETag for a workflow document."""
+    return f'"{workflow["id"]}-v{workflow.get("version", 0)}"'
+
+
+def parse_etag_version(etag: str, workflow_id: str) -> int | None:
+    """
+    Extract the version from an ETag of this workflow.
+
+    If-Match uses strong comparison, so weak ETags (W/) and ETags of another
+    workflow don't match.
+
+    Returns:
+        The version, or None if the ETag isn't a strong ETag of workflow_id
+    """
+    etag = etag.strip()
+    prefix = f'"{workflow_id}-v'
+    if not (etag.startswith(prefix) and etag.endswith('"')):
+        return None
+    version = etag[len(prefix) : -1]
+    return int(version) if version.isdigit() else None
+
+
+def _note_pg_write(store, namespace, summary_namespace, key) -> None:
+    if isinstance(store, ReplicaRoutedPostgresStore):
+        store.note_write(namespace, key)
+        store.note_write(summary_namespace, key)
+
+
+def _ns(namespace: tuple[str, ...]) -> str:
+    return ".".join(namespace)
+
+
+# In-process locks for the generic read-compare-write fallback
+_key_locks: "weakref.WeakValueDictionary[tuple, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _key_lock(namespace: tuple[str, ...], key: str) -> asyncio.Lock:
+    lock = _key_locks.get((namespace, key))
+    if lock is None:
+        lock = _key_locks[(namespace, key)] = asyncio.Lock()
+    return lock
+
+
+async def _classify_miss(
+    store: BaseStore, namespace: tuple[str, ...], key: str, expected_version: int | None
+) -> None:
+    """After a CAS matched nothing: return (404) or raise the conflict."""
+    existing = await store.aget(namespace, key)
+    if existing is not None and expected_version is not None:
+        raise WorkflowVersionConflict(key, existing.value.get("version", 0))
+
+
+# =============================================================================
+# Update
+# =============================================================================
+
+_PG_UPDATE = """
+WITH doc AS (
+    UPDATE store
+    SET value = (value || %(patch)s::jsonb)
+            || jsonb_build_object('version', COALESCE((value->>'version')::int, 0) + 1),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE prefix = %(prefix)s AND key = %(key)s {condition}
+    RETURNING value
+), summary AS (
+    UPDATE store
+    SET value = (value || %(summary_patch)s::jsonb)
+            || jsonb_build_object('version', (SELECT (value->>'version')::int FROM doc)),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE prefix = %(summary_prefix)s AND key = %(key)s AND EXISTS (SELECT 1 FROM doc)
+)
+SELECT value FROM doc
+"""
+_PG_VERSION_CONDITION = "AND COALESCE((value->>'version')::int, 0) = %(expected)s"
+
+
+async def _update_postgres(
+    store, namespace, summary_namespace, key, patch, summary_patch, expected
+):
+    params = {
+        "patch": json.dumps(patch),
+        "summary_patch": json.dumps(summary_patch),
+        "prefix": _ns(namespace),
+        "summary_prefix": _ns(summary_namespace),
+        "key": key,
+        "expected": expected,
+    }
+    condition = _PG_VERSION_CONDITION if expected is not None else ""
+    _note_pg_write(store, namespace, summary_namespace, key)
+    async with store._cursor() as cur:
+        await cur.execute(_PG_UPDATE.format(condition=condition), params)
+        row = await cur.fetchone()
+    return row["value"] if row else None
+
+
+_SQLITE_VERSION = "COALESCE(json_extract(value, '$.version'), 0)"
+
+
+def _sqlite_json_set(patch: dict[str, Any], version_sql: str) -> tuple[str, list[Any]]:
+    """Build json_set(value, path, json(?), ..., '$.version', version_sql) for a patch."""
+    args = []
+    params: list[Any] = []
+    for field, value in patch.items():
+        args.append("?, json(?)")
+        params.extend([f'$."{field}"', json.dumps(value)])
+    # CAST: the store writes values as BLOBs, which newer SQLite reads as JSONB
+    return f"json_set(CAST(value AS TEXT), {', '.join(args)}, '$.version', {version_sql})", params
+
+
+async def _update_sqlite(store, namespace, summary_namespace, key, patch, summary_patch, expected):
+    doc_set, doc_params = _sqlite_json_set(patch, f"{_SQLITE_VERSION} + 1")
+    condition = f"AND {_SQLITE_VERSION} = ?" if expected is not None else ""
+    async with store._cursor(transaction=True) as cur:
+        await cur.execute(
+            f"UPDATE store SET value = {doc_set}, updated_at = CURRENT_TIMESTAMP "
+            f"WHERE prefix = ? AND key = ? {condition} RETURNING value",
+            [*doc_params, _ns(namespace), key, *([expected] if expected is not None else [])],
+        )
+        row = await cur.fetchone()
+        if row is None:
+            return None
+        updated = json.loads(row[0])
+        summary_set, summary_params = _sqlite_json_set(summary_patch, "?")
+        await cur.execute(
+            f"UPDATE store SET value = {summary_set}, updated_at = CURRENT_TIMESTAMP "
+            "WHERE prefix = ? AND key = ?",
+            [*summary_params, updated["version"], _ns(summary_namespace), key],
+        )
+    return updated
+
+
+def _mongo_version_filter(expected: int | None) -> dict[str, Any]:
+    if expected is None:
+        return {}
+    # Documents written before versioning have no version field (= version 0)
+    return {"value.version": {"$in": [0, None]} if expected == 0 else expected}
+
+
+async def _update_mongo(store, namespace, summary_namespace, key, patch, summary_patch, expected):
+    now = datetime.now(UTC)
+    doc = await store.collection.find_one_and_update(
+        {"prefix": _ns(namespace), "key": key, **_mongo_version_filter(expected)},
+        {
+            "$set": {**{f"value.{k}": v for k, v in patch.items()}, "updated_at": now},
+            "$inc": {"value.version": 1},
+        },
+        projection={"_id": 0, "value": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if doc is None:
+        return None
+    updated = doc["value"]
+    # Best-effort: a second round trip, not atomic with the CAS above
+    summary_set = {f"value.{k}": v for k, v in summary_patch.items()}
+    await store.collection.update_one(
+        {"prefix": _ns(summary_namespace), "key": key},
+        {"$set": {**summary_set, "value.version": updated["version"], "updated_at": now}},
+    )
+    return updated
+
+
+async def _update_generic(store, namespace, summary_namespace, key, patch, summary_patch, expected):
+    # Lazy import to avoid a cycle with workflows.storage
+    from workflows.storage import workflow_summary
+
+    async with _key_lock(namespace, key):
+        existing = await store.aget(namespace, key)
+        if existing is None or (
+            expected is not None and existing.value.get("version", 0) != expected
+        ):
+            return None
+        updated = {**existing.value, **patch, "version": existing.value.get("version", 0) + 1}
+        await asyncio.gather(
+            store.aput(namespace=namespace, key=key, value=updated),
+            store.aput(namespace=summary_namespace, key=key, value=workflow_summary(updated)),
+        )
+    return updated
+
+
+async def versioned_update(
+    store: BaseStore,
+    namespace: tuple[str, ...],
+    summary_namespace: tuple[str, ...],
+    key: str,
+    patch: dict[str, Any],
+    summary_patch: dict[str, Any],
+    expected_version: int | None = None,
+) -> dict[str, Any] | None:
+    """
+    Merge `patch` into a document and bump its version in one round trip.
+
+    Args:
+        store: LangGraph store instance
+        namespace: Namespace of the document
+        summary_namespace: Namespace of its summary projection
+        key: Document key
+        patch: Top-level fields to set on the document
+        summary_patch: Top-level fields to set on the summary
+        expected_version: Only apply if the document is at this version
+
+    Returns:
+        The updated document, or None if it doesn't exist
+
+    Raises:
+        WorkflowVersionConflict: If expected_version is stale
+    """
+    if isinstance(store, AsyncPostgresStore):
+        update = _update_postgres
+    elif isinstance(store, AsyncSqliteStore):
+        update = _update_sqlite
+    elif isinstance(store, AsyncMongoDBStore):
+        update = _update_mongo
+    else:
+        update = _update_generic
+
+    updated = await update(
+        store, namespace, summary_namespace, key, patch, summary_patch, expected_version
+    )
+    if updated is None:
+        await _classify_miss(store, namespace, key, expected_version)
+    return updated
+
+
+# =============================================================================
+# Put
+# =============================================================================
+
+_PG_INSERT = """
+INSERT INTO store (prefix, key, value, created_at, updated_at)
+VALUES (%(prefix)s, %(key)s, %(value)s::jsonb, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+ON CONFLICT (prefix, key) DO NOTHING
+RETURNING key
+"""
+_PG_REPLACE = """
+UPDATE store SET value = %(value)s::jsonb, updated_at = CURRENT_TIMESTAMP
+WHERE prefix = %(prefix)s AND key = %(key)s
+    AND COALESCE((value->>'version')::int, 0) = %(expected)s
+RETURNING key
+"""
+
+
+async def _put_postgres(store, namespace, key, value, expected):
+    params = {
+        "prefix": _ns(namespace),
+        "key": key,
+        "value": json.dumps(value),
+        "expected": expected,
+    }
+    if isinstance(store, ReplicaRoutedPostgresStore):
+        store.note_write(namespace, key)
+    async with store._cursor() as cur:
+        await cur.execute(_PG_INSERT if expected is None else _PG_REPLACE, params)
+        return await cur.fetchone() is not None
+
+
+async def _put_sqlite(store, namespace, key, value, expected):
+    async with store._cursor(transaction=True) as cur:
+        if expected is None:
+            await cur.execute(
+                "INSERT INTO store (prefix, key, value, created_at, updated_at) "
+                "VALUES (?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP) "
+                "ON CONFLICT (prefix, key) DO NOTHING RETURNING key",
+                [_ns(namespace), key, json.dumps(value)],
+            )
+        else:
+            await cur.execute(
+                "UPDATE store SET value = ?, updated_at = CURRENT_TIMESTAMP "
+                f"WHERE prefix = ? AND key = ? AND {_SQLITE_VERSION} = ? RETURNING key",
+                [json.dumps(value), _ns(namespace), key, expected],
+            )
+        return await cur.fetchone() is not None
+
+
+async def _put_mongo(store, namespace, key, value, expected):
+    now = datetime.now(UTC)
+    selector = {"prefix": _ns(namespace), "key": key}
+    if expected is None:
+        try:
+            result = await store.collection.update_one(
+                selector,
+                {"$setOnInsert": {"value": value, "created_at": now, "updated_at": now}},
+                upsert=True,
+            )
+        except DuplicateKeyError:  # A concurrent upsert inserted it first
+            return False
+        return result.upserted_id is not None
+    result = await store.collection.update_one(
+        {**selector, **_mongo_version_filter(expected)},
+        {"$set": {"value": value, "updated_at": now}},
+    )
+    return result.matched_count == 1
+
+
+async def _put_generic(store, namespace, key, value, expected):
+    async with _key_lock(namespace, key):
+        existing = await store.aget(namespace, key)
+        current = None if existing is None else existing.value.get("version", 0)
+        if current != expected:
+            return False
+        await store.aput(namespace, key, value, index=False)
+        return True
+
+
+async def versioned_put(
+    store: BaseStore,
+    namespace: tuple[str, ...],
+    key: str,
+    value: dict[str, Any],
+    expected_version: int | None,
+) -> dict[str, Any] | None:
+    """
+    Write a whole document if it is still at `expected_version`.
+
+    Args:
+        store: LangGraph store instance
+        namespace: Namespace of the document
+        key: Document key
+        value: New document (its version is set to expected_version + 1)
+        expected_version: Version the document was read at, None if it
+            didn't exist (the put then only creates it)
+
+    Returns:
+        The written document, or None if another writer got there first
+    """
+    if isinstance(store, AsyncPostgresStore):
+        put = _put_postgres
+    elif isinstance(store, AsyncSqliteStore):
+        put = _put_sqlite
+    elif isinstance(store, AsyncMongoDBStore):
+        put = _put_mongo
+    else:
+        put = _put_generic
+
+    value = {**value, "version": (expected_version or 0) + 1}
+    return value if await put(store, namespace, key, value, expected_version) else None
+
+
+# =============================================================================
+# Delete
+# =============================================================================
+
+_PG_DELETE = """
+WITH doc AS (
+    DELETE FROM store WHERE prefix = %(prefix)s AND key = %(key)s {condition}
+    RETURNING key
+), summary AS (
+    DELETE FROM store
+    WHERE prefix = %(summary_prefix)s AND key = %(key)s AND EXISTS (SELECT 1 FROM doc)
+)
+SELECT key FROM doc
+"""
+
+
+async def _delete_postgres(store, namespace, summary_namespace, key, expected):
+    params = {
+        "prefix": _ns(namespace),
+        "summary_prefix": _ns(summary_namespace),
+        "key": key,
+        "expected": expected,
+    }
+    condition = _PG_VERSION_CONDITION if expected is not None else ""
+    _note_pg_write(store, namespace, summary_namespace, key)
+    async with store._cursor() as cur:
+        await cur.execute(_PG_DELETE.format(condition=condition), params)
+        return await cur.fetchone() is not None
+
+
+async def _delete_sqlite(store, namespace, summary_namespace, key, expected):
+    condition = f"AND {_SQLITE_VERSION} = ?" if expected is not None else ""
+    async with store._cursor(transaction=True) as cur:
+        await cur.execute(
+            f"DELETE FROM store WHERE prefix = ? AND key = ? {condition} RETURNING key",
+            [_ns(namespace), key, *([expected] if expected is not None else [])],
+        )
+        if await cur.fetchone() is None:
+            return False
+        await cur.execute(
+            "DELETE FROM store WHERE prefix = ? AND key = ?", [_ns(summary_namespace), key]
+        )
+    return True
+
+
+async def _delete_mongo(store, namespace, summary_namespace, key, expected):
+    result = await store.collection.delete_one(
+        {"prefix": _ns(namespace), "key": key, **_mongo_version_filter(expected)}
+    )
+    if not result.deleted_count:
+        return False
+    # Best-effort, as in _update_mongo
+    await store.collection.delete_one({"prefix": _ns(summary_namespace), "key": key})
+    return True
+
+
+async def _delete_generic(store, namespace, summary_namespace, key, expected):
+    async with _key_lock(namespace, key):
+        existing = await store.aget(namespace, key)
+        if existing is None or (
+            expected is not None and existing.value.get("version", 0) != expected
+        ):
+            return False
+        await asyncio.gather(
+            store.adelete(namespace=namespace, key=key),
+            store.adelete(namespace=summary_namespace, key=key),
+        )
+    return True
+
+
+async def versioned_delete(
+    store: BaseStore,
+    namespace: tuple[str, ...],
+    summary_namespace: tuple[str, ...],
+    key: str,
+    expected_version: int | None = None,
+) -> bool:
+    """
+    Delete a document (and its summary) in one round trip.
+
+    Args:
+        store: LangGraph store instance
+        namespace: Namespace of the document
+        summary_namespace: Namespace of its summary projection
+        key: Document key
+        expected_version: Only delete if the document is at this version
+
+    Returns:
+        True if deleted, False if it doesn't exist
+
+    Raises:
+        WorkflowVersionConflict: If expected_version is stale
+    """
+    if isinstance(store, AsyncPostgresStore):
+        delete = _delete_postgres
+    elif isinstance(store, AsyncSqliteStore):
+        delete = _delete_sqlite
+    elif isinstance(store, AsyncMongoDBStore):
+        delete = _delete_mongo
+    else:
+        delete = _delete_generic
+
+    deleted = await delete(store, namespace, summary_namespace, key, expected_version)
+    if not deleted:
+        await _classify_miss(store, namespace, key, expected_version)
+    return deleted
@@ -0,0 +1,142 @@
+"""Tests for incremental ingestion into the Chroma DB (scripts/create_chroma_db.py)."""
+
+import importlib.util
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import chromadb
+import fitz
+import pytest
+
+from memory.embeddings import HashingEmbeddings
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "..", "scripts", "create_chroma_db.py")
+
+
+@pytest.fixture(scope="module")
+def script():
+    spec = importlib.util.spec_from_file_location("create_chroma_db", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    yield module
+    del sys.modules[spec.name]
+
+
+class _CountingEmbeddings(HashingEmbeddings):
+    """Hashing embeddings that count texts and fail on chunks containing `fail_on`."""
+
+    def __init__(self, fail_on: str | None = None):
+        super().__init__()
+        self.fail_on = fail_on
+        self.embedded = 0
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        if self.fail_on and any(self.fail_on in text for text in texts):
+            raise RuntimeError("embedding provider went away")
+        self.embedded += len(texts)
+        return self.embed_documents(texts)
+
+
+def _write_pdf(path, paragraphs):
+    doc = fitz.open()
+    page = doc.new_page()
+    for i, paragraph in enumerate(paragraphs):
+        page.insert_text((72, 72 + 20 * i), paragraph)
+    doc.save(str(path))
+    doc.close()
+
+
+@pytest.fixture
+def folders(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    _write_pdf(data / "handbook.pdf", [f"Vacation policy paragraph {i}." for i in range(6)])
+    _write_pdf(data / "expenses.pdf", [f"Expense rule number {i}." for i in range(6)])
+    return data, tmp_path / "db"
+
+
+@pytest.fixture
+def run(script, folders):
+    """Run ingest with small chunks, splitting in threads instead of processes."""
+    data, db = folders
+
+    async def _run(embeddings):
+        with patch.object(
+            script,
+            "ProcessPoolExecutor",
+            lambda max_workers, mp_context: ThreadPoolExecutor(max_workers),
+        ):
+            return await script.ingest(
+                str(data), str(db), embeddings, chunk_size=60, overlap=0, batch_size=4
+            )
+
+    return _run
+
+
+def _manifest(db):
+    with open(db / "ingest_manifest.json") as f:
+        return json.load(f)["files"]
+
+
+def _stored_ids(db):
+    collection = chromadb.PersistentClient(path=str(db)).get_collection("langchain")
+    return set(collection.get(include=[])["ids"])
+
+
+@pytest.mark.asyncio
+async def test_rerun_skips_unchanged_files(run, folders):
+    _, db = folders
+    first = await run(_CountingEmbeddings())
+
+    embeddings = _CountingEmbeddings()
+    second = await run(embeddings)
+
+    assert first.changed == 2 and first.embedded == first.chunks > 2
+    assert (second.skipped, second.changed, second.embedded) == (2, 0, 0)
+    assert embeddings.embedded == 0
+    manifest = _manifest(db)
+    assert _stored_ids(db) == {i for entry in manifest.values() for i in entry["ids"]}
+
+
+@pytest.mark.asyncio
+async def test_changed_and_removed_files_drop_stale_chunks(run, folders):
+    data, db = folders
+    await run(_CountingEmbeddings())
+    before = _manifest(db)
+
+    # Keep the first paragraphs, rewrite the rest; remove the other file
+    _write_pdf(
+        data / "handbook.pdf",
+        [f"Vacation policy paragraph {i}." for i in range(2)] + ["Remote work is allowed."],
+    )
+    os.remove(data / "expenses.pdf")
+    stats = await run(_CountingEmbeddings())
+
+    after = _manifest(db)
+    assert list(after) == ["handbook.pdf"]
+    assert (stats.changed, stats.removed) == (1, 1)
+    stale = (set(before["handbook.pdf"]["ids"]) - set(after["handbook.pdf"]["ids"])) | set(
+        before["expenses.pdf"]["ids"]
+    )
+    assert stats.deleted == len(stale) > 0
+    assert _stored_ids(db) == set(after["handbook.pdf"]["ids"])
+
+
+@pytest.mark.asyncio
+async def test_interrupted_run_leaves_file_out_of_the_manifest(run, folders):
+    _, db = folders
+
+    with pytest.raises(RuntimeError):
+        await run(_CountingEmbeddings(fail_on="Expense"))
+
+    assert "expenses.pdf" not in _manifest(db)
+
+    # The next run picks the file up again
+    stats = await run(_CountingEmbeddings())
+    assert "expenses.pdf" in _manifest(db)
+    assert stats.changed >= 1
+    assert _stored_ids(db) == {i for entry in _manifest(db).values() for i in entry["ids"]}
@@ -0,0 +1,265 @@
+"""Tests for the LlamaGuard singleton and its verdict cache."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, SystemMessage
+
+from agents.llama_guard import LlamaGuard, SafetyAssessment, astream_guarded, llama_guard
+from agents.research_assistant import route_input
+
+
+def _reply(content: str) -> AIMessage:
+    return AIMessage(content=content)
+
+
+@pytest.fixture
+def guard():
+    llama_guard.clear()
+    model = MagicMock()
+    model.ainvoke = AsyncMock(return_value=_reply("safe"))
+    with patch("agents.llama_guard.settings") as mock_settings:
+        mock_settings.GROQ_API_KEY = "key"
+        mock_settings.LLAMA_GUARD_CACHE_SIZE = 100
+        mock_settings.LLAMA_GUARD_CONTEXT_MESSAGES = 2
+        llama_guard._model, llama_guard._model_loaded = model, True
+        yield llama_guard, model, mock_settings
+    llama_guard.clear()
+
+
+def test_singleton():
+    assert LlamaGuard() is llama_guard
+
+
+@pytest.mark.asyncio
+async def test_disabled_without_api_key():
+    llama_guard.clear()
+    with patch("agents.llama_guard.settings") as mock_settings:
+        mock_settings.GROQ_API_KEY = None
+        result = await llama_guard.ainvoke("User", [HumanMessage(content="hi")])
+    assert result.safety_assessment == SafetyAssessment.SAFE
+    llama_guard.clear()
+
+
+@pytest.mark.asyncio
+async def test_repeated_content_is_assessed_once(guard):
+    llama_guard, model, _ = guard
+    messages = [HumanMessage(content="hello")]
+
+    first = await llama_guard.ainvoke("User", messages)
+    second = await llama_guard.ainvoke("User", list(messages))
+    other_role = await llama_guard.ainvoke("Agent", messages)
+
+    assert first == second == other_role
+    assert model.ainvoke.await_count == 2  # Role is part of the key
+    stats = llama_guard.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert stats["verdicts"]["safe"]["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_only_latest_messages_are_assessed(guard):
+    llama_guard, model, _ = guard
+    history = [HumanMessage(content="old question"), AIMessage(content="old answer")]
+    latest = [HumanMessage(content="question"), AIMessage(content="answer")]
+
+    await llama_guard.ainvoke("Agent", history + latest)
+    await llama_guard.ainvoke("Agent", [SystemMessage(content="system")] + latest)
+
+    prompt = model.ainvoke.await_args.args[0][0].content
+    assert "User: question\n\nAgent: answer" in prompt
+    assert "old question" not in prompt
+    model.ainvoke.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_unsafe_verdicts_cached_errors_not(guard):
+    llama_guard, model, _ = guard
+    model.ainvoke.side_effect = [_reply("unsafe\nS1,S10"), _reply("garbage"), _reply("safe")]
+
+    unsafe = await llama_guard.ainvoke("User", [HumanMessage(content="a")])
+    assert await llama_guard.ainvoke("User", [HumanMessage(content="a")]) == unsafe
+    assert unsafe.unsafe_categories == ["Violent Crimes", "Hate"]
+
+    error = await llama_guard.ainvoke("User", [HumanMessage(content="b")])
+    retried = await llama_guard.ainvoke("User", [HumanMessage(content="b")])
+    assert error.safety_assessment == SafetyAssessment.ERROR
+    assert retried.safety_assessment == SafetyAssessment.SAFE
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_assessments_share_one_call(guard):
+    llama_guard, model, _ = guard
+    release = asyncio.Event()
+
+    async def _slow(messages):
+        await release.wait()
+        return _reply("safe")
+
+    model.ainvoke.side_effect = _slow
+    messages = [HumanMessage(content="same")]
+    tasks = [asyncio.create_task(llama_guard.ainvoke("User", messages)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(*tasks)
+    assert all(r.safety_assessment == SafetyAssessment.SAFE for r in results)
+    model.ainvoke.assert_awaited_once()
+    assert llama_guard.stats()["coalesced"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_still_caches_the_verdict(guard):
+    llama_guard, model, _ = guard
+    release = asyncio.Event()
+
+    async def _slow(messages):
+        await release.wait()
+        return _reply("safe")
+
+    model.ainvoke.side_effect = _slow
+    messages = [HumanMessage(content="cancel me")]
+    task = asyncio.create_task(llama_guard.ainvoke("User", messages))
+    await asyncio.sleep(0)
+    task.cancel()
+    release.set()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0)
+
+    await llama_guard.ainvoke("User", messages)
+    model.ainvoke.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_abatch_deduplicates_and_keeps_order(guard):
+    llama_guard, model, _ = guard
+
+    async def _classify(messages):
+        return _reply("unsafe\nS2" if "User: bad" in messages[0].content else "safe")
+
+    model.ainvoke.side_effect = _classify
+    good, bad = [HumanMessage(content="good")], [HumanMessage(content="bad")]
+
+    results = await llama_guard.abatch([("User", good), ("User", bad), ("User", good)])
+
+    assert [r.safety_assessment for r in results] == [
+        SafetyAssessment.SAFE,
+        SafetyAssessment.UNSAFE,
+        SafetyAssessment.SAFE,
+    ]
+    assert model.ainvoke.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded(guard):
+    llama_guard, model, mock_settings = guard
+    mock_settings.LLAMA_GUARD_CACHE_SIZE = 2
+    for text in ("a", "b", "c"):
+        await llama_guard.ainvoke("User", [HumanMessage(content=text)])
+
+    assert llama_guard.stats()["cached"] == 2
+    await llama_guard.ainvoke("User", [HumanMessage(content="a")])  # Evicted
+    assert model.ainvoke.await_count == 4
+
+
+class _StreamingModel:
+    """Streams one chunk per token, counting how many were produced."""
+
+    def __init__(self, tokens, delay=0.0, tool_calls=None):
+        self.tokens = tokens
+        self.delay = delay
+        self.tool_calls = tool_calls or []
+        self.produced = 0
+
+    async def astream(self, model_input, config):
+        for token in self.tokens:
+            await asyncio.sleep(self.delay)
+            self.produced += 1
+            yield AIMessageChunk(content=token)
+        if self.tool_calls:
+            yield AIMessageChunk(content="", tool_call_chunks=self.tool_calls)
+
+
+def _classify_by(flagged: str):
+    async def _classify(messages):
+        return _reply("unsafe\nS1" if flagged in messages[0].content else "safe")
+
+    return _classify
+
+
+@pytest.fixture
+def stream_guard(guard):
+    llama_guard, model, mock_settings = guard
+    mock_settings.LLAMA_GUARD_STREAM_CHECK_CHARS = 5
+    return llama_guard, model, mock_settings
+
+
+@pytest.mark.asyncio
+async def test_astream_guarded_returns_complete_message(stream_guard):
+    _, model, _ = stream_guard
+    stream = _StreamingModel(
+        ["Hello ", "there ", "friend"],
+        tool_calls=[{"name": "calculator", "args": "{}", "id": "call_1", "index": 0}],
+    )
+    messages = [HumanMessage(content="hi")]
+
+    response, safety = await astream_guarded(stream, {}, {}, messages)
+
+    assert type(response) is AIMessage
+    assert response.content == "Hello there friend"
+    assert response.tool_calls[0]["name"] == "calculator"
+    assert safety.safety_assessment == SafetyAssessment.SAFE
+    # Two partial checks, then the complete response
+    assert model.ainvoke.await_count == 3
+    assert "Agent: Hello there friend" in model.ainvoke.await_args.args[0][0].content
+
+
+@pytest.mark.asyncio
+async def test_astream_guarded_stops_on_unsafe_partial_output(stream_guard):
+    _, model, _ = stream_guard
+    model.ainvoke.side_effect = _classify_by("Agent: first bad")
+    stream = _StreamingModel(["first ", "bad "] + ["more "] * 50, delay=0.001)
+
+    response, safety = await astream_guarded(stream, {}, {}, [HumanMessage(content="hi")])
+
+    assert response is None
+    assert safety.safety_assessment == SafetyAssessment.UNSAFE
+    assert stream.produced < 52
+
+
+@pytest.mark.asyncio
+async def test_speculative_input_guard_cancels_generation(stream_guard):
+    _, model, _ = stream_guard
+    model.ainvoke.side_effect = _classify_by("in 'User' messages")
+    stream = _StreamingModel(["token "] * 1000, delay=0.001)
+
+    response, safety = await astream_guarded(
+        stream, {}, {}, [HumanMessage(content="bad idea")], guard_input=True
+    )
+
+    assert response is None
+    assert safety.safety_assessment == SafetyAssessment.UNSAFE
+    assert stream.produced < 1000
+
+
+@pytest.mark.asyncio
+async def test_speculative_input_guard_safe_keeps_response(stream_guard):
+    _, _, mock_settings = stream_guard
+    mock_settings.LLAMA_GUARD_STREAM_CHECK_CHARS = 0
+    stream = _StreamingModel(["fine"])
+
+    response, safety = await astream_guarded(
+        stream, {}, {}, [HumanMessage(content="hi")], guard_input=True
+    )
+
+    assert response.content == "fine"
+    assert safety.safety_assessment == SafetyAssessment.SAFE
+
+
+@pytest.mark.parametrize("speculative, entry", [(False, "guard_input"), (True, "model")])
+def test_speculative_mode_skips_guard_input_node(speculative, entry):
+    with patch("agents.research_assistant.settings") as mock_settings:
+        mock_settings.LLAMA_GUARD_SPECULATIVE = speculative
+        assert route_input({"messages": []}) == entry
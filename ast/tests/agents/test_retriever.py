@@ -0,0 +1,104 @@
+"""Tests for the shared Chroma retriever and its query caches."""
+
+from unittest.mock import patch
+
+import pytest
+from langchain_chroma import Chroma
+
+from agents.retriever import chroma_retriever, normalize_query
+from agents.tools import database_search
+from memory.embeddings import HashingEmbeddings
+
+HANDBOOK = [
+    "Employees get twenty days of paid vacation per year.",
+    "Parental leave lasts sixteen weeks at full pay.",
+    "Expense reports are due within thirty days of purchase.",
+]
+
+
+@pytest.fixture
+def retriever(tmp_path):
+    Chroma(persist_directory=str(tmp_path), embedding_function=HashingEmbeddings()).add_texts(
+        HANDBOOK
+    )
+    chroma_retriever.clear()
+    with patch("agents.retriever.settings") as mock_settings:
+        mock_settings.CHROMA_DB_DIR = str(tmp_path)
+        mock_settings.CHROMA_EMBEDDINGS = "fake"
+        mock_settings.RETRIEVER_K = 2
+        mock_settings.RETRIEVER_SCORE_THRESHOLD = None
+        mock_settings.RETRIEVER_CACHE_SIZE = 100
+        mock_settings.RETRIEVER_CACHE_TTL = 300.0
+        yield chroma_retriever, mock_settings
+    chroma_retriever.clear()
+
+
+def test_normalize_query():
+    assert normalize_query("  Parental   LEAVE\n") == "parental leave"
+
+
+@pytest.mark.asyncio
+async def test_search_returns_top_k(retriever):
+    chroma_retriever, _ = retriever
+
+    documents = await chroma_retriever.asearch("how long is parental leave")
+
+    assert len(documents) == 2
+    assert documents[0].page_content == HANDBOOK[1]
+
+
+@pytest.mark.asyncio
+async def test_store_is_opened_once(retriever):
+    chroma_retriever, _ = retriever
+
+    with patch("agents.retriever.get_chroma_embeddings", wraps=HashingEmbeddings) as embeddings:
+        await chroma_retriever.asearch("vacation")
+        await chroma_retriever.asearch("expense reports")
+
+    embeddings.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_repeated_queries_hit_the_caches(retriever):
+    chroma_retriever, _ = retriever
+
+    first = await chroma_retriever.asearch("Paid vacation")
+    with patch.object(Chroma, "similarity_search_by_vector_with_relevance_scores") as search:
+        second = await chroma_retriever.asearch("  paid   VACATION ")
+    search.assert_not_called()
+    assert [d.page_content for d in first] == [d.page_content for d in second]
+
+    # Another k reuses the query embedding, not the results
+    await chroma_retriever.asearch("paid vacation", k=1)
+    stats = chroma_retriever.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert (stats["embeddingHits"], stats["embeddingMisses"]) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_cached_results_expire(retriever):
+    chroma_retriever, mock_settings = retriever
+    mock_settings.RETRIEVER_CACHE_TTL = 0.0
+
+    await chroma_retriever.asearch("vacation")
+    await chroma_retriever.asearch("vacation")
+
+    assert chroma_retriever.stats()["misses"] == 2
+    assert chroma_retriever.stats()["embeddingHits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_score_threshold_filters_results(retriever):
+    chroma_retriever, _ = retriever
+
+    everything = await chroma_retriever.asearch("parental leave", k=3)
+    relevant = await chroma_retriever.asearch("parental leave", k=3, score_threshold=0.2)
+
+    assert len(everything) == 3
+    assert [d.page_content for d in relevant] == [HANDBOOK[1]]
+
+
+@pytest.mark.asyncio
+async def test_database_search_tool(retriever):
+    result = await database_search.ainvoke({"query": "expense reports"})
+    assert HANDBOOK[2] in result
@@ -0,0 +1,107 @@
+"""Tests for the blob store and lazy ref resolution."""
+
+import base64
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from core.blob_store import (
+    MISSING_BLOB_TEXT,
+    BlobNotFoundError,
+    LocalBlobStore,
+    S3BlobStore,
+    blob_mime_type,
+    get_blob_store,
+    parse_blob_ref,
+    resolve_blob_refs,
+)
+
+
+@pytest.fixture
+def blob_settings(tmp_path):
+    with patch("core.blob_store.settings") as mock_settings:
+        mock_settings.FILE_BLOB_BACKEND = "local"
+        mock_settings.FILE_BLOB_DIR = str(tmp_path)
+        mock_settings.FILE_BLOB_S3_BUCKET = None
+        mock_settings.FILE_BLOB_S3_PREFIX = "processed/"
+        mock_settings.FILE_BLOB_S3_ENDPOINT_URL = None
+        yield mock_settings
+
+
+@pytest.mark.asyncio
+async def test_local_store_is_content_addressed(tmp_path):
+    store = LocalBlobStore(tmp_path)
+
+    ref = await store.put(b"page bytes", "image/jpeg")
+
+    assert ref.startswith("blob://") and ref.endswith(".jpg")
+    assert await store.put(b"page bytes", "image/jpeg") == ref
+    assert await store.get(ref) == b"page bytes"
+    assert blob_mime_type(parse_blob_ref(ref)) == "image/jpeg"
+    assert len(list(tmp_path.rglob("*.jpg"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_invalid_or_missing_refs_raise(tmp_path):
+    store = LocalBlobStore(tmp_path)
+
+    with pytest.raises(BlobNotFoundError):
+        await store.get("blob://../../etc/passwd")
+    with pytest.raises(BlobNotFoundError):
+        await store.get(f"blob://{'a' * 64}.png")
+
+
+@pytest.mark.asyncio
+async def test_s3_store_round_trip():
+    s3 = MagicMock()
+    s3.get_object.return_value = {"Body": MagicMock(read=MagicMock(return_value=b"bytes"))}
+    with patch("boto3.client", return_value=s3) as client:
+        store = S3BlobStore("bucket", prefix="processed/", endpoint_url="http://minio:9000")
+
+        ref = await store.put(b"bytes", "image/png")
+        assert await store.get(ref) == b"bytes"
+
+    client.assert_called_once_with("s3", endpoint_url="http://minio:9000")
+    key = "processed/" + parse_blob_ref(ref)
+    s3.put_object.assert_called_once_with(
+        Bucket="bucket", Key=key, Body=b"bytes", ContentType="image/png"
+    )
+    s3.get_object.assert_called_once_with(Bucket="bucket", Key=key)
+
+
+def test_s3_backend_requires_bucket(blob_settings):
+    blob_settings.FILE_BLOB_BACKEND = "s3"
+
+    with pytest.raises(ValueError, match="FILE_BLOB_S3_BUCKET"):
+        get_blob_store()
+
+
+@pytest.mark.asyncio
+async def test_resolve_replaces_refs_only_in_the_llm_copy(blob_settings):
+    ref = await get_blob_store().put(b"\x89PNG...", "image/png")
+    original = HumanMessage(
+        content=[
+            {"type": "text", "text": "What is this?"},
+            {"type": "image_url", "image_url": {"url": ref}},
+            {"type": "media", "data": ref, "mime_type": "image/png"},
+        ]
+    )
+    plain = AIMessage(content="An image.")
+
+    resolved = await resolve_blob_refs([original, plain])
+
+    b64 = base64.b64encode(b"\x89PNG...").decode()
+    assert resolved[0].content[1]["image_url"]["url"] == f"data:image/png;base64,{b64}"
+    assert resolved[0].content[2]["data"] == b64
+    assert resolved[1] is plain
+    assert original.content[1]["image_url"]["url"] == ref  # State keeps the ref
+
+
+@pytest.mark.asyncio
+async def test_missing_blob_becomes_placeholder(blob_settings):
+    message = HumanMessage(content=[{"type": "image_url", "image_url": f"blob://{'b' * 64}.png"}])
+
+    resolved = await resolve_blob_refs([message])
+
+    assert resolved[0].content == [{"type": "text", "text": MISSING_BLOB_TEXT}]
@@ -0,0 +1,61 @@
+"""Tests for the document cache behind thumbnail handles."""
+
+from unittest.mock import patch
+
+import pytest
+
+from core.document_cache import document_cache
+
+
+@pytest.fixture
+def cache():
+    document_cache.clear()
+    with patch("core.document_cache.settings") as mock_settings:
+        mock_settings.FILE_DOCUMENT_TTL = 600.0
+        mock_settings.FILE_DOCUMENT_MAX = 2
+        yield document_cache, mock_settings
+    document_cache.clear()
+
+
+def _file(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(b"%PDF")
+    return str(path)
+
+
+def test_use_returns_document_and_refreshes_expiry(cache, tmp_path):
+    cache, _ = cache
+    handle = cache.add(_file(tmp_path, "a.pdf"), page_count=3)
+
+    with cache.use(handle) as document:
+        assert document.page_count == 3
+    with cache.use("unknown") as document:
+        assert document is None
+
+
+def test_expired_documents_are_deleted(cache, tmp_path):
+    cache, _ = cache
+    path = _file(tmp_path, "a.pdf")
+    with patch("core.document_cache.time.monotonic", return_value=100.0):
+        handle = cache.add(path, page_count=1)
+    with patch("core.document_cache.time.monotonic", return_value=701.0):
+        with cache.use(handle) as document:
+            assert document is None
+
+    assert not (tmp_path / "a.pdf").exists()
+
+
+def test_lru_bound_spares_documents_in_use(cache, tmp_path):
+    cache, _ = cache
+    first = cache.add(_file(tmp_path, "a.pdf"), page_count=1)
+    with cache.use(first):
+        second = cache.add(_file(tmp_path, "b.pdf"), page_count=1)
+        third = cache.add(_file(tmp_path, "c.pdf"), page_count=1)
+
+    assert cache.stats()["documents"] == 2
+    with cache.use(first) as document:
+        assert document is not None
+    with cache.use(second) as document:
+        assert document is None  # Oldest idle document evicted
+    with cache.use(third) as document:
+        assert document is not None
@@ -0,0 +1,122 @@
+"""Tests for the configurable fake provider."""
+
+import time
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessageChunk, HumanMessage
+
+from core.llm import (
+    FakeModelError,
+    FakeRateLimitError,
+    FakeToolModel,
+    _create_fake_model,
+    _detect_provider,
+)
+
+MESSAGES = [HumanMessage(content="hello")]
+
+
+@pytest.mark.asyncio
+async def test_astream_yields_token_chunks_with_usage():
+    model = FakeToolModel(responses=["one two three"])
+
+    chunks = [chunk async for chunk in model.astream(MESSAGES)]
+
+    assert all(isinstance(c, AIMessageChunk) for c in chunks)
+    assert [c.content for c in chunks[:-1]] == ["one ", "two ", "three"]
+    assert chunks[-1].usage_metadata["output_tokens"] == 3
+
+
+@pytest.mark.asyncio
+async def test_first_token_delay_and_token_rate():
+    model = FakeToolModel(responses=["a b c d e"], first_token_delay=0.05, tokens_per_second=100)
+
+    start = time.perf_counter()
+    stream = model.astream(MESSAGES)
+    await stream.__anext__()
+    ttft = time.perf_counter() - start
+    async for _ in stream:
+        pass
+    total = time.perf_counter() - start
+
+    assert ttft >= 0.05
+    # 4 inter-token gaps at 10ms each
+    assert total >= 0.05 + 0.04
+
+
+@pytest.mark.asyncio
+async def test_scripted_responses_cycle_and_emit_tool_calls():
+    model = FakeToolModel(
+        responses=[
+            {"content": "", "tool_calls": [{"name": "search", "args": {"q": "x"}}]},
+            "done",
+        ]
+    )
+
+    first = await model.ainvoke(MESSAGES)
+    second = await model.ainvoke(MESSAGES)
+    third = await model.ainvoke(MESSAGES)
+
+    assert first.tool_calls[0]["name"] == "search"
+    assert first.tool_calls[0]["args"] == {"q": "x"}
+    assert second.content == "done"
+    assert third.tool_calls[0]["name"] == "search"
+
+
+@pytest.mark.asyncio
+async def test_streamed_tool_calls_aggregate():
+    model = FakeToolModel(
+        responses=[{"content": "ok", "tool_calls": [{"name": "search", "args": {"q": "x"}}]}]
+    )
+
+    merged = None
+    async for chunk in model.astream(MESSAGES):
+        merged = chunk if merged is None else merged + chunk
+
+    assert merged.content == "ok"
+    assert merged.tool_calls[0]["args"] == {"q": "x"}
+
+
+@pytest.mark.asyncio
+async def test_error_injection():
+    with pytest.raises(FakeRateLimitError) as exc_info:
+        await FakeToolModel(responses=["x"], rate_limit_rate=1.0).ainvoke(MESSAGES)
+    assert exc_info.value.status_code == 429
+
+    with pytest.raises(FakeModelError):
+        await FakeToolModel(responses=["x"], error_rate=1.0).ainvoke(MESSAGES)
+
+
+def test_seeded_error_injection_is_reproducible():
+    def outcomes():
+        model = FakeToolModel(responses=["x"], error_rate=0.5, seed=7)
+        results = []
+        for _ in range(20):
+            try:
+                model.invoke(MESSAGES)
+                results.append(True)
+            except FakeModelError:
+                results.append(False)
+        return results
+
+    first = outcomes()
+    assert first == outcomes()
+    assert True in first and False in first
+
+
+def test_create_fake_model_from_settings():
+    config = {"responses": ["scripted"], "first_token_delay": 0.2, "tokens_per_second": 40}
+    with patch("core.llm.settings") as mock_settings:
+        mock_settings.FAKE_MODEL_CONFIG = config
+        model = _create_fake_model()
+
+    assert model.responses == ["scripted"]
+    assert model.first_token_delay == 0.2
+    assert model.tokens_per_second == 40
+    # Settings dict is not mutated
+    assert "responses" in config
+
+
+def test_detect_provider_fake():
+    assert _detect_provider("fake") == "fake"
@@ -0,0 +1,163 @@
+"""Tests for the content-addressed processed file cache."""
+
+import io
+from unittest.mock import patch
+
+import httpx
+import pytest
+from PIL import Image
+
+from core.file_cache import ProcessedFileCache, content_key, processed_file_cache
+from core.file_processor import FileProcessor, ProcessingAction
+
+
+@pytest.fixture
+def cache(tmp_path):
+    processed_file_cache.clear()
+    with patch("core.file_cache.settings") as mock_settings:
+        mock_settings.FILE_CACHE_ENABLED = True
+        mock_settings.FILE_CACHE_DIR = str(tmp_path / "cache")
+        mock_settings.FILE_CACHE_MAX_MB = 1
+        mock_settings.FILE_CACHE_MAX_URLS = 100
+        yield processed_file_cache
+    processed_file_cache.clear()
+
+
+def _png(size=(5000, 100)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color="green").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _client(handler):
+    return patch(
+        "core.file_processor.get_http_client",
+        return_value=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+
+def test_key_covers_processing_params():
+    assert content_key(b"abc", "image/png|150") != content_key(b"abc", "image/png|300")
+    assert content_key(b"abc", "p") == content_key(b"abc", "p")
+
+
+def test_key_of_a_file_matches_its_bytes(tmp_path):
+    path = tmp_path / "file.bin"
+    path.write_bytes(b"abc")
+
+    assert content_key(str(path), "p") == content_key(b"abc", "p")
+
+
+@pytest.mark.asyncio
+async def test_repeat_content_skips_processing(cache):
+    data = _png()
+    with (
+        _client(lambda request: httpx.Response(200, content=data)),
+        patch.object(
+            FileProcessor, "_process_image", autospec=True, side_effect=FileProcessor._process_image
+        ) as process_image,
+    ):
+        first = await FileProcessor().process("https://example.com/a.png", "image/png")
+        # Same bytes under another URL: content hit
+        second = await FileProcessor().process("https://example.com/b.png", "image/png")
+
+    assert process_image.call_count == 1
+    assert second.action == ProcessingAction.TILE
+    assert [f.data for f in second.files] == [f.data for f in first.files]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hitRate"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_etag_revalidation_skips_download(cache):
+    data = _png()
+    requests = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=data, headers={"etag": '"v1"'})
+
+    with _client(_handler):
+        await FileProcessor().process("https://example.com/menu.png", "image/png")
+        with patch("core.file_processor.Image.open") as image_open:
+            result = await FileProcessor().process("https://example.com/menu.png", "image/png")
+
+    image_open.assert_not_called()
+    assert result.action == ProcessingAction.TILE
+    assert requests[1].headers["if-none-match"] == '"v1"'
+    assert cache.stats()["urlHits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_least_recently_used(cache):
+    payload = {"files": [], "action": "direct", "original_pages": None, "pad": "x" * 400_000}
+    await cache.put("a", payload)
+    await cache.put("b", payload)
+    assert await cache.get("a") is not None  # a is now most recent
+    await cache.put("c", payload)
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["sizeBytes"] <= 1024 * 1024
+
+
+@pytest.mark.asyncio
+async def test_index_is_rebuilt_from_disk(cache):
+    await cache.put("k1", {"files": [], "action": "direct", "original_pages": None})
+    cache.clear()
+
+    assert ProcessedFileCache() is cache
+    assert await cache.get("k1") == {"files": [], "action": "direct", "original_pages": None}
+
+
+@pytest.mark.asyncio
+async def test_disabled_cache_is_a_no_op(cache):
+    with patch("core.file_cache.settings.FILE_CACHE_ENABLED", False):
+        await cache.put("k1", {"files": []})
+        assert await cache.get("k1") is None
+    assert cache.stats()["entries"] == 0
+
+
+URL = "https://example.com/price-list.pdf"
+
+
+def _pdf(pages: int) -> bytes:
+    import fitz
+
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page(width=200, height=200)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@pytest.mark.asyncio
+async def test_streamed_pdf_is_cached_and_replayed(cache):
+    data = _pdf(3)
+    with _client(lambda request: httpx.Response(200, content=data)):
+        first = [item async for item in FileProcessor().process_stream(URL, "application/pdf")]
+        with patch.object(FileProcessor, "_render_pdf_pages") as render:
+            second = [item async for item in FileProcessor().process_stream(URL, "application/pdf")]
+
+    render.assert_not_called()
+    assert second[0].original_pages == 3
+    assert [f.data for f in second[1:]] == [f.data for f in first[1:]]
+    assert cache.stats()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_is_not_cached(cache):
+    data = _pdf(3)
+    with _client(lambda request: httpx.Response(200, content=data)):
+        stream = FileProcessor().process_stream(URL, "application/pdf")
+        await anext(stream)
+        await anext(stream)
+        await stream.aclose()
+
+    assert cache.stats()["entries"] == 0
+    assert list(cache.directory.iterdir()) == []
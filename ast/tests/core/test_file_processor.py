@@ -2,15 +2,41 @@
 
 import base64
 import io
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import patch
 
+import httpx
 import pytest
 from PIL import Image
 
 
+def _mock_download(content: bytes = b"", error: Exception | None = None, headers=None):
+    """Serve downloads from an in-process transport instead of the network."""
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        if error is not None:
+            raise error
+        return httpx.Response(200, content=content, headers=headers)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    return patch("core.file_processor.get_http_client", return_value=client)
+
+
 class TestProcessingAction:
     """Tests for determining processing action."""
 
+    def test_image_over_target_long_edge_returns_resize(self):
+        """Image over 1568px (but within 4096px, < 10MB) should return RESIZE."""
+        from core.file_processor import FileProcessor, ProcessingAction
+
+        processor = FileProcessor()
+        action = processor._get_action(
+            size_bytes=2 * 1024 * 1024,
+            width=3000,
+            height=2000,
+            mime_type="image/jpeg",
+        )
+        assert action == ProcessingAction.RESIZE
+
     def test_small_image_returns_direct(self):
         """Small image (< 10MB, < 1568px) should return DIRECT."""
         from core.file_processor import FileProcessor, ProcessingAction
@@ -142,27 +168,232 @@ class TestPDFProcessing:
             processor._process_pdf(pdf_bytes)
         assert "50" in str(exc_info.value)
 
-    def test_pdf_uses_correct_dpi(self):
-        """PDF should be rendered at 150 DPI."""
+    def test_pdf_dpi_fits_page_size(self):
+        """Pages render at a DPI fitting their long edge to 1568px, within 72-200 DPI."""
         from core.file_processor import FileProcessor
 
         processor = FileProcessor()
 
-        # Create a simple PDF (Letter size: 8.5 x 11 inches)
         import fitz
 
         doc = fitz.open()
-        doc.new_page(width=612, height=792)  # 72 DPI default
+        doc.new_page(width=612, height=792)  # Letter: 8.5 x 11 inches
+        doc.new_page(width=216, height=360)  # Receipt: 3 x 5 inches
+        doc.new_page(width=2384, height=3370)  # A0: 33 x 47 inches
         pdf_bytes = doc.tobytes()
         doc.close()
 
-        result = processor._process_pdf(pdf_bytes)
+        letter, receipt, poster = processor._process_pdf(pdf_bytes)
 
-        # At 150 DPI, Letter size should be approximately:
-        # Width: 8.5 * 150 = 1275px
-        # Height: 11 * 150 = 1650px
-        assert result[0].width == pytest.approx(1275, rel=0.05)
-        assert result[0].height == pytest.approx(1650, rel=0.05)
+        # Letter at ~142 DPI: long edge on target
+        assert letter.height == pytest.approx(1568, abs=2)
+        assert letter.width == pytest.approx(1568 * 8.5 / 11, abs=2)
+        # Small pages are capped at 200 DPI, large ones floored at 72 DPI
+        assert receipt.height == pytest.approx(5 * 200, abs=2)
+        assert poster.height == pytest.approx(3370, abs=2)
+
+
+class TestPDFTextLayer:
+    """Tests for the per-page text vs raster decision."""
+
+    PARAGRAPH = "The quick brown fox jumps over the lazy dog. " * 12
+
+    def _pdf(self, *pages: str) -> bytes:
+        """PDF with one page per spec: "text", "image" (text over a full-page image) or "blank"."""
+        import fitz
+
+        doc = fitz.open()
+        for spec in pages:
+            page = doc.new_page(width=612, height=792)
+            if spec == "image":
+                pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 50, 50), False)
+                pix.clear_with(200)
+                page.insert_image(page.rect, pixmap=pix)
+            if spec in ("text", "image"):
+                page.insert_textbox(fitz.Rect(50, 50, 560, 740), self.PARAGRAPH)
+        pdf_bytes = doc.tobytes()
+        doc.close()
+        return pdf_bytes
+
+    def test_text_dense_page_is_sent_as_text(self):
+        """A page with a real text layer becomes a text/plain file."""
+        from core.file_processor import FileProcessor, ProcessingAction
+
+        processor = FileProcessor()
+        _, plan = processor._plan_pdf_pages(self._pdf("text"))
+        (page,) = processor._process_pdf(self._pdf("text"))
+
+        assert processor._pdf_action(plan) == ProcessingAction.EXTRACT_TEXT
+        assert page.mime_type == "text/plain"
+        assert page.is_text
+        assert "quick brown fox" in page.data
+        assert page.to_bytes() == page.data.encode()
+
+    def test_scanned_and_blank_pages_are_rendered(self):
+        """Pages covered by an image (scans with OCR) or without text are rendered."""
+        from core.file_processor import FileProcessor, ProcessingAction
+
+        processor = FileProcessor()
+        pdf_bytes = self._pdf("text", "image", "blank")
+
+        _, plan = processor._plan_pdf_pages(pdf_bytes)
+        files = processor._process_pdf(pdf_bytes)
+
+        assert [text is not None for text in plan.values()] == [True, False, False]
+        assert processor._pdf_action(plan) == ProcessingAction.MIXED
+        assert [f.mime_type for f in files] == ["text/plain", "image/png", "image/png"]
+
+    def test_text_layer_can_be_disabled(self):
+        from core.file_processor import FileProcessor, ProcessingAction
+
+        processor = FileProcessor()
+        processor.PDF_TEXT_LAYER = False
+
+        _, plan = processor._plan_pdf_pages(self._pdf("text"))
+
+        assert plan == {0: None}
+        assert processor._pdf_action(plan) == ProcessingAction.RENDER_PAGES
+
+
+class TestPageRanges:
+    """Tests for page ranges, thumbnail-first mode and document handles."""
+
+    @staticmethod
+    def _pdf(pages: int) -> bytes:
+        import fitz
+
+        doc = fitz.open()
+        for i in range(pages):
+            page = doc.new_page(width=612, height=792)
+            page.insert_text((72, 72), f"Page {i + 1}")
+        pdf_bytes = doc.tobytes()
+        doc.close()
+        return pdf_bytes
+
+    def test_parse_page_range(self):
+        from core.file_processor import InvalidPageRangeError, parse_page_range
+
+        assert parse_page_range(None, 3) == [0, 1, 2]
+        assert parse_page_range("1-3, 7", 10) == [0, 1, 2, 6]
+        assert parse_page_range("8-,2,2-3", 10) == [1, 2, 7, 8, 9]
+        for spec in ("0", "3-2", "11", "1-11", "a", "1,,2"):
+            with pytest.raises(InvalidPageRangeError):
+                parse_page_range(spec, 10)
+
+    @pytest.mark.asyncio
+    async def test_page_range_renders_only_selected_pages(self):
+        """A range selects pages even in PDFs over the page limit."""
+        from core.file_processor import FileProcessor
+
+        processor = FileProcessor()
+        with (
+            _mock_download(content=self._pdf(60)),
+            patch.object(
+                FileProcessor, "_render_pdf_pages", wraps=processor._render_pdf_pages
+            ) as render,
+        ):
+            result = await processor.process(
+                "https://example.com/doc.pdf", "application/pdf", pages="2-3"
+            )
+
+        assert result.original_pages == 60
+        assert result.pages == [2, 3]
+        assert len(result.files) == 2
+        assert sorted(call.args[1] for call in render.call_args_list) == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_thumbnails_then_full_pages_by_handle(self):
+        from core.document_cache import document_cache
+        from core.file_processor import FileProcessor, ProcessingAction
+
+        processor = FileProcessor()
+        with _mock_download(content=self._pdf(4)) as get_client:
+            preview = await processor.process(
+                "https://example.com/doc.pdf", "application/pdf", thumbnails=True
+            )
+            pages = await processor.process_document(preview.handle, pages="3")
+        try:
+            assert preview.action == ProcessingAction.THUMBNAILS
+            assert preview.pages == [1, 2, 3, 4]
+            assert all(f.mime_type == "image/jpeg" for f in preview.files)
+            assert all(max(f.width, f.height) == 256 for f in preview.files)
+
+            assert pages.handle == preview.handle
+            assert pages.pages == [3]
+            assert pages.files[0].height == pytest.approx(1568, abs=2)
+            assert get_client.call_count == 1  # Pages come from the kept document
+        finally:
+            document_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_unknown_handle_raises(self):
+        from core.file_processor import DocumentNotFoundError, FileProcessor
+
+        with pytest.raises(DocumentNotFoundError):
+            await FileProcessor().process_document("nope", pages="1")
+
+    def test_worker_reuses_opened_document(self, tmp_path):
+        from core.file_processor import _pdf_document
+
+        path = tmp_path / "doc.pdf"
+        path.write_bytes(self._pdf(2))
+
+        with _pdf_document(str(path)) as first:
+            pass
+        with _pdf_document(str(path)) as second:
+            assert second is first
+            assert len(second) == 2
+
+    def test_open_documents_lock_per_document(self, tmp_path):
+        """A document in use doesn't block other documents."""
+        import threading
+
+        from core.file_processor import _pdf_document
+
+        first, second = tmp_path / "first.pdf", tmp_path / "second.pdf"
+        first.write_bytes(self._pdf(1))
+        second.write_bytes(self._pdf(2))
+        opened, release = threading.Event(), threading.Event()
+
+        def _hold():
+            with _pdf_document(str(first)):
+                opened.set()
+                release.wait(5)
+
+        holder = threading.Thread(target=_hold)
+        holder.start()
+        try:
+            assert opened.wait(5)
+            done = threading.Event()
+
+            def _use_second():
+                with _pdf_document(str(second)) as doc:
+                    assert len(doc) == 2
+                done.set()
+
+            threading.Thread(target=_use_second).start()
+            assert done.wait(5)
+        finally:
+            release.set()
+            holder.join()
+
+    def test_deleted_document_is_closed(self, tmp_path):
+        from core.file_processor import _forget_pdf_document, _open_documents, _pdf_document
+
+        removed, other = tmp_path / "removed.pdf", tmp_path / "other.pdf"
+        removed.write_bytes(self._pdf(1))
+        other.write_bytes(self._pdf(1))
+
+        with _pdf_document(str(removed)) as doc:
+            pass
+        removed.unlink()
+        with _pdf_document(str(other)):
+            pass
+
+        assert str(removed) not in _open_documents
+        assert doc.is_closed
+        _forget_pdf_document(str(other))
+        assert str(other) not in _open_documents
 
 
 class TestImageCompression:
@@ -221,29 +452,91 @@ class TestImageCompression:
         assert result.height == 1000
 
 
+class TestImageResize:
+    """Tests for scaling images down to the target long edge."""
+
+    def test_resize_fits_long_edge_and_keeps_format(self):
+        from core.file_processor import FileProcessor
+
+        processor = FileProcessor()
+        img = Image.new("RGB", (3136, 1000), color="blue")
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG")
+
+        result = processor._resize_image(buffer.getvalue(), "image/jpeg")
+
+        assert (result.width, result.height) == (1568, 500)
+        assert result.mime_type == "image/jpeg"
+        assert Image.open(io.BytesIO(base64.b64decode(result.data))).size == (1568, 500)
+
+    def test_resize_palette_image_to_png(self):
+        from core.file_processor import FileProcessor
+
+        processor = FileProcessor()
+        img = Image.new("P", (2000, 2000))
+        buffer = io.BytesIO()
+        img.save(buffer, format="GIF")
+
+        result = processor._resize_image(buffer.getvalue(), "image/gif")
+
+        assert result.mime_type == "image/png"
+        assert (result.width, result.height) == (1568, 1568)
+
+    def test_compress_caps_long_edge(self):
+        from core.file_processor import FileProcessor
+
+        processor = FileProcessor()
+        result = processor._compress_image(Image.new("RGB", (4000, 2000)), "image/png")
+
+        assert (result.width, result.height) == (1568, 784)
+
+
 class TestImageTiling:
     """Tests for image tiling."""
 
-    def test_tile_creates_correct_grid(self):
-        """Tiling should create correct number of tiles."""
+    def test_tile_covers_content_in_grid(self):
+        """Content spanning the image is tiled in an overlapping grid."""
         from core.file_processor import FileProcessor
 
         processor = FileProcessor()
 
-        # Create 5000x3000 image (should create ~4x2 grid with overlap)
-        img = Image.new("RGB", (5000, 3000), color="green")
+        # 5000x3000 of content edge to edge: ~4x2 grid (overlapping 1568px windows)
+        img = Image.merge("RGB", [Image.effect_noise((5000, 3000), 40) for _ in range(3)])
+
+        result = processor._tile_image(img)
+
+        assert 4 <= len(result) <= 9  # MAX_TILES
+        assert all(max(tile.width, tile.height) <= processor.TILE_SIZE for tile in result)
+
+    def test_blank_background_is_skipped(self):
+        """Tiles go where the content is; whitespace isn't sent."""
+        from PIL import ImageDraw
+
+        from core.file_processor import FileProcessor
+
+        processor = FileProcessor()
+
+        img = Image.new("RGB", (6000, 4000), color="white")
+        draw = ImageDraw.Draw(img)
+        draw.rectangle((200, 200, 900, 700), fill="black")
+        draw.rectangle((5000, 3300, 5600, 3700), fill="navy")
         buffer = io.BytesIO()
         img.save(buffer, format="PNG")
-        image_bytes = buffer.getvalue()
 
-        result = processor._tile_image(image_bytes)
+        result = processor._tile_image(buffer.getvalue())
+
+        assert len(result) == 2
+        assert all(tile.width < 1000 and tile.height < 1000 for tile in result)
 
-        # With TILE_SIZE=1568 and 10% overlap:
-        # Horizontal: ceil(5000 / (1568 * 0.9)) ≈ 4 tiles
-        # Vertical: ceil(3000 / (1568 * 0.9)) ≈ 3 tiles
-        # Total: 4 * 3 = 12 tiles (but capped at MAX_TILES=9)
-        assert len(result) <= 9  # MAX_TILES
-        assert len(result) >= 4  # At least some tiles
+    def test_photographic_tiles_are_lossy(self):
+        from core.file_processor import FileProcessor
+
+        processor = FileProcessor()
+        img = Image.merge("RGB", [Image.effect_noise((4200, 1000), 60) for _ in range(3)])
+
+        result = processor._tile_image(img)
+
+        assert {tile.mime_type for tile in result} == {"image/webp"}
 
     def test_tile_max_tiles_limit(self):
         """Tiling should respect MAX_TILES limit."""
@@ -312,17 +605,7 @@ class TestProcessMethod:
         image_b64 = base64.b64encode(image_bytes).decode()
 
         # Mock httpx to return our image
-        with patch("core.file_processor.httpx") as mock_httpx:
-            mock_response = MagicMock()
-            mock_response.content = image_bytes
-            mock_response.raise_for_status = MagicMock()
-
-            mock_client = AsyncMock()
-            mock_client.get = AsyncMock(return_value=mock_response)
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=None)
-            mock_httpx.AsyncClient.return_value = mock_client
-
+        with _mock_download(content=image_bytes):
             result = await processor.process(
                 url="https://example.com/image.png",
                 mime_type="image/png",
@@ -348,17 +631,7 @@ class TestProcessMethod:
         pdf_bytes = doc.tobytes()
         doc.close()
 
-        with patch("core.file_processor.httpx") as mock_httpx:
-            mock_response = MagicMock()
-            mock_response.content = pdf_bytes
-            mock_response.raise_for_status = MagicMock()
-
-            mock_client = AsyncMock()
-            mock_client.get = AsyncMock(return_value=mock_response)
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=None)
-            mock_httpx.AsyncClient.return_value = mock_client
-
+        with _mock_download(content=pdf_bytes):
             result = await processor.process(
                 url="https://example.com/document.pdf",
                 mime_type="application/pdf",
@@ -379,13 +652,7 @@ class TestErrorHandling:
 
         processor = FileProcessor()
 
-        with patch("core.file_processor.httpx") as mock_httpx:
-            mock_client = AsyncMock()
-            mock_client.get = AsyncMock(side_effect=Exception("Connection failed"))
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=None)
-            mock_httpx.AsyncClient.return_value = mock_client
-
+        with _mock_download(error=httpx.ConnectError("Connection failed")):
             with pytest.raises(FileProcessingError):
                 await processor.process(
                     url="https://invalid-url.com/file.pdf",
@@ -419,3 +686,259 @@ class TestErrorHandling:
                 height=1000,
                 mime_type="image/png",
             )
+
+
+class TestStreamingDownload:
+    """Tests for streamed, size-capped downloads."""
+
+    @pytest.mark.asyncio
+    async def test_content_length_rejects_before_reading_body(self):
+        """A declared Content-Length over the limit aborts before the body is read."""
+        from core.file_processor import FileProcessor, FileTooLargeError
+
+        processor = FileProcessor()
+        read = []
+
+        async def _body():
+            read.append(True)
+            yield b"x"
+
+        def _handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(
+                200, content=_body(), headers={"content-length": str(200 * 1024 * 1024)}
+            )
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+        with patch("core.file_processor.get_http_client", return_value=client):
+            with pytest.raises(FileTooLargeError):
+                await processor.process("https://example.com/big.pdf", "application/pdf")
+
+        assert read == []
+
+    @pytest.mark.asyncio
+    async def test_running_byte_count_aborts_without_content_length(self):
+        """Without Content-Length, the download stops once the limit is passed."""
+        from core.file_processor import FileProcessor, FileTooLargeError
+
+        processor = FileProcessor()
+        processor.MAX_FILE_SIZE_MB = 1
+        chunks = []
+
+        async def _body():
+            for _ in range(100):
+                chunks.append(True)
+                yield b"x" * (64 * 1024)
+
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=_body()))
+        )
+        with patch("core.file_processor.get_http_client", return_value=client):
+            with pytest.raises(FileTooLargeError):
+                await processor.process("https://example.com/big.png", "image/png")
+
+        assert len(chunks) < 100
+
+    @pytest.mark.asyncio
+    async def test_unsupported_type_is_not_downloaded(self):
+        """Unsupported types are rejected without a request."""
+        from core.file_processor import FileProcessor, UnsupportedFileTypeError
+
+        with patch("core.file_processor.get_http_client") as get_client:
+            with pytest.raises(UnsupportedFileTypeError):
+                await FileProcessor().process("https://example.com/a.mp4", "video/mp4")
+
+        get_client.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_spooled_download_decodes_image_once(self):
+        """A body spooled to disk is opened once for both size check and tiling."""
+        from core.file_processor import FileProcessor, ProcessingAction
+
+        processor = FileProcessor()
+        processor.SPOOL_THRESHOLD_MB = 0
+        img = Image.new("RGB", (5000, 100), color="blue")
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+
+        with _mock_download(content=buffer.getvalue()):
+            with patch("core.file_processor.Image.open", wraps=Image.open) as image_open:
+                result = await processor.process("https://example.com/wide.png", "image/png")
+
+        assert result.action == ProcessingAction.TILE
+        assert image_open.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_spooled_body_is_opened_by_path(self):
+        """Spooled bodies reach the workers as a temp file path, deleted afterwards."""
+        import os
+
+        import fitz
+
+        from core.file_processor import FileProcessor
+
+        processor = FileProcessor()
+        processor.SPOOL_THRESHOLD_MB = 0
+        doc = fitz.open()
+        doc.new_page().insert_text((20, 50), "Spooled")
+        pdf_bytes = doc.tobytes()
+        doc.close()
+        img = Image.new("RGB", (100, 100), color="red")
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+
+        with (
+            patch("core.file_processor._write_temp_pdf") as write_temp_pdf,
+            patch.object(FileProcessor, "_plan_pdf_pages", wraps=processor._plan_pdf_pages) as plan,
+            patch.object(
+                FileProcessor, "_process_image", wraps=processor._process_image
+            ) as process_image,
+        ):
+            with _mock_download(content=pdf_bytes):
+                pdf = await processor.process("https://example.com/spooled.pdf", "application/pdf")
+            with _mock_download(content=buffer.getvalue()):
+                image = await processor.process("https://example.com/spooled.png", "image/png")
+
+        write_temp_pdf.assert_not_called()
+        [pdf_path] = [call.args[0] for call in plan.call_args_list]
+        [image_path] = [call.args[0] for call in process_image.call_args_list]
+        assert isinstance(pdf_path, str) and isinstance(image_path, str)
+        assert not os.path.exists(pdf_path) and not os.path.exists(image_path)
+        assert pdf.original_pages == 1
+        assert image.files[0].to_bytes() == buffer.getvalue()
+
+
+class TestWorkerPool:
+    """Tests for process-pool offload and page-parallel PDF rendering."""
+
+    @staticmethod
+    def _pdf(pages: int) -> bytes:
+        import fitz
+
+        doc = fitz.open()
+        for i in range(pages):
+            page = doc.new_page(width=200 + 10 * i, height=300)
+            page.insert_text((20, 50), f"Page {i + 1}")
+        pdf_bytes = doc.tobytes()
+        doc.close()
+        return pdf_bytes
+
+    @staticmethod
+    async def _render_all(processor, pdf_bytes, tmp_path):
+        path = tmp_path / "doc.pdf"
+        path.write_bytes(pdf_bytes)
+        _, plan = processor._plan_pdf_pages(str(path))
+        return [f async for f in processor._iter_pdf_pages(str(path), plan)]
+
+    @pytest.mark.asyncio
+    async def test_pages_render_in_parallel_processes_in_order(self, tmp_path):
+        """Pages rendered across worker processes come back in page order."""
+        from core.file_processor import FileProcessor, file_worker_pool
+
+        processor = FileProcessor()
+        pdf_bytes = self._pdf(5)
+        file_worker_pool.shutdown()
+        try:
+            # fork: same pickling round trip, without the forkserver's import time
+            with (
+                patch("core.file_processor.settings") as mock_settings,
+                patch("core.file_processor.WORKER_START_METHOD", "fork"),
+            ):
+                mock_settings.FILE_PROCESS_WORKERS = 2
+                files = await self._render_all(processor, pdf_bytes, tmp_path)
+                assert file_worker_pool._executor is not None
+        finally:
+            file_worker_pool.shutdown()
+
+        assert [f.data for f in files] == [f.data for f in processor._process_pdf(pdf_bytes)]
+        assert [f.width for f in files] == sorted(f.width for f in files)
+
+    @pytest.mark.asyncio
+    async def test_one_page_per_worker_in_flight(self, tmp_path):
+        """Each page is its own task, with at most one per worker in flight."""
+        import asyncio
+
+        from core.file_processor import FileProcessor, file_worker_pool
+
+        processor = FileProcessor()
+        in_flight = 0
+        peak = 0
+        rendered = []
+
+        async def _run(fn, *args):
+            nonlocal in_flight, peak
+            if fn.__name__ != "_render_pdf_pages":
+                return fn(*args)
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            rendered.append(args[1:])
+            return [args[1]]
+
+        with (
+            patch.object(file_worker_pool, "run", side_effect=_run),
+            patch("core.file_processor.FileWorkerPool.workers", 3),
+        ):
+            pages = await self._render_all(processor, self._pdf(7), tmp_path)
+
+        assert pages == list(range(7))
+        assert sorted(rendered) == [(i, i + 1) for i in range(7)]
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_text_pages_interleave_with_rendered_pages(self):
+        """Text pages skip the pool and keep their place among rendered pages."""
+        from core.file_processor import FileProcessor, file_worker_pool
+
+        processor = FileProcessor()
+        rendered = []
+
+        async def _run(fn, path, start, stop):
+            rendered.append(start)
+            return [start]
+
+        with patch.object(file_worker_pool, "run", side_effect=_run):
+            pages = [
+                f
+                async for f in processor._iter_pdf_pages(
+                    "doc.pdf", {0: "p0", 1: None, 2: "p2", 3: None}
+                )
+            ]
+
+        assert [getattr(p, "data", p) for p in pages] == ["p0", 1, "p2", 3]
+        assert rendered == [1, 3]
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap_limits_files_in_flight(self):
+        """No more than FILE_PROCESS_MAX_CONCURRENCY files are processed at once."""
+        import asyncio
+
+        from core.file_processor import FileProcessor, file_worker_pool
+
+        img = Image.new("RGB", (10, 10))
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        in_flight = 0
+        peak = 0
+
+        async def _run(fn, *args):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return fn(*args)
+
+        with (
+            patch("core.file_processor.settings") as mock_settings,
+            patch.object(file_worker_pool, "run", side_effect=_run),
+            _mock_download(content=buffer.getvalue()),
+        ):
+            mock_settings.FILE_PROCESS_MAX_CONCURRENCY = 2
+            mock_settings.FILE_PROCESS_WORKERS = 0
+            file_worker_pool._semaphore = None
+            urls = [f"https://example.com/{i}.png" for i in range(6)]
+            await asyncio.gather(*(FileProcessor().process(url, "image/png") for url in urls))
+        file_worker_pool._semaphore = None
+
+        assert peak == 2
@@ -0,0 +1,65 @@
+"""Tests for content-aware tiling."""
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from core.tiling import CELL, content_mask, content_regions, plan_tiles
+
+
+def _covered(tiles, mask, size):
+    """Whether every content cell lies inside some tile."""
+    width, height = size
+    for row, col in zip(*np.nonzero(mask)):
+        x1, y1 = col * CELL, row * CELL
+        x2, y2 = min(x1 + CELL, width), min(y1 + CELL, height)
+        if not any(
+            tx1 <= x1 and ty1 <= y1 and x2 <= tx2 and y2 <= ty2 for tx1, ty1, tx2, ty2 in tiles
+        ):
+            return False
+    return True
+
+
+def test_ink_map_ignores_background_only():
+    img = Image.new("RGB", (640, 640), color="white")
+    draw = ImageDraw.Draw(img)
+    draw.text((40, 40), "invoice total", fill="black")
+    draw.rectangle((320, 320, 639, 639), fill="red")  # Flat, but not background
+
+    mask = content_mask(img)
+
+    assert mask.shape == (20, 20)
+    assert mask[1:3, 1:3].any()  # Text
+    assert mask[12:, 12:].all()  # Solid block
+    assert not mask[5:9, :].any()  # Whitespace
+
+
+def test_regions_split_at_gaps():
+    mask = np.zeros((10, 10), dtype=bool)
+    mask[0:2, 0:3] = True
+    mask[6:9, 5:10] = True
+
+    assert content_regions(mask) == [(0, 0, 2, 3), (6, 5, 9, 10)]
+
+
+def test_tiles_cover_content_within_the_cap():
+    """Even when the grid is capped, every content cell stays covered."""
+    rng = np.random.default_rng(0)
+    pixels = np.full((5000, 7000), 255, dtype=np.uint8)
+    for _ in range(40):
+        y, x = rng.integers(0, 4800), rng.integers(0, 6800)
+        pixels[y : y + 150, x : x + 150] = rng.integers(0, 200, (150, 150))
+    img = Image.fromarray(pixels)
+
+    tiles = plan_tiles(img, tile_size=1568, overlap=0.1, max_tiles=9)
+
+    assert len(tiles) <= 9
+    assert _covered([tile.box for tile in tiles], content_mask(img), img.size)
+    assert all(max(tile.size) <= 1568 for tile in tiles)
+
+
+def test_blank_image_is_one_overview_tile():
+    tiles = plan_tiles(Image.new("RGB", (8000, 2000), "white"), 1568, 0.1, 9)
+
+    assert len(tiles) == 1
+    assert tiles[0].box == (0, 0, 8000, 2000)
+    assert tiles[0].size == (1568, 392)
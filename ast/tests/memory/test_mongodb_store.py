@@ -0,0 +1,194 @@
+"""Tests for the MongoDB long-term store."""
+
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langgraph.store.base import GetOp, ListNamespacesOp, MatchCondition, PutOp, SearchOp
+from pymongo import DeleteOne, UpdateOne
+
+from core.settings import DatabaseType
+from memory.mongodb import AsyncMongoDBStore, _filter_query, _prefix_query
+
+NOW = datetime(2025, 1, 1, tzinfo=UTC)
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+
+    def sort(self, *args):
+        self.calls.append(("sort", args))
+        return self
+
+    def skip(self, n):
+        self.calls.append(("skip", n))
+        return self
+
+    def limit(self, n):
+        self.calls.append(("limit", n))
+        return self
+
+    def __aiter__(self):
+        async def _gen():
+            for doc in self.docs:
+                yield doc
+
+        return _gen()
+
+
+def _doc(key, prefix="workflows", value=None):
+    return {
+        "prefix": prefix,
+        "key": key,
+        "value": value or {"id": key},
+        "created_at": NOW,
+        "updated_at": NOW,
+    }
+
+
+@pytest.fixture
+def collection():
+    collection = MagicMock()
+    collection.bulk_write = AsyncMock()
+    collection.create_index = AsyncMock()
+    collection.distinct = AsyncMock(return_value=[])
+    return collection
+
+
+@pytest.mark.asyncio
+async def test_gets_in_one_namespace_use_single_find(collection):
+    collection.find.return_value = _Cursor([_doc("wf_1"), _doc("wf_2")])
+    store = AsyncMongoDBStore(collection)
+
+    results = await store.abatch(
+        [
+            GetOp(("workflows",), "wf_2"),
+            GetOp(("workflows",), "missing"),
+            GetOp(("workflows",), "wf_1"),
+        ]
+    )
+
+    collection.find.assert_called_once()
+    query = collection.find.call_args.args[0]
+    assert query["prefix"] == "workflows"
+    assert set(query["key"]["$in"]) == {"wf_1", "wf_2", "missing"}
+    assert [r.key if r else None for r in results] == ["wf_2", None, "wf_1"]
+    assert results[0].namespace == ("workflows",)
+
+
+@pytest.mark.asyncio
+async def test_puts_are_one_unordered_bulk_write(collection):
+    store = AsyncMongoDBStore(collection)
+
+    await store.abatch(
+        [
+            PutOp(("workflows",), "wf_1", {"name": "old"}),
+            PutOp(("workflows",), "wf_2", None),
+            PutOp(("workflows",), "wf_1", {"name": "new"}),
+        ]
+    )
+
+    collection.bulk_write.assert_awaited_once()
+    requests = collection.bulk_write.call_args.args[0]
+    assert collection.bulk_write.call_args.kwargs["ordered"] is False
+    assert len(requests) == 2
+    upsert = next(r for r in requests if isinstance(r, UpdateOne))
+    assert upsert._doc["$set"]["value"] == {"name": "new"}
+    assert any(isinstance(r, DeleteOne) for r in requests)
+
+
+@pytest.mark.asyncio
+async def test_ops_apply_in_batch_order(collection):
+    events = []
+
+    def _find(query, projection):
+        events.append(("find", query["key"]))
+        return _Cursor([])
+
+    async def _bulk_write(requests, ordered):
+        events.append(("bulk_write", len(requests)))
+
+    collection.find.side_effect = _find
+    collection.bulk_write.side_effect = _bulk_write
+    store = AsyncMongoDBStore(collection)
+
+    await store.abatch(
+        [
+            GetOp(("workflows",), "wf_1"),
+            PutOp(("workflows",), "wf_1", {"name": "new"}),
+            PutOp(("workflows",), "wf_2", {"name": "new"}),
+            GetOp(("workflows",), "wf_1"),
+        ]
+    )
+
+    # The second get must observe the puts issued before it
+    assert events == [("find", "wf_1"), ("bulk_write", 2), ("find", "wf_1")]
+
+
+@pytest.mark.asyncio
+async def test_search_uses_prefix_filter_and_paging(collection):
+    cursor = _Cursor([_doc("wf_1")])
+    collection.find.return_value = cursor
+    store = AsyncMongoDBStore(collection)
+
+    [results] = await store.abatch(
+        [SearchOp(("workflows",), filter={"isActive": True}, limit=5, offset=10)]
+    )
+
+    query = collection.find.call_args.args[0]
+    assert query["value.isActive"] is True
+    assert query["$or"] == _prefix_query(("workflows",))["$or"]
+    assert ("skip", 10) in cursor.calls and ("limit", 5) in cursor.calls
+    assert results[0].key == "wf_1"
+
+
+@pytest.mark.asyncio
+async def test_list_namespaces_applies_conditions_and_depth(collection):
+    collection.distinct.return_value = ["workflows", "workflow_traces.wf_1", "workflow_traces.wf_2"]
+    store = AsyncMongoDBStore(collection)
+
+    [namespaces] = await store.abatch(
+        [
+            ListNamespacesOp(
+                match_conditions=(MatchCondition("prefix", ("workflow_traces",)),),
+                max_depth=2,
+            )
+        ]
+    )
+
+    assert namespaces == [("workflow_traces", "wf_1"), ("workflow_traces", "wf_2")]
+
+
+@pytest.mark.asyncio
+async def test_setup_creates_compound_indexes(collection):
+    await AsyncMongoDBStore(collection).setup()
+
+    specs = [call.args[0] for call in collection.create_index.call_args_list]
+    assert [("prefix", 1), ("key", 1)] in specs
+    assert [("prefix", 1), ("updated_at", -1)] in specs
+
+
+def test_filter_query_translation():
+    assert _filter_query({"a": 1, "b": {"$gt": 2}, "c": {"d": "x"}}) == {
+        "value.a": 1,
+        "value.b": {"$gt": 2},
+        "value.c.d": "x",
+    }
+
+
+def test_prefix_query_escapes_and_matches_children():
+    query = _prefix_query(("a", "b+c"))
+    assert query["$or"][0] == {"prefix": "a.b+c"}
+    assert query["$or"][1]["prefix"]["$regex"] == r"^a\.b\+c\."
+
+
+def test_initialize_store_uses_mongo_store():
+    from memory import initialize_store
+
+    with patch("memory.settings") as mock_settings, patch("memory.get_mongo_store") as get_store:
+        mock_settings.DATABASE_TYPE = DatabaseType.MONGO
+        initialize_store()
+
+    get_store.assert_called_once()
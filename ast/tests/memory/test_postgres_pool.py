@@ -0,0 +1,153 @@
+"""Tests for the Postgres pool manager."""
+
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from pydantic import SecretStr
+
+from memory.postgres_pool import (
+    InstrumentedAsyncConnectionPool,
+    PostgresPoolManager,
+    within_keep_warm_window,
+)
+
+
+def _fake_pool(*args, **kwargs):
+    pool = MagicMock()
+    pool.open = AsyncMock()
+    pool.wait = AsyncMock()
+    pool.close = AsyncMock()
+    pool.min_size = kwargs["min_size"]
+    pool.max_size = kwargs["max_size"]
+    pool.application_name = kwargs["kwargs"]["application_name"]
+    pool.telemetry.return_value = {"maxSize": kwargs["max_size"]}
+    return pool
+
+
+@pytest.fixture
+def manager():
+    manager = PostgresPoolManager()
+    manager._pools.clear()
+    manager._refs.clear()
+    with (
+        patch("memory.postgres_pool.InstrumentedAsyncConnectionPool", side_effect=_fake_pool),
+        patch("memory.postgres.get_postgres_connection_string", return_value="postgresql://x"),
+    ):
+        yield manager
+    manager._pools.clear()
+    manager._refs.clear()
+
+
+@pytest.fixture
+def mock_settings():
+    with patch("memory.postgres_pool.settings") as mock_settings:
+        mock_settings.POSTGRES_POOL_MODE = "shared"
+        mock_settings.POSTGRES_MIN_CONNECTIONS_PER_POOL = 5
+        mock_settings.POSTGRES_MAX_CONNECTIONS_PER_POOL = 20
+        mock_settings.POSTGRES_SAVER_POOL_MAX = None
+        mock_settings.POSTGRES_STORE_POOL_MAX = None
+        mock_settings.POSTGRES_REPLICA_POOL_MAX = None
+        mock_settings.POSTGRES_REPLICA_DSN = None
+        mock_settings.POSTGRES_POOL_WAIT_TIMEOUT = 60.0
+        mock_settings.POSTGRES_APPLICATION_NAME = "app"
+        mock_settings.POSTGRES_KEEP_WARM = False
+        mock_settings.POSTGRES_KEEP_WARM_TIMEZONE = "UTC"
+        mock_settings.POSTGRES_KEEP_WARM_WEEKDAYS_ONLY = True
+        mock_settings.POSTGRES_KEEP_WARM_START_HOUR = 8
+        mock_settings.POSTGRES_KEEP_WARM_END_HOUR = 20
+        yield mock_settings
+
+
+@pytest.mark.asyncio
+async def test_shared_mode_uses_one_pool(manager, mock_settings):
+    async with manager.pool("saver") as saver_pool, manager.pool("store") as store_pool:
+        assert saver_pool is store_pool
+        assert list(manager.stats()["pools"]) == ["shared"]
+        saver_pool.close.assert_not_called()
+
+    saver_pool.close.assert_awaited_once()
+    assert manager.stats()["pools"] == {}
+
+
+@pytest.mark.asyncio
+async def test_split_mode_applies_budgets(manager, mock_settings):
+    mock_settings.POSTGRES_POOL_MODE = "split"
+    mock_settings.POSTGRES_SAVER_POOL_MAX = 3
+    mock_settings.POSTGRES_STORE_POOL_MAX = 8
+
+    async with manager.pool("saver") as saver_pool, manager.pool("store") as store_pool:
+        assert saver_pool is not store_pool
+        assert (saver_pool.min_size, saver_pool.max_size) == (3, 3)
+        assert (store_pool.min_size, store_pool.max_size) == (5, 8)
+        assert saver_pool.application_name == "app-saver"
+
+
+@pytest.mark.asyncio
+async def test_replica_role_gets_its_own_pool(manager, mock_settings):
+    mock_settings.POSTGRES_REPLICA_DSN = SecretStr("postgresql://replica")
+    mock_settings.POSTGRES_REPLICA_POOL_MAX = 4
+
+    with patch(
+        "memory.postgres_pool.InstrumentedAsyncConnectionPool", side_effect=_fake_pool
+    ) as pool_cls:
+        async with manager.pool("store") as store_pool, manager.pool("replica") as replica_pool:
+            assert replica_pool is not store_pool
+            assert replica_pool.max_size == 4
+            assert replica_pool.application_name == "app-replica"
+
+    assert pool_cls.call_args_list[1].args[0] == "postgresql://replica"
+
+
+@pytest.mark.asyncio
+async def test_replica_role_requires_dsn(manager, mock_settings):
+    with pytest.raises(ValueError, match="POSTGRES_REPLICA_DSN"):
+        await manager.acquire("replica")
+
+
+@pytest.mark.asyncio
+async def test_warmup_failure_closes_pool(manager, mock_settings):
+    def _failing_pool(*args, **kwargs):
+        pool = _fake_pool(*args, **kwargs)
+        pool.wait.side_effect = TimeoutError("cold start")
+        return pool
+
+    with patch("memory.postgres_pool.InstrumentedAsyncConnectionPool", side_effect=_failing_pool):
+        with pytest.raises(TimeoutError):
+            await manager.acquire("saver")
+
+    assert manager.stats()["pools"] == {}
+
+
+@pytest.mark.asyncio
+async def test_ping_counts_failures(manager, mock_settings):
+    pool = await manager.acquire("saver")
+    pool.connection.side_effect = RuntimeError("down")
+    failures = manager._keep_warm_failures
+
+    assert await manager.ping() is False
+    assert manager._keep_warm_failures == failures + 1
+
+    await manager.release("saver")
+
+
+def test_keep_warm_window(mock_settings):
+    # 2025-01-06 is a Monday, 2025-01-11 a Saturday
+    assert within_keep_warm_window(datetime(2025, 1, 6, 9, tzinfo=UTC))
+    assert not within_keep_warm_window(datetime(2025, 1, 6, 21, tzinfo=UTC))
+    assert not within_keep_warm_window(datetime(2025, 1, 11, 9, tzinfo=UTC))
+
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_records_checkout_latency():
+    pool = InstrumentedAsyncConnectionPool("postgresql://x", open=False, min_size=1, max_size=2)
+    with patch("psycopg_pool.AsyncConnectionPool.getconn", new_callable=AsyncMock) as getconn:
+        getconn.return_value = MagicMock()
+        await pool.getconn()
+        await pool.getconn()
+
+    telemetry = pool.telemetry()
+    assert telemetry["checkout"]["count"] == 2
+    assert telemetry["checkout"]["p95Ms"] is not None
+    assert telemetry["inUse"] == telemetry["size"] - telemetry["idle"]
+    assert telemetry["maxSize"] == 2
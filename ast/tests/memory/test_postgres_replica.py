@@ -0,0 +1,166 @@
+"""Tests for read replica routing."""
+
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.store.base import GetOp, PutOp, SearchOp
+from langgraph.store.postgres import AsyncPostgresStore
+
+from memory.postgres_replica import (
+    ReplicaRoutedPostgresSaver,
+    ReplicaRoutedPostgresStore,
+    read_preference,
+    replica_router,
+)
+
+
+@pytest.fixture
+def router():
+    replica_router.reset()
+    with patch("memory.postgres_replica.settings") as mock_settings:
+        mock_settings.POSTGRES_REPLICA_MAX_LAG = 5.0
+        mock_settings.POSTGRES_REPLICA_LAG_CHECK_INTERVAL = 5.0
+        mock_settings.POSTGRES_REPLICA_RETRY_AFTER = 30.0
+        yield replica_router
+    replica_router.reset()
+
+
+def _pool_with_lag(lag):
+    cursor = AsyncMock()
+    cursor.fetchone.return_value = {"lag": lag}
+    conn = AsyncMock()
+    conn.execute.return_value = cursor
+
+    @asynccontextmanager
+    async def _connection():
+        yield conn
+
+    pool = MagicMock()
+    pool.connection = _connection
+    return pool, conn
+
+
+def _routed_store(replica_pool):
+    """Routed store whose primary/replica batches are recorded instead of run."""
+    store = ReplicaRoutedPostgresStore(MagicMock(), replica_conn=replica_pool)
+    calls = []
+
+    async def _abatch(self, ops):
+        calls.append(("replica" if self is store.replica else "primary", list(ops)))
+        return [None] * len(ops)
+
+    return store, calls, _abatch
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_and_writes_to_primary(router):
+    pool, _ = _pool_with_lag(0.2)
+    store, calls, fake = _routed_store(pool)
+
+    with patch.object(AsyncPostgresStore, "abatch", autospec=True, side_effect=fake):
+        await store.abatch([GetOp(("workflows",), "wf_1")])
+        await store.abatch([PutOp(("workflows",), "wf_2", {"id": "wf_2"})])
+
+    assert [target for target, _ in calls] == ["replica", "primary"]
+    assert router.stats()["reads"]["replica"] == 1
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes_goes_to_primary(router):
+    pool, _ = _pool_with_lag(0.0)
+    store, calls, fake = _routed_store(pool)
+
+    with patch.object(AsyncPostgresStore, "abatch", autospec=True, side_effect=fake):
+        await store.abatch([PutOp(("workflows",), "wf_1", {"id": "wf_1"})])
+        await store.abatch([GetOp(("workflows",), "wf_1")])
+        await store.abatch([SearchOp(("workflows",))])
+        await store.abatch([GetOp(("workflows",), "wf_other")])
+
+    assert [target for target, _ in calls] == ["primary", "primary", "primary", "replica"]
+
+
+@pytest.mark.asyncio
+async def test_lagging_replica_falls_back_to_primary(router):
+    pool, conn = _pool_with_lag(12.0)
+    store, calls, fake = _routed_store(pool)
+
+    with patch.object(AsyncPostgresStore, "abatch", autospec=True, side_effect=fake):
+        await store.abatch([GetOp(("workflows",), "wf_1")])
+        await store.abatch([GetOp(("workflows",), "wf_1")])
+
+    assert [target for target, _ in calls] == ["primary", "primary"]
+    # Lag is probed once per check interval, not per read
+    conn.execute.assert_awaited_once()
+    assert router.stats()["lagSeconds"] == 12.0
+
+
+@pytest.mark.asyncio
+async def test_replica_error_falls_back_and_backs_off(router):
+    pool, _ = _pool_with_lag(0.0)
+    store, calls, fake = _routed_store(pool)
+
+    async def _flaky(self, ops):
+        if self is store.replica:
+            calls.append(("replica-error", list(ops)))
+            raise ConnectionError("replica down")
+        return await fake(self, ops)
+
+    with patch.object(AsyncPostgresStore, "abatch", autospec=True, side_effect=_flaky):
+        assert await store.abatch([GetOp(("workflows",), "wf_1")]) == [None]
+        await store.abatch([GetOp(("workflows",), "wf_1")])
+
+    assert [target for target, _ in calls] == ["replica-error", "primary", "primary"]
+    assert router.stats()["failing"] is True
+    assert router.stats()["reads"]["fallbacks"] == 1
+
+
+@pytest.mark.asyncio
+async def test_primary_preference_bypasses_replica(router):
+    pool, _ = _pool_with_lag(0.0)
+    store, calls, fake = _routed_store(pool)
+
+    with patch.object(AsyncPostgresStore, "abatch", autospec=True, side_effect=fake):
+        with read_preference("primary"):
+            await store.aget(("workflow_threads",), "wf_1:t1")
+
+    assert [target for target, _ in calls] == ["primary"]
+
+
+@pytest.mark.asyncio
+async def test_saver_uses_replica_only_for_history_reads(router):
+    pool, _ = _pool_with_lag(0.0)
+    saver = ReplicaRoutedPostgresSaver(MagicMock(), replica_conn=pool)
+    config = {"configurable": {"thread_id": "t1"}}
+    targets = []
+
+    async def _aget_tuple(self, config):
+        targets.append("replica" if self is saver.replica else "primary")
+
+    async def _aput_writes(self, config, writes, task_id, task_path=""):
+        return None
+
+    with (
+        patch.object(AsyncPostgresSaver, "aget_tuple", autospec=True, side_effect=_aget_tuple),
+        patch.object(AsyncPostgresSaver, "aput_writes", autospec=True, side_effect=_aput_writes),
+    ):
+        await saver.aget_tuple(config)
+        with read_preference("replica"):
+            await saver.aget_tuple(config)
+            await saver.aput_writes(config, [], "task")
+            await saver.aget_tuple(config)
+
+    assert targets == ["primary", "replica", "primary"]
+
+
+def test_recent_writes_expire(router):
+    with patch("memory.postgres_replica.time.monotonic", return_value=100.0):
+        router.note_write(("store", ("workflows",), "wf_1"), ("workflows",))
+    with patch("memory.postgres_replica.time.monotonic", return_value=105.0):
+        assert router.recently_written(("store", ("workflows",), "wf_1"))
+        assert router.namespace_recently_written(("workflows",))
+        assert not router.namespace_recently_written(("memories",))
+    with patch("memory.postgres_replica.time.monotonic", return_value=111.0):
+        assert not router.recently_written(("store", ("workflows",), "wf_1"))
+        assert not router.namespace_recently_written()
@@ -0,0 +1,153 @@
+"""Tests for semantic long-term memory."""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.store.memory import InMemoryStore
+
+from core.llm import FakeToolModel
+from memory.embeddings import HashingEmbeddings, get_embeddings
+from memory.semantic import memory_namespace, parse_facts, semantic_memory
+
+NAMESPACE = memory_namespace("wf_1", "user-1")
+FACTS = [
+    "Prefers coffee without sugar",
+    "Lives in Lisbon near the river",
+    "Has two dogs named Rex and Bo",
+]
+
+
+@pytest.fixture
+def store():
+    store = InMemoryStore()
+    semantic_memory.configure(store=store, embeddings=HashingEmbeddings(256))
+    yield store
+    semantic_memory.configure(store=None)
+
+
+@pytest.mark.asyncio
+async def test_recall_ranks_by_similarity(store):
+    await semantic_memory.remember(NAMESPACE, FACTS)
+
+    assert await semantic_memory.recall(NAMESPACE, "what do my dogs eat?", k=1) == [FACTS[2]]
+    assert await semantic_memory.recall(memory_namespace("wf_1", "user-2"), "dogs") == []
+
+
+@pytest.mark.asyncio
+async def test_recall_sees_facts_written_after_index_load(store):
+    assert await semantic_memory.recall(NAMESPACE, "coffee") == []
+
+    await semantic_memory.remember(NAMESPACE, FACTS[:1])
+
+    assert await semantic_memory.recall(NAMESPACE, "coffee") == FACTS[:1]
+
+
+@pytest.mark.asyncio
+async def test_same_fact_is_stored_once(store):
+    await semantic_memory.remember(NAMESPACE, ["Lives in Lisbon", "lives in  LISBON"])
+
+    assert len(await store.asearch(NAMESPACE)) == 1
+
+
+@pytest.mark.asyncio
+async def test_store_with_vector_index_searches_natively():
+    store = InMemoryStore(index={"dims": 256, "embed": HashingEmbeddings(256), "fields": ["text"]})
+    semantic_memory.configure(store=store)
+    try:
+        await semantic_memory.remember(NAMESPACE, FACTS)
+
+        [item] = await store.asearch(NAMESPACE, query="Lisbon", limit=1)
+        assert "embedding" not in item.value
+        assert await semantic_memory.recall(NAMESPACE, "I live in Lisbon", k=1) == [FACTS[1]]
+    finally:
+        semantic_memory.configure(store=None)
+
+
+class _StringPrefixStore(InMemoryStore):
+    """Matches namespaces as string prefixes, like AsyncPostgresStore's LIKE."""
+
+    async def asearch(self, namespace_prefix, /, *, query=None, limit=10, offset=0, **kwargs):
+        items = await super().asearch(namespace_prefix[:-1], query=query, limit=1000, **kwargs)
+        prefix = ".".join(namespace_prefix)
+        matches = [item for item in items if ".".join(item.namespace).startswith(prefix)]
+        return matches[offset : offset + limit]
+
+
+@pytest.mark.asyncio
+async def test_native_recall_is_limited_to_the_exact_namespace():
+    store = _StringPrefixStore(
+        index={"dims": 256, "embed": HashingEmbeddings(256), "fields": ["text"]}
+    )
+    user1, user10 = memory_namespace("wf_1", "user1"), memory_namespace("wf_1", "user10")
+    semantic_memory.configure(store=store)
+    try:
+        await semantic_memory.remember(user10, [f"Has {n} dogs named Rex" for n in range(5)])
+        await semantic_memory.remember(user1, FACTS)
+
+        recalled = await semantic_memory.recall(user1, "dogs named Rex", k=2)
+        assert FACTS[2] in recalled
+        assert set(recalled) <= set(FACTS)
+        assert len(recalled) == 2
+    finally:
+        semantic_memory.configure(store=None)
+
+
+@pytest.mark.asyncio
+async def test_extraction_runs_in_background(store):
+    model = FakeToolModel(responses=['["Is allergic to peanuts"]'])
+
+    semantic_memory.schedule_extraction(
+        NAMESPACE, [HumanMessage(content="I can't eat peanuts"), AIMessage(content="Noted!")], model
+    )
+    await semantic_memory.drain()
+
+    assert await semantic_memory.recall(NAMESPACE, "peanuts") == ["Is allergic to peanuts"]
+
+
+def test_parse_facts():
+    assert parse_facts('```json\n["a", "b"]\n```') == ["a", "b"]
+    assert parse_facts("- likes tea\n- hates rain\n") == ["likes tea", "hates rain"]
+    assert parse_facts("[]") == []
+    assert parse_facts('{"fact": "x"}') == []
+
+
+def test_get_embeddings_fake():
+    with patch("memory.embeddings.settings") as mock_settings:
+        mock_settings.MEMORY_EMBEDDING_DIMS = 64
+        embeddings = get_embeddings("fake")
+
+    assert isinstance(embeddings, HashingEmbeddings)
+    assert len(embeddings.embed_query("hello")) == 64
+    with pytest.raises(ValueError):
+        get_embeddings("nope:model")
+
+
+@pytest.mark.asyncio
+async def test_agent_node_recalls_facts_and_extracts(store):
+    from nodes.actions.agent_node import AgentNode
+
+    await semantic_memory.remember(memory_namespace("wf_1", "user-1"), FACTS)
+    node = AgentNode(
+        "agent-1",
+        {
+            "prompt": {"system": "You are helpful."},
+            "llm": {"model": "fake"},
+            "memory": {"semantic": True, "recallTopK": 1},
+        },
+    )
+    model = AsyncMock()
+    model.ainvoke = AsyncMock(side_effect=[AIMessage(content="Sure!"), AIMessage(content="[]")])
+
+    with patch("nodes.actions.agent_node.get_model_from_name", return_value=model):
+        await node.execute(
+            {"messages": [HumanMessage(content="Recommend a coffee")]},
+            {"configurable": {"thread_id": "t-1", "workflow_id": "wf_1", "user_id": "user-1"}},
+        )
+        await semantic_memory.drain()
+
+    system_prompt = model.ainvoke.call_args_list[0].args[0][0].content
+    assert "- Prefers coffee without sugar" in system_prompt
+    assert "Lisbon" not in system_prompt
+    # Second call is the background extraction over the exchange
+    assert "Recommend a coffee" in model.ainvoke.call_args_list[1].args[0][1].content
@@ -0,0 +1,75 @@
+"""Tests for the durable SQLite store."""
+
+from unittest.mock import patch
+
+import pytest
+from langgraph.store.base import GetOp, PutOp
+
+from memory.sqlite import TuplePrefixSqliteStore, get_sqlite_store
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    path = str(tmp_path / "store.db")
+    with patch("memory.sqlite.settings") as mock_settings:
+        mock_settings.SQLITE_STORE_PATH = path
+        yield path
+
+
+@pytest.mark.asyncio
+async def test_store_uses_wal_and_prefix_index(store_path):
+    async with get_sqlite_store() as store:
+        assert isinstance(store, TuplePrefixSqliteStore)
+        async with store.conn.execute("PRAGMA journal_mode") as cursor:
+            assert (await cursor.fetchone())[0] == "wal"
+        async with store.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT key FROM store WHERE prefix LIKE 'workflows%'"
+        ) as cursor:
+            like_plan = " ".join(row[-1] for row in await cursor.fetchall())
+        async with store.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT key FROM store WHERE (prefix = 'workflows' "
+            "OR (prefix >= 'workflows.' AND prefix < 'workflows/'))"
+        ) as cursor:
+            plan = " ".join(row[-1] for row in await cursor.fetchall())
+
+    # Namespace prefix search uses the index instead of a table scan
+    assert like_plan.startswith("SEARCH")
+    assert "SCAN" not in plan
+
+
+@pytest.mark.asyncio
+async def test_store_persists_across_restarts(store_path):
+    async with get_sqlite_store() as store:
+        await store.aput(("workflows",), "wf_1", {"name": "First"})
+
+    async with get_sqlite_store() as store:
+        item = await store.aget(("workflows",), "wf_1")
+
+    assert item.value == {"name": "First"}
+
+
+@pytest.mark.asyncio
+async def test_store_batch_prefix_search_and_filter(store_path):
+    async with get_sqlite_store() as store:
+        await store.abatch(
+            [
+                PutOp(("workflows",), "wf_1", {"name": "A", "isActive": True}),
+                PutOp(("workflows",), "wf_2", {"name": "B", "isActive": False}),
+                PutOp(("workflow_traces", "wf_1"), "run_1", {"nodes": []}),
+                PutOp(("Workflows",), "wf_3", {"name": "C", "isActive": True}),
+            ]
+        )
+
+        results = await store.abatch([GetOp(("workflows",), "wf_1"), GetOp(("workflows",), "x")])
+        active = await store.asearch(("workflows",), filter={"isActive": True})
+        by_prefix = await store.asearch(("workflow",))
+        by_parent = await store.asearch(("workflow_traces",))
+        wildcard = await store.asearch(("workflow_",))
+
+    assert results[0].value["name"] == "A"
+    assert results[1] is None
+    assert [item.key for item in active] == ["wf_1"]
+    # Tuple-prefix semantics: whole namespace segments, case sensitive, no wildcards
+    assert by_prefix == []
+    assert [item.key for item in by_parent] == ["run_1"]
+    assert wildcard == []
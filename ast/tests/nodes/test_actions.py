@@ -230,6 +230,33 @@ async def test_agent_node_trims_messages(sample_config):
         assert len(call_args) < 4  # Less than system + 3 messages
 
 
+@pytest.mark.asyncio
+async def test_agent_node_resolves_blob_refs_for_llm_only(sample_config, agent_node_config):
+    """AgentNode should load blob:// attachments for the LLM call, leaving refs in state."""
+    from nodes.actions.agent_node import AgentNode
+
+    ref = "blob://" + "a" * 64 + ".png"
+    message = HumanMessage(
+        content=[{"type": "text", "text": "Describe"}, {"type": "image_url", "image_url": ref}]
+    )
+    mock_model = AsyncMock()
+    mock_model.ainvoke = AsyncMock(return_value=AIMessage(content="A cat."))
+    store = MagicMock()
+    store.get = AsyncMock(return_value=b"png-bytes")
+
+    with (
+        patch("nodes.actions.agent_node.get_model_from_name", return_value=mock_model),
+        patch("core.blob_store.get_blob_store", return_value=store),
+    ):
+        node = AgentNode("agent-1", agent_node_config)
+        await node.execute({"messages": [message]}, sample_config)
+
+    sent = mock_model.ainvoke.call_args[0][0][-1]
+    assert sent.content[1]["image_url"] == "data:image/png;base64,cG5nLWJ5dGVz"
+    assert message.content[1]["image_url"] == ref
+    store.get.assert_awaited_once_with(ref)
+
+
 @pytest.mark.asyncio
 async def test_agent_node_type():
     """AgentNode should have correct node_type."""
@@ -197,3 +197,92 @@ def test_get_node_executor_unknown_type_raises():
 
     with pytest.raises(KeyError):
         get_node_executor("unknown_type", "node-1", {})
+
+
+@pytest.mark.asyncio
+async def test_build_workflow_graph_traces_every_node(simple_workflow):
+    """Every node execution should be recorded under the run_id from configurable."""
+    from nodes.executor import build_workflow_graph
+    from nodes.tracing import node_trace_recorder
+
+    node_trace_recorder.reset()
+    mock_model = AsyncMock()
+    mock_model.ainvoke = AsyncMock(return_value=AIMessage(content="Hello!"))
+
+    try:
+        with patch("nodes.actions.agent_node.get_model_from_name") as mock_get_model:
+            mock_get_model.return_value = mock_model
+            graph = await build_workflow_graph(simple_workflow)
+            await graph.ainvoke(
+                {"messages": [HumanMessage(content="Hi there")]},
+                {"configurable": {"thread_id": "thread-123", "run_id": "run-abc"}},
+            )
+
+        traces = node_trace_recorder.get_run("run-abc")
+        assert [t.node_id for t in traces] == ["trigger-manual", "agent-1"]
+        assert all(t.workflow_id == "wf_test" for t in traces)
+        # Agent reports the prompt it sent to the LLM as its input
+        assert traces[1].input_size == len("You are helpful.") + len("Hi there")
+    finally:
+        node_trace_recorder.reset()
+
+
+# =============================================================================
+# Tests for checkpoint durability
+# =============================================================================
+
+
+async def _count_checkpoint_writes(workflow, durability):
+    from langgraph.checkpoint.memory import InMemorySaver
+
+    from nodes.executor import build_workflow_graph, get_run_durability
+
+    saver = InMemorySaver()
+    workflow = {**workflow, "flowData": {**workflow["flowData"], "durability": durability}}
+    mock_model = AsyncMock()
+    mock_model.ainvoke = AsyncMock(return_value=AIMessage(content="Hello!"))
+    config = {"configurable": {"thread_id": f"thread-{durability}"}}
+
+    with patch("nodes.actions.agent_node.get_model_from_name") as mock_get_model:
+        mock_get_model.return_value = mock_model
+        with patch.object(saver, "aput", wraps=saver.aput) as aput:
+            graph = await build_workflow_graph(workflow, checkpointer=saver)
+            await graph.ainvoke(
+                {"messages": [HumanMessage(content="Hi there")]},
+                config,
+                durability=get_run_durability(workflow),
+            )
+
+    state = await graph.aget_state(config) if graph.checkpointer else None
+    return aput.await_count, state
+
+
+@pytest.mark.asyncio
+async def test_exit_durability_persists_only_final_state(simple_workflow):
+    """durability=exit should write one checkpoint holding the final state."""
+    sync_writes, _ = await _count_checkpoint_writes(simple_workflow, "sync")
+    exit_writes, state = await _count_checkpoint_writes(simple_workflow, "exit")
+
+    assert exit_writes == 1
+    assert sync_writes > exit_writes
+    assert state.values["agent_response"] == "Hello!"
+
+
+@pytest.mark.asyncio
+async def test_none_durability_skips_checkpointer(simple_workflow):
+    """durability=none should compile the graph without a checkpointer."""
+    writes, state = await _count_checkpoint_writes(simple_workflow, "none")
+
+    assert writes == 0
+    assert state is None
+
+
+@pytest.mark.asyncio
+async def test_invalid_durability_raises(simple_workflow):
+    """Unknown durability modes should be rejected at build time."""
+    from nodes.executor import build_workflow_graph
+
+    flow_data = {**simple_workflow["flowData"], "durability": "eventually"}
+
+    with pytest.raises(ValueError, match="durability"):
+        await build_workflow_graph({**simple_workflow, "flowData": flow_data})
@@ -0,0 +1,164 @@
+"""Tests for per-node trace recorder."""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from nodes.base import BaseNode
+from nodes.tracing import LatencyHistogram, NodeTraceRecorder, record_node_input, trace_node
+
+
+class _EchoNode(BaseNode):
+    node_type = "echo"
+
+    async def execute(self, state, config):
+        response = AIMessage(
+            content="pong",
+            usage_metadata={"input_tokens": 3, "output_tokens": 1, "total_tokens": 4},
+        )
+        return {"messages": [response], "agent_response": response.content}
+
+
+class _ReportingNode(BaseNode):
+    node_type = "reporting"
+
+    async def execute(self, state, config):
+        record_node_input("abc")
+        return {}
+
+
+class _FailingNode(BaseNode):
+    node_type = "failing"
+
+    async def execute(self, state, config):
+        raise RuntimeError("boom")
+
+
+@pytest.fixture
+def recorder():
+    recorder = NodeTraceRecorder()
+    recorder.reset()
+    yield recorder
+    recorder.reset()
+
+
+def _config(run_id="run-1"):
+    return {"configurable": {"thread_id": "thread-1", "run_id": run_id}}
+
+
+@pytest.mark.asyncio
+async def test_trace_node_records_timing_sizes_and_tokens(recorder):
+    traced = trace_node(_EchoNode("echo-1", {}), "wf_test", recorder)
+
+    history = [HumanMessage(content="old message " * 100), HumanMessage(content="ping")]
+    result = await traced({"messages": history}, _config())
+
+    assert result["messages"][0].content == "pong"
+    traces = recorder.get_run("run-1")
+    assert len(traces) == 1
+    trace = traces[0]
+    assert trace.node_id == "echo-1"
+    assert trace.node_type == "echo"
+    assert trace.workflow_id == "wf_test"
+    # Input defaults to the latest message, not the whole history
+    assert trace.input_size == 4
+    # agent_response mirrors the message and is not counted twice
+    assert trace.output_size == 4
+    assert trace.total_tokens == 4
+    assert trace.duration_ms >= 0
+    assert trace.status == "ok"
+
+
+@pytest.mark.asyncio
+async def test_trace_node_records_errors(recorder):
+    traced = trace_node(_FailingNode("fail-1", {}), "wf_test", recorder)
+
+    with pytest.raises(RuntimeError):
+        await traced({}, _config())
+
+    trace = recorder.get_run("run-1")[0]
+    assert trace.status == "error"
+    assert trace.error == "boom"
+
+
+@pytest.mark.asyncio
+async def test_ring_buffer_is_bounded(recorder):
+    recorder.configure(capacity=2)
+    traced = trace_node(_EchoNode("echo-1", {}), "wf_test", recorder)
+
+    for i in range(5):
+        await traced({}, _config(f"run-{i}"))
+
+    assert recorder.stats()["entries"] == 2
+    assert recorder.get_run("run-0") == []
+    # Histograms aggregate every observation, not just buffered ones
+    assert recorder.histograms("wf_test")["echo-1"]["count"] == 5
+
+
+@pytest.mark.asyncio
+async def test_node_reported_input_size(recorder):
+    traced = trace_node(_ReportingNode("report-1", {}), "wf_test", recorder)
+
+    await traced({"messages": [HumanMessage(content="a much longer message")]}, _config())
+
+    assert recorder.get_run("run-1")[0].input_size == 3
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_workflow_histograms(recorder):
+    await trace_node(_EchoNode("echo-1", {}), "wf_a", recorder)({}, _config())
+    await trace_node(_EchoNode("echo-1", {}), "wf_b", recorder)({}, _config())
+
+    assert recorder.invalidate("wf_a") == 1
+
+    assert recorder.histograms("wf_a") == {}
+    assert "echo-1" in recorder.histograms("wf_b")
+
+
+@pytest.mark.asyncio
+async def test_persist_run_writes_to_store(recorder):
+    store = AsyncMock()
+    recorder.configure(store=store, persist=True)
+    traced = trace_node(_EchoNode("echo-1", {}), "wf_test", recorder)
+    await traced({}, _config())
+
+    assert await recorder.persist_run("wf_test", "run-1") is True
+    store.aput.assert_called_once()
+    assert store.aput.call_args.kwargs["namespace"] == ("workflow_traces", "wf_test")
+
+
+@pytest.mark.asyncio
+async def test_schedule_persist_runs_in_background(recorder):
+    store = AsyncMock()
+    recorder.configure(store=store, persist=True)
+    await trace_node(_EchoNode("echo-1", {}), "wf_test", recorder)({}, _config())
+
+    recorder.schedule_persist("wf_test", "run-1")
+    store.aput.assert_not_called()
+
+    await asyncio.gather(*recorder._pending)
+    store.aput.assert_called_once()
+
+
+def test_reset_restores_defaults(recorder):
+    recorder.configure(store=AsyncMock(), persist=True, capacity=3)
+
+    recorder.reset()
+
+    assert recorder._store is None
+    assert recorder.stats()["persist"] is False
+    assert recorder.stats()["capacity"] == 1000
+
+
+def test_latency_histogram_quantiles():
+    histogram = LatencyHistogram()
+    for ms in [1, 2, 3, 40, 900]:
+        histogram.observe(ms)
+
+    data = histogram.to_dict()
+    assert data["count"] == 5
+    assert data["p50Ms"] == 5
+    assert data["maxMs"] == 900
+    assert data["buckets"]["le_1000"] == 1
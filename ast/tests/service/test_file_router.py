@@ -2,13 +2,27 @@
 
 import base64
 import io
-from unittest.mock import AsyncMock, patch
+import json
+from unittest.mock import patch
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from PIL import Image
 
 
+def _mock_download(content: bytes = b"", error: Exception | None = None, headers=None):
+    """Serve downloads from an in-process transport instead of the network."""
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        if error is not None:
+            raise error
+        return httpx.Response(200, content=content, headers=headers)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    return patch("core.file_processor.get_http_client", return_value=client)
+
+
 @pytest.fixture
 def client():
     """Create test client."""
@@ -31,17 +45,7 @@ class TestFileRouterEndpoint:
         pdf_bytes = doc.tobytes()
         doc.close()
 
-        with patch("core.file_processor.httpx") as mock_httpx:
-            mock_response = AsyncMock()
-            mock_response.content = pdf_bytes
-            mock_response.raise_for_status = AsyncMock()
-
-            mock_client = AsyncMock()
-            mock_client.get = AsyncMock(return_value=mock_response)
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=None)
-            mock_httpx.AsyncClient.return_value = mock_client
-
+        with _mock_download(content=pdf_bytes):
             response = client.post(
                 "/files/process",
                 json={"url": "https://example.com/doc.pdf", "mime_type": "application/pdf"},
@@ -62,17 +66,7 @@ class TestFileRouterEndpoint:
         img.save(buffer, format="PNG")
         image_bytes = buffer.getvalue()
 
-        with patch("core.file_processor.httpx") as mock_httpx:
-            mock_response = AsyncMock()
-            mock_response.content = image_bytes
-            mock_response.raise_for_status = AsyncMock()
-
-            mock_client = AsyncMock()
-            mock_client.get = AsyncMock(return_value=mock_response)
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=None)
-            mock_httpx.AsyncClient.return_value = mock_client
-
+        with _mock_download(content=image_bytes):
             response = client.post(
                 "/files/process",
                 json={"url": "https://example.com/image.png", "mime_type": "image/png"},
@@ -87,17 +81,7 @@ class TestFileRouterEndpoint:
 
     def test_process_unsupported_type_returns_400(self, client):
         """POST /files/process with unsupported type returns 400."""
-        with patch("core.file_processor.httpx") as mock_httpx:
-            mock_response = AsyncMock()
-            mock_response.content = b"video content"
-            mock_response.raise_for_status = AsyncMock()
-
-            mock_client = AsyncMock()
-            mock_client.get = AsyncMock(return_value=mock_response)
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=None)
-            mock_httpx.AsyncClient.return_value = mock_client
-
+        with _mock_download(content=b"video content"):
             response = client.post(
                 "/files/process",
                 json={"url": "https://example.com/video.mp4", "mime_type": "video/mp4"},
@@ -108,13 +92,7 @@ class TestFileRouterEndpoint:
 
     def test_process_invalid_url_returns_500(self, client):
         """POST /files/process with invalid URL returns 500."""
-        with patch("core.file_processor.httpx") as mock_httpx:
-            mock_client = AsyncMock()
-            mock_client.get = AsyncMock(side_effect=Exception("Connection failed"))
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=None)
-            mock_httpx.AsyncClient.return_value = mock_client
-
+        with _mock_download(error=httpx.ConnectError("Connection failed")):
             response = client.post(
                 "/files/process",
                 json={"url": "https://invalid.com/file.pdf", "mime_type": "application/pdf"},
@@ -128,3 +106,227 @@ class TestFileRouterEndpoint:
         response = client.post("/files/process", json={"url": "https://example.com/file.pdf"})
 
         assert response.status_code == 422  # Validation error
+
+
+class TestFileRouterStreamEndpoint:
+    """Tests for POST /files/process/stream (NDJSON)."""
+
+    def test_stream_pdf_emits_meta_pages_and_done(self, client):
+        """Each page is its own NDJSON line, between meta and done lines."""
+        import fitz
+
+        doc = fitz.open()
+        for _ in range(3):
+            doc.new_page(width=612, height=792)
+        pdf_bytes = doc.tobytes()
+        doc.close()
+
+        with _mock_download(content=pdf_bytes):
+            response = client.post(
+                "/files/process/stream",
+                json={"url": "https://example.com/doc.pdf", "mime_type": "application/pdf"},
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0] == {"type": "meta", "action": "render", "original_pages": 3}
+        assert [line["index"] for line in lines[1:-1]] == [0, 1, 2]
+        assert all(line["mime_type"] == "image/png" for line in lines[1:-1])
+        assert lines[-1] == {"type": "done", "count": 3}
+
+    def test_stream_unsupported_type_returns_400(self, client):
+        """Validation errors happen before streaming starts and keep their status."""
+        response = client.post(
+            "/files/process/stream",
+            json={"url": "https://example.com/video.mp4", "mime_type": "video/mp4"},
+        )
+
+        assert response.status_code == 400
+
+    def test_stream_fetch_error_returns_500(self, client):
+        """Fetch errors happen before streaming starts and keep their status."""
+        with _mock_download(error=httpx.ConnectError("Connection failed")):
+            response = client.post(
+                "/files/process/stream",
+                json={"url": "https://invalid.com/file.pdf", "mime_type": "application/pdf"},
+            )
+
+        assert response.status_code == 500
+
+
+@pytest.fixture
+def local_blobs(tmp_path):
+    """Blob store in a temp directory."""
+    with patch("core.blob_store.settings") as mock_settings:
+        mock_settings.FILE_BLOB_BACKEND = "local"
+        mock_settings.FILE_BLOB_DIR = str(tmp_path)
+        yield tmp_path
+
+
+def _png(width: int = 300, height: int = 200) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color="blue").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestFileRouterOutputModes:
+    """Tests for output="ref" / output="raw" and GET /files/blobs/{key}."""
+
+    def test_ref_output_returns_blob_refs(self, client, local_blobs):
+        """Files are written to the blob store and returned as refs, without data."""
+        image_bytes = _png()
+
+        with _mock_download(content=image_bytes):
+            response = client.post(
+                "/files/process",
+                json={
+                    "url": "https://example.com/image.png",
+                    "mime_type": "image/png",
+                    "output": "ref",
+                },
+            )
+
+        assert response.status_code == 200
+        file = response.json()["files"][0]
+        assert file["data"] is None
+        assert file["ref"].startswith("blob://") and file["ref"].endswith(".png")
+
+        blob = client.get(f"/files/blobs/{file['ref'].removeprefix('blob://')}")
+        assert blob.status_code == 200
+        assert blob.headers["content-type"] == "image/png"
+        assert blob.content == image_bytes
+
+    def test_stream_ref_output(self, client, local_blobs):
+        """NDJSON file lines carry a ref instead of data."""
+        with _mock_download(content=_png()):
+            response = client.post(
+                "/files/process/stream",
+                json={
+                    "url": "https://example.com/image.png",
+                    "mime_type": "image/png",
+                    "output": "ref",
+                },
+            )
+
+        file_line = [json.loads(line) for line in response.text.splitlines()][1]
+        assert "data" not in file_line
+        assert file_line["ref"].startswith("blob://")
+
+    def test_raw_output_is_multipart(self, client):
+        """output="raw" returns the meta part, then the raw bytes of each file."""
+        image_bytes = _png()
+
+        with _mock_download(content=image_bytes):
+            response = client.post(
+                "/files/process",
+                json={
+                    "url": "https://example.com/image.png",
+                    "mime_type": "image/png",
+                    "output": "raw",
+                },
+            )
+
+        assert response.status_code == 200
+        content_type = response.headers["content-type"]
+        assert content_type.startswith("multipart/mixed; boundary=")
+        boundary = content_type.split("boundary=")[1].encode()
+
+        parts = response.content.split(b"--" + boundary)
+        assert parts[-1] == b"--\r\n"
+        meta_headers, meta_body = parts[1].split(b"\r\n\r\n", 1)
+        assert b"Content-Type: application/json" in meta_headers
+        assert json.loads(meta_body) == {"action": "direct", "original_pages": None}
+        file_headers, file_body = parts[2].split(b"\r\n\r\n", 1)
+        assert b"Content-Type: image/png" in file_headers
+        assert b"X-Width: 300" in file_headers
+        assert file_body[:-2] == image_bytes  # Part ends with CRLF
+
+    def test_raw_output_keeps_error_status(self, client):
+        """Validation errors still map to 400 before the multipart stream starts."""
+        response = client.post(
+            "/files/process",
+            json={"url": "https://example.com/v.mp4", "mime_type": "video/mp4", "output": "raw"},
+        )
+
+        assert response.status_code == 400
+
+    def test_unknown_blob_returns_404(self, client, local_blobs):
+        assert client.get(f"/files/blobs/{'0' * 64}.png").status_code == 404
+        assert client.get("/files/blobs/..%2Fsecret").status_code == 404
+
+
+class TestFileRouterPages:
+    """Tests for page ranges, thumbnails and /files/documents/{handle}/pages."""
+
+    @staticmethod
+    def _pdf(pages: int) -> bytes:
+        import fitz
+
+        doc = fitz.open()
+        for _ in range(pages):
+            doc.new_page(width=612, height=792)
+        pdf_bytes = doc.tobytes()
+        doc.close()
+        return pdf_bytes
+
+    def test_thumbnails_then_document_pages(self, client):
+        from core.document_cache import document_cache
+
+        with _mock_download(content=self._pdf(5)):
+            preview = client.post(
+                "/files/process",
+                json={
+                    "url": "https://example.com/doc.pdf",
+                    "mime_type": "application/pdf",
+                    "thumbnails": True,
+                },
+            ).json()
+        try:
+            assert preview["action"] == "thumbnails"
+            assert preview["pages"] == [1, 2, 3, 4, 5]
+            assert len(preview["files"]) == 5
+
+            response = client.post(
+                f"/files/documents/{preview['handle']}/pages", json={"pages": "2,4"}
+            )
+            assert response.status_code == 200
+            data = response.json()
+            assert data["pages"] == [2, 4]
+            assert [f["mime_type"] for f in data["files"]] == ["image/png", "image/png"]
+        finally:
+            document_cache.clear()
+
+    def test_stream_meta_carries_pages(self, client):
+        with _mock_download(content=self._pdf(5)):
+            response = client.post(
+                "/files/process/stream",
+                json={
+                    "url": "https://example.com/doc.pdf",
+                    "mime_type": "application/pdf",
+                    "pages": "4-",
+                },
+            )
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0] == {
+            "type": "meta",
+            "action": "render",
+            "original_pages": 5,
+            "pages": [4, 5],
+        }
+        assert lines[-1] == {"type": "done", "count": 2}
+
+    def test_page_range_errors(self, client):
+        request = {"url": "https://example.com/doc.pdf", "mime_type": "application/pdf"}
+
+        assert client.post("/files/process", json={**request, "pages": "1-x"}).status_code == 422
+        with _mock_download(content=self._pdf(2)):
+            response = client.post("/files/process", json={**request, "pages": "3"})
+        assert response.status_code == 400
+        assert "2 pages" in response.json()["detail"]
+
+    def test_unknown_handle_returns_404(self, client):
+        response = client.post("/files/documents/expired/pages", json={"pages": "1"})
+
+        assert response.status_code == 404
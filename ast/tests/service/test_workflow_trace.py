@@ -0,0 +1,203 @@
+"""Tests for workflow run trace endpoints."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+
+from nodes.graph_cache import workflow_graph_cache
+from nodes.tracing import NodeTrace, node_trace_recorder
+from service.workflow_router import router
+
+
+@pytest.fixture
+def client():
+    """Test client with auth disabled and a clean recorder and graph cache."""
+    app = FastAPI()
+    app.include_router(router)
+    node_trace_recorder.reset()
+    workflow_graph_cache.clear()
+    with patch("service.workflow_router.settings") as mock_settings:
+        mock_settings.AUTH_SECRET = None
+        with patch.object(workflow_graph_cache, "_checkpointer", None):
+            yield TestClient(app)
+    node_trace_recorder.reset()
+    workflow_graph_cache.clear()
+
+
+@pytest.fixture
+def sample_workflow():
+    return {
+        "id": "wf_trace",
+        "name": "Trace Workflow",
+        "description": None,
+        "flowData": {
+            "nodes": [
+                {"id": "trigger_1", "type": "manual_trigger", "name": "Trigger", "config": {}},
+                {
+                    "id": "agent_1",
+                    "type": "agent",
+                    "name": "Agent",
+                    "config": {
+                        "prompt": {"system": "You are helpful."},
+                        "llm": {"model": "gpt-5-mini"},
+                    },
+                },
+            ],
+            "edges": [{"source": "trigger_1", "target": "agent_1"}],
+        },
+        "isActive": True,
+        "createdAt": "2025-01-01T00:00:00+00:00",
+        "updatedAt": "2025-01-01T00:00:00+00:00",
+    }
+
+
+@pytest.fixture
+def mock_workflow_backend(sample_workflow):
+    """Patch store access, workflow lookup and the LLM."""
+    mock_agent = MagicMock()
+    mock_agent.store = AsyncMock()
+    mock_model = AsyncMock()
+    mock_model.ainvoke = AsyncMock(return_value=AIMessage(content="Hello!"))
+
+    with patch("service.workflow_router.get_agent", return_value=mock_agent):
+        with patch(
+            "service.workflow_router.get_workflow",
+            new_callable=AsyncMock,
+            return_value=sample_workflow,
+        ):
+            with patch(
+                "nodes.actions.agent_node.get_model_from_name",
+                new_callable=AsyncMock,
+                return_value=mock_model,
+            ):
+                yield
+
+
+def _record(node_id: str, run_id: str = "run-1", duration_ms: float = 12.0) -> None:
+    node_trace_recorder.record(
+        NodeTrace(
+            run_id=run_id,
+            workflow_id="wf_trace",
+            node_id=node_id,
+            node_type="agent",
+            started_at=1000.0,
+            ended_at=1000.0 + duration_ms / 1000,
+            duration_ms=duration_ms,
+            input_size=1,
+            output_size=1,
+        )
+    )
+
+
+def test_get_run_trace(client):
+    _record("agent_1")
+
+    response = client.get("/workflows/wf_trace/runs/run-1/trace")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["runId"] == "run-1"
+    assert data["workflowId"] == "wf_trace"
+    assert [n["node_id"] for n in data["nodes"]] == ["agent_1"]
+    assert data["totalMs"] == pytest.approx(12.0)
+
+
+def test_get_run_trace_not_found(client):
+    response = client.get("/workflows/wf_trace/runs/unknown/trace")
+
+    assert response.status_code == 404
+
+
+def test_get_run_trace_scoped_to_workflow(client):
+    _record("agent_1")
+
+    response = client.get("/workflows/wf_other/runs/run-1/trace")
+
+    assert response.status_code == 404
+
+
+def test_get_node_latency_histograms(client):
+    _record("agent_1", duration_ms=12.0)
+    _record("agent_1", run_id="run-2", duration_ms=700.0)
+
+    response = client.get("/workflows/wf_trace/traces/histograms")
+
+    assert response.status_code == 200
+    histogram = response.json()["nodes"]["agent_1"]
+    assert histogram["count"] == 2
+    assert histogram["maxMs"] == 700.0
+    assert histogram["buckets"]["le_25"] == 1
+    assert histogram["buckets"]["le_1000"] == 1
+
+
+def test_get_node_latency_histograms_empty(client):
+    response = client.get("/workflows/wf_unknown/traces/histograms")
+
+    assert response.status_code == 200
+    assert response.json()["nodes"] == {}
+
+
+def test_invoke_run_id_returns_trace(client, mock_workflow_backend):
+    response = client.post(
+        "/workflows/wf_trace/invoke", json={"message": "Hi", "threadId": "thread-1"}
+    )
+    assert response.status_code == 200
+    run_id = response.json()["message"]["run_id"]
+
+    trace = client.get(f"/workflows/wf_trace/runs/{run_id}/trace")
+
+    assert trace.status_code == 200
+    assert [n["node_id"] for n in trace.json()["nodes"]] == ["trigger_1", "agent_1"]
+
+
+def test_stream_done_event_run_id_returns_trace(client, mock_workflow_backend):
+    response = client.post(
+        "/workflows/wf_trace/stream", json={"message": "Hi", "threadId": "thread-1"}
+    )
+    assert response.status_code == 200
+
+    events = [
+        json.loads(line[len("data: ") :])
+        for line in response.text.splitlines()
+        if line.startswith("data: {")
+    ]
+    done = next(e for e in events if e["type"] == "done")
+
+    trace = client.get(f"/workflows/wf_trace/runs/{done['runId']}/trace")
+
+    assert trace.status_code == 200
+    assert [n["node_id"] for n in trace.json()["nodes"]] == ["trigger_1", "agent_1"]
+
+
+def test_delete_invalidates_histograms(client, mock_workflow_backend):
+    _record("agent_1")
+
+    with patch(
+        "service.workflow_router.delete_workflow", new_callable=AsyncMock, return_value=True
+    ):
+        response = client.delete("/workflows/wf_trace")
+
+    assert response.status_code == 204
+    assert node_trace_recorder.histograms("wf_trace") == {}
+
+
+def test_invoke_failure_still_schedules_persist(client, mock_workflow_backend):
+    with patch.object(node_trace_recorder, "schedule_persist") as mock_persist:
+        with patch(
+            "nodes.actions.agent_node.get_model_from_name",
+            new_callable=AsyncMock,
+            side_effect=RuntimeError("provider down"),
+        ):
+            response = client.post(
+                "/workflows/wf_trace/invoke", json={"message": "Hi", "threadId": "thread-1"}
+            )
+
+    assert response.status_code == 500
+    mock_persist.assert_called_once()
+    workflow_id, run_id = mock_persist.call_args.args
+    assert workflow_id == "wf_trace"
+    assert [t.status for t in node_trace_recorder.get_run(run_id)] == ["ok", "error"]
@@ -0,0 +1,171 @@
+"""Tests for workflow thread retention (sweeper)."""
+
+import time
+from datetime import UTC, datetime
+from unittest.mock import patch
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.store.memory import InMemoryStore
+
+from workflows import retention
+from workflows.retention import _pg_purge_sql, select_expired_threads, thread_sweeper
+from workflows.storage import WORKFLOWS_NAMESPACE
+from workflows.threads import THREAD_HEADS_NAMESPACE, append_thread_messages
+
+HOUR_US = 3_600_000_000
+
+
+@pytest.fixture
+def gc_settings(tmp_path):
+    with patch("workflows.retention.settings") as mock_settings:
+        mock_settings.SQLITE_DB_PATH = str(tmp_path / "checkpoints.db")
+        mock_settings.WORKFLOW_THREAD_IDLE_TTL_HOURS = None
+        mock_settings.WORKFLOW_MAX_THREADS = None
+        mock_settings.WORKFLOW_GC_DRY_RUN = False
+        mock_settings.WORKFLOW_GC_BATCH_SIZE = 2
+        mock_settings.WORKFLOW_GC_BATCH_PAUSE = 0
+        mock_settings.WORKFLOW_GC_MAX_THREADS_PER_SWEEP = 1000
+        yield mock_settings
+
+
+async def _checkpoint(saver, thread_id, active_us):
+    """Checkpoint a run of wf_1 on a thread, as last active at active_us."""
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    ts = datetime.fromtimestamp(active_us / 1e6, UTC).isoformat()
+    stored = await saver.aput(config, {**empty_checkpoint(), "ts": ts}, {"workflow_id": "wf_1"}, {})
+    await saver.aput_writes(stored, [("messages", "x")], task_id="task-1")
+
+
+async def _seed(store, saver, retention, idle_hours):
+    """One workflow with a thread per idle age (hours), each with a checkpoint and 2 messages."""
+    await store.aput(
+        WORKFLOWS_NAMESPACE,
+        "wf_1",
+        {"id": "wf_1", "flowData": {"nodes": [], "retention": retention}},
+    )
+    now_us = time.time_ns() // 1000
+    for i, hours in enumerate(idle_hours):
+        thread_id = f"thread-{i}"
+        await append_thread_messages(
+            store, "wf_1", thread_id, [{"type": "human", "content": "hi"}] * 2, stateful=True
+        )
+        item = await store.aget(THREAD_HEADS_NAMESPACE, f"wf_1:{thread_id}")
+        active_us = now_us - int(hours * HOUR_US)
+        await store.aput(
+            THREAD_HEADS_NAMESPACE, item.key, {**item.value, "lastActiveUs": active_us}
+        )
+        await _checkpoint(saver, thread_id, active_us)
+
+
+async def _remaining_threads(store):
+    heads = await store.asearch(THREAD_HEADS_NAMESPACE, limit=100)
+    return sorted(item.value["threadId"] for item in heads)
+
+
+@pytest.mark.asyncio
+async def test_idle_ttl_and_max_threads_selection(gc_settings):
+    store = InMemoryStore()
+    await _seed(store, InMemorySaver(), {"idleTtlHours": 24}, [1, 2, 48, 3])
+    workflow = (await store.aget(WORKFLOWS_NAMESPACE, "wf_1")).value
+    now_us = time.time_ns() // 1000
+
+    expired = await select_expired_threads(store, workflow, now_us)
+    assert [h["threadId"] for h in expired] == ["thread-2"]
+
+    workflow["flowData"]["retention"] = {"maxThreads": 2}
+    expired = await select_expired_threads(store, workflow, now_us)
+    assert [h["threadId"] for h in expired] == ["thread-3", "thread-2"]
+
+    workflow["flowData"]["retention"] = None
+    assert await select_expired_threads(store, workflow, now_us) == []
+    gc_settings.WORKFLOW_MAX_THREADS = 3
+    assert len(await select_expired_threads(store, workflow, now_us)) == 1
+
+
+@pytest.mark.asyncio
+async def test_sweep_deletes_sqlite_checkpoints_in_batches(gc_settings, tmp_path):
+    store = InMemoryStore()
+    async with AsyncSqliteSaver.from_conn_string(gc_settings.SQLITE_DB_PATH) as saver:
+        await saver.setup()
+        await _seed(store, saver, {"idleTtlHours": 24}, [1, 30, 40, 50])
+        thread_sweeper.configure(store=store, checkpointer=saver)
+
+        dry = await thread_sweeper.sweep(dry_run=True)
+        assert await _remaining_threads(store) == ["thread-0", "thread-1", "thread-2", "thread-3"]
+
+        report = await thread_sweeper.sweep()
+
+        assert dry.to_dict() | {"dryRun": False, "durationMs": 0} == report.to_dict() | {
+            "durationMs": 0
+        }
+        assert report.threads == 3
+        assert report.checkpoint_rows == 6  # One checkpoint + one write per thread
+        assert report.checkpoint_bytes > 0
+        assert report.store_rows == 9  # Two messages + head per thread
+        assert await _remaining_threads(store) == ["thread-0"]
+        assert await saver.aget_tuple({"configurable": {"thread_id": "thread-1"}}) is None
+        assert await saver.aget_tuple({"configurable": {"thread_id": "thread-0"}}) is not None
+        assert await store.asearch(("workflow_messages", "wf_1", "thread-1")) == []
+
+
+@pytest.mark.asyncio
+async def test_sweep_with_generic_saver_and_budget(gc_settings):
+    store = InMemoryStore()
+    saver = InMemorySaver()
+    await _seed(store, saver, {"maxThreads": 1}, [1, 2, 3, 4])
+    gc_settings.WORKFLOW_GC_MAX_THREADS_PER_SWEEP = 2
+    thread_sweeper.configure(store=store, checkpointer=saver)
+
+    report = await thread_sweeper.sweep()
+
+    assert report.threads == 2
+    assert report.checkpoint_rows == 2
+    assert report.checkpoint_bytes is None
+    assert await _remaining_threads(store) == ["thread-0", "thread-3"]
+
+
+@pytest.mark.asyncio
+async def test_threads_are_enumerated_from_the_checkpointer(gc_settings):
+    store = InMemoryStore()
+    saver = InMemorySaver()
+    await _seed(store, saver, {"idleTtlHours": 24}, [1])
+    # A thread whose messages were never projected: no head, only checkpoints
+    await _checkpoint(saver, "headless", time.time_ns() // 1000 - 48 * HOUR_US)
+    thread_sweeper.configure(store=store, checkpointer=saver)
+
+    report = await thread_sweeper.sweep()
+
+    assert report.threads == 1
+    assert report.store_rows == 0
+    assert await saver.aget_tuple({"configurable": {"thread_id": "headless"}}) is None
+    assert await saver.aget_tuple({"configurable": {"thread_id": "thread-0"}}) is not None
+
+
+@pytest.mark.asyncio
+async def test_thread_resumed_after_selection_is_kept(gc_settings):
+    store = InMemoryStore()
+    saver = InMemorySaver()
+    await _seed(store, saver, {"idleTtlHours": 24}, [30, 40])
+    select = retention.select_expired_threads
+
+    async def _select_then_resume(*args, **kwargs):
+        expired = await select(*args, **kwargs)
+        await _checkpoint(saver, "thread-0", time.time_ns() // 1000)
+        return expired
+
+    with patch("workflows.retention.select_expired_threads", side_effect=_select_then_resume):
+        report = await thread_sweeper.sweep(store=store, checkpointer=saver)
+
+    assert report.threads == 1
+    assert await _remaining_threads(store) == ["thread-0"]
+    assert await saver.aget_tuple({"configurable": {"thread_id": "thread-0"}}) is not None
+
+
+def test_postgres_purge_is_one_statement():
+    sql = _pg_purge_sql(dry_run=False)
+    assert sql.count("DELETE FROM") == 3
+    assert "RETURNING pg_column_size" in sql
+    assert "DELETE" not in _pg_purge_sql(dry_run=True)
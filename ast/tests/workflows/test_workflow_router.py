@@ -7,6 +7,7 @@ from fastapi import FastAPI
 
 from service.workflow_router import router
 from schema.workflow_schema import WorkflowResponse
+from workflows.versioning import WorkflowVersionConflict
 
 
 # =============================================================================
@@ -198,6 +199,26 @@ def test_get_workflow_not_found(client, auth_header, mock_store):
             assert response.status_code == 404
 
 
+def test_get_workflow_etag_and_not_modified(client, auth_header, mock_store, sample_workflow):
+    """GET /workflows/{id} should send an ETag and honor If-None-Match."""
+    workflow = {**sample_workflow, "version": 3}
+    with patch("service.workflow_router.get_agent") as mock_get_agent:
+        with patch("service.workflow_router.get_workflow", new_callable=AsyncMock) as mock_get:
+            mock_get_agent.return_value = mock_get_agent_with_store(mock_store)
+            mock_get.return_value = workflow
+
+            response = client.get("/workflows/wf_test123abc", headers=auth_header)
+            assert response.headers["ETag"] == '"wf_test123abc-v3"'
+            assert response.json()["version"] == 3
+
+            response = client.get(
+                "/workflows/wf_test123abc",
+                headers={**auth_header, "If-None-Match": '"wf_test123abc-v3"'},
+            )
+            assert response.status_code == 304
+            assert response.content == b""
+
+
 # =============================================================================
 # Tests for LIST workflows
 # =============================================================================
@@ -231,6 +252,143 @@ def test_list_workflows_with_items(client, auth_header, mock_store, sample_workf
             assert data[0]["id"] == "wf_test123abc"
 
 
+def test_list_workflow_summaries_passes_filters(client, auth_header, mock_store):
+    """GET /workflows/summaries should return a page without flowData."""
+    summary = {
+        "id": "wf_test123abc",
+        "name": "Test Workflow",
+        "description": None,
+        "isActive": True,
+        "nodeCount": 2,
+        "createdAt": "2025-01-01T00:00:00+00:00",
+        "updatedAt": "2025-01-01T00:00:00+00:00",
+        "updatedAtUs": 1735689600000000,
+    }
+    with patch("service.workflow_router.get_agent") as mock_get_agent:
+        with patch(
+            "service.workflow_router.list_workflow_summaries", new_callable=AsyncMock
+        ) as mock_list:
+            mock_get_agent.return_value = mock_get_agent_with_store(mock_store)
+            mock_list.return_value = ([summary], "next")
+
+            response = client.get(
+                "/workflows/summaries?limit=1&isActive=true&namePrefix=Te"
+                "&updatedAfter=2025-01-01T00:00:00Z",
+                headers=auth_header,
+            )
+
+            assert response.status_code == 200
+            data = response.json()
+            assert data["nextCursor"] == "next"
+            assert data["items"][0]["nodeCount"] == 2
+            assert "flowData" not in data["items"][0]
+            kwargs = mock_list.call_args.kwargs
+            assert kwargs["limit"] == 1
+            assert kwargs["is_active"] is True
+            assert kwargs["name_prefix"] == "Te"
+            assert kwargs["updated_after"].year == 2025
+
+
+def test_list_workflow_summaries_invalid_cursor(client, auth_header, mock_store):
+    """GET /workflows/summaries with a bad cursor should return 400."""
+    with patch("service.workflow_router.get_agent") as mock_get_agent:
+        mock_get_agent.return_value = mock_get_agent_with_store(mock_store)
+
+        response = client.get("/workflows/summaries?cursor=garbage", headers=auth_header)
+
+        assert response.status_code == 400
+
+
+# =============================================================================
+# Tests for thread message history
+# =============================================================================
+
+
+def _invoke_with_state(client, auth_header, store, workflow, messages):
+    with patch("service.workflow_router.get_agent") as mock_get_agent:
+        with patch("service.workflow_router.get_workflow", new_callable=AsyncMock) as mock_get:
+            with patch(
+                "service.workflow_router.workflow_graph_cache.get_or_build", new_callable=AsyncMock
+            ) as mock_get_or_build:
+                mock_get_agent.return_value = mock_get_agent_with_store(store)
+                mock_get.return_value = workflow
+                mock_graph = AsyncMock()
+                mock_graph.checkpointer = MagicMock()
+                mock_graph.ainvoke = AsyncMock(return_value={"messages": messages})
+                mock_get_or_build.return_value = mock_graph
+
+                return client.post(
+                    "/workflows/wf_test123abc/invoke",
+                    json={"message": "Hello", "threadId": "thread-123"},
+                    headers=auth_header,
+                )
+
+
+def test_invoke_projects_new_thread_messages(client, auth_header, sample_workflow):
+    """Each invoke should append only the messages new to the thread state."""
+    from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+    from langgraph.store.memory import InMemoryStore
+
+    store = InMemoryStore()
+    first = [HumanMessage(content="Hi"), AIMessage(content="Hello!")]
+    second = [*first, SystemMessage(content="ctx"), HumanMessage(content="Bye"), AIMessage(content="Ciao")]
+
+    _invoke_with_state(client, auth_header, store, sample_workflow, first)
+    _invoke_with_state(client, auth_header, store, sample_workflow, second)
+
+    with patch("service.workflow_router.get_agent") as mock_get_agent:
+        mock_get_agent.return_value = mock_get_agent_with_store(store)
+
+        response = client.get(
+            "/workflows/wf_test123abc/threads/thread-123/messages?limit=3", headers=auth_header
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert [m["content"] for m in data["messages"]] == ["Hello!", "Bye", "Ciao"]
+        assert [m["type"] for m in data["messages"]] == ["ai", "human", "ai"]
+
+        response = client.get(
+            f"/workflows/wf_test123abc/threads/thread-123/messages?cursor={data['nextCursor']}",
+            headers=auth_header,
+        )
+        assert [m["content"] for m in response.json()["messages"]] == ["Hi"]
+        assert response.json()["nextCursor"] is None
+
+
+def test_thread_messages_invalid_cursor(client, auth_header, mock_store):
+    """GET /workflows/{id}/threads/{thread_id}/messages with a bad cursor should return 400."""
+    with patch("service.workflow_router.get_agent") as mock_get_agent:
+        mock_get_agent.return_value = mock_get_agent_with_store(mock_store)
+
+        response = client.get(
+            "/workflows/wf_1/threads/t/messages?cursor=garbage", headers=auth_header
+        )
+
+        assert response.status_code == 400
+
+
+def test_sweep_threads_defaults_to_dry_run(client, auth_header, mock_store):
+    """POST /workflows/threads/sweep should run a dry-run sweep unless told otherwise."""
+    from workflows.retention import SweepReport
+
+    with patch("service.workflow_router.get_agent") as mock_get_agent:
+        with patch(
+            "service.workflow_router.thread_sweeper.sweep", new_callable=AsyncMock
+        ) as mock_sweep:
+            mock_get_agent.return_value = mock_get_agent_with_store(mock_store)
+            mock_sweep.return_value = SweepReport(dry_run=True, threads=3, checkpoint_rows=9)
+
+            response = client.post("/workflows/threads/sweep", headers=auth_header)
+            assert response.status_code == 200
+            assert response.json()["threads"] == 3
+            assert mock_sweep.call_args.kwargs["dry_run"] is True
+            # The store is passed to this sweep, not configured on the singleton
+            assert mock_sweep.call_args.kwargs["store"] is mock_store
+
+            client.post("/workflows/threads/sweep?dryRun=false", headers=auth_header)
+            assert mock_sweep.call_args.kwargs["dry_run"] is False
+
+
 # =============================================================================
 # Tests for UPDATE workflow
 # =============================================================================
@@ -272,6 +430,58 @@ def test_update_workflow_not_found(client, auth_header, mock_store):
             assert response.status_code == 404
 
 
+def test_update_workflow_if_match(client, auth_header, mock_store, sample_workflow):
+    """PATCH /workflows/{id} should pass If-Match through and return the new ETag."""
+    updated = {**sample_workflow, "version": 4}
+
+    with patch("service.workflow_router.get_agent") as mock_get_agent:
+        with patch("service.workflow_router.update_workflow", new_callable=AsyncMock) as mock_update:
+            mock_get_agent.return_value = mock_get_agent_with_store(mock_store)
+            mock_update.return_value = updated
+
+            response = client.patch(
+                "/workflows/wf_test123abc",
+                json={"name": "Updated Name"},
+                headers={**auth_header, "If-Match": '"wf_test123abc-v3"'},
+            )
+
+            assert response.status_code == 200
+            assert response.headers["ETag"] == '"wf_test123abc-v4"'
+            assert mock_update.call_args.kwargs["expected_version"] == 3
+
+
+def test_update_workflow_version_conflict(client, auth_header, mock_store):
+    """PATCH /workflows/{id} with a stale If-Match should return 412."""
+    with patch("service.workflow_router.get_agent") as mock_get_agent:
+        with patch("service.workflow_router.update_workflow", new_callable=AsyncMock) as mock_update:
+            mock_get_agent.return_value = mock_get_agent_with_store(mock_store)
+            mock_update.side_effect = WorkflowVersionConflict("wf_test123abc", 5)
+
+            response = client.patch(
+                "/workflows/wf_test123abc",
+                json={"name": "Updated Name"},
+                headers={**auth_header, "If-Match": '"wf_test123abc-v3"'},
+            )
+            assert response.status_code == 412
+
+            response = client.patch(
+                "/workflows/wf_test123abc",
+                json={"name": "Updated Name"},
+                headers={**auth_header, "If-Match": "not-an-etag"},
+            )
+            assert response.status_code == 412
+
+            # Weak ETags and ETags of another workflow don't match
+            for etag in ('W/"wf_test123abc-v5"', '"wf_other-v5"'):
+                response = client.patch(
+                    "/workflows/wf_test123abc",
+                    json={"name": "Updated Name"},
+                    headers={**auth_header, "If-Match": etag},
+                )
+                assert response.status_code == 412
+            assert mock_update.await_count == 1
+
+
 # =============================================================================
 # Tests for DELETE workflow
 # =============================================================================
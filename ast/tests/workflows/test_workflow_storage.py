@@ -1,16 +1,26 @@
 """Tests for workflow storage - TDD: tests first, implementation after."""
 
 import pytest
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from langgraph.store.memory import InMemoryStore
+
+from memory.sqlite import get_sqlite_store
 
 from workflows.storage import (
     WORKFLOWS_NAMESPACE,
+    WORKFLOW_SUMMARIES_NAMESPACE,
+    encode_cursor,
     generate_workflow_id,
     create_workflow,
     get_workflow,
     list_workflows,
+    list_workflow_summaries,
+    backfill_workflow_summaries,
     update_workflow,
     delete_workflow,
+    setup_workflow_summary_indexes,
+    workflow_summary,
 )
 
 
@@ -51,7 +61,8 @@ class TestCreateWorkflow:
         assert result["isActive"] is True
         assert "createdAt" in result
         assert "updatedAt" in result
-        mock_store.aput.assert_called_once()
+        # Full document plus its list-view summary
+        assert mock_store.aput.call_count == 2
 
     @pytest.mark.asyncio
     async def test_create_workflow_no_description(self, mock_store):
@@ -72,8 +83,8 @@ class TestCreateWorkflow:
             flow_data={"nodes": []},
         )
 
-        call_args = mock_store.aput.call_args
-        assert call_args.kwargs["namespace"] == WORKFLOWS_NAMESPACE
+        namespaces = [c.kwargs["namespace"] for c in mock_store.aput.call_args_list]
+        assert namespaces == [WORKFLOWS_NAMESPACE, WORKFLOW_SUMMARIES_NAMESPACE]
 
 
 class TestGetWorkflow:
@@ -171,7 +182,10 @@ class TestUpdateWorkflow:
 
         assert result["name"] == "New Name"
         assert result["id"] == "wf_123"
-        mock_store.aput.assert_called_once()
+        assert mock_store.aput.call_count == 2
+        summary = mock_store.aput.call_args_list[1].kwargs["value"]
+        assert summary["name"] == "New Name"
+        assert "flowData" not in summary
 
     @pytest.mark.asyncio
     async def test_update_workflow_not_found(self, mock_store):
@@ -237,7 +251,8 @@ class TestDeleteWorkflow:
         result = await delete_workflow(mock_store, "wf_123")
 
         assert result is True
-        mock_store.adelete.assert_called_once()
+        namespaces = [c.kwargs["namespace"] for c in mock_store.adelete.call_args_list]
+        assert namespaces == [WORKFLOWS_NAMESPACE, WORKFLOW_SUMMARIES_NAMESPACE]
 
     @pytest.mark.asyncio
     async def test_delete_workflow_not_found(self, mock_store):
@@ -246,3 +261,217 @@ class TestDeleteWorkflow:
         result = await delete_workflow(mock_store, "wf_notfound")
 
         assert result is False
+
+
+class TestListWorkflowSummaries:
+    """Tests for list_workflow_summaries function."""
+
+    @pytest.fixture
+    def store(self):
+        store = InMemoryStore()
+        for i in range(5):
+            store.put(
+                WORKFLOW_SUMMARIES_NAMESPACE,
+                f"wf_{i}",
+                {
+                    "id": f"wf_{i}",
+                    "name": "Sales bot" if i % 2 else "Support bot",
+                    "description": None,
+                    "isActive": i != 4,
+                    "nodeCount": 2,
+                    "createdAt": f"2025-01-0{i + 1}T00:00:00+00:00",
+                    "updatedAt": f"2025-01-0{i + 1}T00:00:00+00:00",
+                    "updatedAtUs": 1735689600000000 + i * 86400000000,
+                },
+            )
+        return store
+
+    @pytest.mark.asyncio
+    async def test_pages_newest_first_with_cursor(self, store):
+        first, cursor = await list_workflow_summaries(store, limit=2)
+        second, cursor2 = await list_workflow_summaries(store, limit=2, cursor=cursor)
+        third, cursor3 = await list_workflow_summaries(store, limit=2, cursor=cursor2)
+
+        ids = [s["id"] for s in first + second + third]
+        assert ids == ["wf_4", "wf_3", "wf_2", "wf_1", "wf_0"]
+        assert cursor3 is None
+
+    @pytest.mark.asyncio
+    async def test_filters(self, store):
+        from datetime import UTC, datetime
+
+        active, _ = await list_workflow_summaries(store, is_active=False)
+        assert [s["id"] for s in active] == ["wf_4"]
+
+        sales, _ = await list_workflow_summaries(store, name_prefix="sales")
+        assert [s["id"] for s in sales] == ["wf_3", "wf_1"]
+
+        ranged, _ = await list_workflow_summaries(
+            store,
+            updated_after=datetime(2025, 1, 2, tzinfo=UTC),
+            updated_before=datetime(2025, 1, 4, tzinfo=UTC),
+        )
+        assert [s["id"] for s in ranged] == ["wf_2", "wf_1"]
+
+    @pytest.mark.asyncio
+    async def test_paging_reaches_every_workflow(self):
+        store = InMemoryStore()
+        for i in range(60):
+            summary = workflow_summary(
+                {"id": f"wf_{i:02d}", "name": f"Bot {i}", "createdAt": f"2025-01-01T00:{i:02d}:00"}
+            )
+            await store.aput(WORKFLOW_SUMMARIES_NAMESPACE, summary["id"], summary)
+
+        ids, cursor = [], None
+        while True:
+            page, cursor = await list_workflow_summaries(store, limit=10, cursor=cursor)
+            ids += [s["id"] for s in page]
+            if cursor is None:
+                break
+
+        assert ids == [f"wf_{i:02d}" for i in reversed(range(60))]
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor(self, store):
+        with pytest.raises(ValueError):
+            await list_workflow_summaries(store, cursor="not-a-cursor")
+
+    @pytest.mark.asyncio
+    async def test_create_then_list_omits_flow_data(self):
+        store = InMemoryStore()
+        created = await create_workflow(store, "Bot", {"nodes": [{"id": "a"}], "edges": []})
+
+        items, _ = await list_workflow_summaries(store)
+
+        assert items[0]["id"] == created["id"]
+        assert items[0]["nodeCount"] == 1
+        assert "flowData" not in items[0]
+
+    @pytest.mark.asyncio
+    async def test_backfill_writes_missing_summaries(self):
+        store = InMemoryStore()
+        await store.aput(
+            WORKFLOWS_NAMESPACE,
+            "wf_legacy",
+            {
+                "id": "wf_legacy",
+                "name": "Legacy",
+                "isActive": True,
+                "createdAt": "2024-01-01T00:00:00",
+                "flowData": {"nodes": []},
+            },
+        )
+
+        assert await backfill_workflow_summaries(store) == 1
+        assert await backfill_workflow_summaries(store) == 0
+        items, _ = await list_workflow_summaries(store)
+        assert items[0]["id"] == "wf_legacy"
+
+
+class TestListWorkflowSummariesSqlite:
+    """list_workflow_summaries as one indexed query on the SQLite store."""
+
+    @pytest.fixture(autouse=True)
+    def store_path(self, tmp_path):
+        with patch("memory.sqlite.settings") as mock_settings:
+            mock_settings.SQLITE_STORE_PATH = str(tmp_path / "store.db")
+            yield
+
+    @pytest.mark.asyncio
+    async def test_pages_and_filters(self):
+        async with get_sqlite_store() as store:
+            await setup_workflow_summary_indexes(store)
+            # Same second: the store's own updated_at can't order these
+            for i in range(25):
+                name = "Sales bot" if i % 2 else "Support bot"
+                await create_workflow(store, name, {"nodes": []})
+
+            ids, cursor = [], None
+            while True:
+                page, cursor = await list_workflow_summaries(store, limit=10, cursor=cursor)
+                ids += [s["id"] for s in page]
+                if cursor is None:
+                    break
+            everything, _ = await list_workflow_summaries(store, limit=100)
+            sales, _ = await list_workflow_summaries(store, limit=100, name_prefix="SALES")
+            inactive, _ = await list_workflow_summaries(store, is_active=False)
+
+        assert ids == [s["id"] for s in everything]
+        assert len(set(ids)) == 25
+        keys = [(s["updatedAtUs"], s["id"]) for s in everything]
+        assert keys == sorted(keys, reverse=True)
+        assert len(sales) == 12
+        assert all(s["name"] == "Sales bot" for s in sales)
+        assert inactive == []
+
+    @pytest.mark.asyncio
+    async def test_queries_use_summary_indexes(self):
+        async with get_sqlite_store() as store:
+            await setup_workflow_summary_indexes(store)
+            updated = "json_extract(CAST(value AS TEXT), '$.updatedAtUs')"
+            async with store.conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT key FROM store WHERE prefix = ? "
+                f"AND {updated} <= ? AND ({updated} < ? OR key < ?) "
+                f"ORDER BY {updated} DESC, key DESC LIMIT 10",
+                ["workflow_summaries", 1, 1, "wf_1"],
+            ) as cursor:
+                plan = " ".join(row[-1] for row in await cursor.fetchall())
+
+        # Seeks past the cursor in index order: no scan, no sort
+        assert plan.startswith("SEARCH store USING INDEX store_workflow_summaries_updated_idx")
+        assert "<expr><?" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+class TestListWorkflowSummariesMongo:
+    """list_workflow_summaries pushed down to a single Mongo find."""
+
+    @pytest.mark.asyncio
+    async def test_find_filters_orders_and_seeks(self):
+        from memory.mongodb import AsyncMongoDBStore
+
+        cursor = MagicMock()
+        cursor.sort.return_value = cursor
+        cursor.limit.return_value = cursor
+        cursor.__aiter__.return_value = iter([{"value": {"id": "wf_b", "updatedAtUs": 5}}])
+        collection = MagicMock()
+        collection.find.return_value = cursor
+
+        page, next_cursor = await list_workflow_summaries(
+            AsyncMongoDBStore(collection),
+            limit=10,
+            cursor=encode_cursor({"updatedAtUs": 7, "id": "wf_c"}),
+            is_active=True,
+            name_prefix="Sales.",
+        )
+
+        selector = collection.find.call_args.args[0]
+        assert selector["prefix"] == "workflow_summaries"
+        assert selector["value.isActive"] is True
+        assert selector["value.nameKey"] == {"$regex": "^sales\\."}
+        assert selector["$or"] == [
+            {"value.updatedAtUs": {"$lt": 7}},
+            {"value.updatedAtUs": 7, "key": {"$lt": "wf_c"}},
+        ]
+        cursor.sort.assert_called_once_with([("value.updatedAtUs", -1), ("key", -1)])
+        cursor.limit.assert_called_once_with(11)
+        assert [s["id"] for s in page] == ["wf_b"]
+        assert next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_seeded_workflow_is_listed_after_migration():
+    from seeds import (
+        IVY_WORKFLOW_ID,
+        MIGRATIONS_NAMESPACE,
+        WORKFLOW_SUMMARIES_MIGRATION,
+        run_seeds,
+    )
+
+    store = InMemoryStore()
+    await store.aput(MIGRATIONS_NAMESPACE, WORKFLOW_SUMMARIES_MIGRATION, {"written": 0})
+
+    await run_seeds(store)
+
+    items, _ = await list_workflow_summaries(store)
+    assert [s["id"] for s in items] == [IVY_WORKFLOW_ID]
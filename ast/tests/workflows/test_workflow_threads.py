@@ -0,0 +1,118 @@
+"""Tests for the workflow thread message projection."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from langgraph.store.memory import InMemoryStore
+
+from memory.sqlite import get_sqlite_store
+from workflows.threads import (
+    append_thread_messages,
+    get_thread_head,
+    list_thread_messages,
+)
+
+
+def _messages(texts):
+    return [{"type": "human", "content": text} for text in texts]
+
+
+async def _append(store, texts, **kwargs):
+    return await append_thread_messages(store, "wf_1", "thread-1", _messages(texts), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_append_advances_head():
+    store = InMemoryStore()
+
+    assert await get_thread_head(store, "wf_1", "thread-1") == {"nextSeq": 0, "stateCount": 0}
+    await _append(store, ["a", "b"], stateful=True)
+    head = await _append(store, ["a", "b", "c"], stateful=True)
+
+    assert head == {"nextSeq": 3, "stateCount": 3}
+    assert await get_thread_head(store, "wf_1", "thread-1") == head
+    page, _ = await list_thread_messages(store, "wf_1", "thread-1")
+    assert [m["content"] for m in page] == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_skipped_messages_take_no_sequence_number():
+    store = InMemoryStore()
+
+    def _serialize(message):
+        return None if message["content"] == "system" else message
+
+    head = await _append(store, ["system", "a"], stateful=True, serialize=_serialize)
+
+    assert head == {"nextSeq": 1, "stateCount": 2}
+
+
+async def _append_concurrently(store, runs):
+    await asyncio.gather(*(_append(store, [f"r{i}-a", f"r{i}-b"]) for i in range(runs)))
+    page, _ = await list_thread_messages(store, "wf_1", "thread-1", limit=100)
+    return page
+
+
+@pytest.mark.asyncio
+async def test_concurrent_appends_keep_every_message():
+    store = InMemoryStore()
+
+    page = await _append_concurrently(store, 8)
+
+    assert (await get_thread_head(store, "wf_1", "thread-1"))["nextSeq"] == 16
+    assert sorted(m["content"] for m in page) == sorted(f"r{i}-{x}" for i in range(8) for x in "ab")
+    assert [m["seq"] for m in page] == list(range(16))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_appends_keep_every_message_sqlite(tmp_path):
+    with patch("memory.sqlite.settings") as mock_settings:
+        mock_settings.SQLITE_STORE_PATH = str(tmp_path / "store.db")
+        async with get_sqlite_store() as store:
+            page = await _append_concurrently(store, 8)
+            head = await get_thread_head(store, "wf_1", "thread-1")
+
+    assert head["nextSeq"] == 16
+    assert len({m["content"] for m in page}) == 16
+
+
+@pytest.mark.asyncio
+async def test_pages_back_from_newest():
+    store = InMemoryStore()
+    await _append(store, [f"m{i}" for i in range(5)])
+
+    page, cursor = await list_thread_messages(store, "wf_1", "thread-1", limit=2)
+    assert [m["content"] for m in page] == ["m3", "m4"]
+    assert [m["seq"] for m in page] == [3, 4]
+
+    page, cursor = await list_thread_messages(store, "wf_1", "thread-1", limit=2, cursor=cursor)
+    assert [m["content"] for m in page] == ["m1", "m2"]
+
+    page, cursor = await list_thread_messages(store, "wf_1", "thread-1", limit=2, cursor=cursor)
+    assert [m["content"] for m in page] == ["m0"]
+    assert cursor is None
+
+
+@pytest.mark.asyncio
+async def test_latest_page_cost_is_independent_of_thread_length():
+    store = InMemoryStore()
+    await _append(store, [f"m{i}" for i in range(500)])
+
+    with patch.object(
+        InMemoryStore, "abatch", autospec=True, side_effect=InMemoryStore.abatch
+    ) as abatch:
+        page, _ = await list_thread_messages(store, "wf_1", "thread-1", limit=50)
+
+    # One batch of point gets for exactly the page (after the head read)
+    assert len(page) == 50
+    assert [len(call.args[1]) for call in abatch.call_args_list] == [1, 50]
+
+
+@pytest.mark.asyncio
+async def test_empty_thread_and_invalid_cursor():
+    store = InMemoryStore()
+
+    assert await list_thread_messages(store, "wf_1", "missing") == ([], None)
+    with pytest.raises(ValueError):
+        await list_thread_messages(store, "wf_1", "thread-1", cursor="abc")
@@ -0,0 +1,189 @@
+"""Tests for versioned (compare-and-swap) workflow writes."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langgraph.store.memory import InMemoryStore
+from langgraph.store.postgres import AsyncPostgresStore
+from langgraph.store.sqlite.aio import AsyncSqliteStore
+
+from memory.mongodb import AsyncMongoDBStore
+from workflows.storage import (
+    WORKFLOW_SUMMARIES_NAMESPACE,
+    WORKFLOWS_NAMESPACE,
+    create_workflow,
+    delete_workflow,
+    get_workflow,
+    list_workflow_summaries,
+    update_workflow,
+)
+from workflows.versioning import (
+    WorkflowVersionConflict,
+    parse_etag_version,
+    workflow_etag,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def open_store(request, tmp_path):
+    """Factory for each store backend with a local CAS path."""
+
+    @asynccontextmanager
+    async def _open():
+        if request.param == "memory":
+            yield InMemoryStore()
+            return
+        async with AsyncSqliteStore.from_conn_string(str(tmp_path / "store.db")) as store:
+            await store.setup()
+            yield store
+
+    return _open
+
+
+def test_etag_round_trip():
+    etag = workflow_etag({"id": "wf_1", "version": 7})
+    assert etag == '"wf_1-v7"'
+    assert parse_etag_version(etag, "wf_1") == 7
+    # Strong comparison: weak ETags and other workflows' ETags never match
+    assert parse_etag_version('W/"wf_1-v7"', "wf_1") is None
+    assert parse_etag_version('"wf_2-v7"', "wf_1") is None
+    assert parse_etag_version('"wf_1-v7"', "wf") is None
+    assert parse_etag_version('"something"', "wf_1") is None
+
+
+@pytest.mark.asyncio
+async def test_update_bumps_version_and_summary(open_store):
+    async with open_store() as store:
+        created = await create_workflow(store, "Bot", {"nodes": [], "edges": []})
+        assert created["version"] == 1
+
+        updated = await update_workflow(
+            store, created["id"], {"name": "Renamed", "flowData": {"nodes": [{"id": "a"}]}}, 1
+        )
+
+        assert updated["version"] == 2
+        assert updated["name"] == "Renamed"
+        assert updated["description"] is None
+        assert (await get_workflow(store, created["id"]))["name"] == "Renamed"
+        [summary], _ = await list_workflow_summaries(store)
+        assert summary["name"] == "Renamed"
+        assert summary["version"] == 2
+        assert summary["nodeCount"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_version_conflicts(open_store):
+    async with open_store() as store:
+        created = await create_workflow(store, "Bot", {"nodes": []})
+        await update_workflow(store, created["id"], {"name": "First"}, 1)
+
+        with pytest.raises(WorkflowVersionConflict) as exc_info:
+            await update_workflow(store, created["id"], {"name": "Second"}, 1)
+
+        assert exc_info.value.current_version == 2
+        assert (await get_workflow(store, created["id"]))["name"] == "First"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_updates_at_one_version_apply_once(open_store):
+    async with open_store() as store:
+        created = await create_workflow(store, "Bot", {"nodes": []})
+
+        results = await asyncio.gather(
+            *(update_workflow(store, created["id"], {"name": f"n{i}"}, 1) for i in range(5)),
+            return_exceptions=True,
+        )
+
+        applied = [result for result in results if isinstance(result, dict)]
+        conflicts = [result for result in results if isinstance(result, WorkflowVersionConflict)]
+        assert (len(applied), len(conflicts)) == (1, 4)
+        assert (await get_workflow(store, created["id"]))["version"] == 2
+
+
+@pytest.mark.asyncio
+async def test_update_missing_returns_none(open_store):
+    async with open_store() as store:
+        assert await update_workflow(store, "wf_missing", {"name": "x"}, 1) is None
+
+
+@pytest.mark.asyncio
+async def test_delete_is_conditional_and_removes_summary(open_store):
+    async with open_store() as store:
+        created = await create_workflow(store, "Bot", {"nodes": []})
+
+        with pytest.raises(WorkflowVersionConflict):
+            await delete_workflow(store, created["id"], expected_version=5)
+
+        assert await delete_workflow(store, created["id"], expected_version=1) is True
+        assert await get_workflow(store, created["id"]) is None
+        assert await store.aget(WORKFLOW_SUMMARIES_NAMESPACE, created["id"]) is None
+        assert await delete_workflow(store, created["id"]) is False
+
+
+@pytest.mark.asyncio
+async def test_sqlite_update_is_a_single_statement_without_prior_read(tmp_path):
+    async with AsyncSqliteStore.from_conn_string(str(tmp_path / "store.db")) as store:
+        await store.setup()
+        created = await create_workflow(store, "Bot", {"nodes": []})
+
+        with patch.object(store, "aget", wraps=store.aget) as aget:
+            await update_workflow(store, created["id"], {"isActive": False}, 1)
+
+    aget.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_postgres_update_uses_one_conditional_statement():
+    store = MagicMock(spec=AsyncPostgresStore)
+    cursor = AsyncMock()
+    cursor.fetchone.return_value = {"value": {"id": "wf_1", "version": 3}}
+
+    @asynccontextmanager
+    async def _cursor():
+        yield cursor
+
+    store._cursor = _cursor
+
+    updated = await update_workflow(store, "wf_1", {"name": "x"}, expected_version=2)
+
+    assert updated["version"] == 3
+    cursor.execute.assert_awaited_once()
+    sql, params = cursor.execute.call_args.args
+    assert "WITH doc AS" in sql and "= %(expected)s" in sql
+    assert params["expected"] == 2
+    assert params["prefix"] == "workflows"
+    assert params["summary_prefix"] == "workflow_summaries"
+
+
+@pytest.mark.asyncio
+async def test_mongo_update_filters_on_version():
+    store = MagicMock(spec=AsyncMongoDBStore)
+    store.collection = MagicMock()
+    store.collection.find_one_and_update = AsyncMock(
+        return_value={"value": {"id": "wf_1", "version": 3}}
+    )
+    store.collection.update_one = AsyncMock()
+
+    await update_workflow(store, "wf_1", {"name": "x"}, expected_version=2)
+
+    query, update = store.collection.find_one_and_update.call_args.args
+    assert query == {"prefix": "workflows", "key": "wf_1", "value.version": 2}
+    assert update["$inc"] == {"value.version": 1}
+    summary_update = store.collection.update_one.call_args.args[1]
+    assert summary_update["$set"]["value.version"] == 3
+
+
+@pytest.mark.asyncio
+async def test_legacy_document_without_version_matches_zero(open_store):
+    async with open_store() as store:
+        await store.aput(
+            WORKFLOWS_NAMESPACE,
+            "wf_legacy",
+            {"id": "wf_legacy", "name": "Legacy", "isActive": True, "flowData": {"nodes": []}},
+        )
+
+        updated = await update_workflow(store, "wf_legacy", {"name": "New"}, expected_version=0)
+
+        assert updated["version"] == 1